@@ -0,0 +1,90 @@
+"""
+Benchmark of checkpoint size against CPU cost for each compression codec.
+Uses a synthetic conversation with repeated tool outputs, like the
+country and exchange rate lookups of a real thread.
+
+Run with: python -m benchmarks.bench_checkpoint_compression [--turns 50]
+"""
+
+import argparse
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage  # noqa: E402
+
+from src.database.serializers import CompressedSerializer, zstandard  # noqa: E402
+
+TOOL_OUTPUT = """\
+Informações sobre Brazil:
+- Capital: Brasília
+- População: 212,559,417
+- Região: Americas
+- Moeda: BRL
+- Idiomas: Portuguese
+"""
+
+
+def build_checkpoint(turns: int) -> dict:
+    """
+    Builds a checkpoint with the given number of tool-using turns.
+    
+    Args:
+        turns: Number of question/tool/answer turns
+        
+    Returns:
+        Checkpoint dictionary
+    """
+    messages = []
+    for i in range(turns):
+        call_id = f"call_{i}"
+        messages += [
+            HumanMessage(content=f"Tell me about Brazil, question {i}"),
+            AIMessage(content="", tool_calls=[
+                {"name": "get_country_info", "args": {"country_name": "Brazil"}, "id": call_id}
+            ]),
+            ToolMessage(content=TOOL_OUTPUT, tool_call_id=call_id),
+            AIMessage(content=f"Brazil's capital is Brasília. {TOOL_OUTPUT}"),
+        ]
+    return {"id": "benchmark", "channel_values": {"messages": messages}, "channel_versions": {}}
+
+
+def main() -> None:
+    """Runs the benchmark for each codec and prints size and timings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    
+    checkpoint = build_checkpoint(args.turns)
+    configurations = [("none", None), ("zlib", 1), ("zlib", 6), ("zlib", 9)]
+    if zstandard is not None:
+        configurations += [("zstd", 1), ("zstd", 3), ("zstd", 9)]
+    
+    baseline_size = None
+    print(f"Checkpoint with {args.turns} turns, {args.repeat} repetitions\n")
+    print(f"{'codec':<10}{'level':>6}{'bytes':>10}{'ratio':>8}{'dumps ms':>10}{'loads ms':>10}")
+    for codec, level in configurations:
+        serializer = CompressedSerializer(codec=codec, level=level)
+        
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            payload = serializer.dumps_typed(checkpoint)
+        dumps_ms = (time.perf_counter() - start) / args.repeat * 1000
+        
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            serializer.loads_typed(payload)
+        loads_ms = (time.perf_counter() - start) / args.repeat * 1000
+        
+        size = len(payload[1])
+        baseline_size = baseline_size or size
+        print(
+            f"{codec:<10}{level if level is not None else '-':>6}{size:>10}"
+            f"{baseline_size / size:>8.1f}{dumps_ms:>10.2f}{loads_ms:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
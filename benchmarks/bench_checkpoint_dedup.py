@@ -0,0 +1,114 @@
+"""
+Benchmark of checkpoint storage growth with and without message deduplication.
+Stores one checkpoint per turn, each with the whole history so far, as the
+agent does, and reports the database size as the conversation grows.
+Answers use random words, so compression cannot hide the repeated history.
+
+Run with: python -m benchmarks.bench_checkpoint_dedup [--turns 100]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage  # noqa: E402
+from langchain_core.runnables import RunnableConfig  # noqa: E402
+from langgraph.checkpoint.sqlite import SqliteSaver  # noqa: E402
+
+from src.database.connection import connect  # noqa: E402
+from src.database.dedup import DedupSqliteSaver  # noqa: E402
+from src.database.serializers import CompressedSerializer  # noqa: E402
+
+
+def build_messages(turns: int) -> list[BaseMessage]:
+    """
+    Builds a conversation with a question and a distinct answer per turn.
+    
+    Args:
+        turns: Number of turns
+        
+    Returns:
+        List of messages
+    """
+    rng = random.Random(42)
+    
+    def _text(words: int) -> str:
+        return " ".join(
+            "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+            for _ in range(words)
+        )
+    
+    messages: list[BaseMessage] = []
+    for _ in range(turns):
+        messages += [HumanMessage(content=_text(15)), AIMessage(content=_text(150))]
+    return messages
+
+
+def run_benchmark(saver_class: type[SqliteSaver], turns: int, report_every: int) -> list[tuple]:
+    """
+    Stores a growing conversation and samples the database size.
+    
+    Args:
+        saver_class: SqliteSaver or DedupSqliteSaver
+        turns: Number of turns stored
+        report_every: Turns between size samples
+        
+    Returns:
+        List of (turn, database bytes, milliseconds per put) samples
+    """
+    messages = build_messages(turns)
+    samples = []
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "bench.db"
+        saver = saver_class(connect(db_path, check_same_thread=False), serde=CompressedSerializer())
+        config = RunnableConfig(configurable={"thread_id": "bench", "checkpoint_ns": ""})
+        
+        elapsed = 0.0
+        for turn in range(1, turns + 1):
+            checkpoint = {
+                "id": f"{turn:06d}",
+                "channel_values": {"messages": messages[:turn * 2]},
+                "channel_versions": {}
+            }
+            start = time.perf_counter()
+            config = saver.put(config, checkpoint, {"step": turn}, {})
+            elapsed += time.perf_counter() - start
+            
+            if turn % report_every == 0:
+                size = saver.conn.execute(
+                    "SELECT page_count * page_size FROM pragma_page_count, pragma_page_size"
+                ).fetchone()[0]
+                samples.append((turn, size, elapsed / turn * 1000))
+        
+        saver.conn.close()
+    return samples
+
+
+def main() -> None:
+    """Runs the benchmark for both layouts and prints the size growth."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--report-every", type=int, default=20)
+    args = parser.parse_args()
+    
+    results = {
+        label: run_benchmark(saver_class, args.turns, args.report_every)
+        for label, saver_class in (("full", SqliteSaver), ("dedup", DedupSqliteSaver))
+    }
+    
+    print(f"{'turns':<8}{'full KB':>12}{'dedup KB':>12}{'full ms/put':>14}{'dedup ms/put':>14}")
+    for (turn, full_size, full_ms), (_, dedup_size, dedup_ms) in zip(results["full"], results["dedup"]):
+        print(
+            f"{turn:<8}{full_size / 1024:>12.0f}{dedup_size / 1024:>12.0f}"
+            f"{full_ms:>14.2f}{dedup_ms:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of ConversationDB metadata operations: persistent connection
+vs opening a new connection on every call (the previous behaviour).
+
+Run with: python -m benchmarks.bench_conversation_db [--rows 1000] [--calls 5000]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.core.config import Settings  # noqa: E402
+from src.database import repository  # noqa: E402
+from src.database.connection import connect  # noqa: E402
+
+
+def _get_conversation_per_call(db_path: Path, conversation_id: int) -> dict | None:
+    """Reads one conversation opening a connection per call."""
+    with sqlite3.connect(str(db_path)) as connection:
+        connection.row_factory = sqlite3.Row
+        row = connection.execute(
+            "SELECT id, thread_id FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def _get_conversation_tuned_per_call(db_path: Path, conversation_id: int) -> dict | None:
+    """Reads one conversation opening a tuned connection per call."""
+    with connect(db_path) as connection:
+        connection.row_factory = sqlite3.Row
+        row = connection.execute(
+            "SELECT id, thread_id FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def main() -> None:
+    """Runs the benchmark and prints the mean latency of each strategy."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "conversations.db"
+        repository.settings = Settings(
+            openai_api_key="benchmark", conversation_db_path=db_path
+        )
+        with repository.ConversationDB() as db:
+            for i in range(args.rows):
+                db.save_conversation_metadata(f"Message {i}")
+            
+            strategies = {
+                "connect per call": lambda i: _get_conversation_per_call(db_path, i),
+                "tuned connect per call": lambda i: _get_conversation_tuned_per_call(db_path, i),
+                "persistent connection": db.get_conversation,
+            }
+            print(f"{args.calls} get_conversation calls over {args.rows} rows\n")
+            for label, get_conversation in strategies.items():
+                start = time.perf_counter()
+                for i in range(args.calls):
+                    get_conversation(i % args.rows + 1)
+                elapsed = time.perf_counter() - start
+                print(f"{label:<24}{elapsed / args.calls * 1e6:>10.1f} µs/call")
+
+
+if __name__ == "__main__":
+    main()
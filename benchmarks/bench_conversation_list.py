@@ -0,0 +1,72 @@
+"""
+Benchmark of the conversation menu listing as the number of conversations grows:
+loading every conversation (the previous behaviour) vs one keyset page.
+
+Run with: python -m benchmarks.bench_conversation_list [--rows 1000 10000 100000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.core.config import Settings  # noqa: E402
+from src.database import repository  # noqa: E402
+from src.ui.menu import MENU_PAGE_SIZE  # noqa: E402
+
+
+def _fill(db: repository.ConversationDB, rows: int) -> None:
+    """Inserts conversations with distinct update times in one transaction."""
+    start = datetime(2024, 1, 1)
+    with db._cursor(transaction=True) as cursor:
+        cursor.executemany(
+            "INSERT INTO conversations (first_message, updated_at) VALUES (?, ?)",
+            (
+                (f"Message {i}", (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"))
+                for i in range(rows)
+            ),
+        )
+
+
+def _timed(function, repeat: int) -> float:
+    """Returns the best time of a function in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    """Runs the benchmark for each size and prints the listing times."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    print(f"{'rows':<10}{'full list ms':>14}{'first page ms':>16}{'middle page ms':>17}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            repository.settings = Settings(
+                openai_api_key="benchmark", conversation_db_path=Path(tmp_dir) / "conversations.db"
+            )
+            with repository.ConversationDB() as db:
+                _fill(db, rows)
+                middle = db.get_conversations_list(limit=rows // 2)[-1]['cursor']
+                
+                full_ms = _timed(db.get_conversations_list, args.repeat)
+                first_ms = _timed(lambda: db.get_conversations_list(limit=MENU_PAGE_SIZE), args.repeat)
+                middle_ms = _timed(
+                    lambda: db.get_conversations_list(limit=MENU_PAGE_SIZE, before=middle), args.repeat
+                )
+        
+        print(f"{rows:<10}{full_ms:>14.2f}{first_ms:>16.3f}{middle_ms:>17.3f}")
+
+
+if __name__ == "__main__":
+    main()
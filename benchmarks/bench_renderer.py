@@ -0,0 +1,118 @@
+"""
+Benchmark of streamed answer output: print(flush=True) per token vs the
+buffered terminal renderer, counting write syscalls, the time the streaming
+loop spends writing and the delay before the first token reaches the terminal.
+
+Run with: python -m benchmarks.bench_renderer [--tokens 2000] [--rate 500] [--write-latency-us 200]
+"""
+
+import argparse
+import io
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.ui.renderer import TerminalRenderer  # noqa: E402
+
+
+class SlowTerminal(io.FileIO):
+    """
+    File that counts write syscalls, records when the first one happened and
+    makes each one take a fixed time, like a terminal over SSH.
+    """
+    
+    def __init__(self, latency: float) -> None:
+        super().__init__(os.devnull, "w")
+        self.latency = latency
+        self.syscalls = 0
+        self.first_write: float | None = None
+    
+    def write(self, data) -> int:
+        self.syscalls += 1
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        time.sleep(self.latency)
+        return super().write(data)
+
+
+def _stream(write, tokens: int, rate: float) -> tuple[float, float]:
+    """
+    Writes tokens at a fixed rate.
+    
+    Returns:
+        When the first token was written and the seconds spent in write calls
+    """
+    first = time.perf_counter()
+    writing = 0.0
+    for index in range(tokens):
+        start = time.perf_counter()
+        write(" palavra" if index else "Resposta")
+        writing += time.perf_counter() - start
+        # Busy wait: sleep() is too coarse for hundreds of tokens per second
+        deadline = first + (index + 1) / rate
+        while time.perf_counter() < deadline:
+            pass
+    return first, writing
+
+
+def _run(frame_ms: int | None, tokens: int, rate: float, latency: float) -> dict:
+    """
+    Streams an answer to a terminal-like line-buffered stream.
+    
+    Args:
+        frame_ms: Frame interval of the renderer, or None to print every token
+        tokens: Tokens of the answer
+        rate: Tokens per second
+        latency: Seconds each write syscall takes
+    
+    Returns:
+        Dictionary with syscalls, write_ms (spent in the streaming loop's
+        write calls) and first_token_ms
+    """
+    raw = SlowTerminal(latency)
+    stream = io.TextIOWrapper(raw, encoding="utf-8", line_buffering=True)
+    
+    if frame_ms is None:
+        first, writing = _stream(
+            lambda text: print(text, end="", flush=True, file=stream), tokens, rate
+        )
+    else:
+        with TerminalRenderer(stream, frame_interval=frame_ms / 1000) as renderer:
+            first, writing = _stream(renderer.write, tokens, rate)
+    stream.close()
+    
+    return {
+        "syscalls": raw.syscalls,
+        "write_ms": writing * 1000,
+        "first_token_ms": (raw.first_write - first) * 1000,
+    }
+
+
+def main() -> None:
+    """Runs the benchmark for each output mode and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=500, help="Tokens per second")
+    parser.add_argument("--frames", type=int, nargs="+", default=[0, 16, 50])
+    parser.add_argument(
+        "--write-latency-us", type=float, default=200, help="Time each write syscall takes"
+    )
+    args = parser.parse_args()
+    
+    print(
+        f"{args.tokens} tokens at {args.rate:.0f} tokens/s, "
+        f"{args.write_latency_us:.0f} µs per write\n"
+    )
+    print(f"{'mode':<16}{'syscalls':>10}{'write ms':>10}{'first token ms':>16}")
+    modes = [("print", None)] + [(f"renderer {frame_ms}ms", frame_ms) for frame_ms in args.frames]
+    for label, frame_ms in modes:
+        result = _run(frame_ms, args.tokens, args.rate, args.write_latency_us / 1e6)
+        print(
+            f"{label:<16}{result['syscalls']:>10}{result['write_ms']:>10.1f}"
+            f"{result['first_token_ms']:>16.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
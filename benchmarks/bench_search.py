@@ -0,0 +1,114 @@
+"""
+Benchmark of conversation search as the number of indexed messages grows:
+a LIKE scan over the message text vs the FTS5 index, for a word without
+matches, a rare word, a word typed so far (prefix) and two words.
+
+Run with: python -m benchmarks.bench_search [--messages 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import random
+import string
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.core.config import Settings  # noqa: E402
+from src.database import repository  # noqa: E402
+
+CONVERSATIONS = 10000
+VOCABULARY_SIZE = 50000
+
+
+def _vocabulary(rng: random.Random) -> tuple[list[str], list[float]]:
+    """Builds random words and cumulative Zipf weights, so a few words are very common."""
+    words = sorted({
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        for _ in range(VOCABULARY_SIZE)
+    })
+    rng.shuffle(words)
+    return words, list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+
+def _queries(words: list[str]) -> dict[str, str]:
+    """Picks the searched text: a rare word, a common word being typed and two words."""
+    return {
+        # Longer than any generated word, so nothing matches
+        "no match": "inexistente",
+        "rare word": words[-1],
+        "prefix": words[0][:4],
+        "two words": f"{words[1]} {words[2]}",
+    }
+
+
+def _fill(
+    db: repository.ConversationDB, messages: int, words: list[str], cum_weights: list[float]
+) -> None:
+    """Inserts conversations and messages of random words in one transaction."""
+    rng = random.Random(42)
+    with db._cursor(transaction=True) as cursor:
+        cursor.executemany(
+            "INSERT INTO conversations (first_message) VALUES (?)",
+            ((f"Message {i}",) for i in range(CONVERSATIONS)),
+        )
+        cursor.executemany(
+            "INSERT INTO conversation_messages (thread_id, role, content) VALUES (?, 'user', ?)",
+            (
+                (f"t{rng.randrange(1, CONVERSATIONS + 1)}", " ".join(rng.choices(words, cum_weights=cum_weights, k=20)))
+                for _ in range(messages)
+            ),
+        )
+
+
+def _like_search(db: repository.ConversationDB, text: str) -> list:
+    """Finds conversations with a LIKE scan, the approach without an index."""
+    conditions = " AND ".join("content LIKE ?" for _ in text.split())
+    with db._cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT thread_id FROM conversation_messages WHERE {conditions} LIMIT 10",
+            [f"%{word}%" for word in text.split()],
+        )
+        return cursor.fetchall()
+
+
+def _timed(function, repeat: int) -> float:
+    """Returns the best time of a function in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    """Runs the benchmark for each size and prints the search times."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    words, cum_weights = _vocabulary(random.Random(7))
+    queries = _queries(words)
+
+    print(f"{'messages':<10}{'query':<12}{'LIKE ms':>12}{'FTS5 ms':>12}")
+    for messages in args.messages:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            repository.settings = Settings(
+                openai_api_key="benchmark", conversation_db_path=Path(tmp_dir) / "conversations.db"
+            )
+            with repository.ConversationDB() as db:
+                _fill(db, messages, words, cum_weights)
+
+                for name, text in queries.items():
+                    like_ms = _timed(lambda: _like_search(db, text), args.repeat)
+                    fts_ms = _timed(lambda: db.search_conversations(text), args.repeat)
+                    print(f"{messages:<10}{name:<12}{like_ms:>12.2f}{fts_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
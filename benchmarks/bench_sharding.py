@@ -0,0 +1,93 @@
+"""
+Benchmark of checkpoint write throughput against the number of shards.
+Concurrent sessions store checkpoints through one sharded saver, like
+many CLI sessions served by the same process.
+
+Run with: python -m benchmarks.bench_sharding [--sessions 16] [--shards 1 2 4 8]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.runnables import RunnableConfig  # noqa: E402
+
+from src.database.checkpointer import RetryingSqliteSaver, sqlite_savers  # noqa: E402
+from src.database.connection import connect  # noqa: E402
+from src.database.sharding import ShardedCheckpointSaver, shard_path  # noqa: E402
+
+
+def _session(checkpointer, thread_id: str, steps: int) -> None:
+    """Stores one checkpoint and its writes per step of a conversation."""
+    config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+    message = AIMessage(content="Brasília é a capital do Brasil. " * 20)
+    for step in range(steps):
+        checkpoint = {
+            "id": f"{step:06d}",
+            "channel_values": {"messages": [message]},
+            "channel_versions": {}
+        }
+        config = checkpointer.put(config, checkpoint, {"step": step}, {})
+        checkpointer.put_writes(config, [("messages", message)], "task")
+
+
+def run_benchmark(shards: int, sessions: int, steps: int) -> float:
+    """
+    Runs concurrent sessions against a fresh set of shard files.
+    
+    Args:
+        shards: Number of shard files
+        sessions: Number of concurrent sessions
+        steps: Checkpoints stored per session
+        
+    Returns:
+        Checkpoints stored per second
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "checkpoints.db"
+        checkpointer = ShardedCheckpointSaver([
+            RetryingSqliteSaver(connect(shard_path(db_path, index), check_same_thread=False))
+            for index in range(shards)
+        ])
+        for sqlite_saver in sqlite_savers(checkpointer):
+            sqlite_saver.setup()
+        
+        threads = [
+            threading.Thread(target=_session, args=(checkpointer, f"thread-{i}", steps))
+            for i in range(sessions)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        
+        for sqlite_saver in sqlite_savers(checkpointer):
+            sqlite_saver.conn.close()
+    
+    return sessions * steps / elapsed
+
+
+def main() -> None:
+    """Runs the benchmark for each shard count and prints the throughput."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    
+    print(f"{args.sessions} sessions, {args.steps} checkpoints each, {os.cpu_count()} CPUs\n")
+    print(f"{'shards':<8}{'checkpoints/s':>16}")
+    for shards in args.shards:
+        print(f"{shards:<8}{run_benchmark(shards, args.sessions, args.steps):>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
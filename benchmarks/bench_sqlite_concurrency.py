@@ -0,0 +1,127 @@
+"""
+Benchmark of concurrent SQLite access with default vs tuned settings.
+Several processes read and write the same database file, like multiple
+CLI instances sharing the data/ volume.
+
+Run with: python -m benchmarks.bench_sqlite_concurrency [--writers 4] [--readers 4]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.database.connection import connect, is_busy_error, retry_on_busy  # noqa: E402
+
+
+def _open(db_path: Path, tuned: bool) -> sqlite3.Connection:
+    """Opens a connection with default or tuned settings."""
+    if tuned:
+        return connect(db_path)
+    # Python defaults: rollback journal, synchronous=FULL, 5s busy timeout
+    return sqlite3.connect(str(db_path))
+
+
+def _worker(db_path: Path, tuned: bool, writer: bool, duration: float, queue) -> None:
+    """Runs reads or writes until the duration elapses and reports counts."""
+    connection = _open(db_path, tuned)
+    operations = 0
+    errors = 0
+    
+    def _write() -> None:
+        with connection:
+            connection.execute(
+                "INSERT INTO conversations (first_message) VALUES (?)", ("benchmark",)
+            )
+    
+    def _read() -> None:
+        connection.execute(
+            "SELECT id, first_message FROM conversations ORDER BY id DESC LIMIT 20"
+        ).fetchall()
+    
+    operation = _write if writer else _read
+    if tuned:
+        operation = retry_on_busy(operation)
+    
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        try:
+            operation()
+            operations += 1
+        except sqlite3.OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            errors += 1
+    
+    connection.close()
+    queue.put((writer, operations, errors))
+
+
+def run_benchmark(tuned: bool, writers: int, readers: int, duration: float) -> dict:
+    """
+    Runs one benchmark round on a fresh database.
+    
+    Args:
+        tuned: If True, uses the connection factory settings
+        writers: Number of writer processes
+        readers: Number of reader processes
+        duration: Seconds each process runs
+        
+    Returns:
+        Dictionary with write/read throughput and busy errors
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "bench.db"
+        with _open(db_path, tuned) as connection:
+            connection.execute(
+                "CREATE TABLE conversations (id INTEGER PRIMARY KEY, first_message TEXT)"
+            )
+        connection.close()
+        
+        queue = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(
+                target=_worker, args=(db_path, tuned, i < writers, duration, queue)
+            )
+            for i in range(writers + readers)
+        ]
+        for process in processes:
+            process.start()
+        results = [queue.get() for _ in processes]
+        for process in processes:
+            process.join()
+    
+    writes = sum(ops for is_writer, ops, _ in results if is_writer)
+    reads = sum(ops for is_writer, ops, _ in results if not is_writer)
+    return {
+        "writes_per_second": writes / duration,
+        "reads_per_second": reads / duration,
+        "busy_errors": sum(errors for _, _, errors in results),
+    }
+
+
+def main() -> None:
+    """Runs the benchmark with default and tuned settings and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+    
+    print(f"{args.writers} writers, {args.readers} readers, {args.duration}s per round\n")
+    print(f"{'settings':<10}{'writes/s':>12}{'reads/s':>12}{'busy errors':>14}")
+    for label, tuned in (("default", False), ("tuned", True)):
+        result = run_benchmark(tuned, args.writers, args.readers, args.duration)
+        print(
+            f"{label:<10}{result['writes_per_second']:>12.0f}"
+            f"{result['reads_per_second']:>12.0f}{result['busy_errors']:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark of the end-of-turn commit with separate vs unified storage: two
+commits on two files (checkpoints, then activity) vs one transaction on
+the conversation database, for each SQLite synchronous level.
+
+Run with: python -m benchmarks.bench_storage [--turns 300] [--synchronous NORMAL FULL]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langchain_core.runnables import RunnableConfig  # noqa: E402
+
+from src.core.config import Settings  # noqa: E402
+from src.database import checkpointer as checkpointer_module  # noqa: E402
+from src.database import connection, repository  # noqa: E402
+from src.database.checkpointer import create_checkpointer  # noqa: E402
+from src.database.connection import close_shared_connections  # noqa: E402
+from src.database.storage import commit_turn  # noqa: E402
+
+# Graph steps per turn: input, model call, tool call, model call
+STEPS_PER_TURN = 4
+HISTORY_MESSAGES = 20
+
+
+def _run(layout: str, synchronous: str, turns: int) -> dict:
+    """
+    Runs a conversation of several turns against fresh databases.
+
+    Returns:
+        Dictionary with the p50 and p95 of the end-of-turn commit and the turns per second
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings = Settings(
+            openai_api_key="benchmark",
+            conversation_db_path=Path(tmp_dir) / "conversations.db",
+            checkpoint_db_path=Path(tmp_dir) / "checkpoints.db",
+            sqlite_synchronous=synchronous,
+            checkpoint_cache_bytes=0,
+            # Both layouts buffer checkpoints until the end of the turn
+            checkpoint_flush_interval_ms=3600 * 1000,
+            storage_layout=layout,
+        )
+        connection.settings = repository.settings = checkpointer_module.settings = settings
+
+        db = repository.ConversationDB(activity_flush_interval=3600)
+        checkpointer = create_checkpointer(settings.checkpoint_db_path)
+        _, thread_id = db.save_conversation_metadata("Qual a capital do Brasil?")
+        config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+
+        messages = []
+        latencies = []
+        start = time.perf_counter()
+        for turn in range(turns):
+            for step in range(STEPS_PER_TURN):
+                messages.append(HumanMessage(content="Qual a capital do Brasil?") if step == 0
+                                else AIMessage(content="Brasília é a capital do Brasil."))
+                checkpoint = {
+                    "id": f"{turn:05d}-{step}",
+                    # A windowed history, so the commit cost does not grow with the turns
+                    "channel_values": {"messages": messages[-HISTORY_MESSAGES:]},
+                    "channel_versions": {}
+                }
+                config = checkpointer.put(config, checkpoint, {"step": step}, {})
+            db.record_activity(thread_id, STEPS_PER_TURN, "Brasília é a capital do Brasil.")
+
+            commit_start = time.perf_counter()
+            commit_turn(db, checkpointer)
+            if layout == "SEPARATE":
+                # The two-file layout writes the activity in its own transaction
+                db.flush_activity()
+            latencies.append(time.perf_counter() - commit_start)
+        elapsed = time.perf_counter() - start
+
+        checkpointer.close()
+        db.close()
+        close_shared_connections()
+
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "turns_per_second": turns / elapsed,
+    }
+
+
+def main() -> None:
+    """Runs the benchmark for each layout and synchronous level and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--synchronous", nargs="+", default=["NORMAL", "FULL"])
+    args = parser.parse_args()
+
+    print(f"{'synchronous':<13}{'layout':<10}{'commit p50 ms':>15}{'commit p95 ms':>15}{'turns/s':>10}")
+    for synchronous in args.synchronous:
+        for layout in ("SEPARATE", "UNIFIED"):
+            result = _run(layout, synchronous.upper(), args.turns)
+            print(
+                f"{synchronous:<13}{layout:<10}{result['p50_ms']:>15.3f}"
+                f"{result['p95_ms']:>15.3f}{result['turns_per_second']:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
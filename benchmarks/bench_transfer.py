@@ -0,0 +1,96 @@
+"""
+Benchmark of conversation export and import throughput: importing with one
+transaction per conversation vs batched transactions written in parallel
+across checkpoint shards, and exporting the result.
+
+Run with: python -m benchmarks.bench_transfer [--conversations 20000] [--shards 1 4]
+"""
+
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.messages import AIMessage, HumanMessage, messages_to_dict  # noqa: E402
+
+from src.core.config import Settings  # noqa: E402
+from src.database import repository  # noqa: E402
+from src.database.checkpointer import RetryingSqliteSaver, sqlite_savers  # noqa: E402
+from src.database.connection import connect  # noqa: E402
+from src.database.sharding import ShardedCheckpointSaver, shard_path  # noqa: E402
+from src.database.transfer import export_conversations, import_conversations  # noqa: E402
+
+
+def _export_lines(conversations: int, messages: int) -> list[str]:
+    """Builds the export lines of conversations with alternating messages."""
+    lines = []
+    for i in range(conversations):
+        history = [
+            HumanMessage(content=f"Pergunta {i}-{j} sobre o Brasil")
+            if j % 2 == 0 else AIMessage(content=f"Resposta {i}-{j}: Brasília é a capital. " * 5)
+            for j in range(messages)
+        ]
+        lines.append(json.dumps({
+            "thread_id": f"t{i + 1}",
+            "first_message": history[0].content,
+            "messages": messages_to_dict(history),
+        }) + "\n")
+    return lines
+
+
+def _run(lines: list[str], shards: int, batch_size: int) -> tuple[float, float]:
+    """
+    Imports the lines into fresh databases, then exports them.
+
+    Returns:
+        Conversations per second of the import and of the export
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        repository.settings = Settings(
+            openai_api_key="benchmark", conversation_db_path=Path(tmp_dir) / "conversations.db"
+        )
+        checkpointer = ShardedCheckpointSaver([
+            RetryingSqliteSaver(connect(
+                shard_path(Path(tmp_dir) / "checkpoints.db", index), check_same_thread=False
+            ))
+            for index in range(shards)
+        ])
+
+        with repository.ConversationDB() as db:
+            imported = import_conversations(
+                db, checkpointer, lines, workers=shards, batch_size=batch_size
+            )
+            exported = export_conversations(db, checkpointer, io.StringIO(), workers=shards)
+
+        for sqlite_saver in sqlite_savers(checkpointer):
+            sqlite_saver.conn.close()
+
+    return imported["throughput"], exported["throughput"]
+
+
+def main() -> None:
+    """Runs the benchmark and prints the throughput of each configuration."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", type=int, default=20000)
+    parser.add_argument("--messages", type=int, default=10)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    lines = _export_lines(args.conversations, args.messages)
+
+    print(f"{'shards':<8}{'batch':>8}{'import conv/s':>16}{'export conv/s':>16}")
+    for shards in args.shards:
+        for batch_size in (1, 500):
+            # One transaction per conversation is slow, measure it on a sample
+            sample = lines if batch_size > 1 else lines[:args.conversations // 10]
+            import_rate, export_rate = _run(sample, shards, batch_size)
+            print(f"{shards:<8}{batch_size:>8}{import_rate:>16.0f}{export_rate:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
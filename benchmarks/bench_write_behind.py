@@ -0,0 +1,111 @@
+"""
+Benchmark of per-step checkpoint latency with immediate vs group commits.
+Several sessions run concurrently, each storing a checkpoint and its
+writes per graph step and flushing at the end of every turn.
+
+Run with: python -m benchmarks.bench_write_behind [--sessions 8] [--turns 20]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langchain_core.runnables import RunnableConfig  # noqa: E402
+
+from src.database.checkpointer import RetryingSqliteSaver, flush_checkpointer  # noqa: E402
+from src.database.connection import connect  # noqa: E402
+from src.database.write_behind import WriteBehindCheckpointSaver  # noqa: E402
+
+# Graph steps per turn: input, model call, tool call, model call
+STEPS_PER_TURN = 4
+
+
+def _session(checkpointer, thread_id: str, turns: int, latencies: list[float]) -> None:
+    """Stores the checkpoints of a conversation, flushing after each turn."""
+    config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+    messages = []
+    for turn in range(turns):
+        for step in range(STEPS_PER_TURN):
+            messages.append(HumanMessage(content="Qual a capital do Brasil?") if step == 0
+                            else AIMessage(content="Brasília é a capital do Brasil."))
+            checkpoint = {
+                "id": f"{turn:05d}-{step}",
+                "channel_values": {"messages": list(messages)},
+                "channel_versions": {}
+            }
+            start = time.perf_counter()
+            config = checkpointer.put(config, checkpoint, {"step": step}, {})
+            checkpointer.put_writes(config, [("messages", messages[-1])], "task")
+            latencies.append(time.perf_counter() - start)
+        flush_checkpointer(checkpointer)
+
+
+def run_benchmark(write_behind: bool, sessions: int, turns: int) -> dict:
+    """
+    Runs concurrent sessions against a fresh checkpoint database.
+    
+    Args:
+        write_behind: If True, buffers writes and commits them in groups
+        sessions: Number of concurrent sessions
+        turns: Turns per session
+        
+    Returns:
+        Dictionary with the elapsed time, step latencies and commit count
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpointer = RetryingSqliteSaver(connect(Path(tmp_dir) / "bench.db", check_same_thread=False))
+        if write_behind:
+            checkpointer = WriteBehindCheckpointSaver(checkpointer, interval=0.2)
+        
+        latencies: list[float] = []
+        threads = [
+            threading.Thread(target=_session, args=(checkpointer, f"thread-{i}", turns, latencies))
+            for i in range(sessions)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        
+        commits = sessions * turns * STEPS_PER_TURN * 2
+        if write_behind:
+            checkpointer.close()
+            commits = checkpointer.commits
+    
+    latencies.sort()
+    return {
+        "elapsed_seconds": elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "commits": commits,
+    }
+
+
+def main() -> None:
+    """Runs the benchmark with immediate and group commits and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=20)
+    args = parser.parse_args()
+    
+    print(f"{args.sessions} sessions, {args.turns} turns, {STEPS_PER_TURN} steps per turn\n")
+    print(f"{'mode':<14}{'total s':>10}{'step p50 ms':>14}{'step p95 ms':>14}{'commits':>10}")
+    for label, write_behind in (("immediate", False), ("write-behind", True)):
+        result = run_benchmark(write_behind, args.sessions, args.turns)
+        print(
+            f"{label:<14}{result['elapsed_seconds']:>10.2f}{result['p50_ms']:>14.3f}"
+            f"{result['p95_ms']:>14.3f}{result['commits']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+Load generator of concurrent synthetic conversations against one process and one data directory.
+Sessions share the agent, checkpointer and conversation database, like the
+sessions of a server process. Each one starts a conversation, asks a few
+questions drawn from the question mix with a think time between them, and
+starts over. For each concurrency level the tool reports throughput, turn
+latency percentiles, storage time per turn, SQLite busy retries and error rates.
+
+Run with: python -m benchmarks.loadgen [--concurrency 1 4 16 64] [--duration 30]
+          [--think-time-ms 1000] [--turns 3 10] [--mix country=5 exchange=3 trip=1 chat=1]
+          [--model fake|openai] [--apis stub|real] [--data-dir data/loadtest]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from benchmarks.suite import benchmark_settings, open_session, percentile, run_turn  # noqa: E402
+from src.api.stub_server import StubApiServer  # noqa: E402
+from src.core.config import settings  # noqa: E402
+from src.core.metrics import SQLITE_BUSY_RETRIES, SQLITE_BUSY_WAIT_SECONDS, TOOL_CALLS  # noqa: E402
+from src.core.timings import TimingsCallbackHandler, collect_timings  # noqa: E402
+
+# Questions of each kind; they match the rules of the scripted model's default scenario
+QUESTIONS: dict[str, list[str]] = {
+    'country': [
+        "Qual a capital do Brasil?",
+        "Quantos habitantes tem o Japão?",
+        "Que idioma se fala na Argentina?",
+    ],
+    'exchange': [
+        "Qual a cotação do dólar para real?",
+        "Quanto vale 1 euro em dólares?",
+    ],
+    'trip': [
+        "Vou viajar para o Japão, o que preciso saber?",
+    ],
+    'chat': [
+        "Olá, tudo bem?",
+        "Obrigado pela ajuda!",
+    ],
+}
+
+DEFAULT_MIX = {'country': 5.0, 'exchange': 3.0, 'trip': 1.0, 'chat': 1.0}
+
+# Time categories of a turn spent in SQLite, lock waits included
+STORAGE_CATEGORIES = ('checkpoint_read', 'checkpoint_write', 'commit')
+
+
+class LoadStats:
+    """Outcomes of the turns of one concurrency level. Safe to update from several threads."""
+    
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.storage: list[float] = []
+        self.errors: Counter[str] = Counter()
+        self._lock = threading.Lock()
+    
+    def record_turn(self, seconds: float, storage_seconds: float) -> None:
+        """
+        Records a completed turn.
+        
+        Args:
+            seconds: Duration of the turn
+            storage_seconds: Time the turn spent reading and writing SQLite
+        """
+        with self._lock:
+            self.latencies.append(seconds)
+            self.storage.append(storage_seconds)
+    
+    def record_error(self, error: Exception) -> None:
+        """
+        Records a failed turn.
+        
+        Args:
+            error: Exception raised by the turn
+        """
+        with self._lock:
+            self.errors[type(error).__name__] += 1
+
+
+def _tool_calls() -> tuple[float, float]:
+    """Gets the total and failed tool calls counted so far."""
+    samples = TOOL_CALLS.samples()
+    total = sum(value for _, _, value in samples)
+    failed = sum(value for _, labels, value in samples if labels[1] == "error")
+    return total, failed
+
+
+def _run_session(
+    index: int,
+    deadline: float,
+    stats: LoadStats,
+    shared: tuple[Any, Any, Any],
+    options: argparse.Namespace
+) -> None:
+    """
+    Runs conversations until the deadline. No turn is started after it;
+    the turn in progress is finished.
+    
+    Args:
+        index: Session number, which seeds its random choices
+        deadline: time.monotonic() value to stop at
+        stats: Where the turns are recorded
+        shared: Database, agent and checkpointer shared by the sessions
+        options: Parsed command line options
+    """
+    db, agent, checkpointer = shared
+    rng = random.Random(f"{options.seed}:{index}")
+    kinds = list(options.mix)
+    weights = [options.mix[kind] for kind in kinds]
+    
+    while time.monotonic() < deadline:
+        thread_id = None
+        for _ in range(rng.randint(*options.turns)):
+            if time.monotonic() >= deadline:
+                return
+            question = rng.choice(QUESTIONS[rng.choices(kinds, weights)[0]])
+            
+            start = time.perf_counter()
+            try:
+                if thread_id is None:
+                    _, thread_id = db.save_conversation_metadata(question)
+                with collect_timings(thread_id) as timings:
+                    run_turn(
+                        db, agent, checkpointer, thread_id, question,
+                        [TimingsCallbackHandler(timings)]
+                    )
+                totals = timings.totals()
+                stats.record_turn(
+                    time.perf_counter() - start,
+                    sum(totals.get(category, {}).get('seconds', 0.0) for category in STORAGE_CATEGORIES)
+                )
+            except Exception as e:
+                stats.record_error(e)
+            
+            if options.think_time_ms > 0:
+                think = rng.expovariate(1000 / options.think_time_ms)
+                time.sleep(max(0.0, min(think, deadline - time.monotonic())))
+
+
+def run_level(concurrency: int, shared: tuple[Any, Any, Any], options: argparse.Namespace) -> dict[str, Any]:
+    """
+    Runs concurrent sessions for options.duration seconds.
+    
+    Args:
+        concurrency: Number of simultaneous sessions
+        shared: Database, agent and checkpointer shared by the sessions
+        options: Parsed command line options
+    
+    Returns:
+        Dictionary with the turns, errors, throughput, latency percentiles,
+        storage time, busy retries and tool errors of the level
+    """
+    stats = LoadStats()
+    retries, waited = SQLITE_BUSY_RETRIES.value(), SQLITE_BUSY_WAIT_SECONDS.value()
+    tool_calls, tool_errors = _tool_calls()
+    
+    started = time.perf_counter()
+    deadline = time.monotonic() + options.duration
+    threads = [
+        threading.Thread(
+            target=_run_session,
+            args=(index, deadline, stats, shared, options),
+            name=f"load-session-{index}"
+        )
+        for index in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    turns = len(stats.latencies)
+    errors = sum(stats.errors.values())
+    total_tool_calls, total_tool_errors = _tool_calls()
+    latencies = stats.latencies or [0.0]
+    return {
+        'concurrency': concurrency,
+        'turns': turns,
+        'errors': errors,
+        'error_rate': errors / (turns + errors) if turns + errors else 0.0,
+        'error_types': dict(stats.errors),
+        'turns_per_second': turns / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'storage_p95_ms': percentile(stats.storage or [0.0], 0.95) * 1000,
+        'busy_retries': int(SQLITE_BUSY_RETRIES.value() - retries),
+        'busy_wait_ms': (SQLITE_BUSY_WAIT_SECONDS.value() - waited) * 1000,
+        'tool_calls': int(total_tool_calls - tool_calls),
+        'tool_errors': int(total_tool_errors - tool_errors),
+    }
+
+
+def _parse_mix(entries: list[str]) -> dict[str, float]:
+    """
+    Parses the question mix.
+    
+    Args:
+        entries: kind=weight entries
+    
+    Returns:
+        Dictionary of question kind to weight
+    
+    Raises:
+        argparse.ArgumentTypeError: If an entry is malformed or its kind unknown
+    """
+    mix = {}
+    for entry in entries:
+        kind, _, weight = entry.partition("=")
+        if kind not in QUESTIONS:
+            raise argparse.ArgumentTypeError(
+                f"unknown question kind '{kind}' (choose from {', '.join(QUESTIONS)})"
+            )
+        try:
+            mix[kind] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid weight in '{entry}'") from None
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("the mix needs a kind with a positive weight")
+    return mix
+
+
+def _print_level(result: dict[str, Any], stream: Any) -> None:
+    """Prints a row of the results table."""
+    print(
+        f"{result['concurrency']:>6}{result['turns']:>8}{result['turns_per_second']:>9.2f}"
+        f"{result['p50_ms']:>10.0f}{result['p95_ms']:>10.0f}{result['p99_ms']:>10.0f}"
+        f"{result['storage_p95_ms']:>13.1f}{result['busy_retries']:>8}{result['busy_wait_ms']:>12.0f}"
+        f"{result['error_rate']:>9.1%}{result['tool_errors']:>9}",
+        file=stream,
+        flush=True
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Ramps up the concurrency and prints the results of each level."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per concurrency level")
+    parser.add_argument("--think-time-ms", type=int, default=1000, help="Mean pause between questions")
+    parser.add_argument(
+        "--turns", type=int, nargs=2, default=[3, 10], metavar=("MIN", "MAX"),
+        help="Questions per conversation"
+    )
+    parser.add_argument("--mix", nargs="+", help="kind=weight entries, kinds: " + ", ".join(QUESTIONS))
+    parser.add_argument("--model", choices=("fake", "openai"), default="fake")
+    parser.add_argument("--model-latency-ms", type=int, default=300, help="Fake model time to first token")
+    parser.add_argument("--tokens-per-second", type=int, default=50, help="Fake model streaming rate")
+    parser.add_argument("--apis", choices=("stub", "real"), default="stub")
+    parser.add_argument("--api-latency-ms", type=int, default=50, help="Delay of the stub APIs")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="Errors of the stub APIs")
+    parser.add_argument(
+        "--data-dir", type=Path,
+        help="Directory of the databases, e.g. a mounted data volume (default: a temporary one)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="JSON file the results are written to")
+    args = parser.parse_args(argv)
+    
+    try:
+        args.mix = _parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    except argparse.ArgumentTypeError as e:
+        parser.error(f"--mix: {e}")
+    if args.turns[0] < 1 or args.turns[0] > args.turns[1]:
+        parser.error("--turns: MIN must be at least 1 and at most MAX")
+    if args.model == "openai" and settings.openai_api_key in ("", "benchmark"):
+        parser.error("--model openai needs OPENAI_API_KEY")
+    
+    server = None
+    if args.apis == "stub":
+        try:
+            server = StubApiServer(
+                latency=args.api_latency_ms / 1000, error_rate=args.api_error_rate, seed=args.seed
+            )
+        except ValueError as e:
+            parser.error(str(e))
+    
+    out = sys.stdout
+    print(
+        f"model {args.model}, APIs {args.apis}, {args.duration:.0f} s per level, "
+        f"think time {args.think_time_ms} ms, {args.turns[0]}-{args.turns[1]} questions per conversation\n",
+        file=out
+    )
+    print(
+        f"{'users':>6}{'turns':>8}{'turns/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+        f"{'storage p95':>13}{'busy':>8}{'busy wait':>12}{'errors':>9}{'tool err':>9}",
+        file=out
+    )
+    
+    results = []
+    with contextlib.ExitStack() as stack:
+        if server is not None:
+            server.start()
+            stack.callback(server.stop)
+        workdir = args.data_dir or Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        workdir.mkdir(parents=True, exist_ok=True)
+        stack.enter_context(benchmark_settings(
+            workdir,
+            server.url if server is not None else None,
+            fake_model=args.model == "fake",
+            model_latency_ms=args.model_latency_ms,
+            tokens_per_second=args.tokens_per_second
+        ))
+        # The sessions' answers are not shown
+        stack.enter_context(contextlib.redirect_stdout(
+            stack.enter_context(open(os.devnull, "w", encoding="utf-8"))
+        ))
+        shared = stack.enter_context(open_session())
+        for concurrency in args.concurrency:
+            results.append(run_level(concurrency, shared, args))
+            _print_level(results[-1], out)
+    
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({
+            'model': args.model,
+            'apis': args.apis,
+            'duration': args.duration,
+            'think_time_ms': args.think_time_ms,
+            'turns': args.turns,
+            'mix': args.mix,
+            'levels': results,
+        }, indent=2) + "\n", encoding="utf-8")
+        print(f"\nResults saved to {args.output}", file=out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+"""
+End-to-end benchmark suite of agent turns, tools and storage, run offline.
+Every scenario runs the real code paths against the scripted chat model and
+the local stand-ins of the external APIs, and reports latency percentiles,
+throughput and peak memory. Results are saved as JSON and can be compared
+with a saved baseline to catch regressions.
+
+Run with: python -m benchmarks.suite [--quick] [--scenarios single_tool_turn ...]
+          [--output data/benchmarks/results.json] [--baseline benchmarks/baseline.json]
+Or through pytest: python -m pytest benchmarks -m slow
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, ContextManager, NamedTuple
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage  # noqa: E402
+from langchain_core.runnables import Runnable, RunnableConfig  # noqa: E402
+from langgraph.checkpoint.base import BaseCheckpointSaver  # noqa: E402
+
+from src.api.stub_server import StubApiServer  # noqa: E402
+from src.core.agent import create_agent_executor  # noqa: E402
+from src.core.config import settings  # noqa: E402
+from src.core.summarizer import MAX_MESSAGES_BEFORE_SUMMARIZE, summarize_conversation  # noqa: E402
+from src.core.timings import timed  # noqa: E402
+from src.database.checkpointer import (  # noqa: E402
+    create_checkpointer,
+    flush_checkpointer,
+    iter_savers,
+    sqlite_savers,
+)
+from src.database.connection import close_shared_connections  # noqa: E402
+from src.database.repository import ConversationDB  # noqa: E402
+from src.database.search import searchable_messages  # noqa: E402
+from src.database.storage import commit_turn  # noqa: E402
+from src.database.write_behind import WriteBehindCheckpointSaver  # noqa: E402
+from src.ui.menu import MENU_PAGE_SIZE  # noqa: E402
+from src.ui.stream_handler import process_agent_stream  # noqa: E402
+
+DEFAULT_OUTPUT_PATH = Path("data/benchmarks/results.json")
+DEFAULT_TOLERANCE = 0.2  # Slowdown or memory growth reported as a regression
+WARMUP_ITERATIONS = 1
+MEMORY_ITERATIONS = 5  # Extra iterations run under tracemalloc, which slows them down
+
+# Changes smaller than these are noise, whatever their ratio to the baseline
+COMPARED_METRICS = {'p50_ms': 1.0, 'p95_ms': 1.0, 'peak_memory_kb': 64.0}
+
+Operation = Callable[[int], Any]
+
+
+class Scenario(NamedTuple):
+    """Benchmark scenario registered with @scenario."""
+    name: str
+    description: str
+    setup: Callable[[int, bool], ContextManager[Operation]]
+    iterations: int
+    quick_iterations: int
+
+
+SCENARIOS: dict[str, Scenario] = {}
+
+
+def scenario(iterations: int, quick_iterations: int) -> Callable:
+    """
+    Registers a scenario. The decorated generator prepares the data, yields
+    the operation measured (called with the iteration index, from 0 to the
+    count it received) and cleans up after the last iteration.
+    
+    Args:
+        iterations: Measured iterations of a full run
+        quick_iterations: Measured iterations with --quick
+    
+    Returns:
+        Decorator registering the scenario under the function name
+    """
+    def decorator(function: Callable[[int, bool], Iterator[Operation]]) -> Callable:
+        setup = contextmanager(function)
+        SCENARIOS[function.__name__] = Scenario(
+            name=function.__name__,
+            description=(function.__doc__ or "").strip().splitlines()[0],
+            setup=setup,
+            iterations=iterations,
+            quick_iterations=quick_iterations
+        )
+        return setup
+    return decorator
+
+
+@contextmanager
+def open_session() -> Iterator[tuple[ConversationDB, Runnable, BaseCheckpointSaver]]:
+    """Opens the database, agent and checkpointer like the CLI, and closes them."""
+    db = ConversationDB()
+    agent, checkpointer = create_agent_executor()
+    try:
+        yield db, agent, checkpointer
+    finally:
+        commit_turn(db, checkpointer)
+        for saver in iter_savers(checkpointer):
+            if isinstance(saver, WriteBehindCheckpointSaver):
+                saver.close()
+        db.close()
+        for saver in sqlite_savers(checkpointer):
+            saver.conn.close()
+        close_shared_connections()
+
+
+def run_turn(
+    db: ConversationDB,
+    agent: Runnable,
+    checkpointer: BaseCheckpointSaver,
+    thread_id: str,
+    user_message: str,
+    callbacks: list[BaseCallbackHandler] | None = None
+) -> None:
+    """
+    Runs a turn the way the CLI does. The answer is printed to sys.stdout,
+    which callers redirect.
+    """
+    turn = process_agent_stream(agent, user_message, thread_id, callbacks)
+    db.record_activity(
+        thread_id,
+        turn['messages_added'],
+        turn['last_message'],
+        searchable_messages(turn['messages']),
+        turn['usage']
+    )
+    with timed('summarization'):
+        summarize_conversation(checkpointer, thread_id, verbose=False)
+    with timed('commit'):
+        commit_turn(db, checkpointer)
+
+
+def _history(turns: int) -> list[BaseMessage]:
+    """Builds the messages of a conversation with the given number of turns."""
+    messages: list[BaseMessage] = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=f"Pergunta {turn}: qual a capital e a população do Brasil?"))
+        messages.append(AIMessage(
+            content="A capital do Brasil é Brasília e a população é de aproximadamente "
+                    "212 milhões de habitantes, a maior da América do Sul."
+        ))
+    return messages
+
+
+def _new_threads(db: ConversationDB, agent: Runnable, count: int, turns: int) -> list[str]:
+    """Creates conversations whose checkpoints already hold the given number of turns."""
+    thread_ids = []
+    history = _history(turns)
+    for _ in range(count):
+        _, thread_id = db.save_conversation_metadata(history[0].content)
+        config = RunnableConfig(configurable={"thread_id": thread_id})
+        agent.update_state(config, {"messages": history}, as_node="model")
+        thread_ids.append(thread_id)
+    return thread_ids
+
+
+@scenario(iterations=50, quick_iterations=5)
+def single_tool_turn(count: int, quick: bool) -> Iterator[Operation]:
+    """Turn of a new conversation that calls one tool."""
+    with open_session() as (db, agent, checkpointer):
+        def operation(index: int) -> None:
+            _, thread_id = db.save_conversation_metadata("Qual a capital do Brasil?")
+            run_turn(db, agent, checkpointer, thread_id, "Qual a capital do Brasil?")
+        yield operation
+
+
+@scenario(iterations=50, quick_iterations=5)
+def multi_tool_turn(count: int, quick: bool) -> Iterator[Operation]:
+    """Turn of a new conversation that calls two tools at once."""
+    question = "Vou viajar para o Japão, o que preciso saber?"
+    with open_session() as (db, agent, checkpointer):
+        def operation(index: int) -> None:
+            _, thread_id = db.save_conversation_metadata(question)
+            run_turn(db, agent, checkpointer, thread_id, question)
+        yield operation
+
+
+@scenario(iterations=20, quick_iterations=3)
+def thread_resume_200_turns(count: int, quick: bool) -> Iterator[Operation]:
+    """Turn of a 200-turn conversation resumed by a new session (cold cache)."""
+    with open_session() as (db, agent, checkpointer):
+        thread_ids = _new_threads(db, agent, count, turns=200)
+    
+    with open_session() as (db, agent, checkpointer):
+        def operation(index: int) -> None:
+            run_turn(db, agent, checkpointer, thread_ids[index], "E a população do Japão?")
+        yield operation
+
+
+@scenario(iterations=20, quick_iterations=3)
+def summarization(count: int, quick: bool) -> Iterator[Operation]:
+    """Summarization of a conversation that just went over the message limit."""
+    turns = MAX_MESSAGES_BEFORE_SUMMARIZE // 2 + 1
+    with open_session() as (db, agent, checkpointer):
+        thread_ids = _new_threads(db, agent, count, turns=turns)
+    
+    with open_session() as (db, agent, checkpointer):
+        def operation(index: int) -> None:
+            if not summarize_conversation(checkpointer, thread_ids[index], verbose=False):
+                raise RuntimeError(f"Thread {thread_ids[index]} was not summarized")
+            commit_turn(db, checkpointer)
+        yield operation
+
+
+@scenario(iterations=200, quick_iterations=20)
+def menu_listing(count: int, quick: bool) -> Iterator[Operation]:
+    """First page of the conversation menu with 100k conversations (10k with --quick)."""
+    rows = 10_000 if quick else 100_000
+    start = datetime(2024, 1, 1)
+    with ConversationDB() as db:
+        with db._cursor(transaction=True) as cursor:
+            cursor.executemany(
+                "INSERT INTO conversations (first_message, updated_at) VALUES (?, ?)",
+                (
+                    (f"Message {i}", (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"))
+                    for i in range(rows)
+                ),
+            )
+        yield lambda index: db.get_conversations_list(limit=MENU_PAGE_SIZE)
+    close_shared_connections()
+
+
+@scenario(iterations=500, quick_iterations=50)
+def checkpoint_write(count: int, quick: bool) -> Iterator[Operation]:
+    """Checkpoint and pending write of one graph step of a 20-turn conversation."""
+    history = _history(10)
+    checkpointer = create_checkpointer(settings.checkpoint_db_path)
+    
+    def operation(index: int) -> None:
+        config = RunnableConfig(configurable={"thread_id": f"write-{index % 10}", "checkpoint_ns": ""})
+        checkpoint = {
+            "id": f"{index:08d}",
+            "channel_values": {"messages": history},
+            "channel_versions": {}
+        }
+        config = checkpointer.put(config, checkpoint, {"step": index}, {})
+        checkpointer.put_writes(config, [("messages", history[-1])], "task")
+    
+    try:
+        yield operation
+        flush_checkpointer(checkpointer)
+    finally:
+        for saver in iter_savers(checkpointer):
+            if isinstance(saver, WriteBehindCheckpointSaver):
+                saver.close()
+        for saver in sqlite_savers(checkpointer):
+            saver.conn.close()
+        close_shared_connections()
+
+
+@contextmanager
+def benchmark_settings(
+    workdir: Path,
+    api_url: str | None,
+    fake_model: bool = True,
+    model_latency_ms: int = 0,
+    tokens_per_second: int = 0
+) -> Iterator[None]:
+    """
+    Points the settings to the databases in a directory, the scripted or the
+    OpenAI model and the stub or the configured APIs, and restores them afterwards.
+    
+    Args:
+        workdir: Directory of the databases
+        api_url: Base URL of the stub APIs (None keeps the configured APIs)
+        fake_model: Use the scripted model instead of the OpenAI API
+        model_latency_ms: Time to first token of the scripted model
+        tokens_per_second: Streaming rate of the scripted model (0 streams at once)
+    """
+    overrides: dict[str, Any] = {
+        'llm_provider': "FAKE" if fake_model else "OPENAI",
+        'fake_llm_scenario_path': None,
+        'fake_llm_latency_ms': model_latency_ms,
+        'fake_llm_tokens_per_second': tokens_per_second,
+        'conversation_db_path': workdir / "conversations.db",
+        'checkpoint_db_path': workdir / "checkpoints.db",
+        'timings_log_path': None,
+        'trace_log_path': None,
+        'metrics_path': None,
+    }
+    if api_url is not None:
+        overrides.update(countries_api_url=api_url, exchange_api_url=api_url)
+    saved = {name: getattr(settings, name) for name in overrides}
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """
+    Computes a percentile with linear interpolation between samples.
+    
+    Args:
+        samples: Measured values (at least one)
+        fraction: Percentile as a fraction, e.g. 0.95
+    
+    Returns:
+        Percentile value
+    """
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def run_scenario(
+    benchmark: Scenario,
+    api_url: str,
+    quick: bool = False,
+    iterations: int | None = None,
+    model_latency_ms: int = 0,
+    tokens_per_second: int = 0
+) -> dict[str, Any]:
+    """
+    Runs a scenario in a temporary directory: a warm-up iteration, the
+    measured iterations and a few more under tracemalloc for peak memory.
+    
+    Args:
+        benchmark: Scenario to run
+        api_url: Base URL of the stub APIs
+        quick: Use the smaller data sets and iteration counts
+        iterations: Measured iterations (None uses the scenario's own)
+        model_latency_ms: Time to first token of the scripted model
+        tokens_per_second: Streaming rate of the scripted model
+    
+    Returns:
+        Dictionary with iterations, p50_ms, p95_ms, p99_ms, mean_ms,
+        ops_per_second and peak_memory_kb
+    """
+    if iterations is None:
+        iterations = benchmark.quick_iterations if quick else benchmark.iterations
+    memory_iterations = min(MEMORY_ITERATIONS, iterations)
+    count = WARMUP_ITERATIONS + iterations + memory_iterations
+    
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            benchmark_settings(Path(tmp_dir), api_url, True, model_latency_ms, tokens_per_second), \
+            contextlib.redirect_stdout(io.StringIO()), \
+            benchmark.setup(count, quick) as operation:
+        for index in range(WARMUP_ITERATIONS):
+            operation(index)
+        
+        samples = []
+        started = time.perf_counter()
+        for index in range(WARMUP_ITERATIONS, WARMUP_ITERATIONS + iterations):
+            start = time.perf_counter()
+            operation(index)
+            samples.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - started
+        
+        tracemalloc.start()
+        try:
+            for index in range(WARMUP_ITERATIONS + iterations, count):
+                operation(index)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    
+    return {
+        'iterations': iterations,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'mean_ms': sum(samples) / len(samples) * 1000,
+        'ops_per_second': iterations / elapsed if elapsed > 0 else 0.0,
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def run_suite(
+    names: Sequence[str] | None = None,
+    quick: bool = False,
+    iterations: int | None = None,
+    model_latency_ms: int = 0,
+    tokens_per_second: int = 0,
+    api_latency_ms: int = 0,
+    on_result: Callable[[str, dict[str, Any]], None] | None = None
+) -> dict[str, Any]:
+    """
+    Runs scenarios against a stub API server started for the run.
+    
+    Args:
+        names: Scenarios to run (None runs all of them)
+        quick: Use the smaller data sets and iteration counts
+        iterations: Measured iterations of every scenario (None uses their own)
+        model_latency_ms: Time to first token of the scripted model
+        tokens_per_second: Streaming rate of the scripted model
+        api_latency_ms: Delay of every stub API response
+        on_result: Called with the name and result of each scenario as it finishes
+    
+    Returns:
+        Results document with the run environment and the results per scenario
+    
+    Raises:
+        KeyError: If a scenario name is unknown
+    """
+    selected = [SCENARIOS[name] for name in (names or SCENARIOS)]
+    server = StubApiServer(latency=api_latency_ms / 1000)
+    server.start()
+    results: dict[str, Any] = {}
+    try:
+        for benchmark in selected:
+            results[benchmark.name] = run_scenario(
+                benchmark, server.url, quick, iterations, model_latency_ms, tokens_per_second
+            )
+            if on_result is not None:
+                on_result(benchmark.name, results[benchmark.name])
+    finally:
+        server.stop()
+    
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'quick': quick,
+        'model_latency_ms': model_latency_ms,
+        'tokens_per_second': tokens_per_second,
+        'api_latency_ms': api_latency_ms,
+        'scenarios': results,
+    }
+
+
+def compare_results(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE
+) -> list[dict[str, Any]]:
+    """
+    Finds the metrics that got worse than the baseline by more than the
+    tolerance. Scenarios missing from either document are skipped.
+    
+    Args:
+        results: Results document of the current run
+        baseline: Results document saved earlier
+        tolerance: Accepted growth as a fraction, e.g. 0.2 for 20%
+    
+    Returns:
+        List of dictionaries with scenario, metric, baseline and current
+    
+    Raises:
+        ValueError: If the documents were not recorded with the same options
+    """
+    for option in ('quick', 'model_latency_ms', 'tokens_per_second', 'api_latency_ms'):
+        if results.get(option) != baseline.get(option):
+            raise ValueError(
+                f"Baseline recorded with {option}={baseline.get(option)}, "
+                f"this run used {option}={results.get(option)}"
+            )
+    
+    regressions = []
+    for name, result in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        for metric, noise in COMPARED_METRICS.items():
+            if result[metric] - previous[metric] > max(previous[metric] * tolerance, noise):
+                regressions.append({
+                    'scenario': name,
+                    'metric': metric,
+                    'baseline': previous[metric],
+                    'current': result[metric],
+                })
+    return regressions
+
+
+def _print_result(name: str, result: dict[str, Any]) -> None:
+    """Prints a row of the results table."""
+    print(
+        f"{name:<26}{result['iterations']:>7}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+        f"{result['p99_ms']:>10.2f}{result['ops_per_second']:>10.1f}{result['peak_memory_kb']:>12.0f}",
+        flush=True
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Runs the suite, saves the results and compares them with a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), help="Default: all")
+    parser.add_argument("--list", action="store_true", help="List the scenarios and exit")
+    parser.add_argument("--quick", action="store_true", help="Smaller data sets and fewer iterations")
+    parser.add_argument("--iterations", type=int, help="Measured iterations of every scenario")
+    parser.add_argument("--model-latency-ms", type=int, default=0, help="Time to first token")
+    parser.add_argument("--tokens-per-second", type=int, default=0, help="0 streams at once")
+    parser.add_argument("--api-latency-ms", type=int, default=0, help="Delay of the stub APIs")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT_PATH)
+    parser.add_argument("--baseline", type=Path, help="Results file to compare with")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+    
+    if args.list:
+        for benchmark in SCENARIOS.values():
+            print(f"{benchmark.name:<26}{benchmark.description}")
+        return
+    
+    print(f"{'scenario':<26}{'iters':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'peak KB':>12}")
+    results = run_suite(
+        args.scenarios,
+        quick=args.quick,
+        iterations=args.iterations,
+        model_latency_ms=args.model_latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        api_latency_ms=args.api_latency_ms,
+        on_result=_print_result
+    )
+    
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"\nResults saved to {args.output}")
+    
+    if args.baseline is None:
+        return
+    try:
+        regressions = compare_results(
+            results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance
+        )
+    except (OSError, ValueError) as e:
+        sys.exit(f"Cannot compare with {args.baseline}: {e}")
+    
+    if not regressions:
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+        return
+    print(f"\nRegressions against {args.baseline} (tolerance {args.tolerance:.0%}):")
+    for regression in regressions:
+        print(
+            f"  {regression['scenario']}: {regression['metric']} "
+            f"{regression['baseline']:.2f} -> {regression['current']:.2f}"
+        )
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
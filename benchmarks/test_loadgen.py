@@ -0,0 +1,40 @@
+"""
+Runs the load generator briefly through pytest:
+
+    python -m pytest benchmarks -m slow
+"""
+import argparse
+import json
+
+import pytest
+
+from benchmarks.loadgen import _parse_mix, main
+
+
+class TestLoadgen:
+    """Test suite for the load generator."""
+    
+    @pytest.mark.slow
+    def test_ramps_up_and_reports_each_level(self, tmp_path, capsys):
+        """Test that every concurrency level runs turns and is reported."""
+        output = tmp_path / "load.json"
+        
+        main([
+            "--concurrency", "1", "4", "--duration", "1", "--think-time-ms", "0",
+            "--model-latency-ms", "0", "--tokens-per-second", "0", "--api-latency-ms", "0",
+            "--data-dir", str(tmp_path / "data"), "--output", str(output)
+        ])
+        
+        levels = json.loads(output.read_text(encoding="utf-8"))['levels']
+        assert [level['concurrency'] for level in levels] == [1, 4]
+        assert all(level['turns'] > 0 and level['errors'] == 0 for level in levels)
+        assert (tmp_path / "data" / "conversations.db").exists()
+        assert "turns/s" in capsys.readouterr().out
+    
+    def test_parses_the_question_mix(self):
+        """Test that the mix is parsed and unknown kinds are rejected."""
+        assert _parse_mix(["country=2", "chat=0.5"]) == {'country': 2.0, 'chat': 0.5}
+        with pytest.raises(argparse.ArgumentTypeError, match="unknown question kind"):
+            _parse_mix(["weather=1"])
+        with pytest.raises(argparse.ArgumentTypeError, match="positive weight"):
+            _parse_mix(["country=0"])
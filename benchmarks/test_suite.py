@@ -0,0 +1,67 @@
+"""
+Runs the benchmark suite through pytest, separately from the unit tests:
+
+    python -m pytest benchmarks -m slow
+
+Every scenario runs in quick mode. Set BENCHMARK_BASELINE to a results file
+saved with 'python -m benchmarks.suite --quick --output <file>' to also fail
+on regressions against it.
+"""
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks.suite import SCENARIOS, compare_results, percentile, run_suite
+
+
+@pytest.fixture(scope="module")
+def results():
+    """Runs every scenario once in quick mode."""
+    return run_suite(quick=True)
+
+
+class TestSuite:
+    """Test suite for the benchmark scenarios and their comparison."""
+    
+    @pytest.mark.slow
+    @pytest.mark.parametrize("name", list(SCENARIOS))
+    def test_scenario_reports_metrics(self, results, name):
+        """Test that each scenario runs and reports consistent metrics."""
+        result = results['scenarios'][name]
+        
+        assert result['iterations'] == SCENARIOS[name].quick_iterations
+        assert 0 < result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+        assert result['ops_per_second'] > 0
+        assert result['peak_memory_kb'] > 0
+    
+    @pytest.mark.slow
+    def test_no_regressions_against_baseline(self, results):
+        """Test that the run is not slower than the baseline in BENCHMARK_BASELINE."""
+        baseline_path = os.getenv("BENCHMARK_BASELINE")
+        if not baseline_path:
+            pytest.skip("BENCHMARK_BASELINE not set")
+        baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+        
+        assert compare_results(results, baseline) == []
+    
+    def test_compare_results_ignores_noise(self):
+        """Test that only growth over both the tolerance and the noise floor is reported."""
+        def document(p50_ms, peak_memory_kb):
+            return {'quick': True, 'scenarios': {'checkpoint_write': {
+                'p50_ms': p50_ms, 'p95_ms': p50_ms, 'peak_memory_kb': peak_memory_kb
+            }}}
+        
+        regressions = compare_results(document(30.0, 100.0), document(20.0, 90.0))
+        
+        assert [regression['metric'] for regression in regressions] == ['p50_ms', 'p95_ms']
+        assert compare_results(document(0.5, 100.0), document(0.1, 100.0)) == []
+        with pytest.raises(ValueError, match="quick"):
+            compare_results(document(1.0, 1.0), {**document(1.0, 1.0), 'quick': False})
+    
+    def test_percentile_interpolates(self):
+        """Test that percentiles interpolate between the closest samples."""
+        assert percentile([4, 1, 3, 2], 0.5) == 2.5
+        assert percentile([1, 2, 3, 4, 5], 0.95) == pytest.approx(4.8)
+        assert percentile([7], 0.99) == 7
@@ -7,6 +7,9 @@ from typing import Any
 
 import requests
 
+from src.api.clients.http import http_get
+from src.core.config import settings
+
 def get_country_info(country_name: str) -> dict[str, Any]:
     """
     Search for country information using the REST Countries API.
@@ -21,8 +24,8 @@ def get_country_info(country_name: str) -> dict[str, Any]:
 
     try:
         # REST Countries API - free, no key required
-        url = f"https://restcountries.com/v3.1/name/{country_name}"
-        response = requests.get(url, timeout=10)
+        url = f"{settings.countries_api_url}/v3.1/name/{country_name}"
+        response = http_get(url, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
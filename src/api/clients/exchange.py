@@ -7,6 +7,9 @@ from typing import Any
 
 import requests
 
+from src.api.clients.http import http_get
+from src.core.config import settings
+
 def get_exchange_rate(base_currency: str, target_currency: str) -> dict[str, Any]:
     """
     Search for exchange rate between two currencies using a public API.
@@ -21,8 +24,8 @@ def get_exchange_rate(base_currency: str, target_currency: str) -> dict[str, Any
     """
     try:
         # Free exchange rate API (no key required for basic use)
-        url = f"https://api.exchangerate-api.com/v4/latest/{base_currency.upper()}"
-        response = requests.get(url, timeout=10)
+        url = f"{settings.exchange_api_url}/v4/latest/{base_currency.upper()}"
+        response = http_get(url, timeout=10)
         
         if response.status_code == 200:
             data = response.json()
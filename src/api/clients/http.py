@@ -0,0 +1,44 @@
+"""
+HTTP helper shared by the API clients.
+Every request is recorded in the turn timings, the trace and the metrics.
+"""
+
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from src.core.metrics import HTTP_REQUEST_SECONDS, HTTP_REQUESTS
+from src.core.timings import timed
+from src.core.tracing import span
+
+
+def http_get(url: str, timeout: float = 10) -> requests.Response:
+    """
+    Sends a GET request.
+    
+    Args:
+        url: Full URL of the request
+        timeout: Seconds to wait for the server
+    
+    Returns:
+        Response of the server, whatever its status code
+    
+    Raises:
+        requests.exceptions.RequestException: If no response was received
+    """
+    host = urlsplit(url).hostname or ""
+    attributes = {'http.request.method': "GET", 'server.address': host, 'url.full': url}
+    start = time.perf_counter()
+    with timed('http', host), span("GET", attributes, kind='client') as http_span:
+        try:
+            response = requests.get(url, timeout=timeout)
+        except requests.exceptions.RequestException:
+            HTTP_REQUESTS.inc(labels=(host, "error"))
+            raise
+        finally:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, labels=(host,))
+        http_span.set_attribute('http.response.status_code', response.status_code)
+    
+    HTTP_REQUESTS.inc(labels=(host, str(response.status_code)))
+    return response
@@ -0,0 +1,274 @@
+"""
+Local stand-in for the REST Countries and exchange rate APIs.
+Answers from a small built-in data set, with injectable latency and errors,
+so the agent can be benchmarked with no network access:
+
+    python -m src.api.stub_server --port 8080 --latency-ms 50 --error-rate 0.05
+
+Then set COUNTRIES_API_URL and EXCHANGE_API_URL to http://127.0.0.1:8080.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import unquote
+
+STUB_DATE = "2024-01-01"
+
+# Subset of the REST Countries v3.1 fields read by the client
+COUNTRIES: list[dict[str, Any]] = [
+    {
+        'name': {'common': "Brazil", 'official': "Federative Republic of Brazil"},
+        'capital': ["Brasília"],
+        'population': 212559417,
+        'region': "Americas",
+        'currencies': {'BRL': {'name': "Brazilian real", 'symbol': "R$"}},
+        'languages': {'por': "Portuguese"},
+    },
+    {
+        'name': {'common': "Portugal", 'official': "Portuguese Republic"},
+        'capital': ["Lisbon"],
+        'population': 10305564,
+        'region': "Europe",
+        'currencies': {'EUR': {'name': "Euro", 'symbol': "€"}},
+        'languages': {'por': "Portuguese"},
+    },
+    {
+        'name': {'common': "Japan", 'official': "Japan"},
+        'capital': ["Tokyo"],
+        'population': 125836021,
+        'region': "Asia",
+        'currencies': {'JPY': {'name': "Japanese yen", 'symbol': "¥"}},
+        'languages': {'jpn': "Japanese"},
+    },
+    {
+        'name': {'common': "United States", 'official': "United States of America"},
+        'capital': ["Washington, D.C."],
+        'population': 329484123,
+        'region': "Americas",
+        'currencies': {'USD': {'name': "United States dollar", 'symbol': "$"}},
+        'languages': {'eng': "English"},
+    },
+    {
+        'name': {'common': "Argentina", 'official': "Argentine Republic"},
+        'capital': ["Buenos Aires"],
+        'population': 45376763,
+        'region': "Americas",
+        'currencies': {'ARS': {'name': "Argentine peso", 'symbol': "$"}},
+        'languages': {'grn': "Guaraní", 'spa': "Spanish"},
+    },
+    {
+        'name': {'common': "Germany", 'official': "Federal Republic of Germany"},
+        'capital': ["Berlin"],
+        'population': 83240525,
+        'region': "Europe",
+        'currencies': {'EUR': {'name': "Euro", 'symbol': "€"}},
+        'languages': {'deu': "German"},
+    },
+]
+
+# Units of each currency per US dollar
+USD_RATES: dict[str, float] = {
+    'USD': 1.0,
+    'BRL': 4.92,
+    'EUR': 0.91,
+    'GBP': 0.79,
+    'JPY': 141.5,
+    'ARS': 808.5,
+}
+
+
+def find_countries(name: str) -> list[dict[str, Any]]:
+    """
+    Finds countries like GET /v3.1/name/{name}: by part of the common or official name.
+    
+    Args:
+        name: Country name or part of it, in any case
+    
+    Returns:
+        Matching countries, empty if none
+    """
+    wanted = name.strip().lower()
+    return [
+        country for country in COUNTRIES
+        if wanted in country['name']['common'].lower() or wanted in country['name']['official'].lower()
+    ]
+
+
+def latest_rates(base_currency: str) -> dict[str, Any] | None:
+    """
+    Builds the body of GET /v4/latest/{base}.
+    
+    Args:
+        base_currency: Currency code, in any case
+    
+    Returns:
+        Rates of every known currency per unit of the base, None if it is unknown
+    """
+    base = base_currency.upper()
+    if base not in USD_RATES:
+        return None
+    return {
+        'base': base,
+        'date': STUB_DATE,
+        'rates': {code: round(rate / USD_RATES[base], 6) for code, rate in USD_RATES.items()},
+    }
+
+
+class StubApiServer:
+    """Serves both stand-in APIs on one local port in a background thread."""
+    
+    def __init__(
+        self,
+        port: int = 0,
+        host: str = "127.0.0.1",
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int = 0
+    ) -> None:
+        """
+        Initializes the server.
+        
+        Args:
+            port: TCP port (0 picks a free one)
+            host: Address listened on; only the local machine by default
+            latency: Seconds every request waits before being answered
+            error_rate: Fraction of the requests (0.0 to 1.0) answered with error_status
+            error_status: HTTP status of the injected errors
+            seed: Seed of the error draws, so a run can be repeated
+        
+        Raises:
+            ValueError: If error_rate is not between 0.0 and 1.0
+        """
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError(f"error_rate must be between 0.0 and 1.0, got {error_rate}")
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL to set COUNTRIES_API_URL and EXCHANGE_API_URL to."""
+        return f"http://{self.host}:{self.port}"
+    
+    def respond(self, path: str) -> tuple[int, Any]:
+        """
+        Answers a GET request, without the latency.
+        
+        Args:
+            path: Request path, with its query string
+        
+        Returns:
+            Tuple of (HTTP status, JSON body)
+        """
+        with self._random_lock:
+            failed = self._random.random() < self.error_rate
+        if failed:
+            return self.error_status, {'status': self.error_status, 'message': "Injected error"}
+        
+        path = unquote(path.split("?")[0])
+        if path.startswith("/v3.1/name/"):
+            countries = find_countries(path.removeprefix("/v3.1/name/"))
+            if countries:
+                return 200, countries
+        elif path.startswith("/v4/latest/"):
+            rates = latest_rates(path.removeprefix("/v4/latest/"))
+            if rates is not None:
+                return 200, rates
+        return 404, {'status': 404, 'message': "Not Found"}
+    
+    def start(self) -> None:
+        """Starts listening. self.port is the port actually used."""
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                time.sleep(stub.latency)
+                status, payload = stub.respond(self.path)
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format: str, *args: Any) -> None:
+                # A benchmark makes too many requests to print each one
+                pass
+        
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="stub-api-server", daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stops the server and waits for its thread to finish."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Runs the stand-in APIs until interrupted.
+    
+    Args:
+        argv: Command line arguments (defaults to sys.argv)
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1", help="Address listened on")
+    parser.add_argument("--port", type=int, default=8080, help="TCP port (0 picks a free one)")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Delay of every response")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0,
+        help="Fraction of the requests answered with --error-status"
+    )
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of the errors")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the error draws")
+    args = parser.parse_args(argv)
+    
+    try:
+        server = StubApiServer(
+            port=args.port,
+            host=args.host,
+            latency=args.latency_ms / 1000,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            seed=args.seed
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    server.start()
+    print(f"🧪 APIs simuladas em {server.url}")
+    print(f"   COUNTRIES_API_URL={server.url}")
+    print(f"   EXCHANGE_API_URL={server.url}")
+    print("   Pressione Ctrl+C para parar.")
+    
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print("\n👋 Servidor parado.")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,37 +3,43 @@ Configuration of LangChain with OpenAI and Function Calling.
 Here we configure the AI model and the available tools (functions).
 """
 
-import sqlite3
 from textwrap import dedent
 
 from langchain.agents import create_agent
+from langchain.agents.middleware import AgentMiddleware
 from langchain_core.tools import StructuredTool
 from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
 from src.core.config import settings
+from src.core.context_window import create_context_window_middleware
+from src.core.fake_llm import create_fake_chat_model
+from src.core.tracing import TracingCallbackHandler
+from src.database.checkpointer import create_checkpointer
 from src.tools.country_tool import create_country_tool
 from src.tools.exchange_tool import create_exchange_tool
 
 def create_agent_executor(
     llm: ChatOpenAI | None = None,
-    checkpointer: SqliteSaver | None = None
-) -> tuple[Runnable, SqliteSaver]:
+    checkpointer: BaseCheckpointSaver | None = None
+) -> tuple[Runnable, BaseCheckpointSaver]:
     """
     Creates and configures the LangChain 1.0+ agent with Function Calling and checkpoint support.
     
     Args:
         llm: Language model instance. If None, creates a new ChatOpenAI instance
-            using settings from config.
-        checkpointer: Checkpoint saver instance. If None, creates a new SqliteSaver
+            using settings from config (or the scripted model with LLM_PROVIDER=FAKE).
+        checkpointer: Checkpoint saver instance. If None, creates one with create_checkpointer
             using settings from config.
     
     Returns:
         Tuple of (configured agent, checkpointer) ready to use.
     """
     # Initialize language model if not provided
-    if llm is None:
+    if llm is None and settings.llm_provider == "FAKE":
+        llm = create_fake_chat_model()
+    elif llm is None:
         llm = ChatOpenAI(
             model=settings.model_name,
             temperature=settings.temperature,
@@ -42,13 +48,7 @@ def create_agent_executor(
     
     # Initialize checkpointer if not provided
     if checkpointer is None:
-        # Ensure checkpoint database directory exists
-        checkpoint_path = settings.checkpoint_db_path
-        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
-        # Create SQLite connection and SqliteSaver directly
-        # check_same_thread=False is OK as SqliteSaver uses a lock for thread safety
-        conn = sqlite3.connect(str(checkpoint_path), check_same_thread=False)
-        checkpointer = SqliteSaver(conn)
+        checkpointer = create_checkpointer(settings.checkpoint_db_path)
     
     # Create tools using StructuredTool
     # Each tool allows the assistant to call external functions
@@ -75,12 +75,25 @@ def create_agent_executor(
         he needs to type 'limpar', 'clear' or 'reset'.
     """)
     
+    # Limit what is sent to the model to the summary and the latest turns
+    # The checkpoint still keeps the full history
+    middleware: list[AgentMiddleware] = []
+    if settings.context_max_tokens > 0:
+        middleware.append(create_context_window_middleware(
+            max_tokens=settings.context_max_tokens,
+            keep_turns=settings.context_keep_turns
+        ))
+    
     # Create agent using LangChain's new API with checkpointer
     agent = create_agent(
         model=llm,
         tools=tools,
         system_prompt=system_prompt,
-        checkpointer=checkpointer
+        checkpointer=checkpointer,
+        middleware=middleware
     )
     
+    # Trace the agent run and its model and tool calls when a trace is active
+    agent = agent.with_config(callbacks=[TracingCallbackHandler()])
+    
     return agent, checkpointer
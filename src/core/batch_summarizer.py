@@ -0,0 +1,132 @@
+"""
+Module for summarizing stored conversations offline, in batch.
+Threads over the message limit are summarized ahead of time, so that
+reopening a long conversation does not wait for the summarizer.
+"""
+
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any
+
+from langchain_openai import ChatOpenAI
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from src.core.summarizer import (
+    MAX_MESSAGES_BEFORE_SUMMARIZE,
+    create_summary_llm,
+    get_message_count,
+    summarize_conversation,
+)
+from src.database.repository import ConversationDB
+
+
+class RateLimiter:
+    """Spaces out calls so that at most max_per_minute start per minute."""
+    
+    def __init__(self, max_per_minute: float) -> None:
+        """
+        Initializes the rate limiter.
+        
+        Args:
+            max_per_minute: Maximum number of calls per minute (0 disables the limit)
+        """
+        self.interval = 60.0 / max_per_minute if max_per_minute > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def wait(self) -> None:
+        """Blocks until the next call is allowed."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def find_threads_to_summarize(
+    db: ConversationDB,
+    checkpointer: BaseCheckpointSaver,
+    max_messages: int = MAX_MESSAGES_BEFORE_SUMMARIZE
+) -> list[str]:
+    """
+    Finds the stored threads whose history exceeds the message limit.
+    
+    Args:
+        db: Database instance with the conversation metadata
+        checkpointer: Checkpoint saver instance
+        max_messages: Message limit before summarization
+        
+    Returns:
+        List of thread IDs that need summarization
+    """
+    return [
+        thread_id
+        for thread_id in db.get_thread_ids()
+        if get_message_count(checkpointer, thread_id) > max_messages
+    ]
+
+
+def summarize_threads(
+    checkpointer: BaseCheckpointSaver,
+    thread_ids: list[str],
+    llm: ChatOpenAI | None = None,
+    workers: int = 4,
+    max_per_minute: float = 0,
+    on_progress: Callable[[int, int, str, bool], None] | None = None
+) -> dict[str, Any]:
+    """
+    Summarizes the given threads with a bounded worker pool.
+    
+    Args:
+        checkpointer: Checkpoint saver instance
+        thread_ids: Thread IDs to summarize
+        llm: Language model for summarization. If None, creates a new instance.
+        workers: Maximum number of concurrent summarizations
+        max_per_minute: Maximum summarizations started per minute (0 = unlimited)
+        on_progress: Optional callback called with
+            (done, total, thread_id, success) after each thread
+        
+    Returns:
+        Dictionary with total, summarized, failed, elapsed_seconds
+        and throughput (threads per second)
+    """
+    if llm is None:
+        llm = create_summary_llm()
+    
+    rate_limiter = RateLimiter(max_per_minute)
+    
+    def _summarize(thread_id: str) -> bool:
+        rate_limiter.wait()
+        return summarize_conversation(checkpointer, thread_id, llm, verbose=False)
+    
+    summarized = 0
+    failed = 0
+    start = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(_summarize, thread_id): thread_id
+            for thread_id in thread_ids
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            success = future.result()
+            if success:
+                summarized += 1
+            else:
+                failed += 1
+            if on_progress:
+                on_progress(done, len(thread_ids), futures[future], success)
+    
+    elapsed = time.perf_counter() - start
+    return {
+        "total": len(thread_ids),
+        "summarized": summarized,
+        "failed": failed,
+        "elapsed_seconds": elapsed,
+        "throughput": summarized / elapsed if elapsed > 0 else 0.0,
+    }
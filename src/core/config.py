@@ -11,6 +11,43 @@ DEFAULT_CONVERSATION_DB_PATH = Path("data/conversations.db")
 DEFAULT_CHECKPOINT_DB_PATH = Path("data/checkpoints.db")
 DEFAULT_MODEL_NAME = "gpt-4o-mini"
 DEFAULT_TEMPERATURE = 0.5
+DEFAULT_CONTEXT_MAX_TOKENS = 4000
+DEFAULT_CONTEXT_KEEP_TURNS = 10
+DEFAULT_SQLITE_JOURNAL_MODE = "WAL"
+DEFAULT_SQLITE_SYNCHRONOUS = "NORMAL"
+DEFAULT_SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # 256 MB
+DEFAULT_SQLITE_CACHE_SIZE = -64000  # Negative values are in KiB (~64 MB)
+DEFAULT_SQLITE_BUSY_TIMEOUT_MS = 5000
+DEFAULT_SQLITE_BUSY_RETRIES = 3
+DEFAULT_CHECKPOINT_KEEP_LAST = 1
+DEFAULT_CHECKPOINT_COMPACTION_INTERVAL = 0  # Seconds, 0 disables scheduled compaction
+DEFAULT_CHECKPOINT_COMPRESSION = "ZLIB"
+DEFAULT_CHECKPOINT_COMPRESSION_THRESHOLD = 1024  # Bytes
+DEFAULT_CHECKPOINT_CACHE_BYTES = 64 * 1024 * 1024  # 64 MB, 0 disables the cache
+DEFAULT_CHECKPOINT_FLUSH_INTERVAL_MS = 0  # 0 commits every checkpoint immediately
+DEFAULT_CHECKPOINT_SHARDS = 1
+DEFAULT_ACTIVITY_FLUSH_INTERVAL = 5  # Seconds, 0 writes activity at the end of every turn
+DEFAULT_STORAGE_LAYOUT = "SEPARATE"
+DEFAULT_RENDER_FRAME_MS = 16  # ~60 frames per second, 0 writes every token right away
+DEFAULT_METRICS_PORT = 0  # 0 disables the /metrics endpoint
+DEFAULT_LLM_PROVIDER = "OPENAI"
+DEFAULT_FAKE_LLM_LATENCY_MS = 300  # Time to first token of the fake model
+DEFAULT_FAKE_LLM_TOKENS_PER_SECOND = 50  # 0 streams the whole answer at once
+DEFAULT_COUNTRIES_API_URL = "https://restcountries.com"
+DEFAULT_EXCHANGE_API_URL = "https://api.exchangerate-api.com"
+DEFAULT_PROFILE_MODE = "OFF"
+DEFAULT_PROFILER = "CPROFILE"
+DEFAULT_PROFILE_DIR = Path("data/profiles")
+DEFAULT_PROFILE_SAMPLE_INTERVAL_MS = 5
+DEFAULT_PROFILE_MEMORY_FRAMES = 1  # Frames kept per allocation, 0 disables tracemalloc
+
+SQLITE_JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SQLITE_SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+CHECKPOINT_COMPRESSION_CODECS = ("NONE", "ZLIB", "ZSTD")
+STORAGE_LAYOUTS = ("SEPARATE", "UNIFIED")
+LLM_PROVIDERS = ("OPENAI", "FAKE")
+PROFILE_MODES = ("OFF", "TURN", "SESSION")
+PROFILERS = ("CPROFILE", "SAMPLING")
 
 
 def _validate_api_key(api_key: str | None) -> str:
@@ -59,6 +96,56 @@ def _validate_temperature(temperature_raw: str) -> float:
     return temperature
 
 
+def _validate_int(value_raw: str, name: str, minimum: int = 0) -> int:
+    """
+    Validates and converts an integer value.
+
+    Args:
+        value_raw: Integer value from environment.
+        name: Environment variable name, used in error messages.
+        minimum: Smallest accepted value.
+
+    Returns:
+        Validated value as int.
+
+    Raises:
+        ValueError: If the value cannot be parsed as int
+                or if it is lower than the minimum.
+    """
+    try:
+        value = int(value_raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name} value: {value_raw!r}")
+
+    if value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {value}")
+
+    return value
+
+
+def _validate_choice(value_raw: str, name: str, choices: tuple[str, ...]) -> str:
+    """
+    Validates a value against a list of accepted choices (case insensitive).
+
+    Args:
+        value_raw: Value from environment.
+        name: Environment variable name, used in error messages.
+        choices: Accepted values, in upper case.
+
+    Returns:
+        Validated value in upper case.
+
+    Raises:
+        ValueError: If the value is not one of the choices.
+    """
+    value = value_raw.strip().upper()
+    if value not in choices:
+        raise ValueError(
+            f"Invalid {name} value: {value_raw!r} (expected one of {', '.join(choices)})"
+        )
+    return value
+
+
 class Settings:
     """Application settings."""
     
@@ -68,7 +155,40 @@ class Settings:
         conversation_db_path: Path = DEFAULT_CONVERSATION_DB_PATH,
         checkpoint_db_path: Path = DEFAULT_CHECKPOINT_DB_PATH,
         model_name: str = DEFAULT_MODEL_NAME,
-        temperature: float = DEFAULT_TEMPERATURE
+        temperature: float = DEFAULT_TEMPERATURE,
+        context_max_tokens: int = DEFAULT_CONTEXT_MAX_TOKENS,
+        context_keep_turns: int = DEFAULT_CONTEXT_KEEP_TURNS,
+        sqlite_journal_mode: str = DEFAULT_SQLITE_JOURNAL_MODE,
+        sqlite_synchronous: str = DEFAULT_SQLITE_SYNCHRONOUS,
+        sqlite_mmap_size: int = DEFAULT_SQLITE_MMAP_SIZE,
+        sqlite_cache_size: int = DEFAULT_SQLITE_CACHE_SIZE,
+        sqlite_busy_timeout_ms: int = DEFAULT_SQLITE_BUSY_TIMEOUT_MS,
+        sqlite_busy_retries: int = DEFAULT_SQLITE_BUSY_RETRIES,
+        checkpoint_keep_last: int = DEFAULT_CHECKPOINT_KEEP_LAST,
+        checkpoint_compaction_interval: int = DEFAULT_CHECKPOINT_COMPACTION_INTERVAL,
+        checkpoint_compression: str = DEFAULT_CHECKPOINT_COMPRESSION,
+        checkpoint_compression_threshold: int = DEFAULT_CHECKPOINT_COMPRESSION_THRESHOLD,
+        checkpoint_cache_bytes: int = DEFAULT_CHECKPOINT_CACHE_BYTES,
+        checkpoint_flush_interval_ms: int = DEFAULT_CHECKPOINT_FLUSH_INTERVAL_MS,
+        checkpoint_shards: int = DEFAULT_CHECKPOINT_SHARDS,
+        activity_flush_interval: int = DEFAULT_ACTIVITY_FLUSH_INTERVAL,
+        storage_layout: str = DEFAULT_STORAGE_LAYOUT,
+        render_frame_ms: int = DEFAULT_RENDER_FRAME_MS,
+        timings_log_path: Path | None = None,
+        trace_log_path: Path | None = None,
+        metrics_port: int = DEFAULT_METRICS_PORT,
+        metrics_path: Path | None = None,
+        llm_provider: str = DEFAULT_LLM_PROVIDER,
+        fake_llm_scenario_path: Path | None = None,
+        fake_llm_latency_ms: int = DEFAULT_FAKE_LLM_LATENCY_MS,
+        fake_llm_tokens_per_second: int = DEFAULT_FAKE_LLM_TOKENS_PER_SECOND,
+        countries_api_url: str = DEFAULT_COUNTRIES_API_URL,
+        exchange_api_url: str = DEFAULT_EXCHANGE_API_URL,
+        profile_mode: str = DEFAULT_PROFILE_MODE,
+        profiler: str = DEFAULT_PROFILER,
+        profile_dir: Path = DEFAULT_PROFILE_DIR,
+        profile_sample_interval_ms: int = DEFAULT_PROFILE_SAMPLE_INTERVAL_MS,
+        profile_memory_frames: int = DEFAULT_PROFILE_MEMORY_FRAMES
     ):
         """
         Initialize Settings instance.
@@ -79,12 +199,100 @@ class Settings:
             checkpoint_db_path: Path to the checkpoint database file
             model_name: Name of the AI model to use
             temperature: Controls creativity (0.0 = deterministic, 2.0 = very creative)
+            context_max_tokens: Token budget for the messages sent to the model
+                on each call (0 disables windowing)
+            context_keep_turns: Maximum number of recent turns sent to the model
+            sqlite_journal_mode: SQLite journal mode (WAL lets readers run during writes)
+            sqlite_synchronous: SQLite synchronous level
+            sqlite_mmap_size: Bytes of the database file mapped in memory
+            sqlite_cache_size: SQLite page cache size (negative values are in KiB)
+            sqlite_busy_timeout_ms: Time SQLite waits for a lock before failing
+            sqlite_busy_retries: Retries of an operation that failed with a busy database
+            checkpoint_keep_last: Checkpoints kept per thread by compaction
+            checkpoint_compaction_interval: Seconds between scheduled compactions
+                while the CLI is running (0 disables)
+            checkpoint_compression: Codec used to compress checkpoints (NONE, ZLIB or ZSTD)
+            checkpoint_compression_threshold: Payloads smaller than this many
+                bytes are stored uncompressed
+            checkpoint_cache_bytes: Approximate memory used to cache recent
+                checkpoints (0 disables the cache)
+            checkpoint_flush_interval_ms: Milliseconds checkpoint writes are
+                buffered before a group commit (0 commits every write)
+            checkpoint_shards: Number of SQLite files the threads are spread over
+            activity_flush_interval: Seconds conversation activity (updated_at,
+                message count, last message) is buffered before it is written
+                (0 writes it at the end of every turn)
+            storage_layout: SEPARATE keeps checkpoints in their own file;
+                UNIFIED stores them in the conversation database, on the same
+                connection, and commits each turn in a single transaction
+            render_frame_ms: Milliseconds streamed tokens are coalesced before
+                they are written to the terminal (0 writes every token)
+            timings_log_path: JSON Lines file the latency breakdown of each
+                turn is appended to (None disables it)
+            trace_log_path: File the spans of each turn are appended to, in
+                the OTLP JSON format (None disables tracing)
+            metrics_port: Local TCP port serving the metrics on /metrics
+                (0 disables the endpoint)
+            metrics_path: File the metrics are written to after each turn
+                (None disables it)
+            llm_provider: OPENAI calls the OpenAI API; FAKE answers from a
+                local scenario script, with no network access
+            fake_llm_scenario_path: JSON scenario of the FAKE model (None uses
+                the built-in one)
+            fake_llm_latency_ms: Milliseconds the FAKE model waits before its
+                first token
+            fake_llm_tokens_per_second: Rate the FAKE model streams its answers
+                at (0 streams them at once)
+            countries_api_url: Base URL of the REST Countries API
+            exchange_api_url: Base URL of the exchange rate API
+            profile_mode: OFF, TURN (one profile per turn of the CLI) or
+                SESSION (one profile of the whole CLI session or maintenance job)
+            profiler: CPROFILE records every function call; SAMPLING records
+                the stacks of all threads at a fixed interval, with less overhead
+            profile_dir: Directory the profiles and their summaries are written to
+            profile_sample_interval_ms: Milliseconds between the samples of the
+                SAMPLING profiler
+            profile_memory_frames: Stack frames tracemalloc keeps per
+                allocation while profiling (0 disables memory snapshots)
         """
         self.openai_api_key = openai_api_key
         self.conversation_db_path = conversation_db_path
         self.checkpoint_db_path = checkpoint_db_path
         self.model_name = model_name
         self.temperature = temperature
+        self.context_max_tokens = context_max_tokens
+        self.context_keep_turns = context_keep_turns
+        self.sqlite_journal_mode = sqlite_journal_mode
+        self.sqlite_synchronous = sqlite_synchronous
+        self.sqlite_mmap_size = sqlite_mmap_size
+        self.sqlite_cache_size = sqlite_cache_size
+        self.sqlite_busy_timeout_ms = sqlite_busy_timeout_ms
+        self.sqlite_busy_retries = sqlite_busy_retries
+        self.checkpoint_keep_last = checkpoint_keep_last
+        self.checkpoint_compaction_interval = checkpoint_compaction_interval
+        self.checkpoint_compression = checkpoint_compression
+        self.checkpoint_compression_threshold = checkpoint_compression_threshold
+        self.checkpoint_cache_bytes = checkpoint_cache_bytes
+        self.checkpoint_flush_interval_ms = checkpoint_flush_interval_ms
+        self.checkpoint_shards = checkpoint_shards
+        self.activity_flush_interval = activity_flush_interval
+        self.storage_layout = storage_layout
+        self.render_frame_ms = render_frame_ms
+        self.timings_log_path = timings_log_path
+        self.trace_log_path = trace_log_path
+        self.metrics_port = metrics_port
+        self.metrics_path = metrics_path
+        self.llm_provider = llm_provider
+        self.fake_llm_scenario_path = fake_llm_scenario_path
+        self.fake_llm_latency_ms = fake_llm_latency_ms
+        self.fake_llm_tokens_per_second = fake_llm_tokens_per_second
+        self.countries_api_url = countries_api_url
+        self.exchange_api_url = exchange_api_url
+        self.profile_mode = profile_mode
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.profile_sample_interval_ms = profile_sample_interval_ms
+        self.profile_memory_frames = profile_memory_frames
 
 
 def create_settings_from_env() -> Settings:
@@ -95,18 +303,187 @@ def create_settings_from_env() -> Settings:
         Configured Settings instance
         
     Raises:
-        ValueError: If OPENAI_API_KEY is not found or invalid,
-                   or if TEMPERATURE is invalid
+        ValueError: If OPENAI_API_KEY is not found or invalid (unless
+                   LLM_PROVIDER is FAKE), or if TEMPERATURE or another setting is invalid
     """
     # Load environment variables from .env file
     load_dotenv()
 
-    # Validate and get API key
-    api_key = _validate_api_key(os.getenv("OPENAI_API_KEY"))
+    # Validate and get model provider and API key
+    # (the fake model runs offline and needs no key)
+    llm_provider = _validate_choice(
+        os.getenv("LLM_PROVIDER", DEFAULT_LLM_PROVIDER),
+        "LLM_PROVIDER",
+        LLM_PROVIDERS
+    )
+    if llm_provider == "FAKE":
+        api_key = os.getenv("OPENAI_API_KEY", "")
+    else:
+        api_key = _validate_api_key(os.getenv("OPENAI_API_KEY"))
     
     # Validate and get temperature
     temp_raw = os.getenv("TEMPERATURE", str(DEFAULT_TEMPERATURE))
     temperature = _validate_temperature(temp_raw)
+
+    # Validate and get context window limits
+    context_max_tokens = _validate_int(
+        os.getenv("CONTEXT_MAX_TOKENS", str(DEFAULT_CONTEXT_MAX_TOKENS)),
+        "CONTEXT_MAX_TOKENS"
+    )
+    context_keep_turns = _validate_int(
+        os.getenv("CONTEXT_KEEP_TURNS", str(DEFAULT_CONTEXT_KEEP_TURNS)),
+        "CONTEXT_KEEP_TURNS",
+        minimum=1
+    )
+
+    # Validate and get SQLite tuning
+    sqlite_journal_mode = _validate_choice(
+        os.getenv("SQLITE_JOURNAL_MODE", DEFAULT_SQLITE_JOURNAL_MODE),
+        "SQLITE_JOURNAL_MODE",
+        SQLITE_JOURNAL_MODES
+    )
+    sqlite_synchronous = _validate_choice(
+        os.getenv("SQLITE_SYNCHRONOUS", DEFAULT_SQLITE_SYNCHRONOUS),
+        "SQLITE_SYNCHRONOUS",
+        SQLITE_SYNCHRONOUS_MODES
+    )
+    sqlite_mmap_size = _validate_int(
+        os.getenv("SQLITE_MMAP_SIZE", str(DEFAULT_SQLITE_MMAP_SIZE)),
+        "SQLITE_MMAP_SIZE"
+    )
+    sqlite_cache_size = _validate_int(
+        os.getenv("SQLITE_CACHE_SIZE", str(DEFAULT_SQLITE_CACHE_SIZE)),
+        "SQLITE_CACHE_SIZE",
+        minimum=-(2**31)
+    )
+    sqlite_busy_timeout_ms = _validate_int(
+        os.getenv("SQLITE_BUSY_TIMEOUT_MS", str(DEFAULT_SQLITE_BUSY_TIMEOUT_MS)),
+        "SQLITE_BUSY_TIMEOUT_MS"
+    )
+    sqlite_busy_retries = _validate_int(
+        os.getenv("SQLITE_BUSY_RETRIES", str(DEFAULT_SQLITE_BUSY_RETRIES)),
+        "SQLITE_BUSY_RETRIES"
+    )
+
+    # Validate and get checkpoint compaction
+    checkpoint_keep_last = _validate_int(
+        os.getenv("CHECKPOINT_KEEP_LAST", str(DEFAULT_CHECKPOINT_KEEP_LAST)),
+        "CHECKPOINT_KEEP_LAST",
+        minimum=1
+    )
+    checkpoint_compaction_interval = _validate_int(
+        os.getenv(
+            "CHECKPOINT_COMPACTION_INTERVAL", str(DEFAULT_CHECKPOINT_COMPACTION_INTERVAL)
+        ),
+        "CHECKPOINT_COMPACTION_INTERVAL"
+    )
+
+    # Validate and get checkpoint compression
+    checkpoint_compression = _validate_choice(
+        os.getenv("CHECKPOINT_COMPRESSION", DEFAULT_CHECKPOINT_COMPRESSION),
+        "CHECKPOINT_COMPRESSION",
+        CHECKPOINT_COMPRESSION_CODECS
+    )
+    checkpoint_compression_threshold = _validate_int(
+        os.getenv(
+            "CHECKPOINT_COMPRESSION_THRESHOLD", str(DEFAULT_CHECKPOINT_COMPRESSION_THRESHOLD)
+        ),
+        "CHECKPOINT_COMPRESSION_THRESHOLD"
+    )
+    
+    # Validate and get checkpoint cache size
+    checkpoint_cache_bytes = _validate_int(
+        os.getenv("CHECKPOINT_CACHE_BYTES", str(DEFAULT_CHECKPOINT_CACHE_BYTES)),
+        "CHECKPOINT_CACHE_BYTES"
+    )
+    
+    # Validate and get checkpoint write-behind interval
+    checkpoint_flush_interval_ms = _validate_int(
+        os.getenv("CHECKPOINT_FLUSH_INTERVAL_MS", str(DEFAULT_CHECKPOINT_FLUSH_INTERVAL_MS)),
+        "CHECKPOINT_FLUSH_INTERVAL_MS"
+    )
+    
+    # Validate and get checkpoint shard count
+    checkpoint_shards = _validate_int(
+        os.getenv("CHECKPOINT_SHARDS", str(DEFAULT_CHECKPOINT_SHARDS)),
+        "CHECKPOINT_SHARDS",
+        minimum=1
+    )
+    
+    # Validate and get conversation activity flush interval
+    activity_flush_interval = _validate_int(
+        os.getenv("ACTIVITY_FLUSH_INTERVAL", str(DEFAULT_ACTIVITY_FLUSH_INTERVAL)),
+        "ACTIVITY_FLUSH_INTERVAL"
+    )
+    
+    # Validate and get storage layout
+    storage_layout = _validate_choice(
+        os.getenv("STORAGE_LAYOUT", DEFAULT_STORAGE_LAYOUT),
+        "STORAGE_LAYOUT",
+        STORAGE_LAYOUTS
+    )
+    if storage_layout == "UNIFIED" and checkpoint_shards > 1:
+        raise ValueError(
+            "STORAGE_LAYOUT=UNIFIED keeps checkpoints in a single file "
+            f"and cannot be combined with CHECKPOINT_SHARDS={checkpoint_shards}"
+        )
+    
+    # Validate and get terminal frame interval
+    render_frame_ms = _validate_int(
+        os.getenv("RENDER_FRAME_MS", str(DEFAULT_RENDER_FRAME_MS)),
+        "RENDER_FRAME_MS"
+    )
+    
+    # Get turn timings log (empty disables it)
+    timings_log_path = os.getenv("TIMINGS_LOG_PATH", "").strip()
+    
+    # Get trace file (empty disables tracing)
+    trace_log_path = os.getenv("TRACE_LOG_PATH", "").strip()
+    
+    # Validate and get metrics endpoint port and file (empty disables it)
+    metrics_port = _validate_int(
+        os.getenv("METRICS_PORT", str(DEFAULT_METRICS_PORT)),
+        "METRICS_PORT"
+    )
+    if metrics_port > 65535:
+        raise ValueError(f"METRICS_PORT must be at most 65535, got {metrics_port}")
+    metrics_path = os.getenv("METRICS_PATH", "").strip()
+    
+    # Validate and get fake model scenario and pace (empty uses the built-in scenario)
+    fake_llm_scenario_path = os.getenv("FAKE_LLM_SCENARIO", "").strip()
+    fake_llm_latency_ms = _validate_int(
+        os.getenv("FAKE_LLM_LATENCY_MS", str(DEFAULT_FAKE_LLM_LATENCY_MS)),
+        "FAKE_LLM_LATENCY_MS"
+    )
+    fake_llm_tokens_per_second = _validate_int(
+        os.getenv("FAKE_LLM_TOKENS_PER_SECOND", str(DEFAULT_FAKE_LLM_TOKENS_PER_SECOND)),
+        "FAKE_LLM_TOKENS_PER_SECOND"
+    )
+    
+    # Get external API base URLs (point them to 'python -m src.api.stub_server' to run offline)
+    countries_api_url = os.getenv("COUNTRIES_API_URL", DEFAULT_COUNTRIES_API_URL).strip().rstrip("/")
+    exchange_api_url = os.getenv("EXCHANGE_API_URL", DEFAULT_EXCHANGE_API_URL).strip().rstrip("/")
+    
+    # Validate and get profiling mode, profiler and output directory
+    profile_mode = _validate_choice(
+        os.getenv("PROFILE", DEFAULT_PROFILE_MODE),
+        "PROFILE",
+        PROFILE_MODES
+    )
+    profiler = _validate_choice(
+        os.getenv("PROFILER", DEFAULT_PROFILER),
+        "PROFILER",
+        PROFILERS
+    )
+    profile_sample_interval_ms = _validate_int(
+        os.getenv("PROFILE_SAMPLE_INTERVAL_MS", str(DEFAULT_PROFILE_SAMPLE_INTERVAL_MS)),
+        "PROFILE_SAMPLE_INTERVAL_MS",
+        minimum=1
+    )
+    profile_memory_frames = _validate_int(
+        os.getenv("PROFILE_MEMORY_FRAMES", str(DEFAULT_PROFILE_MEMORY_FRAMES)),
+        "PROFILE_MEMORY_FRAMES"
+    )
     
     return Settings(
         openai_api_key=api_key,
@@ -114,6 +491,39 @@ def create_settings_from_env() -> Settings:
         checkpoint_db_path=Path(os.getenv("CHECKPOINT_DB_PATH", str(DEFAULT_CHECKPOINT_DB_PATH))),
         model_name=os.getenv("MODEL_NAME", DEFAULT_MODEL_NAME),
         temperature=temperature,
+        context_max_tokens=context_max_tokens,
+        context_keep_turns=context_keep_turns,
+        sqlite_journal_mode=sqlite_journal_mode,
+        sqlite_synchronous=sqlite_synchronous,
+        sqlite_mmap_size=sqlite_mmap_size,
+        sqlite_cache_size=sqlite_cache_size,
+        sqlite_busy_timeout_ms=sqlite_busy_timeout_ms,
+        sqlite_busy_retries=sqlite_busy_retries,
+        checkpoint_keep_last=checkpoint_keep_last,
+        checkpoint_compaction_interval=checkpoint_compaction_interval,
+        checkpoint_compression=checkpoint_compression,
+        checkpoint_compression_threshold=checkpoint_compression_threshold,
+        checkpoint_cache_bytes=checkpoint_cache_bytes,
+        checkpoint_flush_interval_ms=checkpoint_flush_interval_ms,
+        checkpoint_shards=checkpoint_shards,
+        activity_flush_interval=activity_flush_interval,
+        storage_layout=storage_layout,
+        render_frame_ms=render_frame_ms,
+        timings_log_path=Path(timings_log_path) if timings_log_path else None,
+        trace_log_path=Path(trace_log_path) if trace_log_path else None,
+        metrics_port=metrics_port,
+        metrics_path=Path(metrics_path) if metrics_path else None,
+        llm_provider=llm_provider,
+        fake_llm_scenario_path=Path(fake_llm_scenario_path) if fake_llm_scenario_path else None,
+        fake_llm_latency_ms=fake_llm_latency_ms,
+        fake_llm_tokens_per_second=fake_llm_tokens_per_second,
+        countries_api_url=countries_api_url,
+        exchange_api_url=exchange_api_url,
+        profile_mode=profile_mode,
+        profiler=profiler,
+        profile_dir=Path(os.getenv("PROFILE_DIR", str(DEFAULT_PROFILE_DIR))),
+        profile_sample_interval_ms=profile_sample_interval_ms,
+        profile_memory_frames=profile_memory_frames,
     )
 
 
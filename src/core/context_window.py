@@ -0,0 +1,107 @@
+"""
+Module for limiting the messages sent to the model on each call.
+The checkpoint keeps the full history; only the model input is trimmed.
+"""
+
+from langchain.agents.middleware import AgentMiddleware, wrap_model_call
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from src.core.summarizer import SUMMARY_HEADER, is_pinned
+
+
+def select_context_messages(
+    messages: list[BaseMessage],
+    max_tokens: int,
+    keep_turns: int
+) -> list[BaseMessage]:
+    """
+    Selects the messages that fit in the model context window.
+    Order of priority: conversation summary, pinned facts
+    (created with the CLI 'fixar' command) and then
+    the most recent turns, newest first, until the budget is used.
+    The latest turn is always kept, even if it exceeds the budget.
+    
+    Args:
+        messages: Full message history from the checkpoint
+        max_tokens: Approximate token budget for the selected messages
+        keep_turns: Maximum number of recent turns to keep
+        
+    Returns:
+        List of messages to send to the model, in chronological order
+    """
+    summary = [msg for msg in messages if _is_summary(msg)]
+    pinned = [msg for msg in messages if not _is_summary(msg) and is_pinned(msg)]
+    history = [msg for msg in messages if not _is_summary(msg) and not is_pinned(msg)]
+    
+    budget = max_tokens - count_tokens_approximately(summary + pinned)
+    
+    # Walk turns from newest to oldest while they fit in the budget
+    selected_turns: list[list[BaseMessage]] = []
+    for turn in reversed(_split_turns(history)[-keep_turns:]):
+        turn_tokens = count_tokens_approximately(turn)
+        if selected_turns and turn_tokens > budget:
+            break
+        selected_turns.insert(0, turn)
+        budget -= turn_tokens
+    
+    return summary + pinned + [msg for turn in selected_turns for msg in turn]
+
+
+def create_context_window_middleware(
+    max_tokens: int,
+    keep_turns: int
+) -> AgentMiddleware:
+    """
+    Creates the agent middleware that trims the model input before each call.
+    
+    Args:
+        max_tokens: Approximate token budget for the messages sent to the model
+        keep_turns: Maximum number of recent turns sent to the model
+        
+    Returns:
+        Middleware to be passed to create_agent
+    """
+    @wrap_model_call(name="ContextWindowMiddleware")
+    def context_window(request, handler):
+        messages = select_context_messages(request.messages, max_tokens, keep_turns)
+        return handler(request.override(messages=messages))
+    
+    return context_window
+
+
+def _is_summary(message: BaseMessage) -> bool:
+    """
+    Checks if a message is a summary created by the summarizer.
+    
+    Args:
+        message: Message to check
+        
+    Returns:
+        True if the message is a conversation summary
+    """
+    return (
+        isinstance(message, AIMessage)
+        and isinstance(message.content, str)
+        and message.content.startswith(SUMMARY_HEADER)
+    )
+
+
+def _split_turns(messages: list[BaseMessage]) -> list[list[BaseMessage]]:
+    """
+    Groups messages into turns, each one starting at a user message.
+    Keeping whole turns avoids separating tool calls from their results.
+    
+    Args:
+        messages: Messages in chronological order
+        
+    Returns:
+        List of turns, each turn being a list of messages
+    """
+    turns: list[list[BaseMessage]] = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage) or not turns:
+            turns.append([msg])
+        else:
+            turns[-1].append(msg)
+    return turns
@@ -0,0 +1,288 @@
+"""
+Deterministic chat model for benchmarks and offline runs.
+Answers from a scenario script instead of calling the OpenAI API: it streams
+its answers token by token and calls tools like a real model, with a
+configurable time to first token and token rate.
+"""
+
+import json
+import re
+import time
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.chat_models import generate_from_stream
+from langchain_core.messages import (
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+)
+from langchain_core.messages.tool import tool_call_chunk
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from pydantic import Field
+
+from src.core.config import settings
+
+FAKE_MODEL_NAME = "scripted"
+TOOL_RESULT_PLACEHOLDER = "{tool_result}"
+
+# Rules are tried in order against the latest user message; the first whose
+# regular expression matches decides the answer. A rule with a tool (or a list
+# of "tools", called together) calls it first and answers once the results
+# come back ({tool_result} is replaced by them).
+DEFAULT_SCENARIO: dict[str, Any] = {
+    'rules': [
+        {
+            'match': r"^You are a system that summarizes conversations",
+            'answer': (
+                "- Main topics: countries and exchange rates\n"
+                "- Important facts: the user asked about Brazil and the dollar to real rate\n"
+                "- Decisions or conclusions: none\n"
+                "- Open questions or pending actions (if any): none"
+            ),
+        },
+        {
+            'match': r"(?i)viage[mn]|viajar|trip|travel",
+            'tools': [
+                {'tool': "get_country_info", 'args': {'country_name': "Japan"}},
+                {'tool': "get_exchange_rate", 'args': {'base_currency': "BRL", 'target_currency': "JPY"}},
+            ],
+            'answer': (
+                "Para a sua viagem, reuni o seguinte:\n\n"
+                f"{TOOL_RESULT_PLACEHOLDER}\n"
+                "Boa viagem!"
+            ),
+        },
+        {
+            'match': r"(?i)c[âa]mbio|cota[çc][ãa]o|exchange|d[óo]lar|dollar|euro|reais|\breal\b",
+            'tool': "get_exchange_rate",
+            'args': {'base_currency': "USD", 'target_currency': "BRL"},
+            'answer': (
+                "Aqui está a cotação que encontrei:\n\n"
+                f"{TOOL_RESULT_PLACEHOLDER}\n"
+                "Se quiser, posso consultar a cotação de outras moedas."
+            ),
+        },
+        {
+            'match': r"(?i)capital|popula[çc]|habitantes|inhabitants|pa[íi]s|country|idioma|language",
+            'tool': "get_country_info",
+            'args': {'country_name': "Brazil"},
+            'answer': (
+                "Encontrei estas informações:\n\n"
+                f"{TOOL_RESULT_PLACEHOLDER}\n"
+                "Quer saber mais alguma coisa sobre este ou outro país?"
+            ),
+        },
+    ],
+    'default': (
+        "Posso ajudar com informações sobre países (capital, população, região, "
+        "moeda e idiomas) e com taxas de câmbio entre moedas. O que você gostaria de saber?"
+    ),
+}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that answers from a scenario script.
+    The same conversation always gets the same answers and tool calls.
+    """
+    
+    scenario: dict[str, Any] = Field(default_factory=lambda: DEFAULT_SCENARIO)
+    latency: float = 0.0
+    """Seconds waited before the first token of each call."""
+    tokens_per_second: float = 0.0
+    """Rate tokens are streamed at (0 streams them at once)."""
+    
+    @property
+    def _llm_type(self) -> str:
+        return FAKE_MODEL_NAME
+    
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {
+            'model': FAKE_MODEL_NAME,
+            'latency': self.latency,
+            'tokens_per_second': self.tokens_per_second,
+        }
+    
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Runnable:
+        """
+        Accepts the agent tools. The scenario names the tools it calls.
+        
+        Args:
+            tools: Tools offered to the model
+            **kwargs: Tool choice and other options, ignored
+        
+        Returns:
+            The model itself
+        """
+        return self
+    
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        return generate_from_stream(self._stream(messages, stop, run_manager, **kwargs))
+    
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        answer, tool_calls = self._respond(messages)
+        time.sleep(self.latency)
+        
+        if tool_calls:
+            chunks = [AIMessageChunk(content="", tool_call_chunks=[
+                tool_call_chunk(
+                    name=name, args=json.dumps(args), id=f"call_{len(messages)}_{index}", index=index
+                )
+                for index, (name, args) in enumerate(tool_calls)
+            ])]
+        else:
+            chunks = [AIMessageChunk(content=token) for token in _split_tokens(answer)]
+        
+        for index, chunk in enumerate(chunks):
+            if index and self.tokens_per_second > 0:
+                time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=chunk)
+        
+        input_tokens = count_tokens_approximately(messages)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata={
+            'input_tokens': input_tokens,
+            'output_tokens': len(chunks),
+            'total_tokens': input_tokens + len(chunks),
+        }))
+    
+    def _respond(self, messages: list[BaseMessage]) -> tuple[str, list[tuple[str, dict[str, Any]]]]:
+        """
+        Decides the answer to a conversation.
+        
+        Args:
+            messages: Messages sent to the model
+        
+        Returns:
+            Tuple of (answer text, list of (tool name, arguments) to call first)
+        """
+        question = next(
+            (message.text for message in reversed(messages) if isinstance(message, HumanMessage)),
+            ""
+        )
+        rule = next(
+            (rule for rule in self.scenario['rules'] if re.search(rule['match'], question)),
+            None
+        )
+        if rule is None:
+            return self.scenario['default'], []
+        
+        answer = rule.get('answer', TOOL_RESULT_PLACEHOLDER)
+        tool_calls = [(call['tool'], call.get('args', {})) for call in _rule_tools(rule)]
+        if not tool_calls:
+            return answer, []
+        
+        # Call the tools first, then answer with their results
+        results = []
+        for message in reversed(messages):
+            if not isinstance(message, ToolMessage):
+                break
+            results.insert(0, message.text)
+        if results:
+            return answer.replace(TOOL_RESULT_PLACEHOLDER, "\n".join(results)), []
+        return "", tool_calls
+
+
+def load_scenario(path: Path) -> dict[str, Any]:
+    """
+    Loads a scenario script.
+    The file is a JSON object with a list of "rules" (each with a "match"
+    regular expression and an "answer", plus a "tool" and its "args", or a
+    "tools" list of them, to call first) and the "default" answer when no
+    rule matches.
+    
+    Args:
+        path: Path to the JSON file
+    
+    Returns:
+        Scenario dictionary
+    
+    Raises:
+        ValueError: If the file is not a valid scenario
+    """
+    try:
+        scenario = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid scenario {path}: {e}") from e
+    
+    if not isinstance(scenario, dict) or not isinstance(scenario.get('rules', []), list):
+        raise ValueError(f"Invalid scenario {path}: expected an object with a list of rules")
+    scenario.setdefault('rules', [])
+    scenario.setdefault('default', DEFAULT_SCENARIO['default'])
+    
+    for position, rule in enumerate(scenario['rules']):
+        if not isinstance(rule, dict) or not isinstance(rule.get('match'), str):
+            raise ValueError(f"Invalid scenario {path}: rule {position} has no 'match' pattern")
+        try:
+            re.compile(rule['match'])
+        except re.error as e:
+            raise ValueError(f"Invalid scenario {path}: rule {position}: {e}") from e
+    
+    return scenario
+
+
+def create_fake_chat_model() -> ScriptedChatModel:
+    """
+    Creates the fake chat model configured in settings.
+    
+    Returns:
+        ScriptedChatModel instance
+    """
+    scenario = (
+        load_scenario(settings.fake_llm_scenario_path)
+        if settings.fake_llm_scenario_path else DEFAULT_SCENARIO
+    )
+    return ScriptedChatModel(
+        scenario=scenario,
+        latency=settings.fake_llm_latency_ms / 1000,
+        tokens_per_second=settings.fake_llm_tokens_per_second
+    )
+
+
+def _rule_tools(rule: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Gets the tool calls of a scenario rule.
+    
+    Args:
+        rule: Rule with a single "tool" and its "args", or a "tools" list of them
+    
+    Returns:
+        List of dictionaries with tool and args, empty if the rule calls no tool
+    """
+    if 'tools' in rule:
+        return rule['tools']
+    if 'tool' in rule:
+        return [{'tool': rule['tool'], 'args': rule.get('args', {})}]
+    return []
+
+
+def _split_tokens(text: str) -> list[str]:
+    """
+    Splits an answer into streamed tokens: each word with the whitespace after it.
+    
+    Args:
+        text: Answer text
+    
+    Returns:
+        List of tokens; joined, they give back the text
+    """
+    return re.findall(r"\s*\S+\s*", text) or [text]
@@ -0,0 +1,623 @@
+"""
+In-process metrics in the Prometheus text format.
+Counters and histograms are updated on the hot path of every turn, so each
+thread adds to its own values without taking a lock; the values of all
+threads are only merged when the metrics are read. MetricsServer serves
+them on /metrics for a Prometheus scraper, write_metrics() dumps them to a
+file.
+"""
+
+import operator
+import os
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+# Latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Checkpoint size buckets, in bytes
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[str, ...]
+
+
+class _ThreadOwner:
+    """Kept in thread-local storage only, so it is collected when its thread ends."""
+    
+    __slots__ = ("__weakref__",)
+
+
+class _PerThreadValues:
+    """
+    Values kept per thread: each thread only writes its own dictionary,
+    so updates need no lock. Readers copy the dictionaries of all threads.
+    When a thread ends, its values are folded into those of the threads
+    that ended before it, so memory does not grow with the threads started.
+    """
+    
+    def __init__(
+        self,
+        merge: Callable[[Any, Any], Any] = operator.add,
+        copy: Callable[[Any], Any] = lambda value: value
+    ) -> None:
+        """
+        Initializes the values, empty.
+        
+        Args:
+            merge: Returns the sum of two values of a label set
+            copy: Returns a copy of a value another thread may still update
+        """
+        self._merge = merge
+        self._copy = copy
+        self._local = threading.local()
+        self._shards: list[dict[Labels, Any]] = []
+        self._retired: dict[Labels, Any] = {}
+        self._lock = threading.Lock()
+    
+    def mine(self) -> dict[Labels, Any]:
+        """
+        Gets the values of the calling thread, registering them on first use.
+        
+        Returns:
+            Dictionary of label values to value
+        """
+        try:
+            return self._local.values
+        except AttributeError:
+            values: dict[Labels, Any] = {}
+            owner = _ThreadOwner()
+            self._local.values = values
+            self._local.owner = owner
+            with self._lock:
+                self._shards.append(values)
+            weakref.finalize(owner, self._retire, values)
+            return values
+    
+    def shards(self) -> list[dict[Labels, Any]]:
+        """
+        Copies the values of every thread that updated them.
+        
+        Returns:
+            One dictionary per live thread, and one with the totals of the
+            threads that ended
+        """
+        with self._lock:
+            shards = [self._retired, *self._shards]
+            return [{labels: self._copy(value) for labels, value in shard.items()} for shard in shards]
+    
+    def _retire(self, values: dict[Labels, Any]) -> None:
+        """
+        Folds the values of an ended thread into the retired totals.
+        
+        Args:
+            values: Values of the thread, no longer updated
+        """
+        with self._lock:
+            for labels, value in values.items():
+                retired = self._retired.get(labels)
+                self._retired[labels] = (
+                    self._copy(value) if retired is None else self._merge(retired, value)
+                )
+            self._shards = [shard for shard in self._shards if shard is not values]
+
+
+class Metric(ABC):
+    """Base class of the metrics: a name, a help text and label names."""
+    
+    type_name = ""
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        """
+        Initializes the metric.
+        
+        Args:
+            name: Metric name, e.g. "assistant_turn_duration_seconds"
+            help_text: Description shown in the exposition
+            labelnames: Names of the labels, in the order values are given
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+    
+    @abstractmethod
+    def samples(self) -> list[tuple[str, Labels, float]]:
+        """
+        Gets the current samples.
+        
+        Returns:
+            List of (sample name, label values, value)
+        """
+    
+    def render(self) -> list[str]:
+        """
+        Formats the metric in the Prometheus text format.
+        
+        Returns:
+            Lines of the exposition
+        """
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        for sample_name, label_values, value in self.samples():
+            lines.append(f"{sample_name}{self._format_labels(label_values)} {_format_value(value)}")
+        return lines
+    
+    def _format_labels(self, label_values: Labels) -> str:
+        """
+        Formats the labels of a sample.
+        
+        Args:
+            label_values: Values of the metric labels
+        
+        Returns:
+            Text such as '{tool="get_country_info"}', or '' without labels
+        """
+        pairs = list(zip(self.labelnames, label_values))
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Counter(Metric):
+    """Value that only goes up, e.g. a number of requests."""
+    
+    type_name = "counter"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values = _PerThreadValues()
+    
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        """
+        Adds to the counter.
+        
+        Args:
+            amount: Non-negative amount
+            labels: Label values, in the order of labelnames
+        """
+        values = self._values.mine()
+        values[labels] = values.get(labels, 0.0) + amount
+    
+    def value(self, labels: Labels = ()) -> float:
+        """
+        Gets the total of all threads.
+        
+        Args:
+            labels: Label values, in the order of labelnames
+        
+        Returns:
+            Current value
+        """
+        return sum(shard.get(labels, 0.0) for shard in self._values.shards())
+    
+    def samples(self) -> list[tuple[str, Labels, float]]:
+        totals: dict[Labels, float] = {}
+        for shard in self._values.shards():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return [(f"{self.name}_total", labels, value) for labels, value in sorted(totals.items())]
+
+
+class Gauge(Metric):
+    """Value that goes up and down, e.g. the number of active sessions."""
+    
+    type_name = "gauge"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+    
+    def set(self, value: float, labels: Labels = ()) -> None:
+        """
+        Sets the gauge.
+        
+        Args:
+            value: New value
+            labels: Label values, in the order of labelnames
+        """
+        with self._lock:
+            self._values[labels] = value
+    
+    def inc(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        """
+        Adds to the gauge.
+        
+        Args:
+            amount: Amount, negative to subtract
+            labels: Label values, in the order of labelnames
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+    
+    def dec(self, amount: float = 1.0, labels: Labels = ()) -> None:
+        """
+        Subtracts from the gauge.
+        
+        Args:
+            amount: Amount
+            labels: Label values, in the order of labelnames
+        """
+        self.inc(-amount, labels)
+    
+    def value(self, labels: Labels = ()) -> float:
+        """
+        Gets the gauge.
+        
+        Args:
+            labels: Label values, in the order of labelnames
+        
+        Returns:
+            Current value
+        """
+        with self._lock:
+            return self._values.get(labels, 0.0)
+    
+    def samples(self) -> list[tuple[str, Labels, float]]:
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in sorted(self._values.items())]
+
+
+class _HistogramValue:
+    """Bucket counts, sum and count of one label set in one thread."""
+    
+    __slots__ = ("counts", "sum", "count")
+    
+    def __init__(self, buckets: int) -> None:
+        self.counts = [0] * buckets
+        self.sum = 0.0
+        self.count = 0
+    
+    def copy(self) -> "_HistogramValue":
+        """
+        Copies the value while its thread may still be observing.
+        The count is taken from the copied buckets, so it always matches
+        the +Inf bucket even if an observation was only half recorded.
+        
+        Returns:
+            New histogram value
+        """
+        copied = _HistogramValue(0)
+        copied.counts = list(self.counts)
+        copied.sum = self.sum
+        copied.count = sum(copied.counts)
+        return copied
+    
+    def merge(self, other: "_HistogramValue") -> "_HistogramValue":
+        """
+        Adds the observations of another value to this one.
+        
+        Args:
+            other: Value with the same buckets
+        
+        Returns:
+            This value
+        """
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.sum += other.sum
+        self.count += other.count
+        return self
+
+
+class Histogram(Metric):
+    """Distribution of observed values, e.g. latencies, in cumulative buckets."""
+    
+    type_name = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        """
+        Initializes the histogram.
+        
+        Args:
+            name: Metric name
+            help_text: Description shown in the exposition
+            labelnames: Names of the labels
+            buckets: Upper bounds of the buckets, ascending (+Inf is added)
+        """
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        self._values = _PerThreadValues(merge=_HistogramValue.merge, copy=_HistogramValue.copy)
+    
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        """
+        Records an observation.
+        
+        Args:
+            value: Observed value, e.g. seconds
+            labels: Label values, in the order of labelnames
+        """
+        values = self._values.mine()
+        histogram = values.get(labels)
+        if histogram is None:
+            histogram = values[labels] = _HistogramValue(len(self.buckets) + 1)
+        histogram.counts[bisect_left(self.buckets, value)] += 1
+        histogram.sum += value
+        histogram.count += 1
+    
+    def count(self, labels: Labels = ()) -> int:
+        """
+        Gets the number of observations of all threads.
+        
+        Args:
+            labels: Label values, in the order of labelnames
+        
+        Returns:
+            Number of observations
+        """
+        merged = self._merged().get(labels)
+        return merged.count if merged is not None else 0
+    
+    def samples(self) -> list[tuple[str, Labels, float]]:
+        samples = []
+        bounds = [_format_value(bound) for bound in self.buckets] + ["+Inf"]
+        for labels, histogram in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", labels + (bound,), cumulative))
+            samples.append((f"{self.name}_sum", labels, histogram.sum))
+            samples.append((f"{self.name}_count", labels, histogram.count))
+        return samples
+    
+    def _merged(self) -> dict[Labels, _HistogramValue]:
+        """
+        Adds up the values of all threads.
+        
+        Returns:
+            Dictionary of label values to merged histogram
+        """
+        merged: dict[Labels, _HistogramValue] = {}
+        for shard in self._values.shards():
+            for labels, histogram in shard.items():
+                # The shards are copies, so the first one can be added to
+                if labels in merged:
+                    merged[labels].merge(histogram)
+                else:
+                    merged[labels] = histogram
+        return merged
+    
+    def _format_labels(self, label_values: Labels) -> str:
+        # Bucket samples have one more value, the "le" bound
+        labelnames = self.labelnames
+        if len(label_values) > len(labelnames):
+            labelnames += ("le",)
+        pairs = list(zip(labelnames, label_values))
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Set of metrics exposed together."""
+    
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+    
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        """
+        Gets or creates a counter.
+        
+        Args:
+            name: Metric name, without the _total suffix
+            help_text: Description shown in the exposition
+            labelnames: Names of the labels
+        
+        Returns:
+            Registered counter
+        """
+        return self._register(name, lambda: Counter(name, help_text, labelnames))
+    
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """
+        Gets or creates a gauge.
+        
+        Args:
+            name: Metric name
+            help_text: Description shown in the exposition
+            labelnames: Names of the labels
+        
+        Returns:
+            Registered gauge
+        """
+        return self._register(name, lambda: Gauge(name, help_text, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """
+        Gets or creates a histogram.
+        
+        Args:
+            name: Metric name
+            help_text: Description shown in the exposition
+            labelnames: Names of the labels
+            buckets: Upper bounds of the buckets
+        
+        Returns:
+            Registered histogram
+        """
+        return self._register(name, lambda: Histogram(name, help_text, labelnames, buckets))
+    
+    def render(self) -> str:
+        """
+        Formats every metric in the Prometheus text format.
+        
+        Returns:
+            Exposition text
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = [line for metric in metrics for line in metric.render()]
+        return "\n".join(lines) + "\n"
+    
+    def _register(self, name: str, create: Callable[[], Any]) -> Any:
+        """
+        Gets a metric by name, creating it on first use.
+        
+        Args:
+            name: Metric name
+            create: Function creating the metric
+        
+        Returns:
+            Registered metric
+        """
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = create()
+            return self._metrics[name]
+
+
+class MetricsServer:
+    """Serves the metrics of a registry on /metrics in a background thread."""
+    
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> None:
+        """
+        Initializes the server.
+        
+        Args:
+            registry: Metrics exposed
+            port: TCP port (0 picks a free one)
+            host: Address listened on; only the local machine by default
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+    
+    def start(self) -> None:
+        """Starts listening. self.port is the port actually used."""
+        registry = self.registry
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format: str, *args: Any) -> None:
+                # Scrapes would otherwise be printed in the middle of the conversation
+                pass
+        
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stops the server and waits for its thread to finish."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def write_metrics(path: Path, registry: MetricsRegistry) -> None:
+    """
+    Writes the metrics to a file, replacing it atomically so readers never
+    see a partial file.
+    
+    Args:
+        path: Path to the metrics file
+        registry: Metrics written
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_text(registry.render(), encoding="utf-8")
+    os.replace(temp_path, path)
+
+
+def _format_value(value: float) -> str:
+    """
+    Formats a sample value or bucket bound.
+    
+    Args:
+        value: Number
+    
+    Returns:
+        Integers without a decimal point, other numbers as repr
+    """
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """
+    Escapes a label value.
+    
+    Args:
+        value: Label value
+    
+    Returns:
+        Value with backslashes, quotes and newlines escaped
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Metrics of the application
+REGISTRY = MetricsRegistry()
+
+TURN_SECONDS = REGISTRY.histogram(
+    "assistant_turn_duration_seconds",
+    "Duration of a turn, from the user message to the committed answer"
+)
+TOOL_CALLS = REGISTRY.counter(
+    "assistant_tool_calls", "Tool calls by tool and outcome", ("tool", "outcome")
+)
+HTTP_REQUESTS = REGISTRY.counter(
+    "assistant_http_requests",
+    "Requests to external APIs by host and status code (error when no response)",
+    ("host", "status")
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "assistant_http_request_duration_seconds", "Duration of requests to external APIs", ("host",)
+)
+CHECKPOINT_CACHE_REQUESTS = REGISTRY.counter(
+    "assistant_checkpoint_cache_requests", "Checkpoint cache lookups by result", ("result",)
+)
+CHECKPOINT_BYTES = REGISTRY.histogram(
+    "assistant_checkpoint_size_bytes",
+    "Serialized size of stored checkpoints, messages included",
+    buckets=SIZE_BUCKETS
+)
+SUMMARIZATIONS = REGISTRY.counter(
+    "assistant_summarizations", "Conversation summarizations by outcome", ("outcome",)
+)
+ACTIVE_SESSIONS = REGISTRY.gauge("assistant_active_sessions", "CLI sessions running")
+SQLITE_BUSY_RETRIES = REGISTRY.counter(
+    "assistant_sqlite_busy_retries", "Database operations retried because the database was locked"
+)
+SQLITE_BUSY_WAIT_SECONDS = REGISTRY.counter(
+    "assistant_sqlite_busy_wait_seconds", "Time spent backing off before retrying a locked database"
+)
@@ -0,0 +1,438 @@
+"""
+Module for profiling the assistant inside the real process.
+collect_profile() measures a block of code, such as one turn or a whole
+session, with cProfile (every function call) or a sampling profiler (the
+stacks of all threads at a fixed interval), and takes tracemalloc snapshots
+at its start and end. write_profile() saves the raw profile, the memory
+snapshot and a text summary of the functions with the most cumulative time
+and the largest allocations. profiled() does both with the profiler
+configured in settings.
+"""
+
+import cProfile
+import io
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from src.core.config import PROFILERS, settings
+
+# Rows of each table of the summary
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 15
+
+# Python 3.12 moved cProfile to sys.monitoring, where only one profiler can be
+# active per process, so ThreadProfiler cannot give each thread its own
+THREAD_CPROFILE = sys.version_info < (3, 12)
+
+# Allocations made by the profiling itself are left out of the memory report
+_MEMORY_FILTERS = (
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class ThreadProfiler:
+    """
+    cProfile over several threads.
+    cProfile only sees the thread that enables it, and LangGraph runs nodes
+    in worker threads, so the calling thread and every thread started while
+    profiling get their own profiler; their stats are merged when it stops.
+    Threads already running when it starts are not profiled.
+    Requires Python 3.11 or earlier (see THREAD_CPROFILE).
+    """
+    
+    def __init__(self) -> None:
+        """Initializes the profiler, stopped."""
+        self._profiles: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._stopped = False
+    
+    def start(self) -> None:
+        """Starts profiling the calling thread and the threads started from now on."""
+        threading.setprofile(self._profile_thread)
+        self._enable(cProfile.Profile())
+    
+    def stop(self) -> pstats.Stats:
+        """
+        Stops profiling.
+        A profiler can only be detached by its own thread, so threads
+        started while profiling that are still running detach theirs on
+        their next profiled event; nothing they run afterwards is recorded.
+        
+        Returns:
+            Stats of all profiled threads, merged
+        """
+        threading.setprofile(None)
+        self._stopped = True
+        with self._lock:
+            profiles = list(self._profiles)
+        for profile in profiles:
+            profile.disable()
+        stats = pstats.Stats(profiles[0], stream=io.StringIO())
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+    
+    def _profile_thread(self, frame: FrameType, event: str, arg: Any) -> None:
+        # Called on the first event of each new thread; enabling a profiler
+        # replaces this hook for the rest of the thread
+        self._enable(cProfile.Profile(self._worker_timer))
+    
+    def _worker_timer(self) -> float:
+        """
+        Clock of the profilers of started threads, called by cProfile in
+        the profiled thread on every event. Once stopped it removes the
+        profiler of that thread, which disable() cannot do from another one.
+        
+        Returns:
+            perf_counter() value
+        """
+        if self._stopped:
+            sys.setprofile(None)
+        return time.perf_counter()
+    
+    def _enable(self, profile: cProfile.Profile) -> None:
+        """
+        Starts a profiler in the calling thread.
+        
+        Args:
+            profile: Profiler to enable
+        """
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread at a fixed interval, from a thread of
+    its own. Much cheaper than cProfile on a busy process, and it also sees
+    threads that were already running, but idle threads are sampled too
+    (waiting for input, a lock or the network).
+    """
+    
+    def __init__(self, interval: float) -> None:
+        """
+        Initializes the profiler, stopped.
+        
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+    
+    def start(self) -> None:
+        """Starts sampling in the background."""
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> Counter[tuple[str, ...]]:
+        """
+        Stops sampling.
+        
+        Returns:
+            Number of samples of each stack, as function labels from the
+            outermost call to the innermost
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.stacks
+    
+    def _run(self) -> None:
+        """Takes samples until stopped."""
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample_count += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.stacks[_stack(frame)] += 1
+
+
+class ProfileResult:
+    """Profile of one block of code, filled in when the block ends."""
+    
+    def __init__(self, label: str, profiler: str, sample_interval: float) -> None:
+        """
+        Starts a profile.
+        
+        Args:
+            label: Name of the profiled block, used in the file names
+            profiler: One of PROFILERS
+            sample_interval: Seconds between samples of the SAMPLING profiler
+        """
+        self.label = label
+        self.profiler = profiler
+        self.sample_interval = sample_interval
+        self.started_at = datetime.now(timezone.utc)
+        self.wall_seconds: float | None = None
+        self.stats: pstats.Stats | None = None
+        self.stacks: Counter[tuple[str, ...]] | None = None
+        self.sample_count = 0
+        self.memory_start: tracemalloc.Snapshot | None = None
+        self.memory_end: tracemalloc.Snapshot | None = None
+        self.peak_memory: int | None = None
+    
+    def summary(self, top: int = TOP_FUNCTIONS) -> str:
+        """
+        Formats the profile as text.
+        
+        Args:
+            top: Number of functions listed
+        
+        Returns:
+            Multi-line text with the functions with the most cumulative time
+            and, if memory was traced, the largest allocations
+        """
+        lines = [
+            f"Profile '{self.label}' ({self.profiler}), "
+            f"started {self.started_at.isoformat(timespec='seconds')}, "
+            f"{self.wall_seconds or 0:.3f} s wall clock",
+            "",
+        ]
+        if self.stats is not None:
+            buffer = io.StringIO()
+            self.stats.stream = buffer
+            self.stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+            lines += [
+                f"Top {top} functions by cumulative time (all profiled threads):",
+                buffer.getvalue().strip("\n"),
+            ]
+        if self.stacks is not None:
+            lines += _format_samples(self.stacks, self.sample_count, self.sample_interval, top)
+        if self.memory_end is not None:
+            lines += ["", *_format_memory(self.memory_start, self.memory_end, self.peak_memory)]
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def collect_profile(
+    label: str,
+    profiler: str = "CPROFILE",
+    sample_interval: float = 0.005,
+    memory_frames: int = 1
+) -> Iterator[ProfileResult]:
+    """
+    Profiles the block of code run inside the context.
+    Only one profile can be collected at a time. On Python 3.12 and later
+    CPROFILE falls back to SAMPLING, which result.profiler reports.
+    
+    Args:
+        label: Name of the profiled block, used in the file names
+        profiler: CPROFILE or SAMPLING
+        sample_interval: Seconds between samples of the SAMPLING profiler
+        memory_frames: Stack frames tracemalloc keeps per allocation
+            (0 takes no memory snapshots)
+    
+    Yields:
+        ProfileResult, filled in when the block ends
+    
+    Raises:
+        ValueError: If the profiler is unknown
+    """
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler: {profiler!r} (expected one of {', '.join(PROFILERS)})")
+    if profiler == "CPROFILE" and not THREAD_CPROFILE:
+        profiler = "SAMPLING"
+    result = ProfileResult(label, profiler, sample_interval)
+    
+    # Memory is traced only for the block, unless it was already traced
+    started_tracing = False
+    if memory_frames > 0:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(memory_frames)
+            started_tracing = True
+        tracemalloc.reset_peak()
+        result.memory_start = tracemalloc.take_snapshot()
+    
+    sampler = SamplingProfiler(sample_interval) if profiler == "SAMPLING" else ThreadProfiler()
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        yield result
+    finally:
+        if isinstance(sampler, SamplingProfiler):
+            result.stacks = sampler.stop()
+            result.sample_count = sampler.sample_count
+        else:
+            result.stats = sampler.stop()
+        result.wall_seconds = time.perf_counter() - start
+        
+        if memory_frames > 0:
+            result.peak_memory = tracemalloc.get_traced_memory()[1]
+            result.memory_end = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+
+
+def write_profile(output_dir: Path, result: ProfileResult) -> Path:
+    """
+    Saves a profile to a directory: its summary (.txt), the cProfile stats
+    (.prof, for pstats or snakeviz) or the sampled stacks (.folded, for
+    flamegraph.pl or speedscope) and the memory snapshot at its end
+    (.tracemalloc, for tracemalloc.Snapshot.load).
+    
+    Args:
+        output_dir: Directory the files are written to
+        result: Finished profile
+    
+    Returns:
+        Path to the summary
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    label = re.sub(r"[^\w.-]+", "_", result.label)
+    base = output_dir / f"{result.started_at:%Y%m%d-%H%M%S-%f}-{label}"
+    
+    if result.stats is not None:
+        result.stats.dump_stats(base.with_suffix(".prof"))
+    if result.stacks is not None:
+        with open(base.with_suffix(".folded"), "w", encoding="utf-8") as folded:
+            for stack, count in result.stacks.most_common():
+                folded.write(f"{';'.join(stack)} {count}\n")
+    if result.memory_end is not None:
+        result.memory_end.dump(str(base.with_suffix(".tracemalloc")))
+    
+    summary_path = base.with_suffix(".txt")
+    summary_path.write_text(result.summary(), encoding="utf-8")
+    return summary_path
+
+
+@contextmanager
+def profiled(label: str) -> Iterator[ProfileResult]:
+    """
+    Profiles the block of code run inside the context with the profiler
+    configured in settings, and saves the profile to the profiles directory
+    when the block ends.
+    
+    Args:
+        label: Name of the profiled block, used in the file names
+    
+    Yields:
+        ProfileResult, filled in when the block ends
+    """
+    result = None
+    try:
+        with collect_profile(
+            label,
+            profiler=settings.profiler,
+            sample_interval=settings.profile_sample_interval_ms / 1000,
+            memory_frames=settings.profile_memory_frames
+        ) as result:
+            yield result
+    finally:
+        if result is not None:
+            try:
+                path = write_profile(settings.profile_dir, result)
+                print(f"\n🔬 Perfil salvo em {path}")
+            except OSError as e:
+                print(f"\n⚠️ Aviso: Não foi possível gravar o perfil: {e}")
+
+
+def _stack(frame: FrameType | None) -> tuple[str, ...]:
+    """
+    Describes the stack of a frame.
+    
+    Args:
+        frame: Innermost frame of a thread
+    
+    Returns:
+        Function labels, from the outermost call to the innermost
+    """
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        labels.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+def _format_samples(
+    stacks: Counter[tuple[str, ...]],
+    sample_count: int,
+    interval: float,
+    top: int
+) -> list[str]:
+    """
+    Formats the functions seen in the most samples.
+    
+    Args:
+        stacks: Number of samples of each stack
+        sample_count: Number of times the threads were sampled
+        interval: Seconds between samples
+        top: Number of functions listed
+    
+    Returns:
+        Lines of the table
+    """
+    inclusive: Counter[str] = Counter()
+    own: Counter[str] = Counter()
+    for stack, count in stacks.items():
+        for function in set(stack):
+            inclusive[function] += count
+        if stack:
+            own[stack[-1]] += count
+    
+    lines = [
+        f"{sample_count} samples every {interval * 1000:g} ms, of all threads "
+        "(idle threads are sampled too)",
+        "",
+        f"Top {top} functions by cumulative samples:",
+        f"{'cumulative':>12} {'own':>8}  function",
+    ]
+    for function, count in inclusive.most_common(top):
+        lines.append(f"{count:>12} {own[function]:>8}  {function}")
+    return lines
+
+
+def _format_memory(
+    start: tracemalloc.Snapshot | None,
+    end: tracemalloc.Snapshot,
+    peak: int | None
+) -> list[str]:
+    """
+    Formats the allocations that grew the most during the profile.
+    
+    Args:
+        start: Snapshot taken when the profile started
+        end: Snapshot taken when it ended
+        peak: Peak traced memory, in bytes
+    
+    Returns:
+        Lines of the table
+    """
+    end = end.filter_traces(_MEMORY_FILTERS)
+    if start is not None:
+        statistics = end.compare_to(start.filter_traces(_MEMORY_FILTERS), "lineno")
+    else:
+        statistics = end.statistics("lineno")
+    
+    lines = [
+        f"Memory: peak {(peak or 0) / 1024 / 1024:.1f} MiB traced; "
+        f"top {TOP_ALLOCATIONS} allocations by growth since the start:"
+    ]
+    for statistic in statistics[:TOP_ALLOCATIONS]:
+        frame = statistic.traceback[0]
+        size_diff = getattr(statistic, 'size_diff', statistic.size)
+        count_diff = getattr(statistic, 'count_diff', statistic.count)
+        lines.append(
+            f"  {frame.filename}:{frame.lineno}: {size_diff / 1024:+.1f} KiB "
+            f"({count_diff:+d} blocks, {statistic.size / 1024:.1f} KiB now)"
+        )
+    return lines
@@ -4,30 +4,104 @@ Module for summarizing conversation history when it gets too long.
 
 from textwrap import dedent
 
+from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
 from src.core.config import settings
+from src.core.fake_llm import create_fake_chat_model
+from src.core.metrics import SUMMARIZATIONS
+from src.core.tracing import TracingCallbackHandler, current_span, traced
 
 MAX_MESSAGES_BEFORE_SUMMARIZE = 100
 MAX_SUMMARY_TOKENS = 500  # Maximum tokens for summary response
+SUMMARY_HEADER = "[Resume of previous conversation"
+PINNED_KWARG = "pinned"  # additional_kwargs flag of pinned facts
 
 
+def create_pinned_fact(text: str) -> HumanMessage:
+    """
+    Creates a pinned fact: a user message that is always sent to the model
+    and kept word for word when the conversation is summarized.
+    
+    Args:
+        text: Fact to remember
+        
+    Returns:
+        HumanMessage flagged as pinned
+    """
+    return HumanMessage(content=text, additional_kwargs={PINNED_KWARG: True})
+
+
+def is_pinned(message: BaseMessage) -> bool:
+    """
+    Checks if a message is a pinned fact.
+    
+    Args:
+        message: Message to check
+        
+    Returns:
+        True if the message was created by create_pinned_fact
+    """
+    return bool(message.additional_kwargs.get(PINNED_KWARG))
+
+
+def create_summary_llm() -> BaseChatModel:
+    """
+    Creates the language model used for summarization.
+    
+    Returns:
+        ChatOpenAI instance configured from settings, or the scripted
+        model with LLM_PROVIDER=FAKE
+    """
+    if settings.llm_provider == "FAKE":
+        return create_fake_chat_model()
+    return ChatOpenAI(
+        model=settings.model_name,
+        temperature=0.3,  # Lower temperature for more consistent summaries
+        api_key=settings.openai_api_key
+    )
+
+
+def get_message_count(checkpointer: BaseCheckpointSaver, thread_id: str) -> int:
+    """
+    Counts the messages stored in the latest checkpoint of a thread that
+    count toward the summarization limit (pinned facts are not summarized).
+    
+    Args:
+        checkpointer: Checkpoint saver instance
+        thread_id: Thread ID for checkpoint
+        
+    Returns:
+        Number of messages, 0 if the thread has no checkpoint
+    """
+    config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+    checkpoint = checkpointer.get(config)
+    if not checkpoint:
+        return 0
+    messages = checkpoint.get("channel_values", {}).get("messages", [])
+    return sum(1 for message in messages if not is_pinned(message))
+
+
+@traced("summarize_conversation", "thread_id")
 def summarize_conversation(
-    checkpointer: SqliteSaver,
+    checkpointer: BaseCheckpointSaver,
     thread_id: str,
-    llm: ChatOpenAI | None = None
+    llm: ChatOpenAI | None = None,
+    verbose: bool = True
 ) -> bool:
     """
     Summarizes all messages if conversation exceeds limit.
-    All messages are summarized into a single summary message.
+    All messages are summarized into a single summary message, except
+    pinned facts, which are kept after it unchanged.
     
     Args:
         checkpointer: Checkpoint saver instance
         thread_id: Thread ID for checkpoint
         llm: Language model for summarization. If None, creates a new instance.
+        verbose: If True, prints progress and warnings to the terminal
         
     Returns:
         True if summarization was performed, False otherwise
@@ -43,34 +117,33 @@ def summarize_conversation(
         # Extract messages from checkpoint
         channel_values = checkpoint.get("channel_values", {})
         messages = channel_values.get("messages", [])
+        pinned = [msg for msg in messages if is_pinned(msg)]
+        messages = [msg for msg in messages if not is_pinned(msg)]
 
         # Check if summarization is needed
         if len(messages) <= MAX_MESSAGES_BEFORE_SUMMARIZE:
             return False
         
-        print("\n\n📝 Resumindo mensagens antigas...", end="", flush=True)
+        if verbose:
+            print("\n\n📝 Resumindo mensagens antigas...", end="", flush=True)
         
         # Summarize all messages
         if llm is None:
-            llm = ChatOpenAI(
-                model=settings.model_name,
-                temperature=0.3,  # Lower temperature for more consistent summaries
-                api_key=settings.openai_api_key
-            )
+            llm = create_summary_llm()
         
         summary_text = _create_summary(messages, llm)
         
         # Create summary message - this replaces all previous messages
         summary_message = AIMessage(
             content=dedent(f"""\
-                [Resume of previous conversation - {len(messages)} messages summarized]
+                {SUMMARY_HEADER} - {len(messages)} messages summarized]
                 
                 {summary_text}
             """)
         )
         
-        # Replace all messages with just the summary
-        summarized_messages = [summary_message]
+        # Replace all messages with the summary, keeping the pinned facts
+        summarized_messages = [summary_message, *pinned]
         
         # Update checkpoint with summarized messages
         checkpoint["channel_values"]["messages"] = summarized_messages
@@ -86,12 +159,18 @@ def summarize_conversation(
         
         # Save updated checkpoint with required parameters
         checkpointer.put(config, checkpoint, metadata, new_versions)
+        current_span().set_attribute('messages_summarized', len(messages))
+        SUMMARIZATIONS.inc(labels=("summarized",))
         
-        print(f" ✅ ({len(messages)} mensagens resumidas)\n")
+        if verbose:
+            print(f" ✅ ({len(messages)} mensagens resumidas)\n")
         return True
         
     except Exception as e:
-        print(f"\n⚠️ Aviso: Erro ao resumir conversa: {e}\n")
+        current_span().record_error(e)
+        SUMMARIZATIONS.inc(labels=("failed",))
+        if verbose:
+            print(f"\n⚠️ Aviso: Erro ao resumir conversa: {e}\n")
         return False
 
 def _create_summary(messages: list[BaseMessage], llm: ChatOpenAI) -> str:
@@ -144,8 +223,8 @@ def _create_summary(messages: list[BaseMessage], llm: ChatOpenAI) -> str:
         {conversation_text}
     """)
 
-    # Get summary from LLM
-    response = llm.invoke(summary_prompt)
+    # Get summary from LLM (a child span of the summarization when tracing)
+    response = llm.invoke(summary_prompt, config={"callbacks": [TracingCallbackHandler()]})
     summary = response.content if hasattr(response, 'content') else str(response)
     
     return summary
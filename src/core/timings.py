@@ -0,0 +1,270 @@
+"""
+Module for measuring where the time of a turn goes.
+collect_timings() makes a TurnTimings current for the turn: model and tool
+calls are timed by TimingsCallbackHandler, and checkpoint I/O, HTTP calls,
+summarization and the end-of-turn commit are timed with timed(). The
+current timings follow the turn into the threads LangGraph runs nodes in,
+as they live in a context variable.
+"""
+
+import json
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Timed operations, in the order they are reported
+TIMING_CATEGORIES = (
+    'model', 'tool', 'http', 'checkpoint_read', 'checkpoint_write', 'summarization', 'commit'
+)
+
+# Names shown by format_timings
+CATEGORY_LABELS = {
+    'model': "modelo",
+    'tool': "ferramentas",
+    'http': "HTTP",
+    'checkpoint_read': "leitura de checkpoints",
+    'checkpoint_write': "escrita de checkpoints",
+    'summarization': "resumo",
+    'commit': "commit",
+}
+
+_current_timings: ContextVar["TurnTimings | None"] = ContextVar("current_timings", default=None)
+
+
+class TurnTimings:
+    """Durations measured during one turn. Safe to update from several threads."""
+    
+    def __init__(self, thread_id: str | None = None) -> None:
+        """
+        Starts measuring a turn.
+        
+        Args:
+            thread_id: Thread ID of the conversation
+        """
+        self.thread_id = thread_id
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        self.first_token_seconds: float | None = None
+        self.total_seconds: float | None = None
+        self.spans: list[dict[str, Any]] = []
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+    
+    def add(self, category: str, seconds: float, name: str | None = None) -> None:
+        """
+        Records a timed operation.
+        
+        Args:
+            category: One of TIMING_CATEGORIES
+            seconds: Duration of the operation
+            name: Model, tool or host name, if any
+        """
+        with self._lock:
+            self.spans.append({'category': category, 'name': name, 'seconds': seconds})
+    
+    def mark_first_token(self) -> None:
+        """Records the time to the first streamed token, once per turn."""
+        with self._lock:
+            if self.first_token_seconds is None:
+                self.first_token_seconds = time.perf_counter() - self._start
+    
+    def finish(self) -> None:
+        """Records the total time of the turn."""
+        self.total_seconds = time.perf_counter() - self._start
+    
+    def totals(self) -> dict[str, dict[str, float]]:
+        """
+        Adds up the spans per category.
+        
+        Returns:
+            Dictionary of category to {'seconds', 'count'}, for the
+            categories with at least one span
+        """
+        totals: dict[str, dict[str, float]] = {}
+        with self._lock:
+            for span in self.spans:
+                total = totals.setdefault(span['category'], {'seconds': 0.0, 'count': 0})
+                total['seconds'] += span['seconds']
+                total['count'] += 1
+        return totals
+    
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Builds the record written to the timings log.
+        
+        Returns:
+            Dictionary with thread_id, started_at, total_seconds,
+            first_token_seconds, totals and spans
+        """
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            'thread_id': self.thread_id,
+            'started_at': self.started_at,
+            'total_seconds': self.total_seconds,
+            'first_token_seconds': self.first_token_seconds,
+            'totals': self.totals(),
+            'spans': spans,
+        }
+
+
+class TimingsCallbackHandler(BaseCallbackHandler):
+    """Callback handler that times model calls, the first token and tool calls."""
+    
+    def __init__(self, timings: TurnTimings) -> None:
+        """
+        Initializes the handler.
+        
+        Args:
+            timings: Timings of the turn
+        """
+        self.timings = timings
+        self._starts: dict[UUID, tuple[float, str | None]] = {}
+    
+    def on_chat_model_start(
+        self, serialized: dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._starts[run_id] = (time.perf_counter(), _model_name(serialized, kwargs))
+    
+    def on_llm_start(
+        self, serialized: dict[str, Any], prompts: list[str], *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._starts[run_id] = (time.perf_counter(), _model_name(serialized, kwargs))
+    
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token:
+            self.timings.mark_first_token()
+    
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish('model', run_id)
+    
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish('model', run_id)
+    
+    def on_tool_start(
+        self, serialized: dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._starts[run_id] = (time.perf_counter(), (serialized or {}).get('name'))
+    
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish('tool', run_id)
+    
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish('tool', run_id)
+    
+    def _finish(self, category: str, run_id: UUID) -> None:
+        """
+        Records a model or tool call that ended.
+        
+        Args:
+            category: 'model' or 'tool'
+            run_id: Run ID given to the start callback
+        """
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            self.timings.add(category, time.perf_counter() - start[0], start[1])
+
+
+@contextmanager
+def collect_timings(thread_id: str | None = None) -> Iterator[TurnTimings]:
+    """
+    Makes new timings current for the block, e.g. a turn.
+    
+    Args:
+        thread_id: Thread ID of the conversation
+    
+    Yields:
+        Timings of the block, finished when it exits
+    """
+    timings = TurnTimings(thread_id)
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        timings.finish()
+        _current_timings.reset(token)
+
+
+@contextmanager
+def timed(category: str, name: str | None = None) -> Iterator[None]:
+    """
+    Times the block, or the decorated function, into the current timings.
+    Does nothing outside collect_timings().
+    
+    Args:
+        category: One of TIMING_CATEGORIES
+        name: Model, tool or host name, if any
+    """
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(category, time.perf_counter() - start, name)
+
+
+def format_timings(timings: TurnTimings) -> str:
+    """
+    Formats the breakdown of a turn for the terminal.
+    
+    Args:
+        timings: Finished timings of a turn
+    
+    Returns:
+        Multi-line text
+    """
+    first_token = (
+        f"{timings.first_token_seconds:.2f}s"
+        if timings.first_token_seconds is not None else "-"
+    )
+    lines = [f"⏱️ Turno: {timings.total_seconds or 0:.2f}s | primeiro token: {first_token}"]
+    totals = timings.totals()
+    for category in TIMING_CATEGORIES:
+        if category in totals:
+            total = totals[category]
+            lines.append(
+                f"   {CATEGORY_LABELS[category]}: {total['seconds']:.3f}s ({total['count']:.0f}x)"
+            )
+    return "\n".join(lines)
+
+
+def write_timings(path: Path, timings: TurnTimings) -> None:
+    """
+    Appends the timings of a turn to a JSON Lines file.
+    
+    Args:
+        path: Path to the timings log
+        timings: Finished timings of a turn
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as log:
+        log.write(json.dumps(timings.to_dict(), ensure_ascii=False) + "\n")
+
+
+def _model_name(serialized: dict[str, Any] | None, kwargs: dict[str, Any]) -> str | None:
+    """
+    Finds the model name of a model call.
+    
+    Args:
+        serialized: Serialized model given to the start callback
+        kwargs: Other arguments of the start callback
+    
+    Returns:
+        Model name, if known
+    """
+    params = kwargs.get('invocation_params') or {}
+    name = params.get('model') or params.get('model_name')
+    if name is None and serialized:
+        name = serialized.get('kwargs', {}).get('model_name') or serialized.get('name')
+    return name
@@ -0,0 +1,531 @@
+"""
+Module for tracing turns with nested spans.
+start_trace() opens the root span of a turn; the spans started while it is
+current become its descendants: the agent run, model and tool calls (from
+TracingCallbackHandler), HTTP requests, checkpoint reads and writes,
+summarization and ConversationDB calls. When the root span ends, the spans
+of the trace are handed to an exporter: OtlpJsonFileExporter appends them
+to a file in the OTLP JSON format read by OpenTelemetry collectors and
+viewers, SpanCollector keeps them in memory. Outside a trace, span() and
+traced() do nothing.
+"""
+
+import inspect
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, TypeVar
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+SERVICE_NAME = "langchain-assistant"
+SCOPE_NAME = "src.core.tracing"
+
+# OTLP span kinds
+SPAN_KINDS = {'internal': 1, 'server': 2, 'client': 3}
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+T = TypeVar("T")
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """An operation of a trace, with its timing, attributes and status."""
+    
+    is_recording = True
+    
+    def __init__(
+        self,
+        name: str,
+        trace: "_Trace",
+        parent: "Span | None" = None,
+        attributes: Mapping[str, Any] | None = None,
+        kind: str = 'internal'
+    ) -> None:
+        """
+        Starts a span.
+        
+        Args:
+            name: Operation name
+            trace: Trace the span belongs to
+            parent: Parent span, or None for the root span
+            attributes: Initial attributes
+            kind: 'internal', 'server' or 'client'
+        """
+        self.name = name
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.kind = kind
+        self.attributes: dict[str, Any] = {}
+        self.status_code = STATUS_UNSET
+        self.status_message: str | None = None
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.set_attributes(attributes or {})
+    
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Sets an attribute. None values are ignored.
+        
+        Args:
+            key: Attribute name, e.g. "thread_id"
+            value: str, bool, int or float value
+        """
+        if value is not None:
+            self.attributes[key] = value
+    
+    def set_attributes(self, attributes: Mapping[str, Any]) -> None:
+        """
+        Sets several attributes.
+        
+        Args:
+            attributes: Attribute names and values
+        """
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+    
+    def record_error(self, error: BaseException) -> None:
+        """
+        Marks the span as failed.
+        
+        Args:
+            error: Exception that ended the operation
+        """
+        self.status_code = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+    
+    def end(self) -> None:
+        """Ends the span and adds it to its trace. Ending it again does nothing."""
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.add(self)
+    
+    @property
+    def duration_seconds(self) -> float:
+        """Seconds between the start and the end of the span."""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+    
+    def to_otlp(self) -> dict[str, Any]:
+        """
+        Converts the span to its OTLP JSON form.
+        
+        Returns:
+            Span object of an OTLP ExportTraceServiceRequest
+        """
+        otlp: dict[str, Any] = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': SPAN_KINDS[self.kind],
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns or self.start_ns),
+            'attributes': [
+                {'key': key, 'value': _otlp_value(value)} for key, value in self.attributes.items()
+            ],
+            'status': {'code': self.status_code},
+        }
+        if self.parent_id is not None:
+            otlp['parentSpanId'] = self.parent_id
+        if self.status_message is not None:
+            otlp['status']['message'] = self.status_message
+        return otlp
+
+
+class _NonRecordingSpan:
+    """Span returned outside a trace. Every operation does nothing."""
+    
+    is_recording = False
+    
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+    
+    def set_attributes(self, attributes: Mapping[str, Any]) -> None:
+        pass
+    
+    def record_error(self, error: BaseException) -> None:
+        pass
+    
+    def end(self) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+
+class SpanExporter(ABC):
+    """Receives the spans of each finished trace."""
+    
+    @abstractmethod
+    def export(self, spans: Sequence[Span]) -> None:
+        """
+        Exports the spans of a trace.
+        
+        Args:
+            spans: Finished spans, in the order they ended
+        """
+
+
+class SpanCollector(SpanExporter):
+    """In-process exporter keeping the spans of every trace in memory."""
+    
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+    
+    def export(self, spans: Sequence[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+    
+    def find(self, name: str) -> list[Span]:
+        """
+        Finds collected spans by name.
+        
+        Args:
+            name: Operation name
+        
+        Returns:
+            Spans with that name
+        """
+        with self._lock:
+            return [span for span in self.spans if span.name == name]
+
+
+class OtlpJsonFileExporter(SpanExporter):
+    """
+    Appends each trace to a JSON Lines file, one OTLP
+    ExportTraceServiceRequest per line, the format of the OpenTelemetry
+    collector file exporter.
+    """
+    
+    def __init__(self, path: Path) -> None:
+        """
+        Initializes the exporter.
+        
+        Args:
+            path: Path to the trace file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def export(self, spans: Sequence[Span]) -> None:
+        line = json.dumps(to_otlp_request(spans), ensure_ascii=False)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as trace_file:
+                trace_file.write(line + "\n")
+
+
+class _Trace:
+    """Finished spans of one trace."""
+    
+    def __init__(self) -> None:
+        self.trace_id = os.urandom(16).hex()
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+    
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Callback handler that opens spans for the agent run and its model and
+    tool calls. The span of a call is current while it runs, so HTTP
+    requests made by a tool become children of the tool span.
+    """
+    
+    def __init__(self) -> None:
+        self._spans: dict[UUID, tuple[Span, Span | None]] = {}
+        self._lock = threading.Lock()
+    
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any
+    ) -> None:
+        # Only the outermost chain is the agent run; graph nodes are not traced
+        if parent_run_id is None:
+            metadata = kwargs.get('metadata') or {}
+            self._start(run_id, None, "agent.run", {'thread_id': metadata.get('thread_id')})
+    
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+    
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+    
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any
+    ) -> None:
+        params = kwargs.get('invocation_params') or {}
+        model = params.get('model') or params.get('model_name')
+        self._start(run_id, parent_run_id, "model.call", {'gen_ai.request.model': model})
+    
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            entry = self._spans.get(run_id)
+        if entry is not None:
+            entry[0].set_attributes(_usage_attributes(response))
+        self._end(run_id)
+    
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+    
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        **kwargs: Any
+    ) -> None:
+        name = (serialized or {}).get('name')
+        self._start(run_id, parent_run_id, f"tool.{name}", {'tool.name': name})
+    
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+    
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+    
+    def _start(
+        self,
+        run_id: UUID,
+        parent_run_id: UUID | None,
+        name: str,
+        attributes: Mapping[str, Any]
+    ) -> None:
+        """
+        Starts the span of a run and makes it current.
+        
+        Args:
+            run_id: Run ID given to the start callback
+            parent_run_id: Run ID of the parent run, if any
+            name: Operation name
+            attributes: Initial attributes
+        """
+        previous = _current_span.get()
+        with self._lock:
+            parent_entry = self._spans.get(parent_run_id) if parent_run_id else None
+        parent = parent_entry[0] if parent_entry is not None else previous
+        if parent is None:
+            return
+        
+        span = Span(name, parent.trace, parent, attributes)
+        with self._lock:
+            self._spans[run_id] = (span, previous)
+        _current_span.set(span)
+    
+    def _end(self, run_id: UUID, error: BaseException | None = None) -> None:
+        """
+        Ends the span of a run and restores the span current before it.
+        
+        Args:
+            run_id: Run ID given to the start callback
+            error: Exception that ended the run, if any
+        """
+        with self._lock:
+            entry = self._spans.pop(run_id, None)
+        if entry is None:
+            return
+        
+        span, previous = entry
+        if error is not None:
+            span.record_error(error)
+        span.end()
+        if _current_span.get() is span:
+            _current_span.set(previous)
+
+
+@contextmanager
+def start_trace(
+    name: str,
+    exporter: SpanExporter,
+    attributes: Mapping[str, Any] | None = None
+) -> Iterator[Span]:
+    """
+    Starts a trace whose root span covers the block, e.g. a turn.
+    
+    Args:
+        name: Operation name of the root span
+        exporter: Exporter receiving the spans when the block exits
+        attributes: Attributes of the root span
+    
+    Yields:
+        Root span
+    """
+    root = Span(name, _Trace(), attributes=attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        root.end()
+        exporter.export(list(root.trace.spans))
+
+
+@contextmanager
+def span(
+    name: str,
+    attributes: Mapping[str, Any] | None = None,
+    kind: str = 'internal'
+) -> Iterator[Span | _NonRecordingSpan]:
+    """
+    Runs the block in a child span of the current span.
+    
+    Args:
+        name: Operation name
+        attributes: Initial attributes
+        kind: 'internal', 'server' or 'client'
+    
+    Yields:
+        The new span, or NON_RECORDING_SPAN outside a trace
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NON_RECORDING_SPAN
+        return
+    
+    child = Span(name, parent.trace, parent, attributes, kind)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def traced(name: str, *arguments: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """
+    Decorator running each call of the function in a span.
+    
+    Args:
+        name: Operation name
+        *arguments: Names of the arguments recorded as attributes
+    
+    Returns:
+        Decorator
+    """
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        signature = inspect.signature(func)
+        
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            
+            attributes = {}
+            if arguments:
+                bound = signature.bind_partial(*args, **kwargs).arguments
+                attributes = {argument: bound.get(argument) for argument in arguments}
+            with span(name, attributes):
+                return func(*args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
+
+
+def current_span() -> Span | _NonRecordingSpan:
+    """
+    Gets the current span, e.g. to add attributes known only inside it.
+    
+    Returns:
+        Current span, or NON_RECORDING_SPAN outside a trace
+    """
+    return _current_span.get() or NON_RECORDING_SPAN
+
+
+def to_otlp_request(spans: Sequence[Span]) -> dict[str, Any]:
+    """
+    Builds the OTLP JSON ExportTraceServiceRequest of spans.
+    
+    Args:
+        spans: Finished spans
+    
+    Returns:
+        Dictionary with resourceSpans
+    """
+    return {
+        'resourceSpans': [{
+            'resource': {
+                'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}],
+            },
+            'scopeSpans': [{
+                'scope': {'name': SCOPE_NAME},
+                'spans': [span.to_otlp() for span in spans],
+            }],
+        }],
+    }
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    """
+    Converts an attribute value to an OTLP AnyValue.
+    
+    Args:
+        value: str, bool, int or float value; other values are stored as text
+    
+    Returns:
+        AnyValue dictionary
+    """
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        # 64-bit integers are strings in OTLP JSON
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _usage_attributes(response: Any) -> dict[str, Any]:
+    """
+    Gets the token counts of a model response.
+    
+    Args:
+        response: LLMResult given to on_llm_end
+    
+    Returns:
+        gen_ai.usage.input_tokens and gen_ai.usage.output_tokens, when known
+    """
+    for generations in getattr(response, 'generations', None) or []:
+        for generation in generations:
+            usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None)
+            if usage:
+                return {
+                    'gen_ai.usage.input_tokens': usage.get('input_tokens'),
+                    'gen_ai.usage.output_tokens': usage.get('output_tokens'),
+                }
+    return {}
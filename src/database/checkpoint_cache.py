@@ -0,0 +1,300 @@
+"""
+In-memory LRU cache of checkpoints.
+Each turn the agent loads the latest checkpoint of its thread and the
+summarizer loads it again right after. Keeping recent checkpoints in
+memory skips the SQLite read and the deserialization of the history.
+"""
+
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from src.core.metrics import CHECKPOINT_CACHE_REQUESTS
+from src.core.tracing import span
+
+# Approximate overhead, in bytes, of a message or value besides its text
+VALUE_OVERHEAD_BYTES = 256
+
+CacheKey = tuple[str, str, str]
+
+
+class CachingCheckpointSaver(BaseCheckpointSaver):
+    """
+    Read-through, write-through LRU cache around another checkpoint saver.
+    Entries are keyed by (thread_id, checkpoint_ns, checkpoint_id) and the
+    cache is bounded by the approximate size of the cached checkpoints.
+    
+    The cache lives in one process and only sees the writes made through it.
+    Checkpoints written to the same database by another process (the
+    maintenance CLI, the load generator) are not seen until the thread is
+    invalidated or its entries are evicted, so the latest checkpoint of a
+    thread may be stale in the meantime.
+    """
+    
+    def __init__(self, inner: BaseCheckpointSaver, max_bytes: int) -> None:
+        """
+        Initializes the cache.
+        
+        Args:
+            inner: Checkpoint saver that stores the checkpoints
+            max_bytes: Approximate maximum size of the cached checkpoints
+        """
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[CacheKey, tuple[CheckpointTuple, int]] = OrderedDict()
+        self._latest: dict[tuple[str, str], str] = {}
+        # Bumped by every put and invalidation of a thread, so a read that
+        # missed can tell whether a newer checkpoint was written meanwhile
+        self._generations: dict[tuple[str, str], int] = {}
+        self._epoch = 0
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        
+        with span("checkpoint.cache.get", {'thread_id': thread_id}) as cache_span:
+            with self._lock:
+                checkpoint_id = get_checkpoint_id(config) or self._latest.get((thread_id, checkpoint_ns))
+                entry = self._entries.get((thread_id, checkpoint_ns, checkpoint_id))
+                if entry is not None:
+                    self._entries.move_to_end((thread_id, checkpoint_ns, checkpoint_id))
+                    self.hits += 1
+                    CHECKPOINT_CACHE_REQUESTS.inc(labels=("hit",))
+                    cache_span.set_attribute('cache.hit', True)
+                    return _copy_tuple(entry[0])
+                self.misses += 1
+                generation = self._generation((thread_id, checkpoint_ns))
+            
+            CHECKPOINT_CACHE_REQUESTS.inc(labels=("miss",))
+            cache_span.set_attribute('cache.hit', False)
+            checkpoint_tuple = self.inner.get_tuple(config)
+            if checkpoint_tuple is not None:
+                self._store(
+                    checkpoint_tuple,
+                    latest=get_checkpoint_id(config) is None,
+                    read_generation=generation
+                )
+                return _copy_tuple(checkpoint_tuple)
+            return None
+    
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        return self.inner.list(config, filter=filter, before=before, limit=limit)
+    
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        new_config = self.inner.put(config, checkpoint, metadata, new_versions)
+        parent_config = config if get_checkpoint_id(config) else None
+        self._store(
+            CheckpointTuple(
+                config=new_config,
+                checkpoint=_copy_checkpoint(checkpoint),
+                metadata=get_checkpoint_metadata(config, metadata),
+                parent_config=parent_config,
+                pending_writes=[],
+            ),
+            latest=True
+        )
+        return new_config
+    
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.inner.put_writes(config, writes, task_id, task_path)
+        # The cached tuple no longer has all pending writes of the checkpoint
+        self._evict((
+            str(config["configurable"]["thread_id"]),
+            config["configurable"].get("checkpoint_ns", ""),
+            get_checkpoint_id(config),
+        ))
+    
+    def delete_thread(self, thread_id: str) -> None:
+        self.inner.delete_thread(thread_id)
+        self.invalidate(thread_id)
+    
+    def get_next_version(self, current: Any, channel: None) -> Any:
+        return self.inner.get_next_version(current, channel)
+    
+    def invalidate(self, thread_id: str | None = None) -> None:
+        """
+        Removes cached checkpoints.
+        
+        Args:
+            thread_id: Thread to remove. If None, clears the whole cache.
+        """
+        with self._lock:
+            keys = [key for key in self._entries if thread_id is None or key[0] == str(thread_id)]
+            for key in keys:
+                self._size -= self._entries.pop(key)[1]
+            if thread_id is None:
+                self._epoch += 1
+            else:
+                for key in self._generations:
+                    if key[0] == str(thread_id):
+                        self._generations[key] += 1
+            self._latest = {
+                key: value for key, value in self._latest.items()
+                if thread_id is not None and key[0] != str(thread_id)
+            }
+    
+    def _generation(self, thread_key: tuple[str, str]) -> tuple[int, int]:
+        """
+        Gets the current generation of a thread. Must be called with the lock held.
+        
+        Args:
+            thread_key: Tuple of (thread_id, checkpoint_ns)
+        
+        Returns:
+            Tuple of (cache epoch, thread generation)
+        """
+        return self._epoch, self._generations.setdefault(thread_key, 0)
+    
+    def _store(
+        self,
+        checkpoint_tuple: CheckpointTuple,
+        latest: bool,
+        read_generation: tuple[int, int] | None = None
+    ) -> None:
+        """
+        Adds a checkpoint tuple to the cache, evicting the least recently used.
+        
+        Args:
+            checkpoint_tuple: Checkpoint tuple to cache
+            latest: If True, marks it as the latest checkpoint of its thread
+            read_generation: Generation of the thread when the tuple was read
+                from the inner saver, or None if it was just written. A read
+                tuple is only marked as latest if no put or invalidation of
+                its thread happened since.
+        """
+        configurable = checkpoint_tuple.config["configurable"]
+        key = (
+            str(configurable["thread_id"]),
+            configurable.get("checkpoint_ns", ""),
+            configurable["checkpoint_id"],
+        )
+        size = _estimate_size(checkpoint_tuple.checkpoint)
+        
+        with self._lock:
+            if read_generation is None:
+                self._generations[key[:2]] = self._generations.get(key[:2], 0) + 1
+            elif read_generation != self._generation(key[:2]):
+                # A newer checkpoint may have been written while reading
+                latest = False
+            
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                # Too big to cache; an older checkpoint is no longer the latest
+                if latest:
+                    self._latest.pop(key[:2], None)
+                return
+            self._entries[key] = (checkpoint_tuple, size)
+            self._size += size
+            if latest:
+                self._latest[key[:2]] = key[2]
+            
+            while self._size > self.max_bytes:
+                evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                if self._latest.get(evicted_key[:2]) == evicted_key[2]:
+                    del self._latest[evicted_key[:2]]
+    
+    def _evict(self, key: CacheKey) -> None:
+        """
+        Removes one entry from the cache, if present.
+        
+        Args:
+            key: Cache key of the entry
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[1]
+
+
+def _copy_checkpoint(checkpoint: Checkpoint) -> Checkpoint:
+    """
+    Copies a checkpoint so callers cannot change the cached one.
+    Channel lists are copied, the messages themselves are shared.
+    
+    Args:
+        checkpoint: Checkpoint to copy
+        
+    Returns:
+        Copy of the checkpoint
+    """
+    copied = dict(checkpoint)
+    copied["channel_values"] = {
+        channel: value.copy() if isinstance(value, (list, dict)) else value
+        for channel, value in checkpoint.get("channel_values", {}).items()
+    }
+    if "channel_versions" in checkpoint:
+        copied["channel_versions"] = dict(checkpoint["channel_versions"])
+    return copied
+
+
+def _copy_tuple(checkpoint_tuple: CheckpointTuple) -> CheckpointTuple:
+    """
+    Copies a cached checkpoint tuple before returning it.
+    
+    Args:
+        checkpoint_tuple: Cached checkpoint tuple
+        
+    Returns:
+        Tuple with a copied checkpoint and pending writes
+    """
+    return checkpoint_tuple._replace(
+        checkpoint=_copy_checkpoint(checkpoint_tuple.checkpoint),
+        pending_writes=list(checkpoint_tuple.pending_writes or []),
+    )
+
+
+def _estimate_size(checkpoint: Checkpoint) -> int:
+    """
+    Estimates the memory used by a checkpoint from the text it holds.
+    
+    Args:
+        checkpoint: Checkpoint to measure
+        
+    Returns:
+        Approximate size in bytes
+    """
+    size = VALUE_OVERHEAD_BYTES
+    for value in checkpoint.get("channel_values", {}).values():
+        items = value if isinstance(value, list) else [value]
+        for item in items:
+            content = getattr(item, "content", item)
+            size += VALUE_OVERHEAD_BYTES + len(str(content))
+    return size
@@ -0,0 +1,258 @@
+"""
+Module for creating the checkpoint saver used by the agent.
+"""
+
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src.core.config import settings
+from src.core.timings import timed
+from src.core.tracing import span
+from src.database.checkpoint_cache import CachingCheckpointSaver
+from src.database.connection import connect, retry_on_busy, shared_connection
+from src.database.dedup import DedupSqliteSaver
+from src.database.serializers import CompressedSerializer
+from src.database.sharding import ShardedCheckpointSaver, shard_path
+from src.database.write_behind import WriteBehindCheckpointSaver
+
+
+class RetryingSqliteSaver(DedupSqliteSaver):
+    """Deduplicating SqliteSaver that retries operations when the database is busy."""
+    
+    @timed('checkpoint_read')
+    @retry_on_busy
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        with span("checkpoint.get", _thread_attributes(config)) as checkpoint_span:
+            checkpoint_tuple = super().get_tuple(config)
+            checkpoint_span.set_attribute('checkpoint.found', checkpoint_tuple is not None)
+            return checkpoint_tuple
+    
+    @timed('checkpoint_write')
+    @retry_on_busy
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        with span("checkpoint.put", _thread_attributes(config)):
+            return super().put(config, checkpoint, metadata, new_versions)
+    
+    @timed('checkpoint_write')
+    @retry_on_busy
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        attributes = {**_thread_attributes(config), 'checkpoint.writes': len(writes)}
+        with span("checkpoint.put_writes", attributes):
+            super().put_writes(config, writes, task_id, task_path)
+    
+    @retry_on_busy
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+
+
+def create_checkpointer(db_path: Path) -> BaseCheckpointSaver:
+    """
+    Creates the checkpoint saver for the given checkpoint database.
+    Threads are spread over several files when sharding is enabled, and the
+    savers are wrapped in a write-behind buffer and an LRU cache when they
+    are enabled in the settings.
+    
+    With the unified storage layout, checkpoints are stored in the
+    conversation database instead of db_path, on the connection shared with
+    ConversationDB, and writes are always buffered so commit_turn() can
+    commit them with the turn's activity.
+    
+    Args:
+        db_path: Path to the checkpoint database file
+        
+    Returns:
+        Checkpoint saver instance
+    """
+    # Always wrapped, so compressed checkpoints stay readable if compression is turned off
+    serde = CompressedSerializer(
+        codec=settings.checkpoint_compression,
+        threshold=settings.checkpoint_compression_threshold
+    )
+    
+    if settings.storage_layout == "UNIFIED":
+        checkpointer: BaseCheckpointSaver = _create_shard(
+            settings.conversation_db_path, serde, shared=True
+        )
+    elif settings.checkpoint_shards > 1:
+        checkpointer = ShardedCheckpointSaver([
+            _create_shard(shard_path(db_path, index), serde)
+            for index in range(settings.checkpoint_shards)
+        ])
+    else:
+        checkpointer = _create_shard(db_path, serde)
+    
+    if settings.checkpoint_cache_bytes > 0:
+        checkpointer = CachingCheckpointSaver(checkpointer, settings.checkpoint_cache_bytes)
+    
+    return checkpointer
+
+
+def _create_shard(
+    db_path: Path,
+    serde: CompressedSerializer,
+    shared: bool = False
+) -> BaseCheckpointSaver:
+    """
+    Creates the saver of a single checkpoint database file.
+    
+    Args:
+        db_path: Path to the database file
+        serde: Serializer of the checkpoints
+        shared: If True, uses the connection shared with ConversationDB and
+            buffers writes even when the write-behind interval is 0
+        
+    Returns:
+        Checkpoint saver instance
+    """
+    if shared:
+        conn, lock = shared_connection(db_path)
+        sqlite_saver = RetryingSqliteSaver(conn, serde=serde)
+        # Serializes the saver with ConversationDB, which uses the same connection
+        sqlite_saver.lock = lock
+        return WriteBehindCheckpointSaver(
+            sqlite_saver, interval=settings.checkpoint_flush_interval_ms / 1000
+        )
+    
+    # check_same_thread=False is OK as SqliteSaver uses a lock for thread safety
+    conn = connect(db_path, check_same_thread=False)
+    checkpointer: BaseCheckpointSaver = RetryingSqliteSaver(conn, serde=serde)
+    
+    if settings.checkpoint_flush_interval_ms > 0:
+        checkpointer = WriteBehindCheckpointSaver(
+            checkpointer, interval=settings.checkpoint_flush_interval_ms / 1000
+        )
+    
+    return checkpointer
+
+
+# Savers that wrap another saver, exposed as their inner attribute
+WRAPPING_SAVERS = (CachingCheckpointSaver, WriteBehindCheckpointSaver)
+
+
+def iter_savers(checkpointer: BaseCheckpointSaver) -> Iterator[BaseCheckpointSaver]:
+    """
+    Yields a saver and every saver it wraps or shards to, outermost first.
+    
+    Args:
+        checkpointer: Checkpoint saver instance, possibly wrapped
+        
+    Yields:
+        Each saver of the chain
+    """
+    yield checkpointer
+    if isinstance(checkpointer, WRAPPING_SAVERS):
+        yield from iter_savers(checkpointer.inner)
+    elif isinstance(checkpointer, ShardedCheckpointSaver):
+        for shard in checkpointer.shards:
+            yield from iter_savers(shard)
+
+
+def sqlite_savers(checkpointer: BaseCheckpointSaver) -> list[SqliteSaver]:
+    """
+    Returns the SqliteSaver of every database file behind a saver.
+    
+    Args:
+        checkpointer: Checkpoint saver instance, possibly wrapped or sharded
+        
+    Returns:
+        List with one SqliteSaver per database file
+    """
+    return [saver for saver in iter_savers(checkpointer) if isinstance(saver, SqliteSaver)]
+
+
+def unwrap_checkpointer(checkpointer: BaseCheckpointSaver) -> SqliteSaver:
+    """
+    Returns the SqliteSaver underneath any wrapping savers.
+    
+    Args:
+        checkpointer: Checkpoint saver instance, possibly wrapped
+        
+    Returns:
+        The innermost SqliteSaver
+        
+    Raises:
+        TypeError: If there is not exactly one SqliteSaver, e.g. when sharded
+    """
+    savers = sqlite_savers(checkpointer)
+    if len(savers) != 1:
+        raise TypeError(f"Expected a single SqliteSaver, found {len(savers)}")
+    return savers[0]
+
+
+def sqlite_saver_for(checkpointer: BaseCheckpointSaver, thread_id: str) -> SqliteSaver:
+    """
+    Returns the SqliteSaver of the database file that stores a thread.
+    
+    Args:
+        checkpointer: Checkpoint saver instance, possibly wrapped or sharded
+        thread_id: Thread ID
+        
+    Returns:
+        SqliteSaver of the thread's shard
+    """
+    for saver in iter_savers(checkpointer):
+        if isinstance(saver, ShardedCheckpointSaver):
+            return sqlite_saver_for(saver.shard_for(thread_id), thread_id)
+    return unwrap_checkpointer(checkpointer)
+
+
+def invalidate_cache(checkpointer: BaseCheckpointSaver, thread_id: str | None = None) -> None:
+    """
+    Drops cached checkpoints after the database was changed directly.
+    
+    Args:
+        checkpointer: Checkpoint saver instance, possibly wrapped
+        thread_id: Thread to drop. If None, drops every thread.
+    """
+    for saver in iter_savers(checkpointer):
+        if isinstance(saver, CachingCheckpointSaver):
+            saver.invalidate(thread_id)
+
+
+def flush_checkpointer(checkpointer: BaseCheckpointSaver) -> None:
+    """
+    Commits checkpoint writes buffered by a write-behind saver, if any.
+    Called at the end of each turn so a crash loses at most the current turn.
+    
+    Args:
+        checkpointer: Checkpoint saver instance, possibly wrapped
+    """
+    for saver in iter_savers(checkpointer):
+        if isinstance(saver, WriteBehindCheckpointSaver):
+            saver.flush()
+
+
+def _thread_attributes(config: RunnableConfig) -> dict[str, Any]:
+    """
+    Gets the span attributes identifying the thread of a config.
+    
+    Args:
+        config: Config with the thread ID
+    
+    Returns:
+        Dictionary with thread_id
+    """
+    return {'thread_id': config.get("configurable", {}).get("thread_id")}
@@ -0,0 +1,287 @@
+"""
+Module for compacting the checkpoint database.
+SqliteSaver keeps a checkpoint for every step of every thread, while the
+CLI only resumes from the latest one. Compaction removes old checkpoints,
+orphaned writes and returns the freed pages to the file system.
+The sweeper removes threads whose conversation metadata no longer exists.
+"""
+
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src.database.checkpointer import flush_checkpointer, invalidate_cache, sqlite_savers
+from src.database.connection import connect, retry_on_busy
+from src.database.repository import ConversationDB
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def compact_checkpoints(checkpointer: BaseCheckpointSaver, keep_last: int = 1) -> dict[str, Any]:
+    """
+    Keeps only the latest checkpoints of each thread and reclaims space.
+    Each database file is compacted, and retried when busy, on its own, so
+    the counts of the files already compacted are kept.
+    
+    Args:
+        checkpointer: Checkpoint saver instance
+        keep_last: Number of checkpoints kept per thread and namespace
+        
+    Returns:
+        Dictionary with checkpoints_deleted, writes_deleted,
+        bytes_before, bytes_after and bytes_reclaimed
+    """
+    flush_checkpointer(checkpointer)
+    bytes_before = _database_size(checkpointer)
+    checkpoints_deleted = 0
+    writes_deleted = 0
+    
+    for sqlite_saver in sqlite_savers(checkpointer):
+        checkpoints, writes = _compact_file(sqlite_saver, keep_last)
+        checkpoints_deleted += checkpoints
+        writes_deleted += writes
+    
+    invalidate_cache(checkpointer)
+    vacuum(checkpointer)
+    bytes_after = _database_size(checkpointer)
+    
+    return {
+        "checkpoints_deleted": checkpoints_deleted,
+        "writes_deleted": writes_deleted,
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_reclaimed": max(0, bytes_before - bytes_after),
+    }
+
+
+@retry_on_busy
+def _compact_file(sqlite_saver: SqliteSaver, keep_last: int) -> tuple[int, int]:
+    """
+    Deletes the old checkpoints and orphaned writes of one database file,
+    in one transaction.
+    
+    Args:
+        sqlite_saver: SqliteSaver of the file
+        keep_last: Number of checkpoints kept per thread and namespace
+        
+    Returns:
+        Tuple of (checkpoints_deleted, writes_deleted)
+    """
+    with sqlite_saver.lock:
+        sqlite_saver.setup()
+        # Unlike cursor(), rolls back if a statement fails, so a retry counts every row
+        with sqlite_saver.conn, closing(sqlite_saver.conn.cursor()) as cursor:
+            cursor.execute('''
+                DELETE FROM checkpoints
+                WHERE rowid IN (
+                    SELECT rowid FROM (
+                        SELECT rowid, ROW_NUMBER() OVER (
+                            PARTITION BY thread_id, checkpoint_ns
+                            ORDER BY checkpoint_id DESC
+                        ) AS position
+                        FROM checkpoints
+                    )
+                    WHERE position > ?
+                )
+            ''', (keep_last,))
+            checkpoints_deleted = cursor.rowcount
+            
+            cursor.execute('''
+                DELETE FROM writes
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints
+                    WHERE checkpoints.thread_id = writes.thread_id
+                      AND checkpoints.checkpoint_ns = writes.checkpoint_ns
+                      AND checkpoints.checkpoint_id = writes.checkpoint_id
+                )
+            ''')
+            return checkpoints_deleted, cursor.rowcount
+
+
+@retry_on_busy
+def find_orphaned_threads(checkpointer: BaseCheckpointSaver, db: ConversationDB) -> list[str]:
+    """
+    Finds threads stored in the checkpointer without a conversation row.
+    
+    Args:
+        checkpointer: Checkpoint saver instance
+        db: Database instance with the conversation metadata
+        
+    Returns:
+        Sorted list of orphaned thread IDs
+    """
+    flush_checkpointer(checkpointer)
+    stored_thread_ids = set()
+    for sqlite_saver in sqlite_savers(checkpointer):
+        with sqlite_saver.cursor(transaction=False) as cursor:
+            cursor.execute('''
+                SELECT thread_id FROM checkpoints
+                UNION
+                SELECT thread_id FROM writes
+            ''')
+            stored_thread_ids.update(row[0] for row in cursor.fetchall())
+    
+    return sorted(stored_thread_ids - set(db.get_thread_ids()))
+
+
+@retry_on_busy
+def purge_threads(checkpointer: BaseCheckpointSaver, thread_ids: list[str]) -> None:
+    """
+    Deletes all checkpoints and writes of the given threads,
+    in one transaction per database file.
+    
+    Args:
+        checkpointer: Checkpoint saver instance
+        thread_ids: Thread IDs to delete
+    """
+    params = [(thread_id,) for thread_id in thread_ids]
+    for sqlite_saver in sqlite_savers(checkpointer):
+        with sqlite_saver.cursor() as cursor:
+            cursor.executemany("DELETE FROM checkpoints WHERE thread_id = ?", params)
+            cursor.executemany("DELETE FROM writes WHERE thread_id = ?", params)
+    
+    for thread_id in thread_ids:
+        invalidate_cache(checkpointer, thread_id)
+
+
+def sweep_orphaned_threads(
+    checkpointer: BaseCheckpointSaver,
+    db: ConversationDB,
+    dry_run: bool = False
+) -> list[str]:
+    """
+    Deletes checkpoint data of threads that have no conversation row,
+    such as conversations cleared before deletion was cascaded.
+    
+    Args:
+        checkpointer: Checkpoint saver instance
+        db: Database instance with the conversation metadata
+        dry_run: If True, only finds the orphaned threads
+        
+    Returns:
+        List of orphaned thread IDs (deleted unless dry_run)
+    """
+    orphaned = find_orphaned_threads(checkpointer, db)
+    if orphaned and not dry_run:
+        purge_threads(checkpointer, orphaned)
+    return orphaned
+
+
+def vacuum(checkpointer: BaseCheckpointSaver) -> None:
+    """
+    Returns free pages of the checkpoint database to the file system.
+    The first run converts the database to incremental auto vacuum with
+    a full VACUUM; later runs only release the free pages.
+    
+    Buffered writes are flushed first, and each file is vacuumed on a
+    connection of its own while the saver's lock is held. With the unified
+    layout that lock also keeps ConversationDB off the shared connection,
+    and VACUUM never runs inside one of its transactions.
+    
+    Args:
+        checkpointer: Checkpoint saver instance
+        
+    Raises:
+        sqlite3.OperationalError: If the calling thread has a transaction
+            open on the connection of a saver
+    """
+    flush_checkpointer(checkpointer)
+    for sqlite_saver in sqlite_savers(checkpointer):
+        _vacuum_file(sqlite_saver)
+
+
+@retry_on_busy
+def _vacuum_file(sqlite_saver: SqliteSaver) -> None:
+    """
+    Returns the free pages of one database file to the file system.
+    
+    Args:
+        sqlite_saver: SqliteSaver of the file
+        
+    Raises:
+        sqlite3.OperationalError: If the calling thread has a transaction
+            open on the connection of the saver
+    """
+    with sqlite_saver.lock:
+        if sqlite_saver.conn.in_transaction:
+            raise sqlite3.OperationalError("cannot VACUUM while the connection is in a transaction")
+        db_file = sqlite_saver.conn.execute("PRAGMA database_list").fetchone()[2]
+        if not db_file:
+            # In-memory databases have no file to shrink
+            return
+        with closing(connect(Path(db_file))) as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+                conn.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+                conn.execute("VACUUM")
+            else:
+                conn.execute("PRAGMA incremental_vacuum")
+            # Shrink the WAL file back after the pages were moved
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def _database_size(checkpointer: BaseCheckpointSaver) -> int:
+    """
+    Computes the size in bytes of the checkpoint database files.
+    
+    Args:
+        checkpointer: Checkpoint saver instance
+        
+    Returns:
+        Database size in bytes
+    """
+    size = 0
+    for sqlite_saver in sqlite_savers(checkpointer):
+        with sqlite_saver.lock:
+            conn = sqlite_saver.conn
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        size += page_count * page_size
+    return size
+
+
+class CompactionScheduler:
+    """Runs checkpoint compaction periodically in a background thread."""
+    
+    def __init__(self, checkpointer: BaseCheckpointSaver, interval: float, keep_last: int = 1) -> None:
+        """
+        Initializes the scheduler.
+        
+        Args:
+            checkpointer: Checkpoint saver instance
+            interval: Seconds between compactions
+            keep_last: Number of checkpoints kept per thread
+        """
+        self.checkpointer = checkpointer
+        self.interval = interval
+        self.keep_last = keep_last
+        self.last_report: dict[str, Any] | None = None
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+    
+    def start(self) -> None:
+        """Starts the background thread."""
+        self._thread = threading.Thread(
+            target=self._run, name="checkpoint-compaction", daemon=True
+        )
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stops the background thread and waits for it to finish."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self) -> None:
+        """Compacts on every interval until stopped. Errors are retried next time."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.last_report = compact_checkpoints(self.checkpointer, self.keep_last)
+            except Exception:
+                # Compaction is best effort, the next interval tries again
+                continue
@@ -0,0 +1,141 @@
+"""
+Module for opening SQLite connections.
+Every database of the application is opened here, so that all of them
+share the same journal mode, cache and busy handling from settings.
+"""
+
+import functools
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import ParamSpec, TypeVar
+
+from src.core.config import settings
+from src.core.metrics import SQLITE_BUSY_RETRIES, SQLITE_BUSY_WAIT_SECONDS
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+BUSY_RETRY_BASE_DELAY = 0.05  # Seconds before the first retry
+
+# Connections shared by every user of a database file in this process
+_shared_connections: dict[Path, tuple[sqlite3.Connection, threading.RLock]] = {}
+_shared_connections_lock = threading.Lock()
+
+
+def connect(db_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Opens a SQLite connection tuned with the pragmas from settings.
+    
+    Args:
+        db_path: Path to the database file
+        check_same_thread: If False, the connection may be used from other
+            threads (the caller is responsible for serializing access)
+        
+    Returns:
+        Configured SQLite connection
+    """
+    # Ensure directory exists
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(
+        str(db_path),
+        timeout=settings.sqlite_busy_timeout_ms / 1000,
+        check_same_thread=check_same_thread
+    )
+    apply_pragmas(connection)
+    return connection
+
+
+def shared_connection(db_path: Path) -> tuple[sqlite3.Connection, threading.RLock]:
+    """
+    Returns the connection shared by every user of a database file, opening
+    it on first use. Users hold the lock while they use the connection, so
+    their transactions never interleave and they can share one.
+    
+    Args:
+        db_path: Path to the database file
+        
+    Returns:
+        Tuple of (connection, lock)
+    """
+    key = db_path.resolve()
+    with _shared_connections_lock:
+        if key not in _shared_connections:
+            _shared_connections[key] = (
+                connect(db_path, check_same_thread=False), threading.RLock()
+            )
+        return _shared_connections[key]
+
+
+def close_shared_connections() -> None:
+    """Closes every shared connection, e.g. when a process is done with the databases."""
+    with _shared_connections_lock:
+        for connection, lock in _shared_connections.values():
+            with lock:
+                connection.close()
+        _shared_connections.clear()
+
+
+def apply_pragmas(connection: sqlite3.Connection) -> None:
+    """
+    Applies the configured pragmas to an open connection.
+    
+    Args:
+        connection: SQLite connection
+    """
+    connection.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+    connection.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+    connection.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    connection.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+    connection.execute(f"PRAGMA cache_size = {int(settings.sqlite_cache_size)}")
+
+
+def is_busy_error(error: Exception) -> bool:
+    """
+    Checks if an error was caused by a locked or busy database.
+    
+    Args:
+        error: Exception raised by sqlite3
+        
+    Returns:
+        True if the operation may succeed when retried
+    """
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and (
+        "locked" in message or "busy" in message
+    )
+
+
+def retry_on_busy(func: Callable[P, R]) -> Callable[P, R]:
+    """
+    Decorator that retries an operation when the database is busy.
+    Covers the cases busy_timeout does not, such as a read transaction
+    that cannot be upgraded to a write while another writer is active.
+    Retries use exponential backoff with jitter.
+    
+    Args:
+        func: Function performing the database operation
+        
+    Returns:
+        Wrapped function
+    """
+    @functools.wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt >= settings.sqlite_busy_retries:
+                    raise
+                delay = BUSY_RETRY_BASE_DELAY * (2 ** attempt)
+                delay += random.uniform(0, delay)
+                SQLITE_BUSY_RETRIES.inc()
+                SQLITE_BUSY_WAIT_SECONDS.inc(delay)
+                time.sleep(delay)
+                attempt += 1
+    
+    return wrapper
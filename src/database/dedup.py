@@ -0,0 +1,371 @@
+"""
+Content-addressed storage of checkpoint messages.
+SqliteSaver serializes the whole messages channel in every checkpoint, so
+a message is stored again at every later step of its thread. Here each
+message is stored once in message_blobs, keyed by the hash of its
+serialized form, and a checkpoint only keeps the list of message ids.
+Triggers count the references and delete a message when the last
+checkpoint using it is deleted, whatever deletes the checkpoint.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from typing import Any, NamedTuple
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src.core.metrics import CHECKPOINT_BYTES
+
+# Key of the placeholder stored in a checkpoint instead of its messages
+MESSAGE_REFS_KEY = "__message_refs__"
+
+SETUP_SQL = """
+CREATE TABLE IF NOT EXISTS message_blobs (
+    id INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL UNIQUE,
+    type TEXT,
+    value BLOB,
+    refcount INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS checkpoints_ref_messages
+AFTER INSERT ON checkpoints WHEN NEW.message_ids IS NOT NULL BEGIN
+    UPDATE message_blobs SET refcount = refcount + 1
+    WHERE id IN (SELECT value FROM json_each(NEW.message_ids));
+END;
+CREATE TRIGGER IF NOT EXISTS checkpoints_unref_messages
+AFTER DELETE ON checkpoints WHEN OLD.message_ids IS NOT NULL BEGIN
+    UPDATE message_blobs SET refcount = refcount - 1
+    WHERE id IN (SELECT value FROM json_each(OLD.message_ids));
+    DELETE FROM message_blobs
+    WHERE refcount <= 0 AND id IN (SELECT value FROM json_each(OLD.message_ids));
+END;
+"""
+
+
+class PreparedCheckpoint(NamedTuple):
+    """Checkpoint serialized for storage, with its messages split out."""
+    
+    thread_id: str
+    checkpoint_ns: str
+    checkpoint_id: str
+    parent_checkpoint_id: str | None
+    type: str
+    checkpoint: bytes
+    metadata: bytes
+    messages: list[tuple[str, str, bytes]]
+
+
+class DedupSqliteSaver(SqliteSaver):
+    """SqliteSaver that stores each message once and references it from checkpoints."""
+    
+    def __init__(self, conn: sqlite3.Connection, *, serde: SerializerProtocol | None = None) -> None:
+        super().__init__(conn, serde=serde)
+        # Reentrant, so get_tuple can hold it around the parent's read
+        self.lock = threading.RLock()
+    
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        try:
+            self.conn.execute("ALTER TABLE checkpoints ADD COLUMN message_ids TEXT")
+        except sqlite3.OperationalError as e:
+            if "duplicate column name" not in str(e):
+                raise
+        self.conn.executescript(SETUP_SQL)
+    
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        # The checkpoint and its message ids are read in one transaction, so
+        # a delete from another thread or process cannot land between them
+        with self.lock:
+            self.setup()
+            with self._read_transaction():
+                checkpoint_tuple = super().get_tuple(config)
+                if checkpoint_tuple is None:
+                    return None
+                return self._load_messages(checkpoint_tuple)
+    
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        # The parent generator holds the lock while it yields
+        for checkpoint_tuple in super().list(config, filter=filter, before=before, limit=limit):
+            loaded = self._load_messages(checkpoint_tuple)
+            # Skips checkpoints deleted since the listing query read them
+            if loaded is not None:
+                yield loaded
+    
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        prepared = self.prepare_checkpoint(config, checkpoint, metadata)
+        with self.lock:
+            self.setup()
+            # Unlike cursor(), rolls back if any statement fails
+            with self.conn, closing(self.conn.cursor()) as cursor:
+                write_checkpoint(cursor, prepared)
+        return {
+            "configurable": {
+                "thread_id": config["configurable"]["thread_id"],
+                "checkpoint_ns": config["configurable"]["checkpoint_ns"],
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+    
+    def prepare_checkpoint(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+    ) -> PreparedCheckpoint:
+        """
+        Serializes a checkpoint, replacing each message list with a placeholder.
+        
+        Args:
+            config: Config of the parent checkpoint
+            checkpoint: Checkpoint to store
+            metadata: Metadata of the checkpoint
+            
+        Returns:
+            Serialized checkpoint and its serialized messages
+        """
+        messages = []
+        channel_values = dict(checkpoint.get("channel_values", {}))
+        for channel, value in channel_values.items():
+            if not _is_message_list(value):
+                continue
+            # The placeholder keeps the slice of the message list of this channel
+            channel_values[channel] = {MESSAGE_REFS_KEY: [len(messages), len(value)]}
+            for message in value:
+                type_, serialized = self.serde.dumps_typed(message)
+                messages.append((_hash_message(type_, serialized), type_, serialized))
+        
+        type_, serialized_checkpoint = self.serde.dumps_typed(
+            {**checkpoint, "channel_values": channel_values}
+        )
+        CHECKPOINT_BYTES.observe(
+            len(serialized_checkpoint) + sum(len(message[2]) for message in messages)
+        )
+        return PreparedCheckpoint(
+            thread_id=str(config["configurable"]["thread_id"]),
+            checkpoint_ns=config["configurable"]["checkpoint_ns"],
+            checkpoint_id=checkpoint["id"],
+            parent_checkpoint_id=config["configurable"].get("checkpoint_id"),
+            type=type_,
+            checkpoint=serialized_checkpoint,
+            metadata=json.dumps(
+                get_checkpoint_metadata(config, metadata), ensure_ascii=False
+            ).encode("utf-8", "ignore"),
+            messages=messages,
+        )
+    
+    @contextmanager
+    def _read_transaction(self) -> Iterator[None]:
+        """
+        Runs the block in a read transaction, so its queries see one
+        snapshot of the database. Joins the transaction already open on the
+        connection, e.g. when the unified layout shares it. Must be called
+        with the lock held.
+        """
+        if self.conn.in_transaction:
+            yield
+            return
+        self.conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            self.conn.commit()
+    
+    def _load_messages(self, checkpoint_tuple: CheckpointTuple) -> CheckpointTuple | None:
+        """
+        Replaces message placeholders with the stored messages.
+        Must be called with the lock held.
+        
+        Args:
+            checkpoint_tuple: Checkpoint tuple as read from the database
+            
+        Returns:
+            Checkpoint tuple with the messages loaded, or None if the
+            checkpoint was deleted since it was read
+        """
+        channel_values = checkpoint_tuple.checkpoint.get("channel_values", {})
+        placeholders = {
+            channel: value[MESSAGE_REFS_KEY] for channel, value in channel_values.items()
+            if isinstance(value, dict) and MESSAGE_REFS_KEY in value
+        }
+        if not placeholders:
+            return checkpoint_tuple
+        
+        configurable = checkpoint_tuple.config["configurable"]
+        with closing(self.conn.cursor()) as cursor:
+            cursor.execute(
+                "SELECT message_ids FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (
+                    str(configurable["thread_id"]),
+                    configurable.get("checkpoint_ns", ""),
+                    configurable["checkpoint_id"],
+                ),
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            message_ids = json.loads(row[0])
+            cursor.execute(
+                "SELECT id, type, value FROM message_blobs "
+                "WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(message_ids),),
+            )
+            stored = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        
+        # Deserialize each message once, even if it appears more than once
+        loaded = {
+            message_id: self.serde.loads_typed(typed) for message_id, typed in stored.items()
+        }
+        messages = {
+            channel: [loaded[message_id] for message_id in message_ids[start:start + count]]
+            for channel, (start, count) in placeholders.items()
+        }
+        checkpoint = {
+            **checkpoint_tuple.checkpoint,
+            "channel_values": {**channel_values, **messages},
+        }
+        return checkpoint_tuple._replace(checkpoint=checkpoint)
+
+
+def write_checkpoint(cursor: sqlite3.Cursor, prepared: PreparedCheckpoint) -> None:
+    """
+    Stores a prepared checkpoint and the messages it references.
+    The caller commits.
+    
+    Args:
+        cursor: Cursor of the checkpoint database
+        prepared: Checkpoint returned by DedupSqliteSaver.prepare_checkpoint
+    """
+    key = (prepared.thread_id, prepared.checkpoint_ns, prepared.checkpoint_id)
+    # Deleting first releases the references of a checkpoint stored again;
+    # INSERT OR REPLACE would skip the delete trigger
+    cursor.execute(
+        "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+        key,
+    )
+    message_ids = store_messages(cursor, prepared.messages)
+    cursor.execute(
+        "INSERT INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+        "type, checkpoint, metadata, message_ids) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            *key,
+            prepared.parent_checkpoint_id,
+            prepared.type,
+            prepared.checkpoint,
+            prepared.metadata,
+            json.dumps(message_ids) if prepared.messages else None,
+        ),
+    )
+
+
+def copy_thread(source: sqlite3.Connection, target: sqlite3.Cursor, thread_id: str) -> None:
+    """
+    Copies the checkpoints of a thread and their messages to another database.
+    Message ids differ between databases, so references are rebuilt by hash.
+    The caller commits.
+    
+    Args:
+        source: Connection to the database that has the checkpoints
+        target: Cursor of the database that receives the checkpoints
+        thread_id: Thread ID
+    """
+    rows = source.execute('''
+        SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+               type, checkpoint, metadata, message_ids
+        FROM checkpoints WHERE thread_id = ?
+    ''', (thread_id,)).fetchall()
+    
+    for *columns, message_ids in rows:
+        messages = []
+        if message_ids is not None:
+            stored = {
+                row[0]: row[1:] for row in source.execute(
+                    "SELECT id, hash, type, value FROM message_blobs "
+                    "WHERE id IN (SELECT value FROM json_each(?))",
+                    (message_ids,),
+                )
+            }
+            messages = [stored[message_id] for message_id in json.loads(message_ids)]
+        write_checkpoint(target, PreparedCheckpoint(*columns, messages=messages))
+
+
+def store_messages(cursor: sqlite3.Cursor, messages: list[tuple[str, str, bytes]]) -> list[int]:
+    """
+    Stores messages that are not stored yet and returns their ids.
+    
+    Args:
+        cursor: Cursor of the checkpoint database
+        messages: Tuples of hash, serialization type and serialized message
+        
+    Returns:
+        Message ids, in the order of the messages
+    """
+    if not messages:
+        return []
+    cursor.executemany(
+        "INSERT OR IGNORE INTO message_blobs (hash, type, value) VALUES (?, ?, ?)", messages
+    )
+    cursor.execute(
+        "SELECT hash, id FROM message_blobs WHERE hash IN (SELECT value FROM json_each(?))",
+        (json.dumps([digest for digest, _, _ in messages]),),
+    )
+    ids = dict(cursor.fetchall())
+    return [ids[digest] for digest, _, _ in messages]
+
+
+def _is_message_list(value: Any) -> bool:
+    """
+    Checks whether a channel value is a non-empty list of messages.
+    
+    Args:
+        value: Channel value
+        
+    Returns:
+        True if every item is a message
+    """
+    return isinstance(value, list) and bool(value) and all(
+        isinstance(item, BaseMessage) for item in value
+    )
+
+
+def _hash_message(type_: str, serialized: bytes) -> str:
+    """
+    Computes the content address of a serialized message.
+    
+    Args:
+        type_: Serialization type of the message
+        serialized: Serialized message
+        
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(type_.encode("utf-8") + b"\0" + serialized).hexdigest()
@@ -3,31 +3,257 @@ Module for managing SQLite database.
 Saves and retrieves conversation history.
 """
 
+import re
 import sqlite3
-from datetime import datetime
+import threading
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
+from types import TracebackType
 from typing import Any
 
 from src.core.config import settings
+from src.core.tracing import traced
+from src.database.connection import connect, retry_on_busy, shared_connection
 
+# Columns added after the first release, created on databases that predate them
+ACTIVITY_COLUMNS = {
+    'message_count': 'INTEGER NOT NULL DEFAULT 0',
+    'last_message': 'TEXT',
+}
 
-class ConversationDB:
-    """Manages the conversation database."""
+# Full-text search: conversation_messages keeps the indexed text and
+# conversation_messages_fts is an FTS5 index over it (external content),
+# kept in sync by triggers. Diacritics are ignored, so "cambio" finds "câmbio".
+# The prefix indexes make search-as-you-type prefix queries cheap.
+SEARCH_SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS conversation_messages (
+        id INTEGER PRIMARY KEY,
+        thread_id TEXT NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_conversation_messages_thread_id
+    ON conversation_messages (thread_id);
+    CREATE VIRTUAL TABLE IF NOT EXISTS conversation_messages_fts USING fts5(
+        content,
+        content='conversation_messages',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4'
+    );
+    CREATE TRIGGER IF NOT EXISTS conversation_messages_after_insert
+    AFTER INSERT ON conversation_messages
+    BEGIN
+        INSERT INTO conversation_messages_fts (rowid, content)
+        VALUES (NEW.id, NEW.content);
+    END;
+    CREATE TRIGGER IF NOT EXISTS conversation_messages_after_delete
+    AFTER DELETE ON conversation_messages
+    BEGIN
+        INSERT INTO conversation_messages_fts (conversation_messages_fts, rowid, content)
+        VALUES ('delete', OLD.id, OLD.content);
+    END;
+    CREATE TRIGGER IF NOT EXISTS conversations_after_delete
+    AFTER DELETE ON conversations
+    BEGIN
+        DELETE FROM conversation_messages WHERE thread_id = OLD.thread_id;
+    END;
+'''
+
+# Usage totals kept per conversation and day. Rows are kept when a
+# conversation is deleted, so past usage still adds up.
+STATS_SCHEMA_SQL = '''
+    CREATE TABLE IF NOT EXISTS conversation_stats (
+        thread_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        turns INTEGER NOT NULL DEFAULT 0,
+        messages INTEGER NOT NULL DEFAULT 0,
+        input_tokens INTEGER NOT NULL DEFAULT 0,
+        output_tokens INTEGER NOT NULL DEFAULT 0,
+        tool_calls INTEGER NOT NULL DEFAULT 0,
+        llm_seconds REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (thread_id, day)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_conversation_stats_day
+    ON conversation_stats (day);
+'''
+
+# Counters of conversation_stats, in column order
+STATS_COLUMNS = ('turns', 'messages', 'input_tokens', 'output_tokens', 'tool_calls', 'llm_seconds')
+
+# Counters that rank conversations in get_top_conversations
+TOP_CONVERSATIONS_ORDER = {
+    'tokens': 'input_tokens + output_tokens',
+    'messages': 'messages',
+    'tool_calls': 'tool_calls',
+    'llm_seconds': 'llm_seconds',
+}
+
+# Search hits read per query. Hits are read newest first, so the cost of a
+# query depends on this batch and not on how many messages are indexed.
+SEARCH_BATCH_SIZE = 200
+SEARCH_MAX_HITS = 2000
+
+# Shorter words are matched whole: there is no prefix index for them
+MIN_PREFIX_LENGTH = 2
+
+
+class PendingActivity:
+    """Activity of one conversation recorded since the last flush."""
     
     def __init__(self) -> None:
+        self.updated_at: str | None = None
+        self.messages_added = 0
+        self.last_message: str | None = None
+        self.indexed_messages: list[tuple[str, str]] = []
+        # Day -> counters, in STATS_COLUMNS order
+        self.stats: dict[str, list[float]] = {}
+    
+    def merge_older(self, older: "PendingActivity") -> None:
+        """
+        Merges activity recorded before this one, e.g. after a failed flush.
+        
+        Args:
+            older: Activity recorded earlier for the same conversation
+        """
+        self.updated_at = self.updated_at or older.updated_at
+        self.messages_added += older.messages_added
+        if self.last_message is None:
+            self.last_message = older.last_message
+        self.indexed_messages[:0] = older.indexed_messages
+        for day, counters in older.stats.items():
+            totals = self.stats.setdefault(day, [0] * len(STATS_COLUMNS))
+            for index, value in enumerate(counters):
+                totals[index] += value
+
+
+class ConversationDB:
+    """
+    Manages the conversation database.
+    Keeps a single long-lived connection, so the schema, page cache and
+    prepared statements are reused across calls. Use close() or a
+    with block to release it. With the unified storage layout the
+    connection and its lock are shared with the checkpoint saver, so
+    both can write in one transaction, and close() leaves it open.
+    
+    Conversation activity recorded with record_activity(), including the
+    messages added to the full-text index and the usage statistics, is buffered in
+    memory, coalesced per thread, and written in a single transaction by
+    flush_activity(), which runs every settings.activity_flush_interval
+    seconds, before listing conversations and on close().
+    """
+    
+    def __init__(self, activity_flush_interval: float | None = None) -> None:
         """
         Initializes the database connection.
+        
+        Args:
+            activity_flush_interval: Seconds activity is buffered before it
+                is written (0 writes it on every record_activity call).
+                If None, uses settings.activity_flush_interval.
         """
         self.db_path: Path = settings.conversation_db_path
-        # Ensure directory exists
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Access is serialized by the lock, so the connection can be shared by threads
+        self._connection: sqlite3.Connection | None
+        self._owns_connection = settings.storage_layout != "UNIFIED"
+        if self._owns_connection:
+            self._connection = connect(self.db_path, check_same_thread=False)
+            self._lock = threading.RLock()
+        else:
+            self._connection, self._lock = shared_connection(self.db_path)
         self._init_db()
+        
+        if activity_flush_interval is None:
+            activity_flush_interval = settings.activity_flush_interval
+        self.activity_flush_interval = activity_flush_interval
+        self._pending_activity: dict[str, PendingActivity] = {}
+        self._activity_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flush_thread: threading.Thread | None = None
+    
+    def __enter__(self) -> "ConversationDB":
+        return self
+    
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None
+    ) -> None:
+        self.close()
     
+    def close(self) -> None:
+        """
+        Writes the buffered activity and closes the database connection.
+        Safe to call more than once.
+        """
+        self._stop_event.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join()
+            self._flush_thread = None
+        with self._lock:
+            if self._connection is not None:
+                try:
+                    self.flush_activity()
+                finally:
+                    if self._owns_connection:
+                        self._connection.close()
+                    self._connection = None
+    
+    @contextmanager
+    def _cursor(self, transaction: bool = False) -> Iterator[sqlite3.Cursor]:
+        """
+        Yields a cursor on the shared connection.
+        
+        Args:
+            transaction: If True, commits when the block succeeds
+                and rolls back when it fails
+            
+        Yields:
+            SQLite cursor
+        """
+        with self._lock:
+            if self._connection is None:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            cursor = self._connection.cursor()
+            # Set per cursor, as a shared connection also serves the checkpoint saver
+            cursor.row_factory = sqlite3.Row
+            try:
+                yield cursor
+                if transaction:
+                    self._connection.commit()
+            except BaseException:
+                if transaction:
+                    self._connection.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    @property
+    def connection(self) -> sqlite3.Connection | None:
+        """The database connection, or None once closed."""
+        return self._connection
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Yields a cursor in a transaction, committed when the block succeeds
+        and rolled back when it fails. With the unified storage layout the
+        checkpoint saver shares the connection, so checkpoints can be
+        written in the same transaction.
+        
+        Yields:
+            SQLite cursor
+        """
+        with self._cursor(transaction=True) as cursor:
+            yield cursor
+    
+    @retry_on_busy
     def _init_db(self) -> None:
         """Creates the conversations table and trigger if they don't exist."""
-        with sqlite3.connect(str(self.db_path)) as connection:
-            cursor = connection.cursor()
-            
+        with self._cursor(transaction=True) as cursor:
             # Create table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS conversations (
@@ -51,35 +277,161 @@ class ConversationDB:
                 END
             ''')
             
-            connection.commit()
+            # Index for listing the most recently updated conversations first
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_conversations_updated_at
+                ON conversations (updated_at DESC, id DESC)
+            ''')
+            
+            # Activity columns, missing on databases created before them
+            cursor.execute('PRAGMA table_info(conversations)')
+            existing_columns = {row['name'] for row in cursor.fetchall()}
+            for column, definition in ACTIVITY_COLUMNS.items():
+                if column not in existing_columns:
+                    cursor.execute(
+                        f'ALTER TABLE conversations ADD COLUMN {column} {definition}'
+                    )
+        
+        with self._cursor() as cursor:
+            # executescript commits on its own, the statements are idempotent
+            cursor.executescript(SEARCH_SCHEMA_SQL)
+            cursor.executescript(STATS_SCHEMA_SQL)
 
-    def get_conversations_list(self) -> list[dict[str, Any]]:
+    @traced("ConversationDB.get_conversations_list")
+    @retry_on_busy
+    def get_conversations_list(
+        self,
+        limit: int | None = None,
+        before: tuple[str, int] | None = None
+    ) -> list[dict[str, Any]]:
         """
-        Retrieves the list of conversations.
+        Retrieves the list of conversations, most recently updated first.
+        Pages are read with keyset pagination on the updated_at index, so
+        each page costs the same however many conversations come before it.
+        
+        Args:
+            limit: Maximum number of conversations. If None, returns all.
+            before: Cursor of the last conversation of the previous page.
+                If None, starts from the most recent conversation.
         
         Returns:
-            List of dictionaries with id, first_message and updated_at (formatted)
+            List of dictionaries with id, first_message, updated_at (formatted)
+            message_count, last_message and cursor (to pass as before to get
+            the next page)
         """
-        with sqlite3.connect(str(self.db_path)) as connection:
-            connection.row_factory = sqlite3.Row
-            cursor = connection.cursor()
-            
-            cursor.execute('''
-                SELECT id, first_message, updated_at
-                FROM conversations
-                ORDER BY updated_at DESC
-            ''')
-            
-            rows = cursor.fetchall()
+        # Buffered activity changes the order, write it before reading
+        self.flush_activity()
+        
+        query = '''
+            SELECT id, first_message, updated_at, message_count, last_message,
+                   strftime('%d-%m-%Y', updated_at) AS updated_date
+            FROM conversations
+        '''
+        params: list[Any] = []
+        if before is not None:
+            query += " WHERE (updated_at, id) < (?, ?)"
+            params += list(before)
+        query += " ORDER BY updated_at DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        with self._cursor() as cursor:
+            cursor.execute(query, params)
             return [
                 {
                     'id': row['id'],
                     'first_message': row['first_message'],
-                    'updated_at': datetime.fromisoformat(row['updated_at']).strftime('%d-%m-%Y')
+                    'updated_at': row['updated_date'],
+                    'message_count': row['message_count'],
+                    'last_message': row['last_message'],
+                    'cursor': (row['updated_at'], row['id']),
                 }
-                for row in rows
+                for row in cursor.fetchall()
             ]
     
+    @retry_on_busy
+    def get_thread_ids(self) -> list[str]:
+        """
+        Retrieves the thread IDs of all conversations.
+        
+        Returns:
+            List of thread IDs, most recently updated first
+        """
+        with self._cursor() as cursor:
+            cursor.execute('''
+                SELECT thread_id
+                FROM conversations
+                ORDER BY updated_at DESC
+            ''')
+            return [row['thread_id'] for row in cursor.fetchall()]
+    
+    @retry_on_busy
+    def get_unindexed_thread_ids(self) -> list[str]:
+        """
+        Retrieves the thread IDs of conversations without indexed messages.
+        
+        Returns:
+            List of thread IDs, most recently updated first
+        """
+        with self._cursor() as cursor:
+            cursor.execute('''
+                SELECT thread_id
+                FROM conversations AS c
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM conversation_messages AS m
+                    WHERE m.thread_id = c.thread_id
+                )
+                ORDER BY updated_at DESC
+            ''')
+            return [row['thread_id'] for row in cursor.fetchall()]
+    
+    def iter_conversations(self, batch_size: int = 500) -> Iterator[dict[str, Any]]:
+        """
+        Yields every conversation in ID order, reading one batch at a time,
+        so memory does not grow with the number of conversations.
+        
+        Args:
+            batch_size: Conversations read per query
+            
+        Yields:
+            Dictionary with id, thread_id, first_message, created_at,
+            updated_at, message_count and last_message (timestamps unformatted)
+        """
+        self.flush_activity()
+        last_id = 0
+        while True:
+            batch = self._get_conversations_after(last_id, batch_size)
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1]['id']
+    
+    @retry_on_busy
+    def _get_conversations_after(self, last_id: int, limit: int) -> list[dict[str, Any]]:
+        """
+        Retrieves the conversations with an ID greater than last_id.
+        
+        Args:
+            last_id: ID of the last conversation already read
+            limit: Maximum number of conversations
+            
+        Returns:
+            List of conversation dictionaries, in ID order
+        """
+        with self._cursor() as cursor:
+            cursor.execute('''
+                SELECT id, thread_id, first_message, created_at, updated_at,
+                       message_count, last_message
+                FROM conversations
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, limit))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    @traced("ConversationDB.get_conversation", "conversation_id")
+    @retry_on_busy
     def get_conversation(self, conversation_id: int) -> dict[str, Any] | None:
         """
         Retrieves conversation metadata by ID.
@@ -90,9 +442,7 @@ class ConversationDB:
         Returns:
             Dictionary with id and thread_id, or None
         """
-        with sqlite3.connect(str(self.db_path)) as connection:
-            connection.row_factory = sqlite3.Row
-            cursor = connection.cursor()
+        with self._cursor() as cursor:
             cursor.execute('''
                 SELECT id, thread_id
                 FROM conversations
@@ -107,9 +457,13 @@ class ConversationDB:
                 }
             return None
 
+    @traced("ConversationDB.delete_conversation", "conversation_id")
+    @retry_on_busy
     def delete_conversation(self, conversation_id: int) -> bool:
         """
         Deletes a conversation history.
+        Checkpoint data lives in the checkpointer and is deleted
+        separately with checkpointer.delete_thread(thread_id).
         
         Args:
             conversation_id: ID of the record to delete
@@ -117,12 +471,12 @@ class ConversationDB:
         Returns:
             True if deleted successfully, False otherwise
         """
-        with sqlite3.connect(str(self.db_path)) as connection:
-            cursor = connection.cursor()
+        with self._cursor(transaction=True) as cursor:
             cursor.execute('DELETE FROM conversations WHERE id = ?', (conversation_id,))
-            connection.commit()
             return cursor.rowcount > 0
 
+    @traced("ConversationDB.save_conversation_metadata")
+    @retry_on_busy
     def save_conversation_metadata(self, first_message: str) -> tuple[int, str]:
         """
         Saves conversation metadata to the database.
@@ -134,11 +488,469 @@ class ConversationDB:
         Returns:
             Tuple of (conversation_id, thread_id)
         """
-        with sqlite3.connect(str(self.db_path)) as connection:
-            cursor = connection.cursor()
+        with self._cursor(transaction=True) as cursor:
             cursor.execute('''
                 INSERT INTO conversations (first_message)
                 VALUES (?)
             ''', (first_message,))
-            connection.commit()
             return cursor.lastrowid, f"t{cursor.lastrowid}"
+
+    @traced("ConversationDB.record_activity", "thread_id")
+    def record_activity(
+        self,
+        thread_id: str,
+        messages_added: int,
+        last_message: str | None = None,
+        indexed_messages: Sequence[tuple[str, str]] = (),
+        usage: Mapping[str, float] | None = None
+    ) -> None:
+        """
+        Records a turn of a conversation: bumps updated_at, adds to the
+        message count, replaces the last message preview, adds the
+        turn's messages to the full-text index and adds the turn to the
+        day's usage statistics.
+        The change is buffered and coalesced with other turns of the same
+        thread, so the turn does not pay for a commit.
+        
+        Args:
+            thread_id: Thread ID of the conversation
+            messages_added: Number of messages the turn added
+            last_message: Text of the last message of the turn. If None,
+                keeps the previous preview.
+            indexed_messages: (role, text) of the turn's messages to make searchable
+            usage: Counters of the turn: input_tokens, output_tokens,
+                tool_calls and llm_seconds. Missing counters count as 0.
+        """
+        now = datetime.now(timezone.utc)
+        usage = usage or {}
+        counters = [1, messages_added, *(usage.get(column, 0) for column in STATS_COLUMNS[2:])]
+        
+        with self._activity_lock:
+            pending = self._pending_activity.setdefault(thread_id, PendingActivity())
+            pending.updated_at = now.strftime('%Y-%m-%d %H:%M:%S')
+            pending.messages_added += messages_added
+            if last_message is not None:
+                pending.last_message = last_message
+            pending.indexed_messages.extend(indexed_messages)
+            totals = pending.stats.setdefault(now.strftime('%Y-%m-%d'), [0] * len(STATS_COLUMNS))
+            for index, value in enumerate(counters):
+                totals[index] += value
+            
+            if self.activity_flush_interval > 0 and self._flush_thread is None:
+                self._flush_thread = threading.Thread(
+                    target=self._run_activity_flush, name="conversation-activity", daemon=True
+                )
+                self._flush_thread.start()
+        
+        if self.activity_flush_interval <= 0:
+            self.flush_activity()
+    
+    @property
+    def pending_activity_count(self) -> int:
+        """Number of conversations with activity not yet written."""
+        with self._activity_lock:
+            return len(self._pending_activity)
+    
+    @traced("ConversationDB.flush_activity")
+    def flush_activity(self) -> int:
+        """
+        Writes the buffered activity in a single transaction.
+        If the write fails, the activity is kept and retried by the next flush.
+        
+        Returns:
+            Number of conversations updated
+        """
+        with self.take_activity() as pending:
+            if pending:
+                self._write_activity(pending)
+        return len(pending)
+    
+    @contextmanager
+    def take_activity(self) -> Iterator[dict[str, PendingActivity]]:
+        """
+        Takes the buffered activity, for the block to write it with
+        write_activity(). If the block fails, the activity is put back and
+        retried by the next flush.
+        
+        Yields:
+            Activity per thread ID
+        """
+        with self._activity_lock:
+            pending, self._pending_activity = self._pending_activity, {}
+        try:
+            yield pending
+        except BaseException:
+            # Put the activity back, merging turns recorded in the meantime
+            with self._activity_lock:
+                for thread_id, activity in pending.items():
+                    newer = self._pending_activity.get(thread_id)
+                    if newer is None:
+                        self._pending_activity[thread_id] = activity
+                    else:
+                        newer.merge_older(activity)
+            raise
+    
+    @retry_on_busy
+    def _write_activity(self, pending: dict[str, PendingActivity]) -> None:
+        """
+        Writes buffered activity in its own transaction.
+        
+        Args:
+            pending: Activity per thread ID
+        """
+        with self._cursor(transaction=True) as cursor:
+            self.write_activity(cursor, pending)
+    
+    @staticmethod
+    def write_activity(cursor: sqlite3.Cursor, pending: dict[str, PendingActivity]) -> None:
+        """
+        Applies buffered activity to the conversations, search and stats
+        tables, in the caller's transaction.
+        
+        Args:
+            cursor: Cursor of the open transaction
+            pending: Activity per thread ID
+        """
+        cursor.executemany('''
+            UPDATE conversations
+            SET updated_at = ?,
+                message_count = message_count + ?,
+                last_message = COALESCE(?, last_message)
+            WHERE thread_id = ?
+        ''', [
+            (activity.updated_at, activity.messages_added, activity.last_message, thread_id)
+            for thread_id, activity in pending.items()
+        ])
+        # Skips conversations deleted while their activity was buffered
+        cursor.executemany('''
+            INSERT INTO conversation_messages (thread_id, role, content)
+            SELECT ?, ?, ?
+            WHERE EXISTS (SELECT 1 FROM conversations WHERE thread_id = ?)
+        ''', [
+            (thread_id, role, content, thread_id)
+            for thread_id, activity in pending.items()
+            for role, content in activity.indexed_messages
+        ])
+        cursor.executemany(f'''
+            INSERT INTO conversation_stats (thread_id, day, {', '.join(STATS_COLUMNS)})
+            VALUES (?, ?, {', '.join('?' * len(STATS_COLUMNS))})
+            ON CONFLICT (thread_id, day) DO UPDATE SET
+            {', '.join(f'{column} = {column} + excluded.{column}' for column in STATS_COLUMNS)}
+        ''', [
+            (thread_id, day, *counters)
+            for thread_id, activity in pending.items()
+            for day, counters in activity.stats.items()
+        ])
+    
+    def _run_activity_flush(self) -> None:
+        """Flushes activity on every interval until closed. Errors are retried next time."""
+        while not self._stop_event.wait(self.activity_flush_interval):
+            try:
+                self.flush_activity()
+            except Exception:
+                # The activity stays buffered, the next interval tries again
+                continue
+
+    @traced("ConversationDB.replace_indexed_messages", "thread_id")
+    @retry_on_busy
+    def replace_indexed_messages(
+        self,
+        thread_id: str,
+        messages: Sequence[tuple[str, str]]
+    ) -> None:
+        """
+        Replaces all the indexed messages of a conversation, in one transaction.
+        
+        Args:
+            thread_id: Thread ID of the conversation
+            messages: (role, text) of every message to make searchable
+        """
+        with self._cursor(transaction=True) as cursor:
+            cursor.execute(
+                'DELETE FROM conversation_messages WHERE thread_id = ?', (thread_id,)
+            )
+            cursor.executemany('''
+                INSERT INTO conversation_messages (thread_id, role, content)
+                VALUES (?, ?, ?)
+            ''', [(thread_id, role, content) for role, content in messages])
+    
+    @traced("ConversationDB.search_conversations")
+    @retry_on_busy
+    def search_conversations(self, text: str, limit: int = 10) -> list[dict[str, Any]]:
+        """
+        Finds the conversations whose messages contain every word of the text.
+        The last word also matches as a prefix, so results follow the user
+        while typing. Conversations with the most recent match come first.
+        
+        Args:
+            text: Words to search for (FTS5 syntax is not interpreted)
+            limit: Maximum number of conversations
+            
+        Returns:
+            List of dictionaries with id, first_message, updated_at (formatted)
+            and snippet (matching excerpt, with the matches between « and »)
+        """
+        match_query = _to_match_query(text)
+        if match_query is None or limit <= 0:
+            return []
+        
+        # Buffered turns are not indexed yet, write them before reading
+        self.flush_activity()
+        
+        with self._cursor() as cursor:
+            # Read hits newest first and keep the first of each conversation
+            best_hits: dict[str, int] = {}
+            before: int | None = None
+            scanned = 0
+            while len(best_hits) < limit and scanned < SEARCH_MAX_HITS:
+                params: list[Any] = [match_query]
+                keyset = ''
+                if before is not None:
+                    keyset = 'AND rowid < ?'
+                    params.append(before)
+                cursor.execute(f'''
+                    SELECT m.id, m.thread_id
+                    FROM (
+                        SELECT rowid
+                        FROM conversation_messages_fts
+                        WHERE conversation_messages_fts MATCH ? {keyset}
+                        ORDER BY rowid DESC
+                        LIMIT ?
+                    ) AS hits
+                    JOIN conversation_messages AS m ON m.id = hits.rowid
+                    ORDER BY m.id DESC
+                ''', (*params, SEARCH_BATCH_SIZE))
+                rows = cursor.fetchall()
+                for row in rows:
+                    if len(best_hits) < limit:
+                        best_hits.setdefault(row['thread_id'], row['id'])
+                scanned += len(rows)
+                if len(rows) < SEARCH_BATCH_SIZE:
+                    break
+                before = rows[-1]['id']
+            
+            if not best_hits:
+                return []
+            
+            placeholders = ', '.join('?' * len(best_hits))
+            cursor.execute(f'''
+                SELECT rowid, snippet(conversation_messages_fts, 0, '«', '»', '…', 12) AS snippet
+                FROM conversation_messages_fts
+                WHERE conversation_messages_fts MATCH ? AND rowid IN ({placeholders})
+            ''', (match_query, *best_hits.values()))
+            snippets = {row['rowid']: row['snippet'] for row in cursor.fetchall()}
+            
+            cursor.execute(f'''
+                SELECT id, thread_id, first_message,
+                       strftime('%d-%m-%Y', updated_at) AS updated_date
+                FROM conversations
+                WHERE thread_id IN ({placeholders})
+            ''', tuple(best_hits))
+            conversations = {row['thread_id']: row for row in cursor.fetchall()}
+        
+        return [
+            {
+                'id': conversations[thread_id]['id'],
+                'first_message': conversations[thread_id]['first_message'],
+                'updated_at': conversations[thread_id]['updated_date'],
+                'snippet': snippets.get(message_id),
+            }
+            for thread_id, message_id in best_hits.items()
+            if thread_id in conversations
+        ]
+    
+    @retry_on_busy
+    def get_indexed_messages(self, thread_id: str) -> list[tuple[str, str]]:
+        """
+        Retrieves the messages of a conversation in the full-text index.
+        
+        Args:
+            thread_id: Thread ID of the conversation
+            
+        Returns:
+            List of (role, text) tuples, in the order they were indexed
+        """
+        with self._cursor() as cursor:
+            cursor.execute('''
+                SELECT role, content
+                FROM conversation_messages
+                WHERE thread_id = ?
+                ORDER BY id
+            ''', (thread_id,))
+            return [(row['role'], row['content']) for row in cursor.fetchall()]
+    
+    @retry_on_busy
+    def import_conversations(self, conversations: Sequence[dict[str, Any]]) -> list[str]:
+        """
+        Inserts exported conversations in a single transaction.
+        Each one gets a new ID and thread ID, so imports never collide with
+        conversations already in the database.
+        
+        Args:
+            conversations: Dictionaries with first_message and optionally
+                created_at, updated_at, message_count, last_message and
+                indexed_messages (list of (role, text))
+                
+        Returns:
+            New thread IDs, in the order of the conversations
+        """
+        thread_ids = []
+        with self._cursor(transaction=True) as cursor:
+            for conversation in conversations:
+                cursor.execute('''
+                    INSERT INTO conversations (
+                        first_message, created_at, updated_at, message_count, last_message
+                    )
+                    VALUES (?, COALESCE(?, CURRENT_TIMESTAMP), COALESCE(?, CURRENT_TIMESTAMP), ?, ?)
+                ''', (
+                    conversation.get('first_message'),
+                    conversation.get('created_at'),
+                    conversation.get('updated_at'),
+                    conversation.get('message_count') or 0,
+                    conversation.get('last_message'),
+                ))
+                thread_id = f"t{cursor.lastrowid}"
+                cursor.executemany('''
+                    INSERT INTO conversation_messages (thread_id, role, content)
+                    VALUES (?, ?, ?)
+                ''', [
+                    (thread_id, role, content)
+                    for role, content in conversation.get('indexed_messages') or []
+                ])
+                thread_ids.append(thread_id)
+        return thread_ids
+    
+    @retry_on_busy
+    def delete_conversations(self, thread_ids: Sequence[str]) -> None:
+        """
+        Deletes several conversations, and their indexed messages, in a single transaction.
+        
+        Args:
+            thread_ids: Thread IDs of the conversations
+        """
+        with self._cursor(transaction=True) as cursor:
+            cursor.executemany(
+                "DELETE FROM conversations WHERE thread_id = ?",
+                [(thread_id,) for thread_id in thread_ids]
+            )
+    
+    @traced("ConversationDB.get_conversation_stats", "thread_id")
+    @retry_on_busy
+    def get_conversation_stats(self, thread_id: str) -> dict[str, float]:
+        """
+        Retrieves the usage totals of a conversation.
+        
+        Args:
+            thread_id: Thread ID of the conversation
+            
+        Returns:
+            Dictionary with every counter of STATS_COLUMNS (0 if none recorded)
+        """
+        self.flush_activity()
+        with self._cursor() as cursor:
+            cursor.execute(f'''
+                SELECT {', '.join(f'COALESCE(SUM({column}), 0) AS {column}' for column in STATS_COLUMNS)}
+                FROM conversation_stats
+                WHERE thread_id = ?
+            ''', (thread_id,))
+            return dict(cursor.fetchone())
+    
+    @retry_on_busy
+    def get_top_conversations(
+        self,
+        limit: int = 10,
+        by: str = 'tokens',
+        since: str | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Retrieves the conversations that used the most of a counter.
+        Deleted conversations are included, with first_message None.
+        
+        Args:
+            limit: Maximum number of conversations
+            by: Counter to rank by: tokens, messages, tool_calls or llm_seconds
+            since: First day counted (YYYY-MM-DD). If None, counts every day.
+            
+        Returns:
+            List of dictionaries with thread_id, first_message and the
+            totals of every counter of STATS_COLUMNS, highest first
+            
+        Raises:
+            ValueError: If by is not a known counter
+        """
+        if by not in TOP_CONVERSATIONS_ORDER:
+            raise ValueError(
+                f"Invalid ranking counter: {by!r} (expected one of {', '.join(TOP_CONVERSATIONS_ORDER)})"
+            )
+        
+        self.flush_activity()
+        where = "WHERE day >= ?" if since is not None else ""
+        params = [since] if since is not None else []
+        order = TOP_CONVERSATIONS_ORDER[by]
+        
+        with self._cursor() as cursor:
+            cursor.execute(f'''
+                SELECT totals.*, c.first_message
+                FROM (
+                    SELECT thread_id, {', '.join(f'SUM({column}) AS {column}' for column in STATS_COLUMNS)}
+                    FROM conversation_stats
+                    {where}
+                    GROUP BY thread_id
+                    ORDER BY {order} DESC
+                    LIMIT ?
+                ) AS totals
+                LEFT JOIN conversations AS c ON c.thread_id = totals.thread_id
+                ORDER BY {order} DESC
+            ''', (*params, limit))
+            return [dict(row) for row in cursor.fetchall()]
+    
+    @retry_on_busy
+    def get_daily_totals(self, since: str | None = None) -> list[dict[str, Any]]:
+        """
+        Retrieves the usage totals of every conversation per day.
+        
+        Args:
+            since: First day returned (YYYY-MM-DD). If None, returns every day.
+            
+        Returns:
+            List of dictionaries with day, conversations (active that day)
+            and the totals of every counter of STATS_COLUMNS, oldest day first
+        """
+        self.flush_activity()
+        query = f'''
+            SELECT day, COUNT(*) AS conversations,
+                   {', '.join(f'SUM({column}) AS {column}' for column in STATS_COLUMNS)}
+            FROM conversation_stats
+        '''
+        params: list[Any] = []
+        if since is not None:
+            query += " WHERE day >= ?"
+            params.append(since)
+        query += " GROUP BY day ORDER BY day"
+        
+        with self._cursor() as cursor:
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+
+
+def _to_match_query(text: str) -> str | None:
+    """
+    Builds an FTS5 query matching every word of free text.
+    Words are quoted, so operators and punctuation typed by the user are
+    searched literally. The last word is a prefix unless it is too short.
+    
+    Args:
+        text: Text typed by the user
+        
+    Returns:
+        FTS5 MATCH expression, or None if the text has no words
+    """
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    
+    terms = [f'"{word}"' for word in words]
+    if len(words[-1]) >= MIN_PREFIX_LENGTH and not text[-1:].isspace():
+        terms[-1] += '*'
+    return ' '.join(terms)
+
@@ -0,0 +1,79 @@
+"""
+Module for the full-text search index of conversations.
+Turns are indexed as they complete, through ConversationDB.record_activity();
+backfill_search_index() indexes conversations stored before the index existed.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from src.database.repository import ConversationDB
+
+
+def searchable_messages(messages: Sequence[BaseMessage]) -> list[tuple[str, str]]:
+    """
+    Selects the messages worth indexing: user messages and assistant replies
+    with text. Tool results and tool-call-only replies are skipped.
+
+    Args:
+        messages: Conversation messages
+
+    Returns:
+        List of (role, text) tuples
+    """
+    searchable = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            role = "user"
+        elif isinstance(message, AIMessage):
+            role = "assistant"
+        else:
+            continue
+
+        if text := message.text.strip():
+            searchable.append((role, text))
+    return searchable
+
+
+def backfill_search_index(
+    db: ConversationDB,
+    checkpointer: BaseCheckpointSaver,
+    rebuild: bool = False
+) -> dict[str, Any]:
+    """
+    Indexes the messages stored in the latest checkpoint of each conversation.
+    Conversations already in the index are skipped unless rebuild is True:
+    their index also holds messages that summarization removed from the
+    checkpoint, which a rebuild replaces with the summary.
+
+    Args:
+        db: Database instance with the conversation metadata
+        checkpointer: Checkpoint saver instance
+        rebuild: If True, reindexes every conversation
+
+    Returns:
+        Dictionary with conversations_indexed and messages_indexed
+    """
+    thread_ids = db.get_thread_ids() if rebuild else db.get_unindexed_thread_ids()
+
+    conversations_indexed = 0
+    messages_indexed = 0
+    for thread_id in thread_ids:
+        config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+        checkpoint = checkpointer.get(config)
+        if not checkpoint:
+            continue
+
+        messages = searchable_messages(checkpoint.get("channel_values", {}).get("messages", []))
+        db.replace_indexed_messages(thread_id, messages)
+        conversations_indexed += 1
+        messages_indexed += len(messages)
+
+    return {
+        'conversations_indexed': conversations_indexed,
+        'messages_indexed': messages_indexed,
+    }
@@ -0,0 +1,145 @@
+"""
+Checkpoint serializers.
+Checkpoints are dominated by message text, which compresses very well.
+"""
+
+import zlib
+from typing import Any
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+# Payload header: one format version byte followed by one codec byte
+FORMAT_VERSION = 1
+COMPRESSED_TYPE_SUFFIX = "+compressed"
+CODEC_IDS = {"zlib": 1, "zstd": 2}
+CODECS = ("none", *CODEC_IDS)
+
+
+class CompressedSerializer(SerializerProtocol):
+    """
+    Serializer that compresses payloads of another serializer.
+    Compressed payloads are marked by a type suffix and start with a
+    format version byte and a codec byte. Payloads written without
+    compression (including all checkpoints from before it was enabled)
+    are read unchanged, so compression can be turned on or off at any time.
+    """
+    
+    def __init__(
+        self,
+        inner: SerializerProtocol | None = None,
+        codec: str = "zlib",
+        threshold: int = 1024,
+        level: int | None = None
+    ) -> None:
+        """
+        Initializes the serializer.
+        
+        Args:
+            inner: Serializer producing the uncompressed payload.
+                If None, uses LangGraph's JsonPlusSerializer.
+            codec: "zlib", "zstd" or "none" (zstd needs the zstandard package)
+            threshold: Payloads smaller than this many bytes are not compressed
+            level: Compression level. If None, uses the codec default.
+            
+        Raises:
+            ValueError: If the codec is unknown or not installed
+        """
+        codec = codec.lower()
+        if codec not in CODECS:
+            raise ValueError(f"Unknown compression codec: {codec!r}")
+        if codec == "zstd" and zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        
+        self.inner = inner or JsonPlusSerializer()
+        self.codec = codec
+        self.threshold = threshold
+        self.level = level
+    
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        """
+        Serializes and, if worth it, compresses an object.
+        
+        Args:
+            obj: Object to serialize
+            
+        Returns:
+            Tuple of (type, payload)
+        """
+        type_, data = self.inner.dumps_typed(obj)
+        if self.codec == "none" or len(data) < self.threshold:
+            return type_, data
+        
+        compressed = self._compress(data)
+        # Keep incompressible payloads as they are
+        if len(compressed) + 2 >= len(data):
+            return type_, data
+        
+        header = bytes((FORMAT_VERSION, CODEC_IDS[self.codec]))
+        return f"{type_}{COMPRESSED_TYPE_SUFFIX}", header + compressed
+    
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        """
+        Deserializes a payload, compressed or not.
+        
+        Args:
+            data: Tuple of (type, payload)
+            
+        Returns:
+            Deserialized object
+            
+        Raises:
+            ValueError: If the payload format version or codec is not supported
+        """
+        type_, payload = data
+        if type_.endswith(COMPRESSED_TYPE_SUFFIX):
+            type_ = type_[:-len(COMPRESSED_TYPE_SUFFIX)]
+            payload = _decompress(payload)
+        return self.inner.loads_typed((type_, payload))
+    
+    def _compress(self, data: bytes) -> bytes:
+        """
+        Compresses data with the configured codec.
+        
+        Args:
+            data: Uncompressed bytes
+            
+        Returns:
+            Compressed bytes, without header
+        """
+        if self.codec == "zstd":
+            level = self.level if self.level is not None else 3
+            return zstandard.ZstdCompressor(level=level).compress(data)
+        level = self.level if self.level is not None else 6
+        return zlib.compress(data, level)
+
+
+def _decompress(payload: bytes) -> bytes:
+    """
+    Decompresses a payload written by CompressedSerializer.
+    
+    Args:
+        payload: Header followed by compressed bytes
+        
+    Returns:
+        Uncompressed bytes
+        
+    Raises:
+        ValueError: If the format version or codec is not supported
+    """
+    version, codec_id = payload[0], payload[1]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format version: {version}")
+    
+    if codec_id == CODEC_IDS["zlib"]:
+        return zlib.decompress(payload[2:])
+    if codec_id == CODEC_IDS["zstd"]:
+        if zstandard is None:
+            raise ValueError("Checkpoint is zstd compressed but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload[2:])
+    raise ValueError(f"Unsupported checkpoint compression codec: {codec_id}")
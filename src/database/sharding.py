@@ -0,0 +1,247 @@
+"""
+Sharded checkpoint storage.
+A single SQLite file lets only one writer commit at a time. Threads are
+spread by a hash of their thread_id over several files, each with its
+own connection and lock, so sessions on different shards write in parallel.
+"""
+
+import heapq
+import itertools
+import re
+import sqlite3
+import zlib
+from collections.abc import Iterator, Sequence
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from src.database.connection import connect
+from src.database.dedup import DedupSqliteSaver, copy_thread
+
+WRITES_COLUMNS = (
+    "thread_id, checkpoint_ns, checkpoint_id, task_id, task_path, idx, channel, type, value"
+)
+
+
+def shard_index(thread_id: str, shard_count: int) -> int:
+    """
+    Computes the shard of a thread. Stable across processes and restarts.
+    
+    Args:
+        thread_id: Thread ID
+        shard_count: Number of shards
+        
+    Returns:
+        Index of the shard, from 0 to shard_count - 1
+    """
+    return zlib.crc32(str(thread_id).encode("utf-8")) % shard_count
+
+
+def shard_path(db_path: Path, index: int) -> Path:
+    """
+    Returns the file of a shard. Shard 0 is the original database file,
+    so data written before sharding was enabled stays in place.
+    
+    Args:
+        db_path: Path to the checkpoint database file
+        index: Index of the shard
+        
+    Returns:
+        Path to the shard file, e.g. checkpoints.shard2.db
+    """
+    if index == 0:
+        return db_path
+    return db_path.with_name(f"{db_path.stem}.shard{index}{db_path.suffix}")
+
+
+def find_shard_paths(db_path: Path) -> dict[int, Path]:
+    """
+    Finds the shard files that exist on disk, whatever the configured count.
+    
+    Args:
+        db_path: Path to the checkpoint database file
+        
+    Returns:
+        Dictionary of shard index to file path
+    """
+    pattern = re.compile(rf"^{re.escape(db_path.stem)}\.shard(\d+){re.escape(db_path.suffix)}$")
+    paths = {0: db_path} if db_path.exists() else {}
+    for path in db_path.parent.glob(f"{db_path.stem}.shard*{db_path.suffix}"):
+        match = pattern.match(path.name)
+        if match:
+            paths[int(match.group(1))] = path
+    return dict(sorted(paths.items()))
+
+
+class ShardedCheckpointSaver(BaseCheckpointSaver):
+    """Checkpoint saver that routes each thread to one of several savers."""
+    
+    def __init__(self, shards: Sequence[BaseCheckpointSaver]) -> None:
+        """
+        Initializes the saver.
+        
+        Args:
+            shards: One checkpoint saver per shard, in shard order
+        """
+        super().__init__(serde=shards[0].serde)
+        self.shards = list(shards)
+    
+    def shard_for(self, thread_id: str) -> BaseCheckpointSaver:
+        """
+        Returns the saver that stores a thread.
+        
+        Args:
+            thread_id: Thread ID
+            
+        Returns:
+            Checkpoint saver of the thread's shard
+        """
+        return self.shards[shard_index(thread_id, len(self.shards))]
+    
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self.shard_for(config["configurable"]["thread_id"]).get_tuple(config)
+    
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config and "thread_id" in config.get("configurable", {}):
+            return self.shard_for(config["configurable"]["thread_id"]).list(
+                config, filter=filter, before=before, limit=limit
+            )
+        
+        # Each shard lists newest first, so a merge keeps the global order
+        merged = heapq.merge(
+            *(
+                shard.list(config, filter=filter, before=before, limit=limit)
+                for shard in self.shards
+            ),
+            key=lambda checkpoint_tuple: checkpoint_tuple.config["configurable"]["checkpoint_id"],
+            reverse=True,
+        )
+        return itertools.islice(merged, limit)
+    
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.shard_for(config["configurable"]["thread_id"]).put(
+            config, checkpoint, metadata, new_versions
+        )
+    
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.shard_for(config["configurable"]["thread_id"]).put_writes(
+            config, writes, task_id, task_path
+        )
+    
+    def delete_thread(self, thread_id: str) -> None:
+        self.shard_for(thread_id).delete_thread(thread_id)
+    
+    def get_next_version(self, current: Any, channel: None) -> Any:
+        return self.shards[0].get_next_version(current, channel)
+
+
+def rebalance_shards(db_path: Path, shard_count: int) -> dict[str, Any]:
+    """
+    Moves every thread to the shard it belongs to for a new shard count.
+    Run it after changing CHECKPOINT_SHARDS, while no CLI is running.
+    Rows are copied before they are deleted, so an interrupted run can
+    simply be repeated. Shard files beyond the new count are removed.
+    
+    Args:
+        db_path: Path to the checkpoint database file
+        shard_count: New number of shards
+        
+    Returns:
+        Dictionary with threads_moved, shards_before and shards_after
+    """
+    existing = find_shard_paths(db_path)
+    connections = {
+        index: connect(shard_path(db_path, index))
+        for index in set(existing) | set(range(shard_count))
+    }
+    threads_moved = 0
+    
+    try:
+        for connection in connections.values():
+            DedupSqliteSaver(connection).setup()
+        
+        for source_index in existing:
+            source = connections[source_index]
+            thread_ids = [row[0] for row in source.execute(
+                "SELECT thread_id FROM checkpoints UNION SELECT thread_id FROM writes"
+            )]
+            
+            moves: dict[int, list[str]] = {}
+            for thread_id in thread_ids:
+                target_index = shard_index(thread_id, shard_count)
+                if target_index != source_index:
+                    moves.setdefault(target_index, []).append(thread_id)
+            
+            for target_index, moved in moves.items():
+                copy_threads(source, connections[target_index], moved)
+                with source:
+                    params = [(thread_id,) for thread_id in moved]
+                    source.executemany("DELETE FROM checkpoints WHERE thread_id = ?", params)
+                    source.executemany("DELETE FROM writes WHERE thread_id = ?", params)
+                threads_moved += len(moved)
+    finally:
+        for connection in connections.values():
+            connection.close()
+    
+    # Shards beyond the new count are empty now
+    for index, path in existing.items():
+        if index >= shard_count:
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{path}{suffix}").unlink(missing_ok=True)
+    
+    return {
+        "threads_moved": threads_moved,
+        "shards_before": len(existing),
+        "shards_after": shard_count,
+    }
+
+
+def copy_threads(
+    source: sqlite3.Connection,
+    target: sqlite3.Connection,
+    thread_ids: list[str]
+) -> None:
+    """
+    Copies the rows of some threads between databases in one transaction.
+    
+    Args:
+        source: Connection to the database that has the rows
+        target: Connection to the database that receives the rows
+        thread_ids: Thread IDs to copy
+    """
+    with target, closing(target.cursor()) as cursor:
+        for thread_id in thread_ids:
+            copy_thread(source, cursor, thread_id)
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO writes ({WRITES_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                source.execute(
+                    f"SELECT {WRITES_COLUMNS} FROM writes WHERE thread_id = ?", (thread_id,)
+                ),
+            )
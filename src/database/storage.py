@@ -0,0 +1,115 @@
+"""
+Module for the unified storage layout.
+With STORAGE_LAYOUT=UNIFIED, checkpoints live in the conversation database
+and the checkpoint saver shares the ConversationDB connection, so the
+checkpoints and activity of a turn are committed in a single transaction.
+migrate_to_unified() moves the checkpoints of the two-file layout there.
+"""
+
+from contextlib import ExitStack, closing
+from pathlib import Path
+from typing import Any
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src.core.tracing import traced
+from src.database.checkpointer import flush_checkpointer, iter_savers, sqlite_savers
+from src.database.connection import connect, retry_on_busy
+from src.database.dedup import DedupSqliteSaver
+from src.database.repository import ConversationDB
+from src.database.sharding import copy_threads, find_shard_paths
+from src.database.write_behind import WriteBehindCheckpointSaver
+
+
+@traced("commit_turn")
+def commit_turn(db: ConversationDB, checkpointer: BaseCheckpointSaver) -> None:
+    """
+    Makes a turn durable. When the checkpoint saver shares the database
+    connection (unified layout), the buffered checkpoint writes and the
+    buffered conversation activity are committed in one transaction.
+    Otherwise only the checkpoint writes are committed, and the activity
+    is written on its own interval.
+    
+    Args:
+        db: Database instance with the conversation metadata
+        checkpointer: Checkpoint saver instance, possibly wrapped
+    """
+    savers = sqlite_savers(checkpointer)
+    if len(savers) != 1 or db.connection is None or savers[0].conn is not db.connection:
+        flush_checkpointer(checkpointer)
+        return
+    
+    write_behind = [
+        saver for saver in iter_savers(checkpointer)
+        if isinstance(saver, WriteBehindCheckpointSaver)
+    ]
+    _commit_unified(db, savers[0], write_behind)
+
+
+@retry_on_busy
+def _commit_unified(
+    db: ConversationDB,
+    sqlite_saver: SqliteSaver,
+    write_behind: list[WriteBehindCheckpointSaver]
+) -> None:
+    """
+    Commits the buffered checkpoint writes and activity in one transaction.
+    If the commit fails, both stay buffered.
+    
+    Args:
+        db: Database instance sharing the connection of the saver
+        sqlite_saver: SqliteSaver on the shared connection
+        write_behind: Write-behind savers buffering the checkpoint writes
+    """
+    # setup() commits on its own, so it must run before the transaction
+    with sqlite_saver.lock:
+        sqlite_saver.setup()
+    
+    with ExitStack() as stack:
+        operations = [
+            operation
+            for saver in write_behind
+            for operation in stack.enter_context(saver.take_operations())
+        ]
+        activity = stack.enter_context(db.take_activity())
+        if operations or activity:
+            with db.transaction() as cursor:
+                for operation in operations:
+                    operation(cursor)
+                db.write_activity(cursor, activity)
+
+
+def migrate_to_unified(conversation_db_path: Path, checkpoint_db_path: Path) -> dict[str, Any]:
+    """
+    Copies the checkpoints of every checkpoint file, shards included, to the
+    conversation database. Run it with the CLI stopped, before switching
+    STORAGE_LAYOUT to UNIFIED. The checkpoint files are left untouched, so
+    an interrupted run can simply be repeated.
+    
+    Args:
+        conversation_db_path: Path to the conversation database file
+        checkpoint_db_path: Path to the checkpoint database file
+    
+    Returns:
+        Dictionary with threads_copied and files_read
+    """
+    sources = find_shard_paths(checkpoint_db_path)
+    threads_copied = 0
+    
+    with closing(connect(conversation_db_path)) as target:
+        DedupSqliteSaver(target).setup()
+        for path in sources.values():
+            with closing(connect(path)) as source:
+                # Adds the columns copy_threads reads to files of older versions
+                DedupSqliteSaver(source).setup()
+                thread_ids = [row[0] for row in source.execute(
+                    "SELECT thread_id FROM checkpoints UNION SELECT thread_id FROM writes"
+                )]
+                copy_threads(source, target, thread_ids)
+                threads_copied += len(thread_ids)
+    
+    return {
+        "threads_copied": threads_copied,
+        "files_read": len(sources),
+    }
@@ -0,0 +1,238 @@
+"""
+Module for exporting and importing conversations as JSON Lines.
+Each line holds one conversation: its metadata, its indexed messages and the
+messages of its latest checkpoint. Conversations are streamed one batch at a
+time, so memory does not grow with their number, and checkpoints are read
+and written in parallel across shards.
+"""
+
+import json
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from itertools import islice
+from typing import Any, TextIO
+
+from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src.database.checkpointer import flush_checkpointer, sqlite_saver_for
+from src.database.compaction import purge_threads
+from src.database.connection import retry_on_busy
+from src.database.dedup import DedupSqliteSaver, write_checkpoint
+from src.database.repository import ConversationDB
+
+# Conversations read, or written in one transaction, at a time
+DEFAULT_BATCH_SIZE = 500
+
+# Conversation fields copied to and from the export as they are
+METADATA_FIELDS = ('first_message', 'created_at', 'updated_at', 'message_count', 'last_message')
+
+
+def export_conversations(
+    db: ConversationDB,
+    checkpointer: BaseCheckpointSaver,
+    output: TextIO,
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> dict[str, Any]:
+    """
+    Writes every conversation to a JSON Lines stream, in ID order.
+
+    Args:
+        db: Database instance with the conversation metadata
+        checkpointer: Checkpoint saver instance
+        output: Text stream the lines are written to
+        workers: Threads reading checkpoints; threads of different shards
+            read in parallel
+        batch_size: Conversations read at a time
+
+    Returns:
+        Dictionary with conversations, messages, elapsed_seconds and throughput
+    """
+    start = time.perf_counter()
+    flush_checkpointer(checkpointer)
+
+    conversations = 0
+    messages = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for batch in _batches(db.iter_conversations(batch_size), batch_size):
+            # Checkpoints are read straight from the shards, bypassing the cache
+            records = executor.map(
+                lambda conversation: _export_record(db, checkpointer, conversation), batch
+            )
+            for record in records:
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                conversations += 1
+                messages += len(record['messages'])
+
+    return _report(conversations, messages, start)
+
+
+def import_conversations(
+    db: ConversationDB,
+    checkpointer: BaseCheckpointSaver,
+    lines: Iterable[str],
+    workers: int = 1,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> dict[str, Any]:
+    """
+    Imports conversations from JSON Lines written by export_conversations.
+    Each batch is inserted in one transaction in the conversation database
+    and one transaction per checkpoint shard. If the checkpoints of a batch
+    cannot be written, its conversations and any checkpoints already stored
+    are deleted again before the error is raised; earlier batches stay
+    imported. Imported conversations get new IDs, so importing the same
+    file twice duplicates them.
+
+    Args:
+        db: Database instance with the conversation metadata
+        checkpointer: Checkpoint saver instance
+        lines: JSON Lines, e.g. an open file
+        workers: Threads writing checkpoints, one shard each at a time
+        batch_size: Conversations imported per transaction
+
+    Returns:
+        Dictionary with conversations, messages, elapsed_seconds and throughput
+    """
+    start = time.perf_counter()
+    flush_checkpointer(checkpointer)
+
+    conversations = 0
+    messages = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        records = (json.loads(line) for line in lines if line.strip())
+        for batch in _batches(records, batch_size):
+            # Parse the messages before writing, so a malformed line leaves nothing behind
+            batch_messages = [messages_from_dict(record['messages']) for record in batch]
+            thread_ids = db.import_conversations([
+                {
+                    **{field: record.get(field) for field in METADATA_FIELDS},
+                    'indexed_messages': record.get('indexed_messages'),
+                }
+                for record in batch
+            ])
+
+            # Group the checkpoints by shard and write the shards in parallel
+            by_saver: dict[int, tuple[SqliteSaver, list[tuple[str, list[BaseMessage]]]]] = {}
+            for thread_messages, thread_id in zip(batch_messages, thread_ids):
+                if not thread_messages:
+                    continue
+                saver = sqlite_saver_for(checkpointer, thread_id)
+                by_saver.setdefault(id(saver), (saver, []))[1].append((thread_id, thread_messages))
+            try:
+                list(executor.map(lambda group: _write_checkpoints(*group), by_saver.values()))
+            except Exception:
+                # Other shards may have committed; without their conversation rows
+                # those checkpoints, and rows without checkpoints, would be orphans
+                purge_threads(checkpointer, thread_ids)
+                db.delete_conversations(thread_ids)
+                raise
+            conversations += len(batch)
+            messages += sum(len(thread_messages) for thread_messages in batch_messages)
+
+    return _report(conversations, messages, start)
+
+
+def _export_record(
+    db: ConversationDB,
+    checkpointer: BaseCheckpointSaver,
+    conversation: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Builds the export line of a conversation.
+
+    Args:
+        db: Database instance with the conversation metadata
+        checkpointer: Checkpoint saver instance
+        conversation: Conversation dictionary from ConversationDB.iter_conversations
+
+    Returns:
+        Dictionary with the thread_id, metadata fields, indexed_messages
+        and messages (serialized with messages_to_dict)
+    """
+    thread_id = conversation['thread_id']
+    config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+    checkpoint = sqlite_saver_for(checkpointer, thread_id).get(config)
+    messages = checkpoint.get("channel_values", {}).get("messages", []) if checkpoint else []
+
+    return {
+        'thread_id': thread_id,
+        **{field: conversation[field] for field in METADATA_FIELDS},
+        'indexed_messages': db.get_indexed_messages(thread_id),
+        'messages': messages_to_dict(messages),
+    }
+
+
+@retry_on_busy
+def _write_checkpoints(
+    saver: SqliteSaver,
+    threads: list[tuple[str, list[BaseMessage]]]
+) -> None:
+    """
+    Stores one checkpoint per thread, holding its messages, in one transaction.
+
+    Args:
+        saver: SqliteSaver of the shard storing the threads
+        threads: (thread_id, messages) of each thread
+    """
+    puts = []
+    for thread_id, messages in threads:
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"messages": messages}
+        checkpoint["channel_versions"] = {"messages": saver.get_next_version(None, None)}
+        config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+        puts.append((config, checkpoint, {"source": "import", "step": -1, "parents": {}}))
+
+    if not isinstance(saver, DedupSqliteSaver):
+        for config, checkpoint, metadata in puts:
+            saver.put(config, checkpoint, metadata, checkpoint["channel_versions"])
+        return
+
+    prepared = [saver.prepare_checkpoint(*put) for put in puts]
+    with saver.lock:
+        saver.setup()
+        with saver.conn, closing(saver.conn.cursor()) as cursor:
+            for checkpoint in prepared:
+                write_checkpoint(cursor, checkpoint)
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    """
+    Splits an iterable in lists of up to size items, lazily.
+
+    Args:
+        items: Items to split
+        size: Maximum items per list
+
+    Yields:
+        Lists of consecutive items
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _report(conversations: int, messages: int, start: float) -> dict[str, Any]:
+    """
+    Builds the report of an export or import.
+
+    Args:
+        conversations: Conversations processed
+        messages: Checkpoint messages processed
+        start: perf_counter() value when the job started
+
+    Returns:
+        Dictionary with conversations, messages, elapsed_seconds and throughput
+        (conversations per second)
+    """
+    elapsed = time.perf_counter() - start
+    return {
+        'conversations': conversations,
+        'messages': messages,
+        'elapsed_seconds': elapsed,
+        'throughput': conversations / elapsed if elapsed > 0 else 0.0,
+    }
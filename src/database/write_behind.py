@@ -0,0 +1,272 @@
+"""
+Write-behind checkpoint saver.
+The agent stores a checkpoint after every graph step, which is several
+SQLite commits per turn. This saver serializes the checkpoints right away
+but buffers the rows and commits them together on a short interval and
+at the end of each turn.
+"""
+
+import json
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from functools import partial
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src.core.timings import timed
+from src.core.tracing import span
+from src.database.connection import retry_on_busy
+from src.database.dedup import DedupSqliteSaver, write_checkpoint
+
+# Pending operations that trigger a flush without waiting for the interval
+MAX_PENDING_OPERATIONS = 500
+
+INSERT_CHECKPOINT = (
+    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+    "parent_checkpoint_id, type, checkpoint, metadata) VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+REPLACE_WRITES = (
+    "INSERT OR REPLACE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, "
+    "task_path, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+IGNORE_WRITES = (
+    "INSERT OR IGNORE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, "
+    "task_path, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+# Buffered write, run with a cursor of the open transaction at flush time
+Operation = Callable[[sqlite3.Cursor], None]
+
+
+class WriteBehindCheckpointSaver(BaseCheckpointSaver):
+    """
+    Checkpoint saver that buffers writes and commits them in groups.
+    Reads flush the buffer first, so they always see every write.
+    Call flush() at the end of a turn to make the turn durable.
+    """
+    
+    def __init__(self, inner: SqliteSaver, interval: float) -> None:
+        """
+        Initializes the saver and starts the background flush thread.
+        
+        Args:
+            inner: SqliteSaver that stores the checkpoints
+            interval: Seconds between background flushes (0 starts no
+                thread: writes are committed when flushed or the buffer is full)
+        """
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.interval = interval
+        self.commits = 0
+        self._pending: list[Operation] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+        if interval > 0:
+            self._thread = threading.Thread(
+                target=self._run, name="checkpoint-write-behind", daemon=True
+            )
+            self._thread.start()
+    
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        self.flush()
+        return self.inner.get_tuple(config)
+    
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        self.flush()
+        return self.inner.list(config, filter=filter, before=before, limit=limit)
+    
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        
+        # Serialize now, so later changes to the checkpoint do not leak into the buffer
+        if isinstance(self.inner, DedupSqliteSaver):
+            prepared = self.inner.prepare_checkpoint(config, checkpoint, metadata)
+            self._enqueue(partial(write_checkpoint, prepared=prepared))
+        else:
+            type_, serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+            serialized_metadata = json.dumps(
+                get_checkpoint_metadata(config, metadata), ensure_ascii=False
+            ).encode("utf-8", "ignore")
+            self._enqueue(_statement(INSERT_CHECKPOINT, [(
+                str(thread_id),
+                checkpoint_ns,
+                checkpoint["id"],
+                config["configurable"].get("checkpoint_id"),
+                type_,
+                serialized_checkpoint,
+                serialized_metadata,
+            )]))
+        
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+    
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        query = (
+            REPLACE_WRITES if all(channel in WRITES_IDX_MAP for channel, _ in writes)
+            else IGNORE_WRITES
+        )
+        self._enqueue(_statement(query, [
+            (
+                str(config["configurable"]["thread_id"]),
+                str(config["configurable"]["checkpoint_ns"]),
+                str(config["configurable"]["checkpoint_id"]),
+                task_id,
+                task_path,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]))
+    
+    def delete_thread(self, thread_id: str) -> None:
+        self.flush()
+        self.inner.delete_thread(thread_id)
+    
+    def get_next_version(self, current: Any, channel: None) -> Any:
+        return self.inner.get_next_version(current, channel)
+    
+    def flush(self) -> None:
+        """
+        Commits every buffered write in a single transaction.
+        If the commit fails, the writes stay buffered for the next flush.
+        """
+        with self.take_operations() as operations:
+            if operations:
+                self._commit(operations)
+    
+    @contextmanager
+    def take_operations(self) -> Iterator[Sequence[Operation]]:
+        """
+        Takes the buffered writes, for the block to run them with a cursor
+        of its own transaction. Other flushes wait for the block. If the
+        block fails, the writes are put back for the next flush.
+        
+        Yields:
+            Buffered operations, in order
+        """
+        with self._flush_lock:
+            with self._pending_lock:
+                operations, self._pending = self._pending, []
+            try:
+                yield operations
+            except BaseException:
+                with self._pending_lock:
+                    self._pending = operations + self._pending
+                raise
+            if operations:
+                self.commits += 1
+    
+    def close(self) -> None:
+        """Stops the background thread and flushes the remaining writes."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+    
+    @property
+    def pending_count(self) -> int:
+        """Number of buffered operations not committed yet."""
+        with self._pending_lock:
+            return len(self._pending)
+    
+    @timed('checkpoint_write')
+    @retry_on_busy
+    def _commit(self, operations: Sequence[Operation]) -> None:
+        """
+        Runs the buffered operations in order inside one transaction.
+        
+        Args:
+            operations: Buffered operations
+        """
+        with self.inner.lock, span("checkpoint.commit", {'checkpoint.operations': len(operations)}):
+            self.inner.setup()
+            conn = self.inner.conn
+            cursor = conn.cursor()
+            try:
+                for operation in operations:
+                    operation(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    def _enqueue(self, operation: Operation) -> None:
+        """
+        Buffers an operation, flushing when the buffer is full.
+        
+        Args:
+            operation: Operation run with a cursor at the next flush
+        """
+        with self._pending_lock:
+            self._pending.append(operation)
+            full = len(self._pending) >= MAX_PENDING_OPERATIONS
+        if full:
+            self.flush()
+    
+    def _run(self) -> None:
+        """Flushes on every interval until closed. Errors are retried next time."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                # The writes stay buffered and the next interval tries again
+                continue
+
+
+def _statement(query: str, rows: list[tuple[Any, ...]]) -> Operation:
+    """
+    Builds an operation that runs a statement for each row.
+    
+    Args:
+        query: SQL statement
+        rows: Parameter rows
+        
+    Returns:
+        Operation run with a cursor at the next flush
+    """
+    def _run(cursor: sqlite3.Cursor) -> None:
+        cursor.executemany(query, rows)
+    return _run
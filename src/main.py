@@ -3,14 +3,56 @@ Entry point for the application.
 Interface CLI (Command Line Interface) to interact with the assistant.
 """
 
+import argparse
+
+from src.core.config import settings
+from src.core.profiling import profiled
 from src.ui.cli import run_cli
 
 
-def main() -> None:
-    """Main application entry point."""
-    run_cli()
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the command line parser.
+    
+    Returns:
+        Parser of the application options
+    """
+    parser = argparse.ArgumentParser(description="Assistente IA com Function Calling")
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Mostra o tempo de cada etapa do turno (primeiro token, modelo, ferramentas, checkpoints)"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="turn",
+        choices=["turn", "session"],
+        help=(
+            "Grava um perfil (cProfile ou amostragem, e memória) de cada turno "
+            "ou da sessão inteira em PROFILE_DIR (padrão: turn)"
+        )
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Main application entry point.
+    
+    Args:
+        argv: Command line arguments. If None, uses sys.argv.
+    """
+    args = build_parser().parse_args(argv)
+    
+    # The option overrides PROFILE, so profiling needs no configuration change
+    profile_mode = args.profile.upper() if args.profile else settings.profile_mode
+    if profile_mode == "SESSION":
+        with profiled("session"):
+            run_cli(show_timings=args.timings)
+    else:
+        run_cli(show_timings=args.timings, profile_turns=profile_mode == "TURN")
 
 
 if __name__ == "__main__":
     main()
-
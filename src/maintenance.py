@@ -0,0 +1,427 @@
+"""
+Entry point for maintenance jobs over the stored conversations.
+Run with: python -m src.maintenance <command> [options]
+"""
+
+import argparse
+import gzip
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import TextIO
+
+from src.core.batch_summarizer import find_threads_to_summarize, summarize_threads
+from src.core.config import settings
+from src.core.profiling import profiled
+from src.database.checkpointer import create_checkpointer, flush_checkpointer
+from src.database.compaction import compact_checkpoints, sweep_orphaned_threads
+from src.database.repository import TOP_CONVERSATIONS_ORDER, ConversationDB
+from src.database.search import backfill_search_index
+from src.database.storage import migrate_to_unified
+from src.database.transfer import DEFAULT_BATCH_SIZE, export_conversations, import_conversations
+from src.database.sharding import rebalance_shards
+
+
+def run_summarize(args: argparse.Namespace) -> None:
+    """
+    Summarizes all stored threads that exceed the message limit.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    checkpointer = create_checkpointer(settings.checkpoint_db_path)
+    
+    print("🔎 Procurando conversas acima do limite...")
+    with ConversationDB() as db:
+        thread_ids = find_threads_to_summarize(db, checkpointer)
+    print(f"   {len(thread_ids)} conversa(s) para resumir")
+    
+    if not thread_ids or args.dry_run:
+        return
+    
+    def _print_progress(done: int, total: int, thread_id: str, success: bool) -> None:
+        status = "✅" if success else "⚠️"
+        print(f"   [{done}/{total}] {thread_id} {status}")
+    
+    report = summarize_threads(
+        checkpointer,
+        thread_ids,
+        workers=args.workers,
+        max_per_minute=args.max_per_minute,
+        on_progress=_print_progress
+    )
+    flush_checkpointer(checkpointer)
+    
+    print(
+        f"\n📝 {report['summarized']} resumida(s), {report['failed']} falha(s) "
+        f"em {report['elapsed_seconds']:.1f}s "
+        f"({report['throughput']:.2f} conversas/s)"
+    )
+
+
+def run_compact(args: argparse.Namespace) -> None:
+    """
+    Removes old checkpoints and orphaned writes and reclaims disk space.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    checkpointer = create_checkpointer(settings.checkpoint_db_path)
+    
+    print(f"🗜️ Compactando checkpoints (mantendo os {args.keep_last} mais recentes)...")
+    report = compact_checkpoints(checkpointer, keep_last=args.keep_last)
+    
+    print(
+        f"   {report['checkpoints_deleted']} checkpoint(s) e "
+        f"{report['writes_deleted']} write(s) removidos"
+    )
+    print(
+        f"   {_format_bytes(report['bytes_before'])} → {_format_bytes(report['bytes_after'])} "
+        f"({_format_bytes(report['bytes_reclaimed'])} liberados)"
+    )
+
+
+def run_sweep(args: argparse.Namespace) -> None:
+    """
+    Deletes checkpoint data of threads without conversation metadata.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    checkpointer = create_checkpointer(settings.checkpoint_db_path)
+    
+    print("🧹 Procurando checkpoints sem conversa...")
+    with ConversationDB() as db:
+        orphaned = sweep_orphaned_threads(checkpointer, db, dry_run=args.dry_run)
+    
+    action = "encontrada(s)" if args.dry_run else "removida(s)"
+    print(f"   {len(orphaned)} conversa(s) órfã(s) {action}")
+
+
+def run_rebalance(args: argparse.Namespace) -> None:
+    """
+    Moves every thread to its shard after the shard count changed.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    if settings.storage_layout == "UNIFIED":
+        print("❌ Com STORAGE_LAYOUT=UNIFIED os checkpoints ficam em um único arquivo.")
+        return
+    
+    print(f"🔀 Redistribuindo checkpoints em {args.shards} arquivo(s)...")
+    report = rebalance_shards(settings.checkpoint_db_path, args.shards)
+    
+    print(
+        f"   {report['threads_moved']} conversa(s) movida(s), "
+        f"{report['shards_before']} → {report['shards_after']} arquivo(s)"
+    )
+
+
+def run_unify_storage(args: argparse.Namespace) -> None:
+    """
+    Copies the checkpoints to the conversation database, for the unified layout.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    print(f"📦 Copiando checkpoints para {settings.conversation_db_path}...")
+    report = migrate_to_unified(settings.conversation_db_path, settings.checkpoint_db_path)
+    
+    print(
+        f"   {report['threads_copied']} conversa(s) copiada(s) de "
+        f"{report['files_read']} arquivo(s)"
+    )
+    print(
+        "   Defina STORAGE_LAYOUT=UNIFIED para usar o novo arquivo; "
+        "os arquivos de checkpoint antigos podem ser removidos depois."
+    )
+
+
+def run_backfill_search(args: argparse.Namespace) -> None:
+    """
+    Adds the conversations stored before the search index existed to it.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    checkpointer = create_checkpointer(settings.checkpoint_db_path)
+    
+    action = "Reindexando todas as" if args.rebuild else "Indexando"
+    print(f"🔍 {action} conversas para busca...")
+    with ConversationDB() as db:
+        report = backfill_search_index(db, checkpointer, rebuild=args.rebuild)
+    
+    print(
+        f"   {report['conversations_indexed']} conversa(s) e "
+        f"{report['messages_indexed']} mensagem(ns) indexadas"
+    )
+
+
+def run_export(args: argparse.Namespace) -> None:
+    """
+    Writes every conversation to a JSON Lines file.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    checkpointer = create_checkpointer(settings.checkpoint_db_path)
+    
+    print(f"📤 Exportando conversas para {args.path}...")
+    with ConversationDB() as db, _open_text(args.path, "w") as output:
+        report = export_conversations(
+            db, checkpointer, output, workers=args.workers, batch_size=args.batch_size
+        )
+    
+    print(
+        f"   {report['conversations']} conversa(s) e {report['messages']} mensagem(ns) "
+        f"exportadas em {report['elapsed_seconds']:.1f}s ({report['throughput']:.0f} conversas/s)"
+    )
+
+
+def run_import(args: argparse.Namespace) -> None:
+    """
+    Imports the conversations of a JSON Lines file written by export.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    checkpointer = create_checkpointer(settings.checkpoint_db_path)
+    
+    print(f"📥 Importando conversas de {args.path}...")
+    with ConversationDB() as db, _open_text(args.path, "r") as lines:
+        report = import_conversations(
+            db, checkpointer, lines, workers=args.workers, batch_size=args.batch_size
+        )
+    
+    print(
+        f"   {report['conversations']} conversa(s) e {report['messages']} mensagem(ns) "
+        f"importadas em {report['elapsed_seconds']:.1f}s ({report['throughput']:.0f} conversas/s)"
+    )
+
+
+def run_stats(args: argparse.Namespace) -> None:
+    """
+    Prints the daily usage totals and the conversations that used the most.
+    
+    Args:
+        args: Parsed command line arguments
+    """
+    since = None
+    if args.days > 0:
+        since = (datetime.now(timezone.utc) - timedelta(days=args.days - 1)).strftime('%Y-%m-%d')
+    
+    with ConversationDB() as db:
+        daily_totals = db.get_daily_totals(since=since)
+        top_conversations = db.get_top_conversations(limit=args.top, by=args.by, since=since)
+    
+    if not daily_totals:
+        print("📊 Nenhum uso registrado no período.")
+        return
+    
+    print("📊 Uso por dia:")
+    for day in daily_totals:
+        print(
+            f"   {day['day']}: {day['conversations']} conversa(s), {day['turns']} turno(s), "
+            f"{day['input_tokens']} tokens de entrada, {day['output_tokens']} de saída, "
+            f"{day['tool_calls']} chamada(s) de ferramenta, {day['llm_seconds']:.1f}s no modelo"
+        )
+    
+    print(f"🏆 Conversas com mais uso ({args.by}):")
+    for conversation in top_conversations:
+        title = conversation['first_message'] or "(conversa apagada)"
+        print(
+            f"   {conversation['thread_id']}: {title[:50]} — "
+            f"{conversation['input_tokens'] + conversation['output_tokens']} tokens, "
+            f"{conversation['messages']} mensagem(ns), {conversation['tool_calls']} chamada(s) de ferramenta"
+        )
+
+
+def _open_text(path: Path, mode: str) -> TextIO:
+    """
+    Opens a text file, compressed with gzip if its name ends with .gz.
+    
+    Args:
+        path: File path
+        mode: "r" or "w"
+        
+    Returns:
+        Open text stream
+    """
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _format_bytes(size: int) -> str:
+    """
+    Formats a size in bytes for display.
+    
+    Args:
+        size: Size in bytes
+        
+    Returns:
+        Human readable size
+    """
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the command line parser for the maintenance jobs.
+    
+    Returns:
+        Configured argument parser
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.maintenance",
+        description="Tarefas de manutenção das conversas armazenadas."
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Grava um perfil da tarefa inteira em PROFILE_DIR (também ativado por PROFILE)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    summarize_parser = subparsers.add_parser(
+        "summarize",
+        help="Resume todas as conversas armazenadas acima do limite de mensagens"
+    )
+    summarize_parser.add_argument(
+        "--workers", type=int, default=4,
+        help="Número máximo de resumos simultâneos (padrão: 4)"
+    )
+    summarize_parser.add_argument(
+        "--max-per-minute", type=float, default=60,
+        help="Máximo de resumos iniciados por minuto, 0 = sem limite (padrão: 60)"
+    )
+    summarize_parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Apenas lista as conversas que seriam resumidas"
+    )
+    summarize_parser.set_defaults(handler=run_summarize)
+    
+    compact_parser = subparsers.add_parser(
+        "compact",
+        help="Remove checkpoints antigos e libera espaço em disco"
+    )
+    compact_parser.add_argument(
+        "--keep-last", type=int, default=settings.checkpoint_keep_last,
+        help=f"Checkpoints mantidos por conversa (padrão: {settings.checkpoint_keep_last})"
+    )
+    compact_parser.set_defaults(handler=run_compact)
+    
+    sweep_parser = subparsers.add_parser(
+        "sweep",
+        help="Apaga os checkpoints de conversas sem metadados"
+    )
+    sweep_parser.add_argument(
+        "--dry-run", action="store_true",
+        help="Apenas lista as conversas órfãs"
+    )
+    sweep_parser.set_defaults(handler=run_sweep)
+    
+    rebalance_parser = subparsers.add_parser(
+        "rebalance",
+        help="Move as conversas entre os shards de checkpoints após mudar o número de shards"
+    )
+    rebalance_parser.add_argument(
+        "--shards", type=int, default=settings.checkpoint_shards,
+        help=f"Número de shards (padrão: {settings.checkpoint_shards})"
+    )
+    rebalance_parser.set_defaults(handler=run_rebalance)
+    
+    unify_storage_parser = subparsers.add_parser(
+        "unify-storage",
+        help="Copia os checkpoints para o banco de conversas (STORAGE_LAYOUT=UNIFIED)"
+    )
+    unify_storage_parser.set_defaults(handler=run_unify_storage)
+    
+    backfill_search_parser = subparsers.add_parser(
+        "backfill-search",
+        help="Indexa as mensagens das conversas que faltam no índice de busca"
+    )
+    backfill_search_parser.add_argument(
+        "--rebuild", action="store_true",
+        help="Reindexa todas as conversas a partir do último checkpoint"
+    )
+    backfill_search_parser.set_defaults(handler=run_backfill_search)
+    
+    export_parser = subparsers.add_parser(
+        "export",
+        help="Exporta todas as conversas para um arquivo JSON Lines"
+    )
+    export_parser.add_argument(
+        "path", type=Path,
+        help="Arquivo de saída (comprimido com gzip se terminar em .gz)"
+    )
+    export_parser.add_argument(
+        "--workers", type=int, default=settings.checkpoint_shards,
+        help=f"Threads que leem os shards de checkpoints (padrão: {settings.checkpoint_shards})"
+    )
+    export_parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+        help=f"Conversas lidas por vez (padrão: {DEFAULT_BATCH_SIZE})"
+    )
+    export_parser.set_defaults(handler=run_export)
+    
+    import_parser = subparsers.add_parser(
+        "import",
+        help="Importa conversas de um arquivo gravado por export"
+    )
+    import_parser.add_argument(
+        "path", type=Path,
+        help="Arquivo de entrada (lido com gzip se terminar em .gz)"
+    )
+    import_parser.add_argument(
+        "--workers", type=int, default=settings.checkpoint_shards,
+        help=f"Threads que gravam os shards de checkpoints (padrão: {settings.checkpoint_shards})"
+    )
+    import_parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+        help=f"Conversas por transação (padrão: {DEFAULT_BATCH_SIZE})"
+    )
+    import_parser.set_defaults(handler=run_import)
+    
+    stats_parser = subparsers.add_parser(
+        "stats",
+        help="Mostra o uso total por dia e as conversas que mais consumiram"
+    )
+    stats_parser.add_argument(
+        "--days", type=int, default=7,
+        help="Dias contados, incluindo hoje, 0 = todos os dias (padrão: 7)"
+    )
+    stats_parser.add_argument(
+        "--top", type=int, default=10,
+        help="Conversas listadas (padrão: 10)"
+    )
+    stats_parser.add_argument(
+        "--by", choices=list(TOP_CONVERSATIONS_ORDER), default="tokens",
+        help="Contador usado para ordenar as conversas (padrão: tokens)"
+    )
+    stats_parser.set_defaults(handler=run_stats)
+    
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Maintenance entry point.
+    
+    Args:
+        argv: Command line arguments. If None, uses sys.argv.
+    """
+    args = build_parser().parse_args(argv)
+    
+    # A job has no turns, so any profiling mode profiles all of it
+    profile = args.profile or settings.profile_mode != "OFF"
+    with profiled(args.command) if profile else nullcontext():
+        args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
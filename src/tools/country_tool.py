@@ -7,6 +7,7 @@ from textwrap import dedent
 from langchain_core.tools import StructuredTool
 
 from src.api.clients.countries import get_country_info
+from src.core.metrics import TOOL_CALLS
 from src.core.schemas import CountryInfoInput
 
 
@@ -21,6 +22,7 @@ def get_country_info_wrapper(country_name: str) -> str:
         String formatted with country information or error message
     """
     result = get_country_info(country_name)
+    TOOL_CALLS.inc(labels=("get_country_info", "success" if result.get("success") else "error"))
 
     if not result.get("success"):
         error_msg = result.get('error', 'Unknown error')
@@ -7,6 +7,7 @@ from textwrap import dedent
 from langchain_core.tools import StructuredTool
 
 from src.api.clients.exchange import get_exchange_rate
+from src.core.metrics import TOOL_CALLS
 from src.core.schemas import ExchangeRateInput
 
 
@@ -22,6 +23,7 @@ def get_exchange_rate_wrapper(base_currency: str, target_currency: str) -> str:
         String formatted with exchange rate or error message
     """
     result = get_exchange_rate(base_currency, target_currency)
+    TOOL_CALLS.inc(labels=("get_exchange_rate", "success" if result.get("success") else "error"))
     
     if not result.get("success"):
         error_msg = result.get('error', 'Unknown error')
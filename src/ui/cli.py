@@ -2,30 +2,55 @@
 Main CLI interface logic.
 """
 
-import sqlite3
 import sys
+import time
+from contextlib import ExitStack
 
 from langchain_core.messages import HumanMessage
 from langchain_core.runnables import Runnable, RunnableConfig
-from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langchain_openai import ChatOpenAI
 
 from src.core.agent import create_agent_executor
 from src.core.config import settings
-from src.core.summarizer import summarize_conversation
+from src.core.metrics import (
+    ACTIVE_SESSIONS,
+    REGISTRY,
+    TURN_SECONDS,
+    MetricsServer,
+    write_metrics,
+)
+from src.core.profiling import profiled
+from src.core.summarizer import create_pinned_fact, summarize_conversation
+from src.core.timings import (
+    TimingsCallbackHandler,
+    TurnTimings,
+    collect_timings,
+    format_timings,
+    timed,
+    write_timings,
+)
+from src.core.tracing import OtlpJsonFileExporter, start_trace
+from src.database.checkpointer import create_checkpointer
+from src.database.compaction import CompactionScheduler
 from src.database.repository import ConversationDB
+from src.database.search import searchable_messages
+from src.database.storage import commit_turn
 from src.ui.menu import show_conversation_menu
 from src.ui.stream_handler import process_agent_stream
 
 # Command constants
 EXIT_COMMANDS = ['sair', 'quit', 'exit', 'q']
 CLEAR_COMMANDS = ['limpar', 'clear', 'reset']
+PIN_COMMANDS = ['fixar', 'pin']
 
 
 def run_cli(
     db: ConversationDB | None = None,
     agent: Runnable | None = None,
-    checkpointer: SqliteSaver | None = None
+    checkpointer: BaseCheckpointSaver | None = None,
+    show_timings: bool = False,
+    profile_turns: bool = False
 ) -> None:
     """
     Function that starts the CLI application.
@@ -36,6 +61,8 @@ def run_cli(
         checkpointer: Checkpoint saver instance. If None and agent is provided,
             a new instance will be created. If None and agent is None, will be
             created along with the agent.
+        show_timings: Print the latency breakdown of each turn after the answer
+        profile_turns: Profile each turn and save the profile to the profiles directory
     """
     print("=" * 60)
     print("🤖 Assistente IA com Function Calling")
@@ -47,6 +74,7 @@ def run_cli(
     print()
 
     # Initialize database if not provided
+    owns_db = db is None
     if db is None:
         db = ConversationDB()
 
@@ -57,15 +85,33 @@ def run_cli(
         elif checkpointer is None:
             # If agent is provided but checkpointer is not, create a new one
             # This ensures we always have a checkpointer for summarization
-            checkpoint_path = settings.checkpoint_db_path
-            checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
-            conn = sqlite3.connect(str(checkpoint_path), check_same_thread=False)
-            checkpointer = SqliteSaver(conn)
+            checkpointer = create_checkpointer(settings.checkpoint_db_path)
         print("✅ Assistente inicializado com sucesso!")
     except Exception as e:
         print(f"❌ Erro ao inicializar assistente: {e}")
         sys.exit(1)
     
+    # Compact old checkpoints in the background if configured
+    compaction_scheduler = None
+    if settings.checkpoint_compaction_interval > 0:
+        compaction_scheduler = CompactionScheduler(
+            checkpointer,
+            interval=settings.checkpoint_compaction_interval,
+            keep_last=settings.checkpoint_keep_last
+        )
+        compaction_scheduler.start()
+    
+    # Serve the metrics to a local Prometheus scraper if configured
+    metrics_server = None
+    if settings.metrics_port > 0:
+        metrics_server = MetricsServer(REGISTRY, settings.metrics_port)
+        try:
+            metrics_server.start()
+        except OSError as e:
+            print(f"⚠️ Aviso: Não foi possível servir as métricas na porta {settings.metrics_port}: {e}")
+            metrics_server = None
+    ACTIVE_SESSIONS.inc()
+    
     # Show conversation menu at startup
     thread_id, current_conv_id = show_conversation_menu(db)
     
@@ -77,9 +123,15 @@ def run_cli(
     
     print("\nDigite 'sair' ou 'quit' para encerrar.")
     print("Digite 'limpar' para limpar o histórico da conversa.")
+    print("Digite 'fixar <fato>' para o assistente sempre lembrar de um fato.")
     print("=" * 60)
     print()
     
+    # Each turn is traced to the trace file if configured
+    trace_exporter = None
+    if settings.trace_log_path is not None:
+        trace_exporter = OtlpJsonFileExporter(settings.trace_log_path)
+    
     # Main interaction loop
     while True:
         try:
@@ -95,6 +147,10 @@ def run_cli(
             if user_input.lower() in CLEAR_COMMANDS:
                 # Delete checkpoint and conversation
                 try:
+                    # Delete checkpoints and writes of the thread in one transaction
+                    if thread_id is not None:
+                        checkpointer.delete_thread(thread_id)
+                    
                     # Delete from metadata database if exists
                     if current_conv_id is not None:
                         db.delete_conversation(current_conv_id)
@@ -110,6 +166,12 @@ def run_cli(
                 
                 continue
             
+            # Check if user wants to pin a fact
+            command, _, fact = user_input.partition(" ")
+            if command.lower() in PIN_COMMANDS:
+                _pin_fact(db, agent, checkpointer, thread_id, fact.strip())
+                continue
+            
             # Ignore empty inputs
             if not user_input:
                 continue
@@ -128,13 +190,52 @@ def run_cli(
                     print(f"\n\n⚠️ Aviso: Não foi possível salvar metadados no banco: {e}")
                     continue
             
-            # Process agent streaming with checkpoint
-            # Checkpoint automatically loads previous history and saves after
-            if thread_id is not None:
-                process_agent_stream(agent, user_message, thread_id)
+            turn_start = time.perf_counter()
+            with ExitStack() as turn_stack:
+                # Profile the whole turn, saved when it ends
+                if profile_turns:
+                    turn_stack.enter_context(profiled(f"turn-{thread_id}"))
+                
+                # Measure the turn if its timings are printed or logged
+                timings = None
+                callbacks = None
+                if show_timings or settings.timings_log_path is not None:
+                    timings = turn_stack.enter_context(collect_timings(thread_id))
+                    callbacks = [TimingsCallbackHandler(timings)]
+                
+                # Spans of the agent run, database and checkpoint calls nest under the turn
+                if trace_exporter is not None:
+                    turn_stack.enter_context(
+                        start_trace("turn", trace_exporter, {'thread_id': thread_id})
+                    )
+                
+                # Process agent streaming with checkpoint
+                # Checkpoint automatically loads previous history and saves after
+                if thread_id is not None:
+                    turn = process_agent_stream(agent, user_message, thread_id, callbacks)
+                    
+                    # Buffered, written with other turns instead of committing now
+                    db.record_activity(
+                        thread_id,
+                        turn['messages_added'],
+                        turn['last_message'],
+                        searchable_messages(turn['messages']),
+                        turn['usage']
+                    )
+                
+                # Check if summarization is needed (after new message was added)
+                with timed('summarization'):
+                    summarize_conversation(checkpointer, thread_id)
+                
+                # Make the turn durable before reading the next input
+                # (one transaction with the activity in the unified layout)
+                with timed('commit'):
+                    commit_turn(db, checkpointer)
             
-            # Check if summarization is needed (after new message was added)
-            summarize_conversation(checkpointer, thread_id)
+            TURN_SECONDS.observe(time.perf_counter() - turn_start)
+            if timings is not None:
+                _report_timings(timings, show_timings)
+            _write_metrics()
         except KeyboardInterrupt:
             # Handle Ctrl+C gracefully
             print("\n\n👋 Interrompido pelo usuário. Até logo!")
@@ -142,4 +243,86 @@ def run_cli(
         except Exception as e:
             print(f"\n❌ Erro: {e}")
             print("Tente novamente ou digite 'sair' para encerrar.")
+    
+    if compaction_scheduler is not None:
+        compaction_scheduler.stop()
+    
+    # Commit checkpoint writes still buffered, e.g. after Ctrl+C
+    try:
+        commit_turn(db, checkpointer)
+    except Exception as e:
+        print(f"\n⚠️ Aviso: Não foi possível salvar o último checkpoint: {e}")
+    
+    ACTIVE_SESSIONS.dec()
+    _write_metrics()
+    if metrics_server is not None:
+        metrics_server.stop()
+    
+    # Release the database connection if it was created here
+    if owns_db:
+        db.close()
+
 
+def _pin_fact(
+    db: ConversationDB,
+    agent: Runnable,
+    checkpointer: BaseCheckpointSaver,
+    thread_id: str | None,
+    fact: str
+) -> None:
+    """
+    Adds a pinned fact to the conversation: it is sent to the model on every
+    turn and survives summarization.
+    
+    Args:
+        db: Database instance
+        agent: Agent instance
+        checkpointer: Checkpoint saver of the agent
+        thread_id: Thread ID of the current conversation, None if it has no messages yet
+        fact: Text of the fact
+    """
+    if not fact:
+        print("\n⚠️ Uso: fixar <fato que o assistente deve lembrar>")
+        return
+    if thread_id is None:
+        print("\n⚠️ Envie uma mensagem antes de fixar um fato.")
+        return
+    
+    try:
+        agent.update_state(
+            RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""}),
+            {"messages": [create_pinned_fact(fact)]},
+            as_node="model"
+        )
+        commit_turn(db, checkpointer)
+        print("\n📌 Fato fixado! Ele será enviado ao assistente em todos os turnos.")
+    except Exception as e:
+        print(f"\n⚠️ Aviso: Não foi possível fixar o fato: {e}")
+
+
+def _report_timings(timings: TurnTimings, show_timings: bool) -> None:
+    """
+    Prints the latency breakdown of a turn and appends it to the timings log.
+    
+    Args:
+        timings: Finished timings of the turn
+        show_timings: Print the breakdown
+    """
+    if show_timings:
+        print(f"\n\n{format_timings(timings)}")
+    
+    if settings.timings_log_path is not None:
+        try:
+            write_timings(settings.timings_log_path, timings)
+        except OSError as e:
+            print(f"\n⚠️ Aviso: Não foi possível gravar as medições do turno: {e}")
+
+
+def _write_metrics() -> None:
+    """Writes the metrics to the metrics file, if configured."""
+    if settings.metrics_path is None:
+        return
+    try:
+        write_metrics(settings.metrics_path, REGISTRY)
+    except OSError as e:
+        print(f"\n⚠️ Aviso: Não foi possível gravar as métricas: {e}")
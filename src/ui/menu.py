@@ -2,16 +2,59 @@
 Conversation selection menu.
 """
 
+from collections.abc import Iterator
+from typing import Any
+
 import questionary
+from prompt_toolkit.completion import CompleteEvent, Completer, Completion
+from prompt_toolkit.document import Document
 
 from src.database.repository import ConversationDB
 
+# Conversations loaded per page of the menu
+MENU_PAGE_SIZE = 20
+
+# Conversations suggested while typing a search
+SEARCH_SUGGESTIONS = 10
+
+NEW_CONVERSATION_OPTION = "💬 Nova conversa"
+SEARCH_OPTION = "🔍 Buscar conversas"
+LOAD_MORE_OPTION = "⬇️ Carregar mais conversas"
+
+
+class ConversationSearchCompleter(Completer):
+    """Suggests the conversations matching the text typed so far."""
+    
+    def __init__(self, db: ConversationDB, limit: int = SEARCH_SUGGESTIONS) -> None:
+        """
+        Initializes the completer.
+        
+        Args:
+            db: Database instance
+            limit: Maximum number of suggestions
+        """
+        self.db = db
+        self.limit = limit
+    
+    def get_completions(
+        self, document: Document, complete_event: CompleteEvent
+    ) -> Iterator[Completion]:
+        text = document.text_before_cursor
+        for conv in self.db.search_conversations(text, limit=self.limit):
+            yield Completion(
+                _format_option(conv),
+                start_position=-len(text),
+                display_meta=conv['snippet'] or ""
+            )
+
 
 def show_conversation_menu(
     db: ConversationDB
 ) -> tuple[str | None, int | None]:
     """
     Shows the initial conversation menu and returns the selected conversation thread_id.
+    Conversations are loaded one page at a time; the last option loads the next page.
+    The search option finds conversations by the text of their messages.
     
     Args:
         db: Database instance
@@ -21,29 +64,40 @@ def show_conversation_menu(
         Both are None for new conversations
     """
     try:
-        conversations = db.get_conversations_list()
-        
         # Create formatted options list for questionary
-        options = ["💬 Nova conversa"]
-        
-        if conversations:
-            for conv in conversations:
-                updated_at = conv.get('updated_at')
-
-                # Get first message (truncate if too long)
-                first_message = conv.get('first_message')
-                if first_message and len(first_message) > 50:
-                    first_message = first_message[:47] + "..."
-
-                options.append(f"ID {conv.get('id')} - {first_message} - {updated_at}")
+        options = [NEW_CONVERSATION_OPTION, SEARCH_OPTION]
+        cursor = None
+        load_page = True
         
-        # Use questionary for interactive selection
-        choice = questionary.select(
-            "Selecione uma conversa ou crie uma nova:",
-            choices=options
-        ).ask()
+        while True:
+            if load_page:
+                conversations = db.get_conversations_list(limit=MENU_PAGE_SIZE, before=cursor)
+                options.extend(_format_option(conv) for conv in conversations)
+                
+                # A full page means there may be more conversations to load
+                has_more = len(conversations) == MENU_PAGE_SIZE
+                if has_more:
+                    cursor = conversations[-1]['cursor']
+            
+            # Use questionary for interactive selection
+            choice = questionary.select(
+                "Selecione uma conversa ou crie uma nova:",
+                choices=options + [LOAD_MORE_OPTION] if has_more else options
+            ).ask()
+            
+            if choice == LOAD_MORE_OPTION:
+                load_page = True
+                continue
+            
+            if choice == SEARCH_OPTION:
+                choice = _search_conversations(db)
+                if choice is None:
+                    # Back to the list already loaded
+                    load_page = False
+                    continue
+            break
         
-        if not choice or choice == "💬 Nova conversa":
+        if not choice or choice == NEW_CONVERSATION_OPTION:
             return None, None
         
         # Extract ID from choice and get thread_id from database
@@ -59,3 +113,56 @@ def show_conversation_menu(
         print(f"\n❌ Erro ao carregar conversas: {e}")
         return None, None
 
+
+def _format_option(conv: dict[str, Any]) -> str:
+    """
+    Formats a conversation as a menu option.
+    
+    Args:
+        conv: Conversation dictionary from the database
+        
+    Returns:
+        Option text, starting with "ID <id>"
+    """
+    # Get first message (truncate if too long)
+    first_message = conv.get('first_message')
+    if first_message and len(first_message) > 50:
+        first_message = first_message[:47] + "..."
+    
+    option = f"ID {conv.get('id')} - {first_message} - {conv.get('updated_at')}"
+    if conv.get('message_count'):
+        option += f" ({conv['message_count']} mensagens)"
+    return option
+
+
+def _search_conversations(db: ConversationDB) -> str | None:
+    """
+    Asks for search text, suggesting matching conversations while typing.
+    If the typed text is not a suggestion, lists the conversations it matches.
+    
+    Args:
+        db: Database instance
+        
+    Returns:
+        The chosen conversation option, or None to go back to the menu
+    """
+    answer = questionary.autocomplete(
+        "Buscar (digite para ver sugestões):",
+        choices=[],
+        completer=ConversationSearchCompleter(db),
+        complete_in_thread=True
+    ).ask()
+    if not answer:
+        return None
+    if answer.startswith("ID "):
+        return answer
+    
+    results = db.search_conversations(answer, limit=MENU_PAGE_SIZE)
+    if not results:
+        print("\n🔍 Nenhuma conversa encontrada.")
+        return None
+    
+    return questionary.select(
+        "Resultados da busca:",
+        choices=[_format_option(conv) for conv in results]
+    ).ask()
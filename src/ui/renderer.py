@@ -0,0 +1,126 @@
+"""
+Buffered terminal renderer for streamed tokens.
+Printing every token with flush=True is one write syscall per token, which
+is slow over SSH and in docker TTYs. The renderer coalesces the tokens of a
+frame and writes them at once: the first token after a pause and any text
+with a newline are written right away, the rest at most one frame later.
+"""
+
+import sys
+import threading
+import time
+from types import TracebackType
+from typing import TextIO
+
+from src.core.config import settings
+
+
+class TerminalRenderer:
+    """
+    Writes streamed text to a terminal in frames.
+    Use close() or a with block to write the last frame and stop the
+    background thread.
+    """
+    
+    def __init__(self, stream: TextIO | None = None, frame_interval: float | None = None) -> None:
+        """
+        Initializes the renderer.
+        
+        Args:
+            stream: Text stream written to. If None, uses sys.stdout.
+            frame_interval: Seconds text is coalesced before it is written
+                (0 writes every chunk right away). If None, uses
+                settings.render_frame_ms.
+        """
+        self.stream = stream if stream is not None else sys.stdout
+        if frame_interval is None:
+            frame_interval = settings.render_frame_ms / 1000
+        self.frame_interval = frame_interval
+        self.frames = 0
+        self._buffer: list[str] = []
+        self._last_frame = float("-inf")
+        self._lock = threading.Lock()
+        self._pending_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+    
+    def __enter__(self) -> "TerminalRenderer":
+        return self
+    
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None
+    ) -> None:
+        self.close()
+    
+    def write(self, text: str) -> None:
+        """
+        Writes text, right away or in the next frame.
+        
+        Args:
+            text: Streamed text, e.g. a token
+        """
+        if not text:
+            return
+        
+        with self._lock:
+            self._buffer.append(text)
+            now = time.perf_counter()
+            # The first text after a pause is written now, so the first token is not delayed
+            frame_due = now - self._last_frame >= self.frame_interval
+            if self.frame_interval <= 0 or frame_due or "\n" in text:
+                self._write_frame(now)
+                return
+            
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="terminal-renderer", daemon=True
+                )
+                self._thread.start()
+        self._pending_event.set()
+    
+    def flush(self) -> None:
+        """Writes the buffered text now, e.g. before other output is printed."""
+        with self._lock:
+            self._write_frame(time.perf_counter())
+    
+    def close(self) -> None:
+        """Stops the background thread and writes the buffered text."""
+        self._stop_event.set()
+        self._pending_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+    
+    def _write_frame(self, now: float) -> None:
+        """
+        Writes the buffered text with a single write and flush.
+        The caller holds the lock.
+        
+        Args:
+            now: perf_counter() value of the frame
+        """
+        if not self._buffer:
+            return
+        self.stream.write("".join(self._buffer))
+        self.stream.flush()
+        self._buffer.clear()
+        self._last_frame = now
+        self.frames += 1
+    
+    def _run(self) -> None:
+        """Writes buffered text when its frame is due, until closed."""
+        while True:
+            self._pending_event.wait()
+            if self._stop_event.is_set():
+                return
+            self._pending_event.clear()
+            
+            with self._lock:
+                delay = self._last_frame + self.frame_interval - time.perf_counter()
+            if delay > 0 and self._stop_event.wait(delay):
+                return
+            self.flush()
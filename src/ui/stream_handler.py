@@ -4,6 +4,7 @@ Handler for processing agent message streaming.
 
 from typing import Any
 
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.messages import (
     AIMessage,
     AIMessageChunk,
@@ -11,12 +12,16 @@ from langchain_core.messages import (
 )
 from langchain_core.runnables import Runnable, RunnableConfig
 
+from src.core.timings import TimingsCallbackHandler, TurnTimings
+from src.ui.renderer import TerminalRenderer
+
 
 def process_agent_stream(
     agent: Runnable,
     user_message: Any,
-    thread_id: str
-) -> None:
+    thread_id: str,
+    callbacks: list[BaseCallbackHandler] | None = None
+) -> dict[str, Any]:
     """
     Processes agent streaming with checkpoint support.
     
@@ -24,25 +29,54 @@ def process_agent_stream(
         agent: Configured LangChain agent with checkpointer
         user_message: User message to send to agent
         thread_id: Thread ID for checkpoint
+        callbacks: Callback handlers of the run, e.g. to time the turn
+        
+    Returns:
+        Dictionary with messages (the messages the turn added to the
+        conversation, starting with the user message), messages_added
+        (their count), last_message (text of the last assistant reply,
+        or None) and usage (input_tokens, output_tokens, tool_calls and
+        llm_seconds of the turn, the time spent inside model calls)
     """
     # Execute agent and get complete response
     print("\n🤖 Assistente: Analisando...\n", end="", flush=True)
 
     tool_content_list: set[str] = set()
     first_message_chunk = True
+    turn: dict[str, Any] = {
+        'messages': [user_message],
+        'messages_added': 1,
+        'last_message': None,
+        'usage': {'input_tokens': 0, 'output_tokens': 0, 'tool_calls': 0, 'llm_seconds': 0.0},
+    }
+    # Model time is measured from the start to the end of each model call,
+    # not between stream updates (which also include tools and checkpoints)
+    model_timings = TurnTimings(thread_id)
+    callbacks = [*(callbacks or []), TimingsCallbackHandler(model_timings)]
     
-    # Stream with thread_id - checkpoint automatically loads/saves history
-    for stream_mode, chunk in agent.stream(
-        {"messages": [user_message]},
-        stream_mode=["updates", "messages"],
-        config=RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
-    ):
-        if stream_mode == "updates":
-            _process_updates_chunk(chunk, tool_content_list)
-        elif stream_mode == "messages":
-            first_message_chunk = _process_messages_chunk(
-                chunk, first_message_chunk
+    # Tokens are written in frames instead of one write per token
+    with TerminalRenderer() as renderer:
+        # Stream with thread_id - checkpoint automatically loads/saves history
+        for stream_mode, chunk in agent.stream(
+            {"messages": [user_message]},
+            stream_mode=["updates", "messages"],
+            config=RunnableConfig(
+                configurable={"thread_id": thread_id, "checkpoint_ns": ""},
+                callbacks=callbacks
             )
+        ):
+            if stream_mode == "updates":
+                # Tool messages are printed, so the tokens before them go first
+                renderer.flush()
+                _process_updates_chunk(chunk, tool_content_list)
+                _track_turn_messages(chunk, turn)
+            elif stream_mode == "messages":
+                first_message_chunk = _process_messages_chunk(
+                    chunk, first_message_chunk, renderer
+                )
+    
+    turn['usage']['llm_seconds'] = model_timings.totals().get('model', {}).get('seconds', 0.0)
+    return turn
 
 
 def _process_updates_chunk(
@@ -60,9 +94,38 @@ def _process_updates_chunk(
         _handle_tool_message(chunk['tools'], tool_content_list)
 
 
+def _track_turn_messages(chunk: dict[str, Any], turn: dict[str, Any]) -> None:
+    """
+    Collects the messages added by each node update, keeps the text
+    of the last assistant reply and adds up the token usage of model calls.
+    
+    Args:
+        chunk: 'updates' stream chunk, mapping node names to their updates
+        turn: Turn summary updated in place
+    """
+    usage = turn['usage']
+    for update in chunk.values():
+        if not isinstance(update, dict):
+            continue
+        
+        messages = update.get('messages') or []
+        turn['messages'].extend(messages)
+        turn['messages_added'] += len(messages)
+        for message in messages:
+            if not isinstance(message, AIMessage):
+                continue
+            if message.text:
+                turn['last_message'] = message.text
+            usage['tool_calls'] += len(message.tool_calls)
+            if message.usage_metadata:
+                usage['input_tokens'] += message.usage_metadata.get('input_tokens', 0)
+                usage['output_tokens'] += message.usage_metadata.get('output_tokens', 0)
+
+
 def _process_messages_chunk(
     chunk: list[AIMessageChunk],
-    first_message_chunk: bool
+    first_message_chunk: bool,
+    renderer: TerminalRenderer | None = None
 ) -> bool:
     """
     Processes 'messages' stream mode chunks.
@@ -70,18 +133,22 @@ def _process_messages_chunk(
     Args:
         chunk: Message chunk from agent
         first_message_chunk: Flag indicating if this is the first chunk
+        renderer: Renderer the text is written to. If None, the text is
+            written right away.
         
     Returns:
         Updated first_message_chunk flag
     """
     message_chunk = chunk[0]
+    if renderer is None:
+        renderer = TerminalRenderer(frame_interval=0)
     
     if isinstance(message_chunk, AIMessageChunk):
-        if (content := message_chunk.content):
+        if (content := message_chunk.text):
             if first_message_chunk:
-                print("\n", end="", flush=True)
+                renderer.write("\n")
                 first_message_chunk = False
-            print(content, end="", flush=True)
+            renderer.write(content)
     
     return first_message_chunk
 
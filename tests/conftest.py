@@ -21,9 +21,10 @@ def temp_db_path():
     with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
         db_path = Path(tmp.name)
     yield db_path
-    # Cleanup
-    if db_path.exists():
-        db_path.unlink()
+    # Cleanup, including WAL side files
+    for path in (db_path, Path(f"{db_path}-wal"), Path(f"{db_path}-shm")):
+        if path.exists():
+            path.unlink()
 
 
 @pytest.fixture
@@ -32,9 +33,9 @@ def temp_checkpoint_db_path():
     with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
         db_path = Path(tmp.name)
     yield db_path
-    # Cleanup
-    if db_path.exists():
-        db_path.unlink()
+    # Cleanup, including WAL side files and checkpoint shards
+    for path in db_path.parent.glob(f"{db_path.stem}*"):
+        path.unlink()
 
 
 @pytest.fixture
@@ -61,7 +62,9 @@ def conversation_db(temp_db_path, monkeypatch):
         temperature=0.5
     )
     monkeypatch.setattr("src.database.repository.settings", test_settings)
-    return ConversationDB()
+    db = ConversationDB()
+    yield db
+    db.close()
 
 
 @pytest.fixture
@@ -8,7 +8,7 @@ import sqlite3
 import pytest
 from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
 
 from src.core.agent import create_agent_executor
 
@@ -16,15 +16,10 @@ from src.core.agent import create_agent_executor
 class TestCreateAgentExecutor:
     """Test suite for create_agent_executor function."""
     
-    def test_creates_agent_with_default_llm(self, temp_checkpoint_db_path, monkeypatch):
+    def test_creates_agent_with_default_llm(self, test_settings, monkeypatch):
         """Test that agent is created with default LLM when none provided."""
 
-        # Mock settings
-        test_settings = MagicMock()
-        test_settings.model_name = "gpt-4o-mini"
-        test_settings.temperature = 0.5
-        test_settings.openai_api_key = "test-key"
-        test_settings.checkpoint_db_path = temp_checkpoint_db_path
+        # Use test settings with temporary database paths
         monkeypatch.setattr("src.core.agent.settings", test_settings)
         
         # Mock ChatOpenAI to avoid real API calls
@@ -40,15 +35,13 @@ class TestCreateAgentExecutor:
                 agent, checkpointer = create_agent_executor()
         
         assert agent is not None
-        assert isinstance(checkpointer, SqliteSaver)
+        assert isinstance(checkpointer, BaseCheckpointSaver)
         mock_chat.assert_called_once()
     
-    def test_creates_agent_with_provided_llm(self, temp_checkpoint_db_path, monkeypatch):
+    def test_creates_agent_with_provided_llm(self, test_settings, monkeypatch):
         """Test that agent uses provided LLM instead of creating new one."""
 
-        # Mock settings
-        test_settings = MagicMock()
-        test_settings.checkpoint_db_path = temp_checkpoint_db_path
+        # Use test settings with temporary database paths
         monkeypatch.setattr("src.core.agent.settings", test_settings)
         
         # Create custom LLM
@@ -68,18 +61,13 @@ class TestCreateAgentExecutor:
         call_args = mock_create.call_args
         assert call_args.kwargs['model'] == custom_llm
     
-    def test_creates_agent_with_provided_checkpointer(self, temp_checkpoint_db_path, monkeypatch):
+    def test_creates_agent_with_provided_checkpointer(self, test_settings, monkeypatch):
         """Test that agent uses provided checkpointer instead of creating new one."""
-        # Mock settings
-        test_settings = MagicMock()
-        test_settings.model_name = "gpt-4o-mini"
-        test_settings.temperature = 0.5
-        test_settings.openai_api_key = "test-key"
-        test_settings.checkpoint_db_path = temp_checkpoint_db_path
+        # Use test settings with temporary database paths
         monkeypatch.setattr("src.core.agent.settings", test_settings)
         
         # Create custom checkpointer
-        custom_checkpointer = MagicMock(spec=SqliteSaver)
+        custom_checkpointer = MagicMock(spec=BaseCheckpointSaver)
         
         # Mock ChatOpenAI to avoid validation errors
         with patch('src.core.agent.ChatOpenAI') as mock_chat:
@@ -100,15 +88,10 @@ class TestCreateAgentExecutor:
         call_args = mock_create.call_args
         assert call_args.kwargs['checkpointer'] == custom_checkpointer
     
-    def test_agent_has_tools(self, temp_checkpoint_db_path, monkeypatch):
+    def test_agent_has_tools(self, test_settings, monkeypatch):
         """Test that created agent has tools configured."""
 
-        # Mock settings
-        test_settings = MagicMock()
-        test_settings.model_name = "gpt-4o-mini"
-        test_settings.temperature = 0.5
-        test_settings.openai_api_key = "test-key"
-        test_settings.checkpoint_db_path = temp_checkpoint_db_path
+        # Use test settings with temporary database paths
         monkeypatch.setattr("src.core.agent.settings", test_settings)
         
         # Mock ChatOpenAI
@@ -130,3 +113,23 @@ class TestCreateAgentExecutor:
         tools = call_args.kwargs['tools']
         assert len(tools) > 0  # Should have at least country and exchange tools
 
+    
+    def test_agent_has_context_window_middleware(self, test_settings, monkeypatch):
+        """Test that the context window middleware is added when enabled."""
+        # Use test settings with temporary database paths
+        monkeypatch.setattr("src.core.agent.settings", test_settings)
+        
+        with patch('src.core.agent.create_agent') as mock_create:
+            create_agent_executor(llm=MagicMock(spec=ChatOpenAI))
+        
+        assert len(mock_create.call_args.kwargs['middleware']) == 1
+    
+    def test_agent_without_context_window_middleware(self, test_settings, monkeypatch):
+        """Test that windowing is disabled when the token budget is 0."""
+        test_settings.context_max_tokens = 0
+        monkeypatch.setattr("src.core.agent.settings", test_settings)
+        
+        with patch('src.core.agent.create_agent') as mock_create:
+            create_agent_executor(llm=MagicMock(spec=ChatOpenAI))
+        
+        assert mock_create.call_args.kwargs['middleware'] == []
@@ -0,0 +1,96 @@
+"""
+Tests for offline batch summarization.
+"""
+from unittest.mock import patch
+
+from langchain_core.runnables import RunnableConfig
+
+from src.core.batch_summarizer import (
+    RateLimiter,
+    find_threads_to_summarize,
+    summarize_threads,
+)
+
+
+def _put_messages(checkpointer, thread_id, messages):
+    """Stores a checkpoint with the given messages for a thread."""
+    config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+    checkpoint = {
+        "id": f"{thread_id}_checkpoint",
+        "channel_values": {"messages": messages},
+        "channel_versions": {}
+    }
+    checkpointer.put(config, checkpoint, {"source": "test"}, {})
+
+
+class TestRateLimiter:
+    """Test suite for RateLimiter class."""
+    
+    def test_unlimited_does_not_sleep(self):
+        """Test that a limit of 0 never waits."""
+        limiter = RateLimiter(0)
+        
+        with patch('src.core.batch_summarizer.time.sleep') as mock_sleep:
+            limiter.wait()
+            limiter.wait()
+        
+        mock_sleep.assert_not_called()
+    
+    def test_spaces_out_calls(self):
+        """Test that consecutive calls wait for the interval."""
+        limiter = RateLimiter(60)
+        
+        with patch('src.core.batch_summarizer.time.sleep') as mock_sleep:
+            limiter.wait()
+            limiter.wait()
+        
+        mock_sleep.assert_called_once()
+        assert 0 < mock_sleep.call_args.args[0] <= 1.0
+
+
+class TestFindThreadsToSummarize:
+    """Test suite for find_threads_to_summarize function."""
+    
+    def test_finds_only_threads_over_limit(
+        self, conversation_db, checkpointer, sample_messages, many_messages
+    ):
+        """Test that only threads above the message limit are returned."""
+        _, short_thread = conversation_db.save_conversation_metadata("Short")
+        _, long_thread = conversation_db.save_conversation_metadata("Long")
+        _put_messages(checkpointer, short_thread, sample_messages)
+        _put_messages(checkpointer, long_thread, many_messages)
+        
+        result = find_threads_to_summarize(conversation_db, checkpointer)
+        
+        assert result == [long_thread]
+
+
+class TestSummarizeThreads:
+    """Test suite for summarize_threads function."""
+    
+    def test_summarizes_all_threads(self, checkpointer, mock_llm, many_messages):
+        """Test that all given threads are summarized and reported."""
+        for thread_id in ("t1", "t2", "t3"):
+            _put_messages(checkpointer, thread_id, many_messages)
+        progress = []
+        
+        report = summarize_threads(
+            checkpointer, ["t1", "t2", "t3"], llm=mock_llm, workers=2,
+            on_progress=lambda *args: progress.append(args)
+        )
+        
+        assert report["total"] == 3
+        assert report["summarized"] == 3
+        assert report["failed"] == 0
+        assert len(progress) == 3
+        assert progress[-1][0] == 3
+    
+    def test_reports_failures(self, checkpointer, mock_llm, many_messages):
+        """Test that failed summarizations are counted."""
+        _put_messages(checkpointer, "t1", many_messages)
+        mock_llm.invoke.side_effect = Exception("API Error")
+        
+        report = summarize_threads(checkpointer, ["t1"], llm=mock_llm)
+        
+        assert report["summarized"] == 0
+        assert report["failed"] == 1
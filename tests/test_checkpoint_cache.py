@@ -0,0 +1,168 @@
+"""
+Tests for the checkpoint LRU cache.
+"""
+from unittest.mock import patch
+
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.database.checkpoint_cache import CachingCheckpointSaver
+from src.database.checkpointer import create_checkpointer, unwrap_checkpointer
+from src.database.compaction import compact_checkpoints, purge_threads
+
+
+def _config(thread_id, checkpoint_id=None):
+    """Builds the config of a thread, optionally for one checkpoint."""
+    configurable = {"thread_id": thread_id, "checkpoint_ns": ""}
+    if checkpoint_id is not None:
+        configurable["checkpoint_id"] = checkpoint_id
+    return RunnableConfig(configurable=configurable)
+
+
+def _put(saver, thread_id, checkpoint_id, text="hello"):
+    """Stores a checkpoint with one message."""
+    checkpoint = {
+        "id": checkpoint_id,
+        "channel_values": {"messages": [HumanMessage(content=text)]},
+        "channel_versions": {}
+    }
+    return saver.put(_config(thread_id), checkpoint, {"source": "test"}, {})
+
+
+class TestCachingCheckpointSaver:
+    """Test suite for CachingCheckpointSaver class."""
+    
+    def test_latest_checkpoint_served_from_cache(self, checkpointer):
+        """Test that reading the latest checkpoint after a put skips the inner saver."""
+        cache = CachingCheckpointSaver(checkpointer, max_bytes=1024 * 1024)
+        _put(cache, "t1", "00001")
+        
+        with patch.object(checkpointer, "get_tuple") as inner_get:
+            checkpoint_tuple = cache.get_tuple(_config("t1"))
+        
+        inner_get.assert_not_called()
+        assert checkpoint_tuple.checkpoint["id"] == "00001"
+        assert checkpoint_tuple.metadata["source"] == "test"
+        assert cache.hits == 1
+    
+    def test_miss_reads_through_and_caches(self, checkpointer):
+        """Test that a miss loads from the inner saver and caches the result."""
+        _put(checkpointer, "t1", "00001")
+        cache = CachingCheckpointSaver(checkpointer, max_bytes=1024 * 1024)
+        
+        first = cache.get_tuple(_config("t1"))
+        second = cache.get_tuple(_config("t1"))
+        
+        assert first.checkpoint["id"] == second.checkpoint["id"] == "00001"
+        assert (cache.hits, cache.misses) == (1, 1)
+    
+    def test_matches_inner_saver(self, checkpointer):
+        """Test that cached tuples match what the inner saver returns."""
+        cache = CachingCheckpointSaver(checkpointer, max_bytes=1024 * 1024)
+        _put(cache, "t1", "00001")
+        _put(cache, "t1", "00002", text="second")
+        
+        cached = cache.get_tuple(_config("t1"))
+        stored = checkpointer.get_tuple(_config("t1"))
+        
+        assert cached.config == stored.config
+        assert cached.parent_config == stored.parent_config
+        assert cached.checkpoint["channel_values"] == stored.checkpoint["channel_values"]
+    
+    def test_returned_checkpoint_is_a_copy(self, checkpointer):
+        """Test that changing a returned checkpoint does not change the cache."""
+        cache = CachingCheckpointSaver(checkpointer, max_bytes=1024 * 1024)
+        _put(cache, "t1", "00001")
+        
+        cache.get_tuple(_config("t1")).checkpoint["channel_values"]["messages"].append("x")
+        
+        assert len(cache.get_tuple(_config("t1")).checkpoint["channel_values"]["messages"]) == 1
+    
+    def test_evicts_least_recently_used(self, checkpointer):
+        """Test that the cache stays within its byte budget."""
+        cache = CachingCheckpointSaver(checkpointer, max_bytes=6000)
+        _put(cache, "t1", "00001", text="a" * 2000)
+        _put(cache, "t2", "00001", text="b" * 2000)
+        cache.get_tuple(_config("t1"))
+        _put(cache, "t3", "00001", text="c" * 2000)
+        cache.hits = cache.misses = 0
+        
+        cache.get_tuple(_config("t1"))
+        cache.get_tuple(_config("t2"))
+        
+        assert (cache.hits, cache.misses) == (1, 1)
+    
+    def test_read_racing_a_put_keeps_newer_latest(self, checkpointer):
+        """Test that a miss that read an older checkpoint while a put landed does not mark it as latest."""
+        _put(checkpointer, "t1", "00001")
+        cache = CachingCheckpointSaver(checkpointer, max_bytes=1024 * 1024)
+        inner_get = checkpointer.get_tuple
+        
+        def get_then_put(config):
+            stale = inner_get(config)
+            _put(cache, "t1", "00002", text="newer")
+            return stale
+        
+        with patch.object(checkpointer, "get_tuple", side_effect=get_then_put):
+            assert cache.get_tuple(_config("t1")).checkpoint["id"] == "00001"
+        
+        assert cache.get_tuple(_config("t1")).checkpoint["id"] == "00002"
+    
+    def test_oversized_put_is_not_served_stale(self, checkpointer):
+        """Test that a checkpoint too big to cache replaces the cached latest one."""
+        cache = CachingCheckpointSaver(checkpointer, max_bytes=2000)
+        _put(cache, "t1", "00001")
+        _put(cache, "t1", "00002", text="a" * 5000)
+        
+        assert cache.get_tuple(_config("t1")).checkpoint["id"] == "00002"
+    
+    def test_put_writes_evicts_checkpoint(self, checkpointer):
+        """Test that pending writes are visible after they are stored."""
+        cache = CachingCheckpointSaver(checkpointer, max_bytes=1024 * 1024)
+        saved_config = _put(cache, "t1", "00001")
+        
+        cache.put_writes(saved_config, [("messages", "pending")], "task")
+        
+        assert cache.get_tuple(_config("t1")).pending_writes == [("task", "messages", "pending")]
+    
+    def test_delete_thread_invalidates(self, checkpointer):
+        """Test that a deleted thread is not served from the cache."""
+        cache = CachingCheckpointSaver(checkpointer, max_bytes=1024 * 1024)
+        _put(cache, "t1", "00001")
+        
+        cache.delete_thread("t1")
+        
+        assert cache.get_tuple(_config("t1")) is None
+    
+    def test_purge_and_compaction_invalidate(self, checkpointer):
+        """Test that maintenance on the database drops stale cached checkpoints."""
+        cache = CachingCheckpointSaver(checkpointer, max_bytes=1024 * 1024)
+        _put(cache, "t1", "00001")
+        _put(cache, "t1", "00002")
+        _put(cache, "t2", "00001")
+        
+        compact_checkpoints(cache, keep_last=1)
+        purge_threads(cache, ["t2"])
+        
+        assert cache.get_tuple(_config("t1", "00001")) is None
+        assert cache.get_tuple(_config("t2")) is None
+        assert cache.get_tuple(_config("t1")).checkpoint["id"] == "00002"
+
+
+class TestCreateCheckpointer:
+    """Test suite for cache wiring in create_checkpointer."""
+    
+    def test_wraps_saver_in_cache(self, temp_checkpoint_db_path):
+        """Test that the cache is enabled by default."""
+        checkpointer = create_checkpointer(temp_checkpoint_db_path)
+        
+        assert isinstance(checkpointer, CachingCheckpointSaver)
+        unwrap_checkpointer(checkpointer).conn.close()
+    
+    def test_cache_can_be_disabled(self, temp_checkpoint_db_path):
+        """Test that CHECKPOINT_CACHE_BYTES=0 returns the plain saver."""
+        with patch("src.database.checkpointer.settings.checkpoint_cache_bytes", 0):
+            checkpointer = create_checkpointer(temp_checkpoint_db_path)
+        
+        assert not isinstance(checkpointer, CachingCheckpointSaver)
+        checkpointer.conn.close()
@@ -1,15 +1,18 @@
 """
 Tests for CLI interface.
 """
+import json
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import Runnable
 
-from src.ui.cli import EXIT_COMMANDS, CLEAR_COMMANDS, run_cli
+from src.core.config import settings
+from src.core.metrics import ACTIVE_SESSIONS, TURN_SECONDS
+from src.core.timings import TimingsCallbackHandler
+from src.ui.cli import EXIT_COMMANDS, CLEAR_COMMANDS, _pin_fact, run_cli
 from src.database.repository import ConversationDB
-from langgraph.checkpoint.sqlite import SqliteSaver
 
 
 class TestRunCli:
@@ -77,18 +80,15 @@ class TestRunCli:
     
     @patch('src.ui.cli.show_conversation_menu')
     @patch('src.ui.cli.create_agent_executor')
-    @patch('src.ui.cli.sqlite3')
-    @patch('src.ui.cli.SqliteSaver')
-    def test_run_cli_initializes_with_provided_agent(self, mock_saver, mock_sqlite3, mock_create_agent, mock_menu):
+    @patch('src.ui.cli.create_checkpointer')
+    def test_run_cli_initializes_with_provided_agent(self, mock_saver, mock_create_agent, mock_menu):
         """Test that run_cli uses provided agent and creates checkpointer if not provided."""
         mock_menu.return_value = (None, None)
         mock_agent = MagicMock(spec=Runnable)
         mock_checkpointer = MagicMock()
         mock_create_agent.return_value = (mock_agent, mock_checkpointer)
         
-        # Mock SQLite connection and SqliteSaver for when checkpointer needs to be created
-        mock_conn = MagicMock()
-        mock_sqlite3.connect.return_value = mock_conn
+        # Mock checkpointer creation for when checkpointer needs to be created
         mock_saver.return_value = mock_checkpointer
         
         # Should not create new agent if provided, but will create checkpointer
@@ -200,6 +200,204 @@ class TestRunCli:
         # Verify that delete_conversation was called with conversation ID
         mock_db.delete_conversation.assert_called_once_with(1)
         
+        # Verify that the thread checkpoints were deleted too
+        mock_checkpointer.delete_thread.assert_called_once_with('t1')
+        
         # Verify clear message was printed
         mock_print.assert_any_call("\n🧹 Histórico da conversa limpo!")
 
+    
+    @patch('src.ui.cli.show_conversation_menu')
+    @patch('src.ui.cli.create_agent_executor')
+    @patch('src.ui.cli.summarize_conversation')
+    @patch('src.ui.cli.process_agent_stream')
+    @patch('src.ui.cli.commit_turn')
+    @patch('builtins.input')
+    @patch('builtins.print')
+    def test_flushes_checkpointer_after_each_turn(self, mock_print, mock_input, mock_commit, mock_process_stream, mock_summarize, mock_create_agent, mock_menu):
+        """Test that buffered checkpoints are committed at the end of each turn and on exit."""
+        mock_db = MagicMock(spec=ConversationDB)
+        mock_menu.return_value = ('t1', 1)
+        
+        mock_checkpointer = MagicMock()
+        mock_create_agent.return_value = (MagicMock(spec=Runnable), mock_checkpointer)
+        mock_summarize.return_value = False
+        
+        # Two turns, then exit
+        mock_input.side_effect = ["Olá", "Tudo bem?", "sair"]
+        
+        run_cli(db=mock_db)
+        
+        assert mock_process_stream.call_count == 2
+        assert mock_commit.call_count == 3
+        mock_commit.assert_called_with(mock_db, mock_checkpointer)
+
+    
+    @patch('src.ui.cli.show_conversation_menu')
+    @patch('src.ui.cli.create_agent_executor')
+    @patch('src.ui.cli.summarize_conversation')
+    @patch('src.ui.cli.process_agent_stream')
+    @patch('builtins.input')
+    @patch('builtins.print')
+    def test_records_activity_after_each_turn(self, mock_print, mock_input, mock_process_stream, mock_summarize, mock_create_agent, mock_menu):
+        """Test that each turn records the conversation activity."""
+        mock_db = MagicMock(spec=ConversationDB)
+        mock_menu.return_value = ('t1', 1)
+        mock_create_agent.return_value = (MagicMock(spec=Runnable), MagicMock())
+        mock_summarize.return_value = False
+        mock_process_stream.return_value = {
+            'messages': [HumanMessage(content="Olá"), AIMessage(content="Oi!")],
+            'messages_added': 2,
+            'last_message': "Oi!",
+            'usage': {'input_tokens': 10, 'output_tokens': 3, 'tool_calls': 0, 'llm_seconds': 0.5},
+        }
+        
+        mock_input.side_effect = ["Olá", "sair"]
+        
+        run_cli(db=mock_db)
+        
+        # The turn is also added to the search index and the usage statistics
+        mock_db.record_activity.assert_called_once_with(
+            't1', 2, "Oi!", [("user", "Olá"), ("assistant", "Oi!")],
+            mock_process_stream.return_value['usage']
+        )
+    
+    @patch('src.ui.cli.show_conversation_menu')
+    @patch('src.ui.cli.create_agent_executor')
+    @patch('src.ui.cli.summarize_conversation')
+    @patch('src.ui.cli.process_agent_stream')
+    @patch('src.ui.cli.commit_turn')
+    @patch('builtins.input')
+    @patch('builtins.print')
+    def test_show_timings_prints_and_logs_breakdown(self, mock_print, mock_input, mock_commit, mock_process_stream, mock_summarize, mock_create_agent, mock_menu, tmp_path):
+        """Test that --timings times the turn, prints the breakdown and appends it to the log."""
+        mock_db = MagicMock(spec=ConversationDB)
+        mock_menu.return_value = ('t1', 1)
+        mock_create_agent.return_value = (MagicMock(spec=Runnable), MagicMock())
+        mock_summarize.return_value = False
+        mock_process_stream.return_value = {
+            'messages': [HumanMessage(content="Olá"), AIMessage(content="Oi!")],
+            'messages_added': 2,
+            'last_message': "Oi!",
+            'usage': {'input_tokens': 10, 'output_tokens': 3, 'tool_calls': 0, 'llm_seconds': 0.5},
+        }
+        mock_input.side_effect = ["Olá", "sair"]
+        log_path = tmp_path / "timings.jsonl"
+        
+        with patch.object(settings, 'timings_log_path', log_path):
+            run_cli(db=mock_db, show_timings=True)
+        
+        # The agent run gets a handler timing the model and tool calls
+        callbacks = mock_process_stream.call_args.args[3]
+        assert isinstance(callbacks[0], TimingsCallbackHandler)
+        
+        printed = [call.args[0] for call in mock_print.call_args_list if call.args]
+        assert any("⏱️ Turno:" in text for text in printed)
+        
+        record = json.loads(log_path.read_text(encoding="utf-8"))
+        assert record['thread_id'] == 't1'
+        assert set(record['totals']) == {'summarization', 'commit'}
+    
+    @patch('src.ui.cli.show_conversation_menu')
+    @patch('src.ui.cli.create_agent_executor')
+    @patch('src.ui.cli.summarize_conversation')
+    @patch('src.ui.cli.process_agent_stream')
+    @patch('src.ui.cli.commit_turn')
+    @patch('builtins.input')
+    @patch('builtins.print')
+    def test_traces_each_turn_to_trace_file(self, mock_print, mock_input, mock_commit, mock_process_stream, mock_summarize, mock_create_agent, mock_menu, tmp_path):
+        """Test that each turn is exported as one trace when TRACE_LOG_PATH is set."""
+        mock_db = MagicMock(spec=ConversationDB)
+        mock_menu.return_value = ('t1', 1)
+        mock_create_agent.return_value = (MagicMock(spec=Runnable), MagicMock())
+        mock_summarize.return_value = False
+        mock_input.side_effect = ["Olá", "Tudo bem?", "sair"]
+        trace_path = tmp_path / "traces.jsonl"
+        
+        with patch.object(settings, 'trace_log_path', trace_path):
+            run_cli(db=mock_db)
+        
+        requests = [json.loads(line) for line in trace_path.read_text(encoding="utf-8").splitlines()]
+        assert len(requests) == 2
+        root = requests[0]['resourceSpans'][0]['scopeSpans'][0]['spans'][-1]
+        assert root['name'] == "turn"
+        assert root['attributes'] == [{'key': 'thread_id', 'value': {'stringValue': "t1"}}]
+    
+    @patch('src.ui.cli.show_conversation_menu')
+    @patch('src.ui.cli.create_agent_executor')
+    @patch('src.ui.cli.summarize_conversation')
+    @patch('src.ui.cli.process_agent_stream')
+    @patch('src.ui.cli.commit_turn')
+    @patch('builtins.input')
+    @patch('builtins.print')
+    def test_writes_metrics_file(self, mock_print, mock_input, mock_commit, mock_process_stream, mock_summarize, mock_create_agent, mock_menu, tmp_path):
+        """Test that the metrics file is written with the turn latency and the session is counted."""
+        mock_menu.return_value = ('t1', 1)
+        mock_create_agent.return_value = (MagicMock(spec=Runnable), MagicMock())
+        mock_summarize.return_value = False
+        mock_input.side_effect = ["Olá", "sair"]
+        metrics_path = tmp_path / "metrics.prom"
+        turns_before = TURN_SECONDS.count()
+        
+        with patch.object(settings, 'metrics_path', metrics_path):
+            run_cli(db=MagicMock(spec=ConversationDB))
+        
+        assert TURN_SECONDS.count() == turns_before + 1
+        assert ACTIVE_SESSIONS.value() == 0
+        assert "assistant_turn_duration_seconds_count" in metrics_path.read_text(encoding="utf-8")
+    
+    @patch('src.ui.cli.show_conversation_menu')
+    @patch('src.ui.cli.create_agent_executor')
+    @patch('src.ui.cli.summarize_conversation')
+    @patch('src.ui.cli.process_agent_stream')
+    @patch('src.ui.cli.commit_turn')
+    @patch('builtins.input')
+    @patch('builtins.print')
+    def test_profile_turns_saves_one_profile_per_turn(self, mock_print, mock_input, mock_commit, mock_process_stream, mock_summarize, mock_create_agent, mock_menu, tmp_path):
+        """Test that --profile turn saves a profile and its summary for each turn."""
+        mock_menu.return_value = ('t1', 1)
+        mock_create_agent.return_value = (MagicMock(spec=Runnable), MagicMock())
+        mock_summarize.return_value = False
+        mock_input.side_effect = ["Olá", "Tudo bem?", "sair"]
+        
+        with patch.object(settings, 'profile_dir', tmp_path):
+            run_cli(db=MagicMock(spec=ConversationDB), profile_turns=True)
+        
+        summaries = sorted(tmp_path.glob("*-turn-t1.txt"))
+        assert len(summaries) == 2
+        assert all(summary.with_suffix(".prof").exists() for summary in summaries)
+    
+    @patch('src.ui.cli.commit_turn')
+    @patch('builtins.print')
+    def test_pin_fact_adds_pinned_message(self, mock_print, mock_commit):
+        """Test that 'fixar' adds a pinned fact to the thread and commits it."""
+        mock_db = MagicMock(spec=ConversationDB)
+        mock_agent = MagicMock()
+        mock_checkpointer = MagicMock()
+        
+        _pin_fact(mock_db, mock_agent, mock_checkpointer, "t1", "Meu nome é Ana")
+        
+        config, update = mock_agent.update_state.call_args.args
+        assert config["configurable"]["thread_id"] == "t1"
+        fact = update["messages"][0]
+        assert fact.content == "Meu nome é Ana"
+        assert fact.additional_kwargs == {"pinned": True}
+        mock_commit.assert_called_once_with(mock_db, mock_checkpointer)
+    
+    @patch('src.ui.cli.show_conversation_menu')
+    @patch('src.ui.cli.create_agent_executor')
+    @patch('src.ui.cli.process_agent_stream')
+    @patch('builtins.input')
+    @patch('builtins.print')
+    def test_pin_command_needs_a_conversation(self, mock_print, mock_input, mock_process_stream, mock_create_agent, mock_menu):
+        """Test that pinning before the first message only prints a warning."""
+        mock_menu.return_value = (None, None)
+        mock_agent = MagicMock()
+        mock_create_agent.return_value = (mock_agent, MagicMock())
+        mock_input.side_effect = ["fixar Meu nome é Ana", "sair"]
+        
+        run_cli(db=MagicMock(spec=ConversationDB))
+        
+        mock_agent.update_state.assert_not_called()
+        mock_process_stream.assert_not_called()
+        mock_print.assert_any_call("\n⚠️ Envie uma mensagem antes de fixar um fato.")
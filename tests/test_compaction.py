@@ -0,0 +1,175 @@
+"""
+Tests for checkpoint compaction.
+"""
+import sqlite3
+
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.database.checkpointer import RetryingSqliteSaver, sqlite_savers
+
+from src.database.compaction import (
+    AUTO_VACUUM_INCREMENTAL,
+    CompactionScheduler,
+    compact_checkpoints,
+    find_orphaned_threads,
+    purge_threads,
+    sweep_orphaned_threads,
+)
+from src.database.connection import connect
+from src.database.sharding import ShardedCheckpointSaver, shard_path
+
+
+def _put_history(checkpointer, thread_id, steps):
+    """Stores one checkpoint and one write per step for a thread."""
+    for step in range(steps):
+        config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+        checkpoint = {
+            "id": f"{step:05d}",
+            "channel_values": {"messages": [HumanMessage(content="x" * 1000)] * step},
+            "channel_versions": {}
+        }
+        saved_config = checkpointer.put(config, checkpoint, {"source": "test"}, {})
+        checkpointer.put_writes(saved_config, [("messages", "pending")], "task")
+
+
+def _count(checkpointer, table):
+    """Counts the rows of a checkpoint table."""
+    return checkpointer.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+class TestCompactCheckpoints:
+    """Test suite for compact_checkpoints function."""
+    
+    def test_keeps_latest_checkpoints_per_thread(self, checkpointer):
+        """Test that only the latest N checkpoints of each thread remain."""
+        _put_history(checkpointer, "t1", 10)
+        _put_history(checkpointer, "t2", 5)
+        
+        report = compact_checkpoints(checkpointer, keep_last=2)
+        
+        assert report["checkpoints_deleted"] == 11
+        assert _count(checkpointer, "checkpoints") == 4
+        latest = checkpointer.get(RunnableConfig(configurable={"thread_id": "t1", "checkpoint_ns": ""}))
+        assert latest["id"] == "00009"
+    
+    def test_deletes_orphaned_writes(self, checkpointer):
+        """Test that writes of deleted checkpoints are removed."""
+        _put_history(checkpointer, "t1", 10)
+        
+        report = compact_checkpoints(checkpointer, keep_last=1)
+        
+        assert report["writes_deleted"] == 9
+        assert _count(checkpointer, "writes") == 1
+    
+    def test_reclaims_space(self, checkpointer):
+        """Test that freed pages are returned and reported."""
+        _put_history(checkpointer, "t1", 30)
+        
+        report = compact_checkpoints(checkpointer, keep_last=1)
+        
+        assert report["bytes_reclaimed"] > 0
+        assert report["bytes_after"] < report["bytes_before"]
+        auto_vacuum = checkpointer.conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        assert auto_vacuum == AUTO_VACUUM_INCREMENTAL
+    
+    def test_compacting_twice_is_noop(self, checkpointer):
+        """Test that a second compaction has nothing to remove."""
+        _put_history(checkpointer, "t1", 5)
+        compact_checkpoints(checkpointer, keep_last=1)
+        
+        report = compact_checkpoints(checkpointer, keep_last=1)
+        
+        assert report["checkpoints_deleted"] == 0
+        assert report["writes_deleted"] == 0
+
+    
+    def test_busy_shard_keeps_counts_of_earlier_shards(self, temp_checkpoint_db_path, monkeypatch):
+        """Test that a shard retried after a busy error does not reset the report."""
+        checkpointer = ShardedCheckpointSaver([
+            RetryingSqliteSaver(connect(shard_path(temp_checkpoint_db_path, index), check_same_thread=False))
+            for index in range(2)
+        ])
+        for thread_id in ("t1", "t2", "t3", "t4"):
+            _put_history(checkpointer, thread_id, 3)
+        savers = sqlite_savers(checkpointer)
+        assert all(_count(saver, "checkpoints") for saver in savers)
+        
+        setup = savers[1].setup
+        attempts = []
+        
+        def busy_once():
+            attempts.append(None)
+            if len(attempts) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            setup()
+        monkeypatch.setattr(savers[1], "setup", busy_once)
+        
+        report = compact_checkpoints(checkpointer, keep_last=1)
+        
+        assert len(attempts) > 1
+        assert report["checkpoints_deleted"] == 8
+        assert report["writes_deleted"] == 8
+        for saver in savers:
+            saver.conn.close()
+
+class TestCompactionScheduler:
+    """Test suite for CompactionScheduler class."""
+    
+    def test_runs_in_background(self, checkpointer):
+        """Test that the scheduler compacts periodically until stopped."""
+        _put_history(checkpointer, "t1", 5)
+        scheduler = CompactionScheduler(checkpointer, interval=0.01, keep_last=1)
+        
+        scheduler.start()
+        for _ in range(200):
+            if scheduler.last_report is not None:
+                break
+            scheduler._stop_event.wait(0.01)
+        scheduler.stop()
+        
+        assert scheduler.last_report is not None
+        assert _count(checkpointer, "checkpoints") == 1
+
+
+class TestSweepOrphanedThreads:
+    """Test suite for orphaned thread sweeping."""
+    
+    def test_finds_threads_without_metadata(self, checkpointer, conversation_db):
+        """Test that only threads without a conversation row are orphaned."""
+        _, thread_id = conversation_db.save_conversation_metadata("Kept")
+        _put_history(checkpointer, thread_id, 2)
+        _put_history(checkpointer, "t999", 2)
+        
+        assert find_orphaned_threads(checkpointer, conversation_db) == ["t999"]
+    
+    def test_sweep_deletes_orphaned_threads(self, checkpointer, conversation_db):
+        """Test that orphaned checkpoints and writes are deleted."""
+        _, thread_id = conversation_db.save_conversation_metadata("Kept")
+        _put_history(checkpointer, thread_id, 2)
+        _put_history(checkpointer, "t999", 3)
+        
+        orphaned = sweep_orphaned_threads(checkpointer, conversation_db)
+        
+        assert orphaned == ["t999"]
+        assert _count(checkpointer, "checkpoints") == 2
+        assert _count(checkpointer, "writes") == 2
+    
+    def test_sweep_dry_run_keeps_data(self, checkpointer, conversation_db):
+        """Test that dry run does not delete anything."""
+        _put_history(checkpointer, "t999", 3)
+        
+        orphaned = sweep_orphaned_threads(checkpointer, conversation_db, dry_run=True)
+        
+        assert orphaned == ["t999"]
+        assert _count(checkpointer, "checkpoints") == 3
+    
+    def test_purge_threads(self, checkpointer):
+        """Test that purge deletes all data of the given threads only."""
+        _put_history(checkpointer, "t1", 3)
+        _put_history(checkpointer, "t2", 3)
+        
+        purge_threads(checkpointer, ["t1"])
+        
+        assert _count(checkpointer, "checkpoints") == 3
+        assert checkpointer.get(RunnableConfig(configurable={"thread_id": "t1", "checkpoint_ns": ""})) is None
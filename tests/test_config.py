@@ -9,11 +9,15 @@ import pytest
 
 from src.core.config import (
     DEFAULT_CHECKPOINT_DB_PATH,
+    DEFAULT_CONTEXT_KEEP_TURNS,
+    DEFAULT_CONTEXT_MAX_TOKENS,
     DEFAULT_CONVERSATION_DB_PATH,
     DEFAULT_MODEL_NAME,
     DEFAULT_TEMPERATURE,
     Settings,
     _validate_api_key,
+    _validate_choice,
+    _validate_int,
     _validate_temperature,
     create_settings_from_env,
 )
@@ -64,6 +68,38 @@ class TestValidateTemperature:
             _validate_temperature("2.1")
 
 
+class TestValidateInt:
+    """Test suite for _validate_int function."""
+    
+    def test_validates_valid_int(self):
+        """Test that valid integers are accepted."""
+        assert _validate_int("0", "VALUE") == 0
+        assert _validate_int("4000", "VALUE") == 4000
+    
+    def test_raises_error_on_invalid_format(self):
+        """Test that invalid integer format raises ValueError."""
+        with pytest.raises(ValueError, match="Invalid VALUE value"):
+            _validate_int("ten", "VALUE")
+    
+    def test_raises_error_below_minimum(self):
+        """Test that values below the minimum raise ValueError."""
+        with pytest.raises(ValueError, match="VALUE must be at least 1"):
+            _validate_int("0", "VALUE", minimum=1)
+
+
+class TestValidateChoice:
+    """Test suite for _validate_choice function."""
+    
+    def test_validates_valid_choice(self):
+        """Test that valid choices are accepted in any case."""
+        assert _validate_choice("wal", "MODE", ("DELETE", "WAL")) == "WAL"
+    
+    def test_raises_error_on_invalid_choice(self):
+        """Test that unknown choices raise ValueError."""
+        with pytest.raises(ValueError, match="Invalid MODE value"):
+            _validate_choice("fast", "MODE", ("DELETE", "WAL"))
+
+
 class TestSettings:
     """Test suite for Settings class."""
     
@@ -101,7 +137,11 @@ class TestCreateSettingsFromEnv:
         "TEMPERATURE": "0.8",
         "MODEL_NAME": "gpt-4",
         "CONVERSATION_DB_PATH": "custom/conversations.db",
-        "CHECKPOINT_DB_PATH": "custom/checkpoints.db"
+        "CHECKPOINT_DB_PATH": "custom/checkpoints.db",
+        "CONTEXT_MAX_TOKENS": "2000",
+        "CONTEXT_KEEP_TURNS": "5",
+        "SQLITE_JOURNAL_MODE": "delete",
+        "SQLITE_BUSY_TIMEOUT_MS": "100"
     })
     @patch('src.core.config.load_dotenv')
     def test_loads_from_environment(self, mock_load_dotenv):
@@ -113,6 +153,10 @@ class TestCreateSettingsFromEnv:
         assert settings.model_name == "gpt-4"
         assert settings.conversation_db_path == Path("custom/conversations.db")
         assert settings.checkpoint_db_path == Path("custom/checkpoints.db")
+        assert settings.context_max_tokens == 2000
+        assert settings.context_keep_turns == 5
+        assert settings.sqlite_journal_mode == "DELETE"
+        assert settings.sqlite_busy_timeout_ms == 100
     
     @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}, clear=True)
     @patch('src.core.config.load_dotenv')
@@ -122,6 +166,8 @@ class TestCreateSettingsFromEnv:
         
         assert settings.openai_api_key == "test-key"
         assert settings.temperature == DEFAULT_TEMPERATURE
+        assert settings.context_max_tokens == DEFAULT_CONTEXT_MAX_TOKENS
+        assert settings.context_keep_turns == DEFAULT_CONTEXT_KEEP_TURNS
         assert settings.model_name == DEFAULT_MODEL_NAME
         assert settings.conversation_db_path == DEFAULT_CONVERSATION_DB_PATH
         assert settings.checkpoint_db_path == DEFAULT_CHECKPOINT_DB_PATH
@@ -133,3 +179,85 @@ class TestCreateSettingsFromEnv:
         with pytest.raises(ValueError, match="OPENAI_API_KEY not found"):
             create_settings_from_env()
 
+    
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key", "STORAGE_LAYOUT": "unified"}, clear=True)
+    @patch('src.core.config.load_dotenv')
+    def test_loads_unified_storage_layout(self, mock_load_dotenv):
+        """Test that the storage layout is read case insensitively."""
+        settings = create_settings_from_env()
+        
+        assert settings.storage_layout == "UNIFIED"
+    
+    @patch.dict(os.environ, {
+        "OPENAI_API_KEY": "test-key",
+        "STORAGE_LAYOUT": "UNIFIED",
+        "CHECKPOINT_SHARDS": "4"
+    }, clear=True)
+    @patch('src.core.config.load_dotenv')
+    def test_raises_error_on_unified_layout_with_shards(self, mock_load_dotenv):
+        """Test that the unified layout cannot be combined with sharding."""
+        with pytest.raises(ValueError, match="CHECKPOINT_SHARDS"):
+            create_settings_from_env()
+    
+    @patch.dict(os.environ, {
+        "OPENAI_API_KEY": "test-key",
+        "METRICS_PORT": "9464",
+        "METRICS_PATH": "data/metrics.prom"
+    }, clear=True)
+    @patch('src.core.config.load_dotenv')
+    def test_loads_metrics_settings(self, mock_load_dotenv):
+        """Test that the metrics endpoint port and file are read."""
+        settings = create_settings_from_env()
+        
+        assert settings.metrics_port == 9464
+        assert settings.metrics_path == Path("data/metrics.prom")
+    
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key", "METRICS_PORT": "70000"}, clear=True)
+    @patch('src.core.config.load_dotenv')
+    def test_raises_error_on_invalid_metrics_port(self, mock_load_dotenv):
+        """Test that a metrics port outside the TCP range is rejected."""
+        with pytest.raises(ValueError, match="METRICS_PORT"):
+            create_settings_from_env()
+    
+    @patch.dict(os.environ, {
+        "OPENAI_API_KEY": "test-key",
+        "PROFILE": "session",
+        "PROFILER": "sampling",
+        "PROFILE_DIR": "/tmp/profiles",
+        "PROFILE_MEMORY_FRAMES": "0"
+    }, clear=True)
+    @patch('src.core.config.load_dotenv')
+    def test_loads_profiling_settings(self, mock_load_dotenv):
+        """Test that the profiling mode, profiler and output directory are read."""
+        settings = create_settings_from_env()
+        
+        assert settings.profile_mode == "SESSION"
+        assert settings.profiler == "SAMPLING"
+        assert settings.profile_dir == Path("/tmp/profiles")
+        assert settings.profile_memory_frames == 0
+    
+    @patch.dict(os.environ, {"OPENAI_API_KEY": "test-key", "PROFILE": "always"}, clear=True)
+    @patch('src.core.config.load_dotenv')
+    def test_raises_error_on_invalid_profile_mode(self, mock_load_dotenv):
+        """Test that an unknown profiling mode is rejected."""
+        with pytest.raises(ValueError, match="PROFILE"):
+            create_settings_from_env()
+    
+    @patch.dict(os.environ, {
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_SCENARIO": "benchmarks/scenario.json",
+        "FAKE_LLM_LATENCY_MS": "0",
+        "COUNTRIES_API_URL": "http://127.0.0.1:8080/",
+        "EXCHANGE_API_URL": "http://127.0.0.1:8080"
+    }, clear=True)
+    @patch('src.core.config.load_dotenv')
+    def test_loads_fake_provider_without_api_key(self, mock_load_dotenv):
+        """Test that the fake model needs no API key and the API URLs are read."""
+        settings = create_settings_from_env()
+        
+        assert settings.llm_provider == "FAKE"
+        assert settings.openai_api_key == ""
+        assert settings.fake_llm_scenario_path == Path("benchmarks/scenario.json")
+        assert settings.fake_llm_latency_ms == 0
+        assert settings.countries_api_url == "http://127.0.0.1:8080"
+        assert settings.exchange_api_url == "http://127.0.0.1:8080"
@@ -0,0 +1,96 @@
+"""
+Tests for the SQLite connection factory.
+"""
+import sqlite3
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.core.metrics import SQLITE_BUSY_RETRIES, SQLITE_BUSY_WAIT_SECONDS
+from src.database.checkpointer import RetryingSqliteSaver, create_checkpointer, unwrap_checkpointer
+from src.database.connection import connect, is_busy_error, retry_on_busy
+from src.database.serializers import CompressedSerializer
+
+
+class TestConnect:
+    """Test suite for connect function."""
+    
+    def test_applies_pragmas(self, temp_db_path, test_settings, monkeypatch):
+        """Test that the configured pragmas are applied."""
+        test_settings.sqlite_cache_size = -2000
+        test_settings.sqlite_busy_timeout_ms = 1234
+        monkeypatch.setattr("src.database.connection.settings", test_settings)
+        
+        connection = connect(temp_db_path)
+        
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        # NORMAL synchronous level is 1
+        assert connection.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert connection.execute("PRAGMA cache_size").fetchone()[0] == -2000
+        assert connection.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+        connection.close()
+    
+    def test_creates_parent_directory(self, tmp_path):
+        """Test that the database directory is created."""
+        db_path = tmp_path / "nested" / "test.db"
+        
+        connect(db_path).close()
+        
+        assert db_path.exists()
+
+
+class TestRetryOnBusy:
+    """Test suite for retry_on_busy decorator."""
+    
+    def test_detects_busy_errors(self):
+        """Test that locked and busy errors are retryable."""
+        assert is_busy_error(sqlite3.OperationalError("database is locked"))
+        assert is_busy_error(sqlite3.OperationalError("database is busy"))
+        assert not is_busy_error(sqlite3.OperationalError("no such table: x"))
+    
+    @patch('src.database.connection.time.sleep')
+    def test_retries_until_success(self, mock_sleep):
+        """Test that busy errors are retried."""
+        func = MagicMock(side_effect=[sqlite3.OperationalError("database is locked"), "ok"])
+        retries, waited = SQLITE_BUSY_RETRIES.value(), SQLITE_BUSY_WAIT_SECONDS.value()
+        
+        result = retry_on_busy(func)()
+        
+        assert result == "ok"
+        assert func.call_count == 2
+        mock_sleep.assert_called_once()
+        assert SQLITE_BUSY_RETRIES.value() == retries + 1
+        assert SQLITE_BUSY_WAIT_SECONDS.value() == pytest.approx(waited + mock_sleep.call_args.args[0])
+    
+    @patch('src.database.connection.time.sleep')
+    def test_gives_up_after_retries(self, mock_sleep, test_settings, monkeypatch):
+        """Test that the error is raised when retries are exhausted."""
+        test_settings.sqlite_busy_retries = 2
+        monkeypatch.setattr("src.database.connection.settings", test_settings)
+        func = MagicMock(side_effect=sqlite3.OperationalError("database is locked"))
+        
+        with pytest.raises(sqlite3.OperationalError):
+            retry_on_busy(func)()
+        
+        assert func.call_count == 3
+    
+    def test_does_not_retry_other_errors(self):
+        """Test that other errors are raised immediately."""
+        func = MagicMock(side_effect=sqlite3.OperationalError("no such table: x"))
+        
+        with pytest.raises(sqlite3.OperationalError):
+            retry_on_busy(func)()
+        
+        assert func.call_count == 1
+
+
+class TestCreateCheckpointer:
+    """Test suite for create_checkpointer function."""
+    
+    def test_creates_retrying_saver(self, temp_checkpoint_db_path):
+        """Test that the checkpointer uses the tuned connection."""
+        checkpointer = unwrap_checkpointer(create_checkpointer(temp_checkpoint_db_path))
+        
+        assert isinstance(checkpointer, RetryingSqliteSaver)
+        assert isinstance(checkpointer.serde, CompressedSerializer)
+        assert checkpointer.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
@@ -0,0 +1,104 @@
+"""
+Tests for model context windowing.
+"""
+from unittest.mock import MagicMock
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.core.context_window import (
+    create_context_window_middleware,
+    select_context_messages,
+)
+from src.core.summarizer import SUMMARY_HEADER, create_pinned_fact
+
+
+def _make_turns(count):
+    """Creates a history with the given number of question/answer turns."""
+    messages = []
+    for i in range(count):
+        messages.append(HumanMessage(content=f"Question {i}"))
+        messages.append(AIMessage(content=f"Answer {i}"))
+    return messages
+
+
+class TestSelectContextMessages:
+    """Test suite for select_context_messages function."""
+    
+    def test_keeps_short_history_untouched(self, sample_messages):
+        """Test that a history within limits is sent as is."""
+        result = select_context_messages(sample_messages, max_tokens=4000, keep_turns=10)
+        
+        assert result == sample_messages
+    
+    def test_keeps_only_last_turns(self):
+        """Test that only the last K turns are kept."""
+        messages = _make_turns(20)
+        
+        result = select_context_messages(messages, max_tokens=4000, keep_turns=3)
+        
+        assert len(result) == 6
+        assert result[0].content == "Question 17"
+        assert result[-1].content == "Answer 19"
+    
+    def test_respects_token_budget(self):
+        """Test that older turns are dropped when the budget is exceeded."""
+        messages = _make_turns(20)
+        
+        result = select_context_messages(messages, max_tokens=30, keep_turns=20)
+        
+        assert 0 < len(result) < len(messages)
+        assert result[-1].content == "Answer 19"
+    
+    def test_always_keeps_latest_turn(self):
+        """Test that the current turn is kept even above the budget."""
+        messages = _make_turns(2)
+        
+        result = select_context_messages(messages, max_tokens=1, keep_turns=10)
+        
+        assert [msg.content for msg in result] == ["Question 1", "Answer 1"]
+    
+    def test_summary_and_pinned_come_first(self):
+        """Test that summary and pinned facts are always kept first."""
+        summary = AIMessage(content=f"{SUMMARY_HEADER} - 100 messages summarized]\n\nFacts")
+        pinned = create_pinned_fact("My name is Ana")
+        messages = [summary, pinned] + _make_turns(10)
+        
+        result = select_context_messages(messages, max_tokens=4000, keep_turns=2)
+        
+        assert result[0] is summary
+        assert result[1] is pinned
+        assert len(result) == 6
+    
+    def test_does_not_split_tool_calls(self):
+        """Test that tool calls stay together with their results."""
+        messages = _make_turns(5) + [
+            HumanMessage(content="Capital of France?"),
+            AIMessage(content="", tool_calls=[
+                {"name": "get_country_info", "args": {"country_name": "France"}, "id": "call_1"}
+            ]),
+            ToolMessage(content="Informações sobre France", tool_call_id="call_1"),
+            AIMessage(content="Paris"),
+        ]
+        
+        result = select_context_messages(messages, max_tokens=4000, keep_turns=1)
+        
+        assert len(result) == 4
+        assert isinstance(result[0], HumanMessage)
+        assert isinstance(result[2], ToolMessage)
+
+
+class TestContextWindowMiddleware:
+    """Test suite for create_context_window_middleware function."""
+    
+    def test_middleware_trims_request_messages(self):
+        """Test that the middleware sends only the window to the model."""
+        middleware = create_context_window_middleware(max_tokens=4000, keep_turns=1)
+        request = MagicMock()
+        request.messages = _make_turns(5)
+        handler = MagicMock()
+        
+        middleware.wrap_model_call(request, handler)
+        
+        sent_messages = request.override.call_args.kwargs['messages']
+        assert [msg.content for msg in sent_messages] == ["Question 4", "Answer 4"]
+        handler.assert_called_once_with(request.override.return_value)
@@ -0,0 +1,182 @@
+"""
+Tests for content-addressed message storage in checkpoints.
+"""
+import sqlite3
+from contextlib import closing
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src.database.compaction import compact_checkpoints
+from src.database.dedup import MESSAGE_REFS_KEY, DedupSqliteSaver
+from src.database.write_behind import WriteBehindCheckpointSaver
+
+
+def _config(thread_id):
+    """Builds the config of a thread."""
+    return RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+
+
+def _conversation(turns):
+    """Builds the messages of a conversation with stable IDs."""
+    messages = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=f"Pergunta {turn}", id=f"h{turn}"))
+        messages.append(AIMessage(content=f"Resposta {turn}", id=f"a{turn}"))
+    return messages
+
+
+def _put_history(saver, thread_id, turns):
+    """Stores one checkpoint per turn, each with the whole history so far."""
+    messages = _conversation(turns)
+    config = _config(thread_id)
+    for turn in range(1, turns + 1):
+        checkpoint = {
+            "id": f"{turn:05d}",
+            "channel_values": {"messages": messages[:turn * 2], "step": turn},
+            "channel_versions": {}
+        }
+        config = saver.put(config, checkpoint, {"source": "test"}, {})
+    return messages
+
+
+def _count(saver, table):
+    """Counts the rows of a table."""
+    return saver.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest.fixture
+def dedup_saver(temp_checkpoint_db_path):
+    """Creates a deduplicating saver with a temporary database."""
+    saver = DedupSqliteSaver(sqlite3.connect(str(temp_checkpoint_db_path), check_same_thread=False))
+    yield saver
+    saver.conn.close()
+
+
+class TestDedupSqliteSaver:
+    """Test suite for DedupSqliteSaver class."""
+    
+    def test_repeated_message_in_one_checkpoint(self, dedup_saver):
+        """Test that a message appearing twice is stored once and read back twice."""
+        message = HumanMessage(content="Oi", id="h0")
+        checkpoint = {"id": "00001", "channel_values": {"messages": [message, message]}, "channel_versions": {}}
+        dedup_saver.put(_config("t1"), checkpoint, {}, {})
+        
+        assert _count(dedup_saver, "message_blobs") == 1
+        assert dedup_saver.get_tuple(_config("t1")).checkpoint["channel_values"]["messages"] == [message, message]
+        
+        dedup_saver.delete_thread("t1")
+        assert _count(dedup_saver, "message_blobs") == 0
+    
+    def test_stores_each_message_once(self, dedup_saver):
+        """Test that message rows grow with messages, not with checkpoints."""
+        _put_history(dedup_saver, "t1", 10)
+        
+        assert _count(dedup_saver, "message_blobs") == 20
+        refcounts = dedup_saver.conn.execute("SELECT refcount FROM message_blobs").fetchall()
+        # The first message is in all 10 checkpoints, the last only in the latest
+        assert max(row[0] for row in refcounts) == 10
+        assert min(row[0] for row in refcounts) == 1
+    
+    def test_round_trip(self, dedup_saver):
+        """Test that checkpoints read back with their messages in order."""
+        messages = _put_history(dedup_saver, "t1", 5)
+        
+        latest = dedup_saver.get_tuple(_config("t1"))
+        listed = list(dedup_saver.list(_config("t1")))
+        
+        assert latest.checkpoint["channel_values"]["messages"] == messages
+        assert latest.checkpoint["channel_values"]["step"] == 5
+        assert [len(t.checkpoint["channel_values"]["messages"]) for t in listed] == [10, 8, 6, 4, 2]
+    
+    def test_checkpoint_blob_holds_placeholder(self, dedup_saver):
+        """Test that the checkpoint row no longer contains the messages."""
+        _put_history(dedup_saver, "t1", 1)
+        
+        type_, blob = dedup_saver.conn.execute("SELECT type, checkpoint FROM checkpoints").fetchone()
+        stored = dedup_saver.serde.loads_typed((type_, blob))
+        
+        assert stored["channel_values"]["messages"] == {MESSAGE_REFS_KEY: [0, 2]}
+    
+    def test_storing_again_does_not_count_twice(self, dedup_saver):
+        """Test that putting the same checkpoint twice keeps refcounts right."""
+        _put_history(dedup_saver, "t1", 1)
+        _put_history(dedup_saver, "t1", 1)
+        
+        dedup_saver.delete_thread("t1")
+        
+        assert _count(dedup_saver, "message_blobs") == 0
+    
+    def test_compaction_collects_unreferenced_messages(self, dedup_saver):
+        """Test that deleting checkpoints releases their messages."""
+        messages = _put_history(dedup_saver, "t1", 10)
+        
+        compact_checkpoints(dedup_saver, keep_last=1)
+        
+        refcounts = {row[0] for row in dedup_saver.conn.execute("SELECT refcount FROM message_blobs")}
+        assert refcounts == {1}
+        assert dedup_saver.get_tuple(_config("t1")).checkpoint["channel_values"]["messages"] == messages
+        
+        dedup_saver.delete_thread("t1")
+        
+        assert _count(dedup_saver, "message_blobs") == 0
+    
+    def test_messages_shared_between_threads(self, dedup_saver):
+        """Test that a message used by another thread survives its deletion."""
+        _put_history(dedup_saver, "t1", 2)
+        _put_history(dedup_saver, "t2", 2)
+        
+        dedup_saver.delete_thread("t1")
+        
+        assert _count(dedup_saver, "message_blobs") == 4
+        assert len(dedup_saver.get_tuple(_config("t2")).checkpoint["channel_values"]["messages"]) == 4
+    
+    def test_reads_checkpoints_without_references(self, dedup_saver):
+        """Test that checkpoints written before deduplication stay readable."""
+        messages = _put_history(SqliteSaver(dedup_saver.conn), "t1", 2)
+        
+        latest = dedup_saver.get_tuple(_config("t1"))
+        
+        assert latest.checkpoint["channel_values"]["messages"] == messages
+    
+    def test_delete_between_reads(self, dedup_saver, temp_checkpoint_db_path, monkeypatch):
+        """Test that a checkpoint deleted by another connection while its messages load is read whole."""
+        # WAL lets the other connection delete while the read transaction is open
+        dedup_saver.conn.execute("PRAGMA journal_mode = WAL")
+        messages = _put_history(dedup_saver, "t1", 2)
+        load_messages = dedup_saver._load_messages
+        
+        def delete_then_load(checkpoint_tuple):
+            with closing(sqlite3.connect(str(temp_checkpoint_db_path))) as other:
+                with other:
+                    other.execute("DELETE FROM checkpoints WHERE thread_id = 't1'")
+            return load_messages(checkpoint_tuple)
+        
+        monkeypatch.setattr(dedup_saver, "_load_messages", delete_then_load)
+        latest = dedup_saver.get_tuple(_config("t1"))
+        monkeypatch.undo()
+        
+        assert latest.checkpoint["channel_values"]["messages"] == messages
+        assert dedup_saver.get_tuple(_config("t1")) is None
+        assert _count(dedup_saver, "message_blobs") == 0
+    
+    def test_load_messages_of_deleted_checkpoint(self, dedup_saver):
+        """Test that messages of a checkpoint deleted since it was read load as None."""
+        _put_history(dedup_saver, "t1", 2)
+        stored = SqliteSaver.get_tuple(dedup_saver, _config("t1"))
+        
+        dedup_saver.delete_thread("t1")
+        
+        with dedup_saver.lock:
+            assert dedup_saver._load_messages(stored) is None
+    
+    def test_write_behind_stores_references(self, dedup_saver):
+        """Test that buffered writes go through the deduplicated layout."""
+        saver = WriteBehindCheckpointSaver(dedup_saver, interval=3600)
+        messages = _put_history(saver, "t1", 3)
+        saver.close()
+        
+        assert _count(dedup_saver, "message_blobs") == 6
+        assert dedup_saver.get_tuple(_config("t1")).checkpoint["channel_values"]["messages"] == messages
@@ -0,0 +1,115 @@
+"""
+Tests for the scripted chat model.
+"""
+import json
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.core.fake_llm import DEFAULT_SCENARIO, ScriptedChatModel, load_scenario
+
+
+class TestScriptedChatModel:
+    """Test suite for ScriptedChatModel."""
+    
+    def test_calls_the_tool_then_answers_with_its_result(self):
+        """Test that a matching rule calls its tool and answers with the tool result."""
+        model = ScriptedChatModel()
+        question = HumanMessage(content="Qual a capital do Brasil?")
+        
+        first = model.invoke([question])
+        result = ToolMessage(content="- Capital: Brasília", tool_call_id=first.tool_calls[0]['id'])
+        second = model.invoke([question, first, result])
+        
+        assert first.tool_calls[0]['name'] == "get_country_info"
+        assert first.tool_calls[0]['args'] == {'country_name': "Brazil"}
+        assert "- Capital: Brasília" in second.content
+        assert second.tool_calls == []
+        assert model.invoke([question]).tool_calls == first.tool_calls
+    
+    def test_calls_several_tools_at_once(self):
+        """Test that a rule with a list of tools calls them in one message."""
+        model = ScriptedChatModel()
+        question = HumanMessage(content="Vou viajar para o Japão")
+        
+        first = model.invoke([question])
+        results = [
+            ToolMessage(content=f"resultado {index}", tool_call_id=call['id'])
+            for index, call in enumerate(first.tool_calls)
+        ]
+        second = model.invoke([question, first] + results)
+        
+        assert [call['name'] for call in first.tool_calls] == ["get_country_info", "get_exchange_rate"]
+        assert len({call['id'] for call in first.tool_calls}) == 2
+        assert "resultado 0\nresultado 1" in second.content
+    
+    def test_streams_the_answer_token_by_token(self):
+        """Test that answers are streamed as words, with their token usage."""
+        model = ScriptedChatModel()
+        
+        chunks = list(model.stream([HumanMessage(content="oi")]))
+        
+        message = sum(chunks[1:], chunks[0])
+        tokens = [chunk.content for chunk in chunks if chunk.content]
+        
+        assert message.content == DEFAULT_SCENARIO['default']
+        assert len(tokens) > 10
+        assert message.usage_metadata['output_tokens'] == len(tokens)
+    
+    def test_paces_the_stream(self):
+        """Test that the latency and token rate delay the answer."""
+        model = ScriptedChatModel(
+            scenario={'rules': [], 'default': "um dois três quatro"},
+            latency=0.05,
+            tokens_per_second=100
+        )
+        
+        started = time.perf_counter()
+        model.invoke([HumanMessage(content="oi")])
+        
+        assert time.perf_counter() - started >= 0.05 + 3 / 100
+    
+    def test_summary_prompt_gets_a_summary(self):
+        """Test that the summarization prompt is answered without a tool call."""
+        model = ScriptedChatModel()
+        
+        response = model.invoke(
+            "You are a system that summarizes conversations for long-term memory.\n"
+            "User: Qual a capital do Brasil?"
+        )
+        
+        assert response.tool_calls == []
+        assert response.content.startswith("- Main topics")
+    
+    def test_answers_after_the_tool_follow_the_latest_question(self):
+        """Test that the rule is chosen by the latest user message."""
+        model = ScriptedChatModel()
+        history = [HumanMessage(content="Qual a capital do Brasil?"), AIMessage(content="Brasília.")]
+        
+        response = model.invoke(history + [HumanMessage(content="E o dólar?")])
+        
+        assert response.tool_calls[0]['name'] == "get_exchange_rate"
+
+
+class TestLoadScenario:
+    """Test suite for load_scenario."""
+    
+    def test_loads_rules_and_default(self, tmp_path):
+        """Test that a scenario file is loaded, with the built-in default answer."""
+        path = tmp_path / "scenario.json"
+        path.write_text(json.dumps({'rules': [{'match': "(?i)olá", 'answer': "Olá!"}]}), encoding="utf-8")
+        
+        scenario = load_scenario(path)
+        
+        assert ScriptedChatModel(scenario=scenario).invoke("Olá").content == "Olá!"
+        assert scenario['default'] == DEFAULT_SCENARIO['default']
+    
+    @pytest.mark.parametrize("content", ["not json", '{"rules": [{"answer": "x"}]}', '{"rules": [{"match": "("}]}'])
+    def test_raises_error_on_invalid_scenario(self, tmp_path, content):
+        """Test that malformed files, rules without a pattern and invalid patterns are rejected."""
+        path = tmp_path / "scenario.json"
+        path.write_text(content, encoding="utf-8")
+        
+        with pytest.raises(ValueError, match="Invalid scenario"):
+            load_scenario(path)
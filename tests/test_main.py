@@ -14,8 +14,8 @@ class TestMain:
     @patch('src.main.run_cli')
     def test_main_calls_run_cli(self, mock_run_cli):
         """Test that main function calls run_cli."""
-        main()
-        mock_run_cli.assert_called_once()
+        main([])
+        mock_run_cli.assert_called_once_with(show_timings=False, profile_turns=False)
     
     @patch('src.main.run_cli')
     def test_main_handles_exceptions(self, mock_run_cli):
@@ -24,5 +24,25 @@ class TestMain:
         
         # Should not raise, but let exception propagate
         with pytest.raises(Exception, match="Test error"):
-            main()
+            main([])
+    
+    @patch('src.main.run_cli')
+    def test_main_timings_flag(self, mock_run_cli):
+        """Test that --timings turns on the per-turn breakdown."""
+        main(["--timings"])
+        mock_run_cli.assert_called_once_with(show_timings=True, profile_turns=False)
+    
+    @patch('src.main.run_cli')
+    def test_main_profile_flag_profiles_turns(self, mock_run_cli):
+        """Test that --profile alone profiles each turn."""
+        main(["--profile"])
+        mock_run_cli.assert_called_once_with(show_timings=False, profile_turns=True)
+    
+    @patch('src.main.profiled')
+    @patch('src.main.run_cli')
+    def test_main_profile_session(self, mock_run_cli, mock_profiled):
+        """Test that --profile session profiles the whole session once."""
+        main(["--profile", "session"])
+        mock_profiled.assert_called_once_with("session")
+        mock_run_cli.assert_called_once_with(show_timings=False)
 
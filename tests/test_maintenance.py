@@ -0,0 +1,169 @@
+"""
+Tests for maintenance entry point.
+"""
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from src.core.config import settings
+from src.maintenance import build_parser, main
+
+
+class TestMaintenance:
+    """Test suite for maintenance commands."""
+    
+    def test_requires_command(self):
+        """Test that a command is required."""
+        with pytest.raises(SystemExit):
+            build_parser().parse_args([])
+    
+    @patch('src.maintenance.summarize_threads')
+    @patch('src.maintenance.find_threads_to_summarize')
+    @patch('src.maintenance.create_checkpointer')
+    @patch('src.maintenance.ConversationDB')
+    def test_summarize_runs_batch(self, mock_db, mock_checkpointer, mock_find, mock_summarize):
+        """Test that summarize finds and summarizes threads."""
+        mock_find.return_value = ["t1", "t2"]
+        mock_summarize.return_value = {
+            "total": 2, "summarized": 2, "failed": 0,
+            "elapsed_seconds": 1.0, "throughput": 2.0
+        }
+        
+        main(["summarize", "--workers", "2", "--max-per-minute", "10"])
+        
+        mock_summarize.assert_called_once()
+        call_args = mock_summarize.call_args
+        assert call_args.args[1] == ["t1", "t2"]
+        assert call_args.kwargs["workers"] == 2
+        assert call_args.kwargs["max_per_minute"] == 10
+    
+    @patch('src.maintenance.summarize_threads')
+    @patch('src.maintenance.find_threads_to_summarize')
+    @patch('src.maintenance.create_checkpointer')
+    @patch('src.maintenance.ConversationDB')
+    def test_summarize_dry_run(self, mock_db, mock_checkpointer, mock_find, mock_summarize):
+        """Test that dry run does not summarize."""
+        mock_find.return_value = ["t1"]
+        
+        main(["summarize", "--dry-run"])
+        
+        mock_summarize.assert_not_called()
+    
+    @patch('src.maintenance.compact_checkpoints')
+    @patch('src.maintenance.create_checkpointer')
+    def test_compact_runs_compaction(self, mock_checkpointer, mock_compact):
+        """Test that compact calls compaction with the given limit."""
+        mock_compact.return_value = {
+            "checkpoints_deleted": 10, "writes_deleted": 5,
+            "bytes_before": 4096, "bytes_after": 1024, "bytes_reclaimed": 3072
+        }
+        
+        main(["compact", "--keep-last", "3"])
+        
+        mock_compact.assert_called_once_with(mock_checkpointer.return_value, keep_last=3)
+    
+    @patch('src.maintenance.sweep_orphaned_threads')
+    @patch('src.maintenance.create_checkpointer')
+    @patch('src.maintenance.ConversationDB')
+    def test_sweep_runs_sweeper(self, mock_db, mock_checkpointer, mock_sweep):
+        """Test that sweep calls the sweeper with dry run option."""
+        mock_sweep.return_value = ["t1"]
+        
+        main(["sweep", "--dry-run"])
+        
+        assert mock_sweep.call_args.kwargs["dry_run"] is True
+    
+    @patch('src.maintenance.profiled')
+    @patch('src.maintenance.rebalance_shards')
+    def test_profile_wraps_job(self, mock_rebalance, mock_profiled):
+        """Test that --profile profiles the whole job under its command name."""
+        mock_rebalance.return_value = {"threads_moved": 0, "shards_before": 1, "shards_after": 1}
+        
+        main(["--profile", "rebalance", "--shards", "1"])
+        
+        mock_profiled.assert_called_once_with("rebalance")
+        mock_rebalance.assert_called_once()
+    
+    @patch('src.maintenance.rebalance_shards')
+    def test_rebalance_moves_threads(self, mock_rebalance):
+        """Test that rebalance uses the given shard count."""
+        mock_rebalance.return_value = {"threads_moved": 3, "shards_before": 1, "shards_after": 4}
+        
+        main(["rebalance", "--shards", "4"])
+        
+        assert mock_rebalance.call_args.args[1] == 4
+    
+    @patch('src.maintenance.backfill_search_index')
+    @patch('src.maintenance.create_checkpointer')
+    @patch('src.maintenance.ConversationDB')
+    def test_backfill_search_indexes_conversations(self, mock_db, mock_checkpointer, mock_backfill):
+        """Test that backfill-search passes the rebuild option."""
+        mock_backfill.return_value = {"conversations_indexed": 2, "messages_indexed": 10}
+        
+        main(["backfill-search", "--rebuild"])
+        
+        assert mock_backfill.call_args.kwargs["rebuild"] is True
+    
+    @patch('src.maintenance.export_conversations')
+    @patch('src.maintenance.create_checkpointer')
+    @patch('src.maintenance.ConversationDB')
+    def test_export_writes_gzip_file(self, mock_db, mock_checkpointer, mock_export, tmp_path):
+        """Test that export compresses the output when the name ends with .gz."""
+        def export(db, checkpointer, output, **kwargs):
+            output.write('{"thread_id": "t1"}\n')
+            return {"conversations": 1, "messages": 2, "elapsed_seconds": 0.1, "throughput": 10.0}
+        mock_export.side_effect = export
+        path = tmp_path / "backup.jsonl.gz"
+        
+        main(["export", str(path), "--workers", "2"])
+        
+        assert mock_export.call_args.kwargs["workers"] == 2
+        assert gzip.decompress(path.read_bytes()) == b'{"thread_id": "t1"}\n'
+    
+    @patch('src.maintenance.import_conversations')
+    @patch('src.maintenance.create_checkpointer')
+    @patch('src.maintenance.ConversationDB')
+    def test_import_reads_file(self, mock_db, mock_checkpointer, mock_import, tmp_path):
+        """Test that import passes the batch size."""
+        mock_import.return_value = {
+            "conversations": 1, "messages": 2, "elapsed_seconds": 0.1, "throughput": 10.0
+        }
+        path = tmp_path / "backup.jsonl"
+        path.write_text("")
+        
+        main(["import", str(path), "--batch-size", "100"])
+        
+        assert mock_import.call_args.kwargs["batch_size"] == 100
+    
+    @patch('src.maintenance.ConversationDB')
+    def test_stats_prints_totals(self, mock_db, capsys):
+        """Test that stats queries the requested period and ranking."""
+        db = mock_db.return_value.__enter__.return_value
+        counters = {
+            "turns": 3, "messages": 6, "input_tokens": 900, "output_tokens": 100,
+            "tool_calls": 2, "llm_seconds": 4.5,
+        }
+        db.get_daily_totals.return_value = [{"day": "2024-05-01", "conversations": 1, **counters}]
+        db.get_top_conversations.return_value = [
+            {"thread_id": "t1", "first_message": None, **counters}
+        ]
+        
+        main(["stats", "--days", "0", "--top", "3", "--by", "tool_calls"])
+        
+        db.get_daily_totals.assert_called_once_with(since=None)
+        db.get_top_conversations.assert_called_once_with(limit=3, by="tool_calls", since=None)
+        output = capsys.readouterr().out
+        assert "2024-05-01" in output
+        assert "1000 tokens" in output
+    
+    @patch('src.maintenance.migrate_to_unified')
+    def test_unify_storage_copies_checkpoints(self, mock_migrate):
+        """Test that unify-storage copies the configured checkpoint files."""
+        mock_migrate.return_value = {"threads_copied": 3, "files_read": 1}
+        
+        main(["unify-storage"])
+        
+        mock_migrate.assert_called_once_with(
+            settings.conversation_db_path, settings.checkpoint_db_path
+        )
@@ -5,8 +5,16 @@ from unittest.mock import patch
 
 import pytest
 import questionary
+from prompt_toolkit.completion import CompleteEvent
+from prompt_toolkit.document import Document
 
-from src.ui.menu import show_conversation_menu
+from src.ui.menu import (
+    LOAD_MORE_OPTION,
+    NEW_CONVERSATION_OPTION,
+    SEARCH_OPTION,
+    ConversationSearchCompleter,
+    show_conversation_menu,
+)
 
 
 class TestShowConversationMenu:
@@ -91,3 +99,70 @@ class TestShowConversationMenu:
         assert thread_id is None
         assert conv_id is None
 
+    
+    @patch('src.ui.menu.questionary.select')
+    def test_loads_more_conversations_on_demand(self, mock_select, conversation_db, monkeypatch):
+        """Test that only the first page is loaded until more are requested."""
+        monkeypatch.setattr('src.ui.menu.MENU_PAGE_SIZE', 2)
+        ids = [conversation_db.save_conversation_metadata(f"Msg {i}")[0] for i in range(3)]
+        oldest = ids[0]
+        mock_select.return_value.ask.side_effect = [
+            LOAD_MORE_OPTION,
+            f"ID {oldest} - Msg 0 - 01-01-2024",
+        ]
+        
+        result_thread_id, result_conv_id = show_conversation_menu(conversation_db)
+        
+        first_choices = mock_select.call_args_list[0].kwargs['choices']
+        second_choices = mock_select.call_args_list[1].kwargs['choices']
+        assert len(first_choices) == 5  # new, search, two conversations, load more
+        assert first_choices[-1] == LOAD_MORE_OPTION
+        assert len(second_choices) == 5  # new, search and all three conversations
+        assert LOAD_MORE_OPTION not in second_choices
+        assert result_conv_id == oldest
+    
+    @patch('src.ui.menu.questionary.autocomplete')
+    @patch('src.ui.menu.questionary.select')
+    def test_search_selects_suggested_conversation(self, mock_select, mock_autocomplete, conversation_db):
+        """Test that a conversation picked from the search suggestions is loaded."""
+        conv_id, thread_id = conversation_db.save_conversation_metadata("Câmbio do dólar")
+        mock_select.return_value.ask.return_value = SEARCH_OPTION
+        mock_autocomplete.return_value.ask.return_value = f"ID {conv_id} - Câmbio do dólar - 01-01-2024"
+        
+        result_thread_id, result_conv_id = show_conversation_menu(conversation_db)
+        
+        assert (result_thread_id, result_conv_id) == (thread_id, conv_id)
+        completer = mock_autocomplete.call_args.kwargs['completer']
+        assert isinstance(completer, ConversationSearchCompleter)
+    
+    @patch('src.ui.menu.questionary.autocomplete')
+    @patch('src.ui.menu.questionary.select')
+    def test_search_without_results_returns_to_list(self, mock_select, mock_autocomplete, conversation_db):
+        """Test that a search without results goes back to the conversation list."""
+        conversation_db.save_conversation_metadata("Message")
+        mock_select.return_value.ask.side_effect = [SEARCH_OPTION, NEW_CONVERSATION_OPTION]
+        mock_autocomplete.return_value.ask.return_value = "inexistente"
+        
+        with patch('builtins.print'):
+            result = show_conversation_menu(conversation_db)
+        
+        assert result == (None, None)
+        assert mock_select.call_count == 2
+        # The page is not loaded twice
+        assert mock_select.call_args_list[1].kwargs['choices'] == mock_select.call_args_list[0].kwargs['choices']
+
+
+class TestConversationSearchCompleter:
+    """Test suite for the search-as-you-type completer."""
+    
+    def test_suggests_matching_conversations(self, conversation_db):
+        """Test that suggestions come from the full-text index."""
+        conv_id, thread_id = conversation_db.save_conversation_metadata("Olá")
+        conversation_db.replace_indexed_messages(thread_id, [("user", "Qual o câmbio do euro?")])
+        completer = ConversationSearchCompleter(conversation_db)
+        
+        completions = list(completer.get_completions(Document("camb"), CompleteEvent()))
+        
+        assert len(completions) == 1
+        assert completions[0].text.startswith(f"ID {conv_id} - ")
+        assert completions[0].start_position == -4
@@ -0,0 +1,221 @@
+"""
+Tests for the metrics registry and its exposition.
+"""
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.api.clients.http import http_get
+from src.core.metrics import (
+    CHECKPOINT_BYTES,
+    CHECKPOINT_CACHE_REQUESTS,
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS,
+    TOOL_CALLS,
+    Metric,
+    MetricsRegistry,
+    MetricsServer,
+    write_metrics,
+)
+from src.database.checkpoint_cache import CachingCheckpointSaver
+from src.database.dedup import DedupSqliteSaver
+from src.tools.country_tool import get_country_info_wrapper
+
+
+class TestMetrics:
+    """Test suite for counters, gauges and histograms."""
+    
+    def test_counter_adds_up_all_threads(self):
+        """Test that increments made by several threads are all counted."""
+        counter = MetricsRegistry().counter("requests", "Requests", ("host",))
+        
+        def work():
+            for _ in range(1000):
+                counter.inc(labels=("a",))
+        
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(2, labels=("b",))
+        
+        assert counter.value(("a",)) == 8000
+        assert counter.samples() == [
+            ("requests_total", ("a",), 8000.0),
+            ("requests_total", ("b",), 2.0),
+        ]
+    
+    def test_ended_threads_are_folded(self):
+        """Test that values of ended threads are kept in one total instead of one shard each."""
+        counter = MetricsRegistry().counter("requests", "Requests")
+        histogram = MetricsRegistry().histogram("latency_seconds", "Latency", buckets=(1.0,))
+        
+        def work():
+            counter.inc()
+            histogram.observe(0.5)
+        
+        for _ in range(20):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        
+        assert counter._values.shards() == [{(): 20.0}]
+        assert len(histogram._values.shards()) == 1
+        assert counter.value() == 20
+        assert histogram.count() == 20
+        assert ("latency_seconds_sum", (), 10.0) in histogram.samples()
+    
+    def test_histogram_shards_are_copies(self):
+        """Test that reading a histogram copies the values a thread keeps updating."""
+        histogram = MetricsRegistry().histogram("latency_seconds", "Latency", buckets=(1.0,))
+        histogram.observe(0.5)
+        
+        copied = histogram._values.shards()[1][()]
+        histogram.observe(2.0)
+        
+        assert copied.counts == [1, 0]
+        assert copied.count == 1
+        assert histogram.count() == 2
+    
+    def test_histogram_renders_cumulative_buckets(self):
+        """Test that histogram buckets are cumulative, with the sum and count."""
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", ("host",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, labels=("a",))
+        
+        lines = registry.render().splitlines()
+        
+        assert lines == [
+            "# HELP latency_seconds Latency",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{host="a",le="0.1"} 2',
+            'latency_seconds_bucket{host="a",le="1"} 3',
+            'latency_seconds_bucket{host="a",le="+Inf"} 4',
+            'latency_seconds_sum{host="a"} 3.65',
+            'latency_seconds_count{host="a"} 4',
+        ]
+        assert histogram.count(("a",)) == 4
+    
+    def test_gauge_and_label_escaping(self):
+        """Test that gauges go up and down and label values are escaped."""
+        registry = MetricsRegistry()
+        gauge = registry.gauge("sessions", "Sessions", ("name",))
+        gauge.inc(labels=('say "hi"',))
+        gauge.inc(labels=('say "hi"',))
+        gauge.dec(labels=('say "hi"',))
+        
+        assert 'sessions{name="say \\"hi\\""} 1' in registry.render()
+    
+    def test_registry_returns_existing_metric(self):
+        """Test that registering a name again returns the same metric."""
+        registry = MetricsRegistry()
+        
+        assert registry.counter("turns", "Turns") is registry.counter("turns", "Turns")
+    
+    def test_metric_must_implement_samples(self):
+        """Test that a metric type without samples() cannot be created."""
+        class IncompleteMetric(Metric):
+            type_name = "gauge"
+        
+        with pytest.raises(TypeError, match="samples"):
+            IncompleteMetric("incomplete", "Incomplete")
+
+
+class TestExposition:
+    """Test suite for MetricsServer and write_metrics."""
+    
+    def test_server_exposes_metrics(self):
+        """Test that /metrics serves the registry and other paths are not found."""
+        registry = MetricsRegistry()
+        registry.counter("turns", "Turns").inc()
+        server = MetricsServer(registry, port=0)
+        server.start()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+                body = response.read().decode("utf-8")
+                content_type = response.headers["Content-Type"]
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"http://127.0.0.1:{server.port}/")
+        finally:
+            server.stop()
+        
+        assert "turns_total 1" in body
+        assert content_type.startswith("text/plain; version=0.0.4")
+    
+    def test_write_metrics_replaces_file(self, tmp_path):
+        """Test that the metrics file holds the latest exposition."""
+        registry = MetricsRegistry()
+        counter = registry.counter("turns", "Turns")
+        path = tmp_path / "metrics" / "metrics.prom"
+        
+        counter.inc()
+        write_metrics(path, registry)
+        counter.inc()
+        write_metrics(path, registry)
+        
+        assert "turns_total 2" in path.read_text(encoding="utf-8")
+        assert list(path.parent.iterdir()) == [path]
+
+
+class TestInstrumentation:
+    """Test suite for the metrics recorded by the application."""
+    
+    @patch('src.api.clients.http.requests.get')
+    def test_http_requests_count_status_and_errors(self, mock_get):
+        """Test that HTTP requests are counted by status code, failures as errors."""
+        labels = ("metrics.example",)
+        ok_before = HTTP_REQUESTS.value(("metrics.example", "503"))
+        errors_before = HTTP_REQUESTS.value(("metrics.example", "error"))
+        observed_before = HTTP_REQUEST_SECONDS.count(labels)
+        
+        mock_get.return_value = Mock(status_code=503)
+        http_get("https://metrics.example/v1")
+        mock_get.side_effect = requests.exceptions.ConnectionError("down")
+        with pytest.raises(requests.exceptions.ConnectionError):
+            http_get("https://metrics.example/v1")
+        
+        assert HTTP_REQUESTS.value(("metrics.example", "503")) == ok_before + 1
+        assert HTTP_REQUESTS.value(("metrics.example", "error")) == errors_before + 1
+        assert HTTP_REQUEST_SECONDS.count(labels) == observed_before + 2
+    
+    @patch('src.tools.country_tool.get_country_info')
+    def test_tool_calls_count_outcome(self, mock_get_country_info):
+        """Test that tool calls are counted by outcome."""
+        errors_before = TOOL_CALLS.value(("get_country_info", "error"))
+        mock_get_country_info.return_value = {"success": False, "error": "Country not found"}
+        
+        get_country_info_wrapper("Atlantis")
+        
+        assert TOOL_CALLS.value(("get_country_info", "error")) == errors_before + 1
+    
+    def test_checkpoint_cache_and_size(self, temp_checkpoint_db_path):
+        """Test that checkpoint sizes and cache hits and misses are recorded."""
+        saver = DedupSqliteSaver(sqlite3.connect(str(temp_checkpoint_db_path)))
+        cache = CachingCheckpointSaver(saver, max_bytes=1024 * 1024)
+        config = RunnableConfig(configurable={"thread_id": "t1", "checkpoint_ns": ""})
+        checkpoint = {
+            "id": "1",
+            "channel_values": {"messages": [HumanMessage(content="hello")]},
+            "channel_versions": {}
+        }
+        stored_before = CHECKPOINT_BYTES.count()
+        hits_before = CHECKPOINT_CACHE_REQUESTS.value(("hit",))
+        misses_before = CHECKPOINT_CACHE_REQUESTS.value(("miss",))
+        
+        cache.put(config, checkpoint, {}, {})
+        cache.get_tuple(config)
+        cache.get_tuple(RunnableConfig(configurable={"thread_id": "t2", "checkpoint_ns": ""}))
+        saver.conn.close()
+        
+        assert CHECKPOINT_BYTES.count() == stored_before + 1
+        assert CHECKPOINT_CACHE_REQUESTS.value(("hit",)) == hits_before + 1
+        assert CHECKPOINT_CACHE_REQUESTS.value(("miss",)) == misses_before + 1
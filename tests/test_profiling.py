@@ -0,0 +1,163 @@
+"""
+Tests for the built-in profiling.
+"""
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+
+from src.core.config import Settings
+from src.core.profiling import collect_profile, profiled, write_profile
+
+
+def _busy_worker():
+    """Spends some CPU time in a function the profiles can find."""
+    return sum(i * i for i in range(20000))
+
+
+def _run_in_thread(target):
+    """Runs a function in a new thread and waits for it."""
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+
+
+class TestCollectProfile:
+    """Test suite for collect_profile and write_profile."""
+    
+    @pytest.mark.skipif(sys.version_info >= (3, 12), reason="cProfile per thread needs Python 3.11")
+    def test_cprofile_sees_threads_started_inside(self):
+        """Test that cProfile stats include threads started during the block, like LangGraph workers."""
+        with collect_profile("turn", memory_frames=0) as result:
+            _run_in_thread(_busy_worker)
+        
+        functions = {function for _, _, function in result.stats.stats}
+        assert "_busy_worker" in functions
+        assert result.wall_seconds > 0
+        assert result.memory_end is None
+    
+    @pytest.mark.skipif(sys.version_info >= (3, 12), reason="cProfile per thread needs Python 3.11")
+    def test_cprofile_detaches_from_threads_still_running(self):
+        """Test that threads started during the block stop being profiled when it ends."""
+        resume = threading.Event()
+        hooks = []
+        
+        def worker():
+            resume.wait()
+            _busy_worker()
+            hooks.append(sys.getprofile())
+        
+        with collect_profile("turn", memory_frames=0) as result:
+            thread = threading.Thread(target=worker)
+            thread.start()
+        resume.set()
+        thread.join()
+        
+        assert hooks == [None]
+        functions = {function for _, _, function in result.stats.stats}
+        assert "_busy_worker" not in functions
+    
+    def test_cprofile_falls_back_to_sampling(self):
+        """Test that CPROFILE uses the sampling profiler where cProfile cannot follow threads."""
+        with patch('src.core.profiling.THREAD_CPROFILE', False):
+            with collect_profile("turn", sample_interval=0.001, memory_frames=0) as result:
+                time.sleep(0.02)
+        
+        assert result.profiler == "SAMPLING"
+        assert result.stats is None
+        assert result.sample_count > 0
+    
+    def test_sampling_profiler_records_stacks(self):
+        """Test that the sampling profiler records the stacks of other threads."""
+        stop = threading.Event()
+        
+        def spin():
+            while not stop.is_set():
+                _busy_worker()
+        
+        thread = threading.Thread(target=spin)
+        thread.start()
+        try:
+            with collect_profile("turn", profiler="SAMPLING", sample_interval=0.001, memory_frames=0) as result:
+                time.sleep(0.1)
+        finally:
+            stop.set()
+            thread.join()
+        
+        assert result.sample_count > 0
+        assert any("_busy_worker" in function for stack in result.stacks for function in stack)
+        assert "cumulative samples" in result.summary()
+    
+    def test_takes_memory_snapshots(self):
+        """Test that tracemalloc runs only during the block and its allocations are reported."""
+        with collect_profile("turn") as result:
+            kept = [bytearray(1024) for _ in range(100)]
+        
+        assert not tracemalloc.is_tracing()
+        assert result.peak_memory >= 100 * 1024
+        assert "Memory: peak" in result.summary()
+        assert len(kept) == 100
+    
+    def test_rejects_unknown_profiler(self):
+        """Test that an unknown profiler is rejected before profiling starts."""
+        with pytest.raises(ValueError, match="PYINSTRUMENT"):
+            with collect_profile("turn", profiler="PYINSTRUMENT"):
+                pass
+    
+    def test_write_profile_saves_files(self, tmp_path):
+        """Test that the stats, snapshot and summary are written next to each other."""
+        with collect_profile("turn/1") as result:
+            _busy_worker()
+        
+        summary_path = write_profile(tmp_path / "profiles", result)
+        
+        assert summary_path.suffix == ".txt"
+        assert "turn_1" in summary_path.name
+        assert "_busy_worker" in summary_path.read_text(encoding="utf-8")
+        stats = pstats.Stats(str(summary_path.with_suffix(".prof")))
+        assert stats.total_calls > 0
+        assert tracemalloc.Snapshot.load(str(summary_path.with_suffix(".tracemalloc"))).traces
+    
+    def test_write_profile_saves_folded_stacks(self, tmp_path):
+        """Test that sampled stacks are written in the folded format of flame graph tools."""
+        with collect_profile("turn", profiler="SAMPLING", sample_interval=0.001, memory_frames=0) as result:
+            time.sleep(0.05)
+        
+        summary_path = write_profile(tmp_path, result)
+        
+        lines = summary_path.with_suffix(".folded").read_text(encoding="utf-8").splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert ";" in stack and int(count) > 0
+
+
+class TestProfiled:
+    """Test suite for profiled."""
+    
+    def test_saves_profile_with_configured_profiler(self, tmp_path, capsys):
+        """Test that the block is profiled as configured and the profile is saved."""
+        test_settings = Settings(
+            openai_api_key="test-key", profiler="SAMPLING", profile_dir=tmp_path, profile_memory_frames=0
+        )
+        with patch('src.core.profiling.settings', test_settings):
+            with profiled("session") as result:
+                time.sleep(0.02)
+        
+        assert result.profiler == "SAMPLING"
+        assert len(list(tmp_path.glob("*-session.txt"))) == 1
+        assert "Perfil salvo" in capsys.readouterr().out
+    
+    def test_warns_when_profile_cannot_be_written(self, tmp_path, capsys):
+        """Test that a profile that cannot be saved only prints a warning."""
+        blocker = tmp_path / "file"
+        blocker.write_text("", encoding="utf-8")
+        test_settings = Settings(openai_api_key="test-key", profile_dir=blocker / "profiles")
+        with patch('src.core.profiling.settings', test_settings):
+            with profiled("session"):
+                pass
+        
+        assert "Não foi possível gravar o perfil" in capsys.readouterr().out
@@ -0,0 +1,80 @@
+"""
+Tests for the terminal renderer.
+"""
+import io
+import time
+
+from src.ui.renderer import TerminalRenderer
+
+
+class CountingStream(io.StringIO):
+    """StringIO that counts flushes, i.e. the writes that reach the terminal."""
+    
+    def __init__(self):
+        super().__init__()
+        self.flushes = 0
+    
+    def flush(self):
+        self.flushes += 1
+        super().flush()
+
+
+class TestTerminalRenderer:
+    """Test suite for TerminalRenderer class."""
+    
+    def test_first_token_is_written_right_away(self):
+        """Test that coalescing does not delay the first token."""
+        stream = CountingStream()
+        with TerminalRenderer(stream, frame_interval=60) as renderer:
+            renderer.write("Olá")
+            
+            assert stream.getvalue() == "Olá"
+    
+    def test_coalesces_tokens_of_a_frame(self):
+        """Test that the tokens after the first are written together."""
+        stream = CountingStream()
+        renderer = TerminalRenderer(stream, frame_interval=60)
+        
+        for token in ["A", " capital", " é", " Brasília"]:
+            renderer.write(token)
+        assert stream.getvalue() == "A"
+        
+        renderer.close()
+        
+        assert stream.getvalue() == "A capital é Brasília"
+        assert stream.flushes == 2
+        assert renderer.frames == 2
+    
+    def test_newline_writes_the_frame(self):
+        """Test that a line break is not held back."""
+        stream = CountingStream()
+        with TerminalRenderer(stream, frame_interval=60) as renderer:
+            renderer.write("Primeira")
+            renderer.write(" linha\n")
+            
+            assert stream.getvalue() == "Primeira linha\n"
+    
+    def test_background_thread_writes_due_frame(self):
+        """Test that buffered text is written when its frame is due, without more tokens."""
+        stream = CountingStream()
+        with TerminalRenderer(stream, frame_interval=0.01) as renderer:
+            renderer.write("Olá")
+            renderer.write(", mundo")
+            
+            deadline = time.monotonic() + 2
+            while stream.getvalue() != "Olá, mundo" and time.monotonic() < deadline:
+                time.sleep(0.005)
+            
+            assert stream.getvalue() == "Olá, mundo"
+    
+    def test_zero_interval_is_unbuffered(self):
+        """Test that a frame interval of 0 writes every chunk."""
+        stream = CountingStream()
+        renderer = TerminalRenderer(stream, frame_interval=0)
+        
+        for token in ["a", "b", "c"]:
+            renderer.write(token)
+        
+        assert stream.getvalue() == "abc"
+        assert stream.flushes == 3
+        assert renderer._thread is None
@@ -1,6 +1,9 @@
 """
 Tests for ConversationDB repository.
 """
+import sqlite3
+import time
+
 import pytest
 from src.database.repository import ConversationDB
 
@@ -57,6 +60,41 @@ class TestConversationDB:
         assert conv_id2 in ids
         assert conv_id3 in ids
     
+    def test_get_conversations_list_pages(self, conversation_db):
+        """Test keyset pagination, including conversations updated in the same second."""
+        ids = [conversation_db.save_conversation_metadata(f"Message {i}")[0] for i in range(5)]
+        
+        first_page = conversation_db.get_conversations_list(limit=2)
+        second_page = conversation_db.get_conversations_list(limit=2, before=first_page[-1]['cursor'])
+        last_page = conversation_db.get_conversations_list(limit=2, before=second_page[-1]['cursor'])
+        
+        paged_ids = [conv['id'] for conv in first_page + second_page + last_page]
+        assert paged_ids == list(reversed(ids))
+        assert len(last_page) == 1
+    
+    def test_get_conversations_list_uses_index(self, conversation_db):
+        """Test that listing a page is served by the updated_at index."""
+        with conversation_db._cursor() as cursor:
+            cursor.execute('''
+                EXPLAIN QUERY PLAN
+                SELECT id FROM conversations
+                WHERE (updated_at, id) < ('2024-01-01', 1)
+                ORDER BY updated_at DESC, id DESC LIMIT 20
+            ''')
+            plan = " ".join(row['detail'] for row in cursor.fetchall())
+        
+        assert "idx_conversations_updated_at" in plan
+        assert "TEMP B-TREE" not in plan
+    
+    def test_get_thread_ids(self, conversation_db):
+        """Test retrieving thread IDs of all conversations."""
+        _, thread_id1 = conversation_db.save_conversation_metadata("First message")
+        _, thread_id2 = conversation_db.save_conversation_metadata("Second message")
+        
+        thread_ids = conversation_db.get_thread_ids()
+        
+        assert sorted(thread_ids) == sorted([thread_id1, thread_id2])
+    
     def test_delete_conversation(self, conversation_db):
         """Test deleting a conversation."""
         conv_id, _ = conversation_db.save_conversation_metadata("To be deleted")
@@ -80,3 +118,262 @@ class TestConversationDB:
         assert thread_id2 == f"t{conv_id2}"
         assert thread_id1 != thread_id2
 
+    
+    def test_reuses_connection(self, conversation_db):
+        """Test that the same connection is used across calls."""
+        connection = conversation_db._connection
+        
+        conversation_db.save_conversation_metadata("Message")
+        conversation_db.get_conversations_list()
+        
+        assert conversation_db._connection is connection
+    
+    def test_close(self, conversation_db):
+        """Test that operations fail after close and close is idempotent."""
+        conversation_db.close()
+        conversation_db.close()
+        
+        with pytest.raises(sqlite3.ProgrammingError):
+            conversation_db.get_conversations_list()
+    
+    def test_context_manager_closes(self, conversation_db):
+        """Test that the with block closes the connection."""
+        with conversation_db as db:
+            db.save_conversation_metadata("Message")
+        
+        assert conversation_db._connection is None
+    
+    def test_failed_transaction_rolls_back(self, conversation_db):
+        """Test that a failing write does not leave a partial transaction."""
+        with pytest.raises(RuntimeError):
+            with conversation_db._cursor(transaction=True) as cursor:
+                cursor.execute("INSERT INTO conversations (first_message) VALUES ('x')")
+                raise RuntimeError("boom")
+        
+        assert conversation_db.get_conversations_list() == []
+    
+    def test_record_activity_is_buffered(self, conversation_db):
+        """Test that activity is not written until flushed."""
+        _, thread_id = conversation_db.save_conversation_metadata("Message")
+        
+        conversation_db.record_activity(thread_id, 2, "Reply")
+        
+        with conversation_db._cursor() as cursor:
+            cursor.execute("SELECT message_count FROM conversations")
+            assert cursor.fetchone()['message_count'] == 0
+        assert conversation_db.pending_activity_count == 1
+    
+    def test_flush_activity_coalesces_per_thread(self, conversation_db):
+        """Test that several turns of a thread are written as one update."""
+        _, thread_id = conversation_db.save_conversation_metadata("Message")
+        
+        conversation_db.record_activity(thread_id, 2, "First reply")
+        conversation_db.record_activity(thread_id, 4, "Second reply")
+        conversation_db.record_activity(thread_id, 2, None)
+        
+        assert conversation_db.flush_activity() == 1
+        assert conversation_db.pending_activity_count == 0
+        
+        conversation = conversation_db.get_conversations_list()[0]
+        assert conversation['message_count'] == 8
+        assert conversation['last_message'] == "Second reply"
+    
+    def test_activity_moves_conversation_to_top(self, conversation_db):
+        """Test that the most recently active conversation is listed first."""
+        older_id, older_thread = conversation_db.save_conversation_metadata("Older")
+        conversation_db.save_conversation_metadata("Newer")
+        with conversation_db._cursor(transaction=True) as cursor:
+            cursor.execute("UPDATE conversations SET updated_at = '2020-01-01 00:00:00'")
+        
+        conversation_db.record_activity(older_thread, 2, "Reply")
+        
+        # Listing writes the buffered activity first
+        assert conversation_db.get_conversations_list()[0]['id'] == older_id
+    
+    def test_close_flushes_activity(self, conversation_db, temp_db_path):
+        """Test that buffered activity is written when the database is closed."""
+        _, thread_id = conversation_db.save_conversation_metadata("Message")
+        conversation_db.record_activity(thread_id, 2, "Reply")
+        
+        conversation_db.close()
+        
+        with sqlite3.connect(temp_db_path) as conn:
+            row = conn.execute("SELECT message_count, last_message FROM conversations").fetchone()
+        assert row == (2, "Reply")
+    
+    def test_activity_flushed_on_interval(self, conversation_db):
+        """Test that the background thread writes activity on every interval."""
+        conversation_db.activity_flush_interval = 0.01
+        _, thread_id = conversation_db.save_conversation_metadata("Message")
+        
+        conversation_db.record_activity(thread_id, 2, "Reply")
+        
+        deadline = time.monotonic() + 2
+        while conversation_db.pending_activity_count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert conversation_db.pending_activity_count == 0
+    
+    def test_activity_written_every_turn_without_interval(self, conversation_db):
+        """Test that an interval of 0 writes activity immediately."""
+        conversation_db.activity_flush_interval = 0
+        _, thread_id = conversation_db.save_conversation_metadata("Message")
+        
+        conversation_db.record_activity(thread_id, 2, "Reply")
+        
+        assert conversation_db.pending_activity_count == 0
+        assert conversation_db._flush_thread is None
+    
+    def test_adds_activity_columns_to_existing_database(self, temp_db_path, monkeypatch):
+        """Test that databases created before the activity columns are migrated."""
+        with sqlite3.connect(temp_db_path) as conn:
+            conn.execute('''
+                CREATE TABLE conversations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    thread_id TEXT UNIQUE,
+                    first_message TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute("INSERT INTO conversations (thread_id, first_message) VALUES ('t1', 'Old')")
+        conn.close()
+        monkeypatch.setattr("src.database.repository.settings.conversation_db_path", temp_db_path)
+        
+        with ConversationDB() as db:
+            conversation = db.get_conversations_list()[0]
+        
+        assert conversation['message_count'] == 0
+        assert conversation['last_message'] is None
+    
+    def test_search_conversations(self, conversation_db):
+        """Test that conversations are found by the words of their messages."""
+        conv_id, thread_id = conversation_db.save_conversation_metadata("Olá")
+        _, other_thread = conversation_db.save_conversation_metadata("Outra")
+        conversation_db.record_activity(thread_id, 2, "Reply", [
+            ("user", "Qual a taxa de câmbio do euro?"),
+            ("assistant", "A taxa de câmbio é 5,40."),
+        ])
+        conversation_db.record_activity(other_thread, 2, "Reply", [("user", "Capital da França")])
+        
+        # Buffered turns are written before searching; accents are ignored
+        results = conversation_db.search_conversations("cambio euro")
+        
+        assert [result['id'] for result in results] == [conv_id]
+        assert "«câmbio»" in results[0]['snippet']
+    
+    def test_search_conversations_matches_prefix_of_last_word(self, conversation_db):
+        """Test that the word being typed matches as a prefix."""
+        conv_id, thread_id = conversation_db.save_conversation_metadata("Olá")
+        conversation_db.replace_indexed_messages(thread_id, [("user", "Informações sobre o Brasil")])
+        
+        assert [r['id'] for r in conversation_db.search_conversations("bras")] == [conv_id]
+        assert conversation_db.search_conversations("bras ") == []
+    
+    def test_search_conversations_ignores_query_syntax(self, conversation_db):
+        """Test that FTS5 operators typed by the user do not raise."""
+        conversation_db.save_conversation_metadata("Olá")
+        
+        assert conversation_db.search_conversations('"NEAR(a* OR -') == []
+        assert conversation_db.search_conversations("   ") == []
+    
+    def test_search_conversations_one_result_per_conversation(self, conversation_db, monkeypatch):
+        """Test that conversations with many hits appear once, newest match first."""
+        monkeypatch.setattr("src.database.repository.SEARCH_BATCH_SIZE", 2)
+        old_id, old_thread = conversation_db.save_conversation_metadata("Old")
+        new_id, new_thread = conversation_db.save_conversation_metadata("New")
+        conversation_db.replace_indexed_messages(old_thread, [("user", "euro")])
+        conversation_db.replace_indexed_messages(new_thread, [("user", "euro")] * 5)
+        
+        results = conversation_db.search_conversations("euro")
+        
+        assert [result['id'] for result in results] == [new_id, old_id]
+    
+    def test_delete_conversation_removes_indexed_messages(self, conversation_db):
+        """Test that deleting a conversation removes it from the index."""
+        conv_id, thread_id = conversation_db.save_conversation_metadata("Olá")
+        conversation_db.replace_indexed_messages(thread_id, [("user", "euro")])
+        
+        conversation_db.delete_conversation(conv_id)
+        
+        assert conversation_db.search_conversations("euro") == []
+        with conversation_db._cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM conversation_messages_fts")
+            assert cursor.fetchone()[0] == 0
+    
+    def test_get_unindexed_thread_ids(self, conversation_db):
+        """Test that only conversations without indexed messages are returned."""
+        _, indexed = conversation_db.save_conversation_metadata("Indexed")
+        _, unindexed = conversation_db.save_conversation_metadata("Unindexed")
+        conversation_db.replace_indexed_messages(indexed, [("user", "euro")])
+        
+        assert conversation_db.get_unindexed_thread_ids() == [unindexed]
+    
+    def test_record_activity_updates_stats(self, conversation_db):
+        """Test that turns add up in the conversation statistics."""
+        _, thread_id = conversation_db.save_conversation_metadata("Message")
+        
+        conversation_db.record_activity(thread_id, 4, "Reply", usage={
+            'input_tokens': 100, 'output_tokens': 20, 'tool_calls': 1, 'llm_seconds': 1.5
+        })
+        conversation_db.record_activity(thread_id, 2, "Reply", usage={
+            'input_tokens': 150, 'output_tokens': 30, 'llm_seconds': 0.5
+        })
+        
+        assert conversation_db.get_conversation_stats(thread_id) == {
+            'turns': 2, 'messages': 6, 'input_tokens': 250, 'output_tokens': 50,
+            'tool_calls': 1, 'llm_seconds': 2.0,
+        }
+    
+    def test_stats_are_kept_per_day(self, conversation_db):
+        """Test that daily totals add up the conversations active each day."""
+        _, first = conversation_db.save_conversation_metadata("First")
+        _, second = conversation_db.save_conversation_metadata("Second")
+        with conversation_db._cursor(transaction=True) as cursor:
+            cursor.execute(
+                "INSERT INTO conversation_stats (thread_id, day, turns, input_tokens) "
+                "VALUES (?, '2024-01-01', 3, 500)", (first,)
+            )
+        conversation_db.record_activity(first, 2, usage={'input_tokens': 10})
+        conversation_db.record_activity(second, 2, usage={'input_tokens': 20})
+        
+        totals = conversation_db.get_daily_totals()
+        
+        assert [day['day'] for day in totals][0] == '2024-01-01'
+        assert totals[0]['input_tokens'] == 500
+        assert totals[-1]['conversations'] == 2
+        assert totals[-1]['input_tokens'] == 30
+        assert len(conversation_db.get_daily_totals(since=totals[-1]['day'])) == 1
+    
+    def test_get_top_conversations(self, conversation_db):
+        """Test that conversations are ranked by a counter, deleted ones included."""
+        small_id, small = conversation_db.save_conversation_metadata("Small")
+        big_id, big = conversation_db.save_conversation_metadata("Big")
+        conversation_db.record_activity(small, 2, usage={'input_tokens': 10, 'tool_calls': 5})
+        conversation_db.record_activity(big, 2, usage={'input_tokens': 900})
+        conversation_db.delete_conversation(big_id)
+        
+        by_tokens = conversation_db.get_top_conversations(limit=5)
+        by_tools = conversation_db.get_top_conversations(limit=1, by='tool_calls')
+        
+        assert [(row['thread_id'], row['first_message']) for row in by_tokens] == [
+            (big, None), (small, "Small")
+        ]
+        assert [row['thread_id'] for row in by_tools] == [small]
+        with pytest.raises(ValueError):
+            conversation_db.get_top_conversations(by='cost')
+    
+    def test_failed_flush_keeps_stats(self, conversation_db, monkeypatch):
+        """Test that a failed flush merges the buffered counters with newer ones."""
+        _, thread_id = conversation_db.save_conversation_metadata("Message")
+        conversation_db.record_activity(thread_id, 2, usage={'output_tokens': 5})
+        
+        def fail(pending):
+            conversation_db.record_activity(thread_id, 2, usage={'output_tokens': 7})
+            raise sqlite3.OperationalError("disk I/O error")
+        monkeypatch.setattr(conversation_db, "_write_activity", fail)
+        with pytest.raises(sqlite3.OperationalError):
+            conversation_db.flush_activity()
+        monkeypatch.undo()
+        
+        stats = conversation_db.get_conversation_stats(thread_id)
+        assert (stats['turns'], stats['messages'], stats['output_tokens']) == (2, 4, 12)
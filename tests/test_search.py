@@ -0,0 +1,66 @@
+"""
+Tests for the conversation search index helpers.
+"""
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import empty_checkpoint
+
+from src.database.search import backfill_search_index, searchable_messages
+
+
+def _save_messages(checkpointer, thread_id, messages):
+    """Stores a checkpoint holding the given messages."""
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": messages}
+    config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+    checkpointer.put(config, checkpoint, {}, {})
+
+
+class TestSearchableMessages:
+    """Test suite for searchable_messages function."""
+    
+    def test_keeps_user_and_assistant_text(self):
+        """Test that tool results and tool-call-only replies are skipped."""
+        messages = [
+            HumanMessage(content="Capital do Brasil?"),
+            AIMessage(content="", tool_calls=[{"name": "get_country_info", "args": {}, "id": "1"}]),
+            ToolMessage(content="get_country_info: Brasília", tool_call_id="1"),
+            AIMessage(content=[{"type": "text", "text": "Brasília."}]),
+        ]
+        
+        assert searchable_messages(messages) == [
+            ("user", "Capital do Brasil?"),
+            ("assistant", "Brasília."),
+        ]
+
+
+class TestBackfillSearchIndex:
+    """Test suite for backfill_search_index function."""
+    
+    def test_indexes_unindexed_conversations(self, conversation_db, checkpointer):
+        """Test that conversations are indexed from their latest checkpoint."""
+        conv_id, thread_id = conversation_db.save_conversation_metadata("Olá")
+        _, missing_thread = conversation_db.save_conversation_metadata("Sem checkpoint")
+        _save_messages(checkpointer, thread_id, [
+            HumanMessage(content="Qual o câmbio do euro?"),
+            AIMessage(content="5,40 reais."),
+        ])
+        
+        report = backfill_search_index(conversation_db, checkpointer)
+        
+        assert report == {"conversations_indexed": 1, "messages_indexed": 2}
+        assert [r["id"] for r in conversation_db.search_conversations("euro")] == [conv_id]
+    
+    def test_skips_indexed_conversations_unless_rebuilding(self, conversation_db, checkpointer):
+        """Test that messages indexed while chatting are kept by default."""
+        _, thread_id = conversation_db.save_conversation_metadata("Olá")
+        conversation_db.replace_indexed_messages(thread_id, [("user", "mensagem resumida")])
+        _save_messages(checkpointer, thread_id, [AIMessage(content="Resumo da conversa")])
+        
+        assert backfill_search_index(conversation_db, checkpointer)["conversations_indexed"] == 0
+        assert conversation_db.search_conversations("resumida")
+        
+        backfill_search_index(conversation_db, checkpointer, rebuild=True)
+        
+        assert conversation_db.search_conversations("resumida") == []
+        assert conversation_db.search_conversations("resumo")
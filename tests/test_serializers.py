@@ -0,0 +1,95 @@
+"""
+Tests for checkpoint serializers.
+"""
+import sqlite3
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from src.database.serializers import (
+    COMPRESSED_TYPE_SUFFIX,
+    FORMAT_VERSION,
+    CompressedSerializer,
+)
+
+
+@pytest.fixture
+def large_value():
+    """Creates a highly compressible value, like a long message history."""
+    return {"messages": [HumanMessage(content="Capital of Brazil? " * 50)] * 20}
+
+
+class TestCompressedSerializer:
+    """Test suite for CompressedSerializer class."""
+    
+    @pytest.mark.parametrize("codec", ["zlib", "zstd"])
+    def test_round_trip(self, codec, large_value):
+        """Test that compressed values are restored."""
+        serializer = CompressedSerializer(codec=codec)
+        
+        type_, payload = serializer.dumps_typed(large_value)
+        
+        assert type_.endswith(COMPRESSED_TYPE_SUFFIX)
+        assert payload[0] == FORMAT_VERSION
+        assert serializer.loads_typed((type_, payload)) == large_value
+    
+    def test_compresses_large_payloads(self, large_value):
+        """Test that compression reduces the payload size."""
+        _, plain = JsonPlusSerializer().dumps_typed(large_value)
+        
+        _, compressed = CompressedSerializer(codec="zlib").dumps_typed(large_value)
+        
+        assert len(compressed) < len(plain) / 5
+    
+    def test_small_payloads_are_not_compressed(self):
+        """Test that payloads below the threshold are stored as is."""
+        serializer = CompressedSerializer(codec="zlib", threshold=1024)
+        
+        type_, payload = serializer.dumps_typed({"messages": [AIMessage(content="Hi")]})
+        
+        assert not type_.endswith(COMPRESSED_TYPE_SUFFIX)
+    
+    def test_none_codec_does_not_compress(self, large_value):
+        """Test that the none codec stores plain payloads."""
+        type_, _ = CompressedSerializer(codec="none").dumps_typed(large_value)
+        
+        assert not type_.endswith(COMPRESSED_TYPE_SUFFIX)
+    
+    def test_reads_uncompressed_payloads(self, large_value):
+        """Test backward compatibility with payloads from before compression."""
+        plain = JsonPlusSerializer().dumps_typed(large_value)
+        
+        assert CompressedSerializer(codec="zlib").loads_typed(plain) == large_value
+    
+    def test_rejects_unknown_format_version(self, large_value):
+        """Test that payloads from a newer format are rejected."""
+        serializer = CompressedSerializer(codec="zlib")
+        type_, payload = serializer.dumps_typed(large_value)
+        
+        with pytest.raises(ValueError, match="format version"):
+            serializer.loads_typed((type_, bytes([99]) + payload[1:]))
+    
+    def test_rejects_unknown_codec(self):
+        """Test that unknown codecs raise ValueError."""
+        with pytest.raises(ValueError, match="Unknown compression codec"):
+            CompressedSerializer(codec="lz4")
+    
+    def test_works_with_checkpointer(self, temp_checkpoint_db_path, many_messages):
+        """Test that checkpoints are stored compressed and read back."""
+        conn = sqlite3.connect(str(temp_checkpoint_db_path), check_same_thread=False)
+        checkpointer = SqliteSaver(conn, serde=CompressedSerializer(codec="zlib"))
+        config = RunnableConfig(configurable={"thread_id": "t1", "checkpoint_ns": ""})
+        checkpoint = {
+            "id": "test_checkpoint_id",
+            "channel_values": {"messages": many_messages},
+            "channel_versions": {}
+        }
+        
+        checkpointer.put(config, checkpoint, {"source": "test"}, {})
+        
+        stored_type = conn.execute("SELECT type FROM checkpoints").fetchone()[0]
+        assert stored_type.endswith(COMPRESSED_TYPE_SUFFIX)
+        assert checkpointer.get(config)["channel_values"]["messages"] == many_messages
@@ -0,0 +1,192 @@
+"""
+Tests for sharded checkpoint storage.
+"""
+import threading
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.database.checkpointer import (
+    RetryingSqliteSaver,
+    create_checkpointer,
+    sqlite_savers,
+    unwrap_checkpointer,
+)
+from src.database.compaction import compact_checkpoints, purge_threads
+from src.database.connection import connect
+from src.database.sharding import (
+    ShardedCheckpointSaver,
+    find_shard_paths,
+    rebalance_shards,
+    shard_index,
+    shard_path,
+)
+
+THREAD_IDS = [f"thread-{i}" for i in range(20)]
+
+
+def _config(thread_id):
+    """Builds the config of a thread."""
+    return RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+
+
+def _put(saver, thread_id, checkpoint_id):
+    """Stores a checkpoint with one message."""
+    checkpoint = {
+        "id": checkpoint_id,
+        "channel_values": {"messages": [HumanMessage(content=thread_id)]},
+        "channel_versions": {}
+    }
+    saved_config = saver.put(_config(thread_id), checkpoint, {"source": "test"}, {})
+    saver.put_writes(saved_config, [("messages", "pending")], "task")
+
+
+def _open_shards(db_path, count):
+    """Opens a sharded saver over the given number of files."""
+    return ShardedCheckpointSaver([
+        RetryingSqliteSaver(connect(shard_path(db_path, index), check_same_thread=False))
+        for index in range(count)
+    ])
+
+
+def _close(checkpointer):
+    """Closes every connection of a saver."""
+    for sqlite_saver in sqlite_savers(checkpointer):
+        sqlite_saver.conn.close()
+
+
+@pytest.fixture
+def sharded(temp_checkpoint_db_path):
+    """Creates a saver with four shards in the temporary directory."""
+    checkpointer = _open_shards(temp_checkpoint_db_path, 4)
+    yield checkpointer
+    _close(checkpointer)
+
+
+class TestShardRouting:
+    """Test suite for shard_index and shard_path functions."""
+    
+    def test_index_is_stable_and_in_range(self):
+        """Test that a thread always maps to the same valid shard."""
+        for thread_id in THREAD_IDS:
+            index = shard_index(thread_id, 4)
+            assert 0 <= index < 4
+            assert shard_index(thread_id, 4) == index
+    
+    def test_threads_spread_over_shards(self):
+        """Test that threads are distributed over all shards."""
+        assert {shard_index(thread_id, 4) for thread_id in THREAD_IDS} == {0, 1, 2, 3}
+    
+    def test_shard_zero_is_original_file(self, temp_checkpoint_db_path):
+        """Test that shard 0 keeps the existing database file."""
+        assert shard_path(temp_checkpoint_db_path, 0) == temp_checkpoint_db_path
+        assert shard_path(temp_checkpoint_db_path, 2).name.endswith(".shard2.db")
+
+
+class TestShardedCheckpointSaver:
+    """Test suite for ShardedCheckpointSaver class."""
+    
+    def test_routes_threads_to_their_shard(self, sharded):
+        """Test that each thread is stored only in its own shard."""
+        for thread_id in THREAD_IDS:
+            _put(sharded, thread_id, "00001")
+        
+        for thread_id in THREAD_IDS:
+            owner = shard_index(thread_id, 4)
+            for index, shard in enumerate(sharded.shards):
+                stored = shard.get_tuple(_config(thread_id))
+                assert (stored is not None) == (index == owner)
+            assert sharded.get_tuple(_config(thread_id)).pending_writes
+    
+    def test_lists_across_shards(self, sharded):
+        """Test that listing without a thread merges every shard, newest first."""
+        for step, thread_id in enumerate(THREAD_IDS):
+            _put(sharded, thread_id, f"{step:05d}")
+        
+        listed = [t.checkpoint["id"] for t in sharded.list(None)]
+        
+        assert listed == [f"{step:05d}" for step in reversed(range(len(THREAD_IDS)))]
+        assert len(list(sharded.list(None, limit=5))) == 5
+        assert len(list(sharded.list(_config(THREAD_IDS[0])))) == 1
+    
+    def test_delete_thread(self, sharded):
+        """Test that deleting a thread removes it from its shard."""
+        _put(sharded, "t1", "00001")
+        
+        sharded.delete_thread("t1")
+        
+        assert sharded.get_tuple(_config("t1")) is None
+    
+    def test_concurrent_sessions(self, sharded):
+        """Test that concurrent sessions on different shards store every checkpoint."""
+        def _session(thread_id):
+            for step in range(10):
+                _put(sharded, thread_id, f"{step:05d}")
+        
+        threads = [threading.Thread(target=_session, args=(t,)) for t in THREAD_IDS]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(list(sharded.list(None))) == 10 * len(THREAD_IDS)
+    
+    def test_maintenance_covers_all_shards(self, sharded):
+        """Test that compaction and purge run on every shard file."""
+        for thread_id in THREAD_IDS:
+            _put(sharded, thread_id, "00001")
+            _put(sharded, thread_id, "00002")
+        
+        report = compact_checkpoints(sharded, keep_last=1)
+        purge_threads(sharded, THREAD_IDS[:5])
+        
+        assert report["checkpoints_deleted"] == len(THREAD_IDS)
+        assert len(list(sharded.list(None))) == len(THREAD_IDS) - 5
+
+
+class TestCreateCheckpointer:
+    """Test suite for sharding in create_checkpointer."""
+    
+    def test_creates_sharded_saver(self, temp_checkpoint_db_path, monkeypatch):
+        """Test that CHECKPOINT_SHARDS > 1 spreads threads over several files."""
+        monkeypatch.setattr("src.database.checkpointer.settings.checkpoint_shards", 3)
+        monkeypatch.setattr("src.database.checkpointer.settings.checkpoint_cache_bytes", 0)
+        
+        checkpointer = create_checkpointer(temp_checkpoint_db_path)
+        
+        assert isinstance(checkpointer, ShardedCheckpointSaver)
+        assert len(sqlite_savers(checkpointer)) == 3
+        with pytest.raises(TypeError):
+            unwrap_checkpointer(checkpointer)
+        _close(checkpointer)
+
+
+class TestRebalanceShards:
+    """Test suite for rebalance_shards function."""
+    
+    def test_grow_and_shrink(self, temp_checkpoint_db_path):
+        """Test that threads move to their new shard and stay readable."""
+        single = _open_shards(temp_checkpoint_db_path, 1)
+        for thread_id in THREAD_IDS:
+            _put(single, thread_id, "00001")
+        _close(single)
+        
+        report = rebalance_shards(temp_checkpoint_db_path, 4)
+        
+        expected_moves = sum(1 for t in THREAD_IDS if shard_index(t, 4) != 0)
+        assert report == {"threads_moved": expected_moves, "shards_before": 1, "shards_after": 4}
+        sharded = _open_shards(temp_checkpoint_db_path, 4)
+        for thread_id in THREAD_IDS:
+            stored = sharded.shards[shard_index(thread_id, 4)].get_tuple(_config(thread_id))
+            assert stored.checkpoint["channel_values"]["messages"][0].content == thread_id
+            assert stored.pending_writes
+        _close(sharded)
+        
+        report = rebalance_shards(temp_checkpoint_db_path, 1)
+        
+        assert report["threads_moved"] == expected_moves
+        assert list(find_shard_paths(temp_checkpoint_db_path)) == [0]
+        single = _open_shards(temp_checkpoint_db_path, 1)
+        assert len(list(single.list(None))) == len(THREAD_IDS)
+        _close(single)
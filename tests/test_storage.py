@@ -0,0 +1,184 @@
+"""
+Tests for the unified storage layout.
+"""
+import sqlite3
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.core.config import Settings
+from src.database.checkpointer import RetryingSqliteSaver, create_checkpointer, unwrap_checkpointer
+from src.database.compaction import AUTO_VACUUM_INCREMENTAL, compact_checkpoints, vacuum
+from src.database.connection import close_shared_connections, connect
+from src.database.repository import ConversationDB
+from src.database.sharding import shard_path
+from src.database.storage import commit_turn, migrate_to_unified
+from src.database.write_behind import WriteBehindCheckpointSaver
+
+
+def _config(thread_id):
+    """Builds the config of a thread."""
+    return RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+
+
+def _put(saver, thread_id, checkpoint_id):
+    """Stores a checkpoint with one message."""
+    checkpoint = {
+        "id": checkpoint_id,
+        "channel_values": {"messages": [HumanMessage(content=thread_id)]},
+        "channel_versions": {}
+    }
+    saver.put(_config(thread_id), checkpoint, {"source": "test"}, {})
+
+
+def _count_checkpoints(connection):
+    """Counts the stored checkpoints."""
+    return connection.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+
+
+@pytest.fixture
+def unified_settings(temp_db_path, temp_checkpoint_db_path, monkeypatch):
+    """Settings of the unified layout, applied to the database modules."""
+    test_settings = Settings(
+        openai_api_key="test-api-key",
+        conversation_db_path=temp_db_path,
+        checkpoint_db_path=temp_checkpoint_db_path,
+        checkpoint_cache_bytes=0,
+        storage_layout="UNIFIED"
+    )
+    monkeypatch.setattr("src.database.repository.settings", test_settings)
+    monkeypatch.setattr("src.database.checkpointer.settings", test_settings)
+    yield test_settings
+    close_shared_connections()
+
+
+@pytest.fixture
+def unified_storage(unified_settings):
+    """Creates a ConversationDB and a checkpointer sharing one connection."""
+    db = ConversationDB(activity_flush_interval=3600)
+    checkpointer = create_checkpointer(unified_settings.checkpoint_db_path)
+    yield db, checkpointer
+    checkpointer.close()
+    db.close()
+
+
+class TestUnifiedLayout:
+    """Test suite for the unified storage layout."""
+    
+    def test_checkpointer_shares_connection(self, unified_storage):
+        """Test that checkpoints are stored on the ConversationDB connection."""
+        db, checkpointer = unified_storage
+        
+        assert isinstance(checkpointer, WriteBehindCheckpointSaver)
+        assert unwrap_checkpointer(checkpointer).conn is db.connection
+    
+    def test_commit_turn_uses_one_transaction(self, unified_storage):
+        """Test that the checkpoints and activity of a turn are committed together."""
+        db, checkpointer = unified_storage
+        _, thread_id = db.save_conversation_metadata("Olá")
+        _put(checkpointer, thread_id, "00001")
+        _put(checkpointer, thread_id, "00002")
+        db.record_activity(thread_id, 2, "Oi!", [("user", "Olá")])
+        
+        statements = []
+        db.connection.set_trace_callback(statements.append)
+        commit_turn(db, checkpointer)
+        db.connection.set_trace_callback(None)
+        
+        assert statements.count("COMMIT") == 1
+        assert checkpointer.pending_count == 0
+        assert db.pending_activity_count == 0
+        assert _count_checkpoints(db.connection) == 2
+        assert checkpointer.get(_config(thread_id))["id"] == "00002"
+        assert db.get_conversations_list()[0]["last_message"] == "Oi!"
+    
+    def test_failed_commit_keeps_turn_buffered(self, unified_storage, monkeypatch):
+        """Test that a failed commit writes nothing and keeps both buffers."""
+        db, checkpointer = unified_storage
+        _, thread_id = db.save_conversation_metadata("Olá")
+        _put(checkpointer, thread_id, "00001")
+        db.record_activity(thread_id, 2, "Oi!")
+        
+        def fail(cursor, pending):
+            raise sqlite3.OperationalError("disk I/O error")
+        monkeypatch.setattr(db, "write_activity", fail)
+        with pytest.raises(sqlite3.OperationalError):
+            commit_turn(db, checkpointer)
+        
+        assert _count_checkpoints(db.connection) == 0
+        assert checkpointer.pending_count == 1
+        assert db.pending_activity_count == 1
+        
+        monkeypatch.undo()
+        commit_turn(db, checkpointer)
+        
+        assert _count_checkpoints(db.connection) == 1
+        assert db.get_conversations_list()[0]["message_count"] == 2
+    
+    def test_compaction_vacuums_shared_database(self, unified_storage):
+        """Test that compaction reclaims space of the shared file and leaves the connection usable."""
+        db, checkpointer = unified_storage
+        _, thread_id = db.save_conversation_metadata("Olá")
+        for step in range(5):
+            _put(checkpointer, thread_id, f"{step:05d}")
+        
+        report = compact_checkpoints(checkpointer)
+        
+        assert report["checkpoints_deleted"] == 4
+        assert db.connection.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL
+        assert checkpointer.get(_config(thread_id))["id"] == "00004"
+        db.record_activity(thread_id, 2, "Oi!")
+        commit_turn(db, checkpointer)
+        assert db.get_conversations_list()[0]["last_message"] == "Oi!"
+    
+    def test_vacuum_refuses_inside_transaction(self, unified_storage):
+        """Test that vacuum does not run inside a transaction open on the shared connection."""
+        db, checkpointer = unified_storage
+        # Already incremental, where the pages would be released in the caller's transaction
+        vacuum(checkpointer)
+        
+        with pytest.raises(sqlite3.OperationalError, match="transaction"):
+            with db.transaction() as cursor:
+                cursor.execute("INSERT INTO conversations (first_message) VALUES ('Olá')")
+                vacuum(checkpointer)
+        
+        assert db.get_conversations_list() == []
+    
+    def test_separate_layout_only_flushes_checkpoints(self, conversation_db, checkpointer):
+        """Test that with two files the activity keeps its own interval."""
+        write_behind = WriteBehindCheckpointSaver(checkpointer, interval=0)
+        _, thread_id = conversation_db.save_conversation_metadata("Olá")
+        _put(write_behind, thread_id, "00001")
+        conversation_db.activity_flush_interval = 3600
+        conversation_db.record_activity(thread_id, 2)
+        
+        commit_turn(conversation_db, write_behind)
+        
+        assert write_behind.pending_count == 0
+        assert conversation_db.pending_activity_count == 1
+        write_behind.close()
+
+
+class TestMigrateToUnified:
+    """Test suite for migrate_to_unified function."""
+    
+    def test_copies_every_shard(self, unified_settings):
+        """Test that threads of every checkpoint file become readable in the unified layout."""
+        for index, thread_id in enumerate(["t1", "t2"]):
+            saver = RetryingSqliteSaver(connect(
+                shard_path(unified_settings.checkpoint_db_path, index), check_same_thread=False
+            ))
+            _put(saver, thread_id, "00001")
+            saver.conn.close()
+        
+        report = migrate_to_unified(
+            unified_settings.conversation_db_path, unified_settings.checkpoint_db_path
+        )
+        
+        assert report == {"threads_copied": 2, "files_read": 2}
+        checkpointer = create_checkpointer(unified_settings.checkpoint_db_path)
+        for thread_id in ["t1", "t2"]:
+            checkpoint = checkpointer.get(_config(thread_id))
+            assert checkpoint["channel_values"]["messages"][0].content == thread_id
+        checkpointer.close()
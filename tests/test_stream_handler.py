@@ -1,10 +1,12 @@
 """
 Tests for stream handler.
 """
+import time
 from unittest.mock import MagicMock, Mock
+from uuid import uuid4
 
 import pytest
-from langchain_core.messages import AIMessageChunk, HumanMessage, ToolMessage
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
 
 from src.ui.stream_handler import (
@@ -67,6 +69,56 @@ class TestProcessAgentStream:
         
         # Should not raise
         process_agent_stream(mock_agent, user_message, thread_id)
+    
+    def test_process_agent_stream_returns_turn_activity(self):
+        """Test that the turn's message count and last reply are returned."""
+        mock_agent = MagicMock()
+        tool_call = AIMessage(content="", tool_calls=[
+            {"name": "get_country_info", "args": {}, "id": "call_1"}
+        ])
+        tool_message = ToolMessage(content="get_country_info: result", tool_call_id="call_1")
+        mock_agent.stream.return_value = [
+            ("updates", {"model": {"messages": [tool_call]}}),
+            ("updates", {"tools": {"messages": [tool_message]}}),
+            ("updates", {"SummarizationMiddleware.before_model": None}),
+            ("updates", {"model": {"messages": [AIMessage(
+                content="Final answer",
+                usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}
+            )]}}),
+        ]
+        
+        turn = process_agent_stream(mock_agent, HumanMessage(content="Test"), "test_thread")
+        
+        # User message, tool call, tool result and final answer
+        assert turn['messages_added'] == 4
+        assert turn['messages'][0].content == "Test"
+        assert turn['messages'][-1].content == "Final answer"
+        assert turn['last_message'] == "Final answer"
+        assert turn['usage']['input_tokens'] == 120
+        assert turn['usage']['output_tokens'] == 30
+        assert turn['usage']['tool_calls'] == 1
+        assert turn['usage']['llm_seconds'] >= 0
+    
+    def test_llm_seconds_counts_only_model_calls(self):
+        """Test that model time comes from the model call callbacks, not the time between updates."""
+        def stream(inputs, stream_mode, config):
+            handlers = config["callbacks"]
+            run_id = uuid4()
+            for handler in handlers:
+                handler.on_chat_model_start({}, [], run_id=run_id)
+            time.sleep(0.05)
+            for handler in handlers:
+                handler.on_llm_end(None, run_id=run_id)
+            # Checkpoint writes and other node work between updates
+            time.sleep(0.2)
+            yield ("updates", {"model": {"messages": [AIMessage(content="Final answer")]}})
+        
+        mock_agent = MagicMock()
+        mock_agent.stream.side_effect = stream
+        
+        turn = process_agent_stream(mock_agent, HumanMessage(content="Test"), "test_thread")
+        
+        assert 0.05 <= turn['usage']['llm_seconds'] < 0.2
 
 
 class TestProcessUpdatesChunk:
@@ -124,6 +176,14 @@ class TestProcessMessagesChunk:
         
         second = _process_messages_chunk(chunk2, False)
         assert second is False
+    
+    def test_process_messages_chunk_writes_to_renderer(self):
+        """Test that message text goes through the renderer."""
+        renderer = MagicMock()
+        
+        _process_messages_chunk([AIMessageChunk(content="Hello")], True, renderer)
+        
+        assert [call.args[0] for call in renderer.write.call_args_list] == ["\n", "Hello"]
 
 
 class TestHandleToolMessage:
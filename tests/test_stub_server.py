@@ -0,0 +1,58 @@
+"""
+Tests for the local stand-in of the external APIs.
+"""
+from unittest.mock import patch
+
+import pytest
+
+from src.api.clients.countries import get_country_info
+from src.api.clients.exchange import get_exchange_rate
+from src.api.stub_server import StubApiServer
+
+
+@pytest.fixture
+def stub_server():
+    """Starts a stub server on a free port and points the API clients to it."""
+    server = StubApiServer()
+    server.start()
+    with patch('src.api.clients.countries.settings') as countries_settings, \
+            patch('src.api.clients.exchange.settings') as exchange_settings:
+        countries_settings.countries_api_url = server.url
+        exchange_settings.exchange_api_url = server.url
+        yield server
+    server.stop()
+
+
+class TestStubApiServer:
+    """Test suite for StubApiServer."""
+    
+    def test_serves_countries_and_rates_to_the_clients(self, stub_server):
+        """Test that the clients parse the stub responses like the real APIs."""
+        country = get_country_info("brazil")
+        rate = get_exchange_rate("EUR", "USD")
+        
+        assert country['success'] is True
+        assert country['capital'] == "Brasília"
+        assert country['currency'] == "BRL"
+        assert rate['success'] is True
+        assert rate['rate'] == pytest.approx(1 / 0.91, rel=1e-4)
+    
+    def test_unknown_country_and_currency_are_not_found(self, stub_server):
+        """Test that unknown names answer 404 like the real APIs."""
+        assert get_country_info("Atlantis")['error'] == "Error in API: 404"
+        assert get_exchange_rate("XYZ", "USD")['error'] == "Error in API: 404"
+    
+    def test_injects_errors_at_the_given_rate(self):
+        """Test that errors are injected deterministically for a seed."""
+        always = StubApiServer(error_rate=1.0)
+        sometimes = [StubApiServer(error_rate=0.5, seed=7) for _ in range(2)]
+        
+        assert always.respond("/v4/latest/USD")[0] == 503
+        statuses = [[server.respond("/v4/latest/USD")[0] for _ in range(20)] for server in sometimes]
+        assert statuses[0] == statuses[1]
+        assert set(statuses[0]) == {200, 503}
+    
+    def test_rejects_invalid_error_rate(self):
+        """Test that an error rate outside 0.0 to 1.0 is rejected."""
+        with pytest.raises(ValueError, match="error_rate"):
+            StubApiServer(error_rate=1.5)
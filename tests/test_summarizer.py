@@ -7,7 +7,12 @@ import pytest
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables import RunnableConfig
 
-from src.core.summarizer import MAX_MESSAGES_BEFORE_SUMMARIZE, summarize_conversation
+from src.core.summarizer import (
+    MAX_MESSAGES_BEFORE_SUMMARIZE,
+    create_pinned_fact,
+    get_message_count,
+    summarize_conversation,
+)
 
 
 class TestSummarizeConversation:
@@ -58,6 +63,42 @@ class TestSummarizeConversation:
         assert isinstance(messages[0], AIMessage)
         assert "Resume of previous conversation" in messages[0].content
     
+    def test_summarization_keeps_pinned_facts(self, checkpointer, mock_llm, many_messages):
+        """Test that pinned facts survive summarization after the summary and are not summarized."""
+        thread_id = "test_thread"
+        config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+        pinned = create_pinned_fact("My name is Ana")
+        checkpoint = {
+            "id": "test_checkpoint_id",
+            "channel_values": {"messages": [pinned] + many_messages},
+            "channel_versions": {}
+        }
+        checkpointer.put(config, checkpoint, {"source": "test"}, {})
+        
+        result = summarize_conversation(checkpointer, thread_id, mock_llm)
+        
+        assert result is True
+        assert "My name is Ana" not in mock_llm.invoke.call_args.args[0]
+        messages = checkpointer.get(config)["channel_values"]["messages"]
+        assert len(messages) == 2
+        assert messages[1].content == "My name is Ana"
+        assert messages[1].additional_kwargs == {"pinned": True}
+    
+    def test_pinned_facts_do_not_count_toward_limit(self, checkpointer, mock_llm):
+        """Test that pinned facts alone never trigger a summarization."""
+        thread_id = "test_thread"
+        config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+        messages = [create_pinned_fact(f"Fact {i}") for i in range(MAX_MESSAGES_BEFORE_SUMMARIZE + 1)]
+        checkpoint = {
+            "id": "test_checkpoint_id",
+            "channel_values": {"messages": messages},
+            "channel_versions": {}
+        }
+        checkpointer.put(config, checkpoint, {"source": "test"}, {})
+        
+        assert summarize_conversation(checkpointer, thread_id, mock_llm) is False
+        assert get_message_count(checkpointer, thread_id) == 0
+    
     def test_summarization_at_limit(self, checkpointer, mock_llm):
         """Test that summarization doesn't occur exactly at limit (100 messages)."""
         thread_id = "test_thread"
@@ -128,3 +169,41 @@ class TestSummarizeConversation:
         
         assert result is False
 
+    
+    def test_summarization_quiet_mode(self, checkpointer, mock_llm, many_messages):
+        """Test that nothing is printed when verbose is False."""
+        thread_id = "test_thread"
+        config = RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+        
+        checkpoint = {
+            "id": "test_checkpoint_id",
+            "channel_values": {"messages": many_messages},
+            "channel_versions": {}
+        }
+        checkpointer.put(config, checkpoint, {"source": "test"}, {})
+        
+        with patch('builtins.print') as mock_print:
+            result = summarize_conversation(checkpointer, thread_id, mock_llm, verbose=False)
+        
+        assert result is True
+        mock_print.assert_not_called()
+
+
+class TestGetMessageCount:
+    """Test suite for get_message_count function."""
+    
+    def test_counts_messages(self, checkpointer, sample_messages):
+        """Test that messages in the latest checkpoint are counted."""
+        config = RunnableConfig(configurable={"thread_id": "test_thread", "checkpoint_ns": ""})
+        checkpoint = {
+            "id": "test_checkpoint_id",
+            "channel_values": {"messages": sample_messages},
+            "channel_versions": {}
+        }
+        checkpointer.put(config, checkpoint, {"source": "test"}, {})
+        
+        assert get_message_count(checkpointer, "test_thread") == len(sample_messages)
+    
+    def test_missing_thread_has_no_messages(self, checkpointer):
+        """Test that a thread without checkpoint has 0 messages."""
+        assert get_message_count(checkpointer, "non_existent_thread") == 0
@@ -0,0 +1,196 @@
+"""
+Tests for the per-turn timings.
+"""
+import json
+import sqlite3
+import threading
+import time
+from contextvars import copy_context
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.api.clients.countries import get_country_info
+from src.core.timings import (
+    TimingsCallbackHandler,
+    TurnTimings,
+    collect_timings,
+    format_timings,
+    timed,
+    write_timings,
+)
+from src.database.checkpointer import RetryingSqliteSaver
+
+
+def _config(thread_id):
+    """Builds the config of a thread."""
+    return RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+
+
+class TestTurnTimings:
+    """Test suite for TurnTimings."""
+    
+    def test_totals_per_category(self):
+        """Test that spans are added up per category."""
+        timings = TurnTimings("t1")
+        timings.add('tool', 0.25, 'get_country_info')
+        timings.add('tool', 0.5, 'get_exchange_rate')
+        timings.add('model', 1.0, 'gpt-4o-mini')
+        
+        assert timings.totals() == {
+            'tool': {'seconds': 0.75, 'count': 2},
+            'model': {'seconds': 1.0, 'count': 1},
+        }
+    
+    def test_first_token_marked_once(self):
+        """Test that only the first token sets the time to first token."""
+        timings = TurnTimings()
+        timings.mark_first_token()
+        first = timings.first_token_seconds
+        time.sleep(0.01)
+        timings.mark_first_token()
+        
+        assert timings.first_token_seconds == first
+
+
+class TestTimed:
+    """Test suite for collect_timings and timed."""
+    
+    def test_records_into_current_timings(self):
+        """Test that timed blocks and decorated functions are recorded."""
+        @timed('checkpoint_read')
+        def read():
+            return "checkpoint"
+        
+        with collect_timings("t1") as timings:
+            with timed('http', 'restcountries.com'):
+                pass
+            assert read() == "checkpoint"
+        
+        assert [(span['category'], span['name']) for span in timings.spans] == [
+            ('http', 'restcountries.com'),
+            ('checkpoint_read', None),
+        ]
+        assert timings.total_seconds is not None
+    
+    def test_does_nothing_outside_a_turn(self):
+        """Test that timed blocks outside collect_timings are not recorded anywhere."""
+        with collect_timings() as timings:
+            pass
+        
+        with timed('commit'):
+            pass
+        
+        assert timings.spans == []
+    
+    def test_follows_the_turn_into_threads(self):
+        """Test that work run in another thread with the turn's context is recorded."""
+        with collect_timings() as timings:
+            thread = threading.Thread(
+                target=copy_context().run, args=(self._timed_block,)
+            )
+            thread.start()
+            thread.join()
+        
+        assert timings.totals()['checkpoint_write']['count'] == 1
+    
+    @staticmethod
+    def _timed_block():
+        with timed('checkpoint_write'):
+            pass
+
+
+class TestTimingsCallbackHandler:
+    """Test suite for TimingsCallbackHandler."""
+    
+    def test_times_model_and_tool_calls(self):
+        """Test that model calls, the first token and tool calls are recorded."""
+        timings = TurnTimings()
+        handler = TimingsCallbackHandler(timings)
+        model_run, tool_run = uuid4(), uuid4()
+        
+        handler.on_chat_model_start(
+            {}, [[]], run_id=model_run, invocation_params={'model_name': 'gpt-4o-mini'}
+        )
+        handler.on_llm_new_token("", run_id=model_run)
+        assert timings.first_token_seconds is None
+        handler.on_llm_new_token("Olá", run_id=model_run)
+        handler.on_llm_end(Mock(), run_id=model_run)
+        
+        handler.on_tool_start({'name': 'get_country_info'}, "Brazil", run_id=tool_run)
+        handler.on_tool_error(RuntimeError("timeout"), run_id=tool_run)
+        
+        assert timings.first_token_seconds is not None
+        assert [(span['category'], span['name']) for span in timings.spans] == [
+            ('model', 'gpt-4o-mini'),
+            ('tool', 'get_country_info'),
+        ]
+
+
+class TestInstrumentation:
+    """Test suite for the timed operations outside the agent run."""
+    
+    @patch('src.api.clients.countries.requests.get')
+    def test_http_calls_are_timed(self, mock_get):
+        """Test that the HTTP time of a tool call is recorded with its host."""
+        mock_get.return_value = Mock(status_code=404)
+        
+        with collect_timings() as timings:
+            get_country_info("Atlantis")
+        
+        assert timings.spans[0]['category'] == 'http'
+        assert timings.spans[0]['name'] == 'restcountries.com'
+    
+    def test_checkpoint_reads_and_writes_are_timed(self, temp_checkpoint_db_path):
+        """Test that the checkpoint saver records its reads and writes."""
+        saver = RetryingSqliteSaver(sqlite3.connect(str(temp_checkpoint_db_path)))
+        checkpoint = {
+            "id": "1",
+            "channel_values": {"messages": [HumanMessage(content="hello")]},
+            "channel_versions": {}
+        }
+        
+        with collect_timings() as timings:
+            config = saver.put(_config("t1"), checkpoint, {}, {})
+            saver.put_writes(config, [("messages", "pending")], "task")
+            saver.get_tuple(_config("t1"))
+        saver.conn.close()
+        
+        totals = timings.totals()
+        assert totals['checkpoint_write']['count'] == 2
+        assert totals['checkpoint_read']['count'] == 1
+
+
+class TestReporting:
+    """Test suite for format_timings and write_timings."""
+    
+    def test_format_timings(self):
+        """Test that the breakdown lists the recorded categories."""
+        timings = TurnTimings()
+        timings.add('model', 1.5)
+        timings.add('commit', 0.004)
+        timings.finish()
+        
+        text = format_timings(timings)
+        
+        assert text.startswith("⏱️ Turno:")
+        assert "primeiro token: -" in text
+        assert "modelo: 1.500s (1x)" in text
+        assert "commit: 0.004s (1x)" in text
+        assert "ferramentas" not in text
+    
+    def test_write_timings_appends_json_lines(self, tmp_path):
+        """Test that each turn is appended as one JSON line."""
+        log_path = tmp_path / "logs" / "timings.jsonl"
+        for thread_id in ("t1", "t2"):
+            with collect_timings(thread_id) as timings:
+                timings.add('tool', 0.1, 'get_exchange_rate')
+            write_timings(log_path, timings)
+        
+        records = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+        
+        assert [record['thread_id'] for record in records] == ["t1", "t2"]
+        assert records[0]['totals']['tool'] == {'seconds': 0.1, 'count': 1}
+        assert records[0]['spans'][0]['name'] == 'get_exchange_rate'
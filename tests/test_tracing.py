@@ -0,0 +1,224 @@
+"""
+Tests for tracing spans and their exporters.
+"""
+import json
+import sqlite3
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.runnables import RunnableConfig
+
+from src.core.tracing import (
+    NON_RECORDING_SPAN,
+    OtlpJsonFileExporter,
+    SpanCollector,
+    SpanExporter,
+    TracingCallbackHandler,
+    current_span,
+    span,
+    start_trace,
+    traced,
+)
+from src.database.checkpoint_cache import CachingCheckpointSaver
+from src.database.checkpointer import RetryingSqliteSaver
+
+
+def _config(thread_id):
+    """Builds the config of a thread."""
+    return RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+
+
+def _parent_names(collector):
+    """Maps each collected span name to the name of its parent."""
+    by_id = {collected.span_id: collected for collected in collector.spans}
+    return {
+        collected.name: by_id[collected.parent_id].name if collected.parent_id else None
+        for collected in collector.spans
+    }
+
+
+class TestSpans:
+    """Test suite for start_trace, span and traced."""
+    
+    def test_nested_spans_are_exported_with_the_trace(self):
+        """Test that spans nest under the current span and are exported when the trace ends."""
+        collector = SpanCollector()
+        
+        with start_trace("turn", collector, {'thread_id': "t1"}) as root:
+            with span("agent.run"):
+                with span("GET", {'server.address': "restcountries.com"}, kind='client'):
+                    pass
+            assert collector.spans == []
+        
+        assert _parent_names(collector) == {"turn": None, "agent.run": "turn", "GET": "agent.run"}
+        assert {collected.trace.trace_id for collected in collector.spans} == {root.trace.trace_id}
+        assert root.attributes == {'thread_id': "t1"}
+    
+    def test_does_nothing_outside_a_trace(self):
+        """Test that spans outside a trace are not recorded."""
+        @traced("work")
+        def work():
+            return current_span()
+        
+        with span("orphan") as orphan:
+            assert orphan is NON_RECORDING_SPAN
+        assert work() is NON_RECORDING_SPAN
+    
+    def test_traced_records_arguments(self):
+        """Test that traced records the named arguments as attributes."""
+        @traced("ConversationDB.record_activity", "thread_id")
+        def record_activity(thread_id, messages_added):
+            return messages_added
+        
+        collector = SpanCollector()
+        with start_trace("turn", collector):
+            assert record_activity("t1", messages_added=2) == 2
+        
+        assert collector.find("ConversationDB.record_activity")[0].attributes == {'thread_id': "t1"}
+    
+    def test_errors_mark_the_span(self):
+        """Test that an exception leaving a span sets its error status."""
+        collector = SpanCollector()
+        
+        with pytest.raises(RuntimeError):
+            with start_trace("turn", collector):
+                with span("tool.get_country_info"):
+                    raise RuntimeError("timeout")
+        
+        failed = collector.find("tool.get_country_info")[0]
+        assert failed.to_otlp()['status'] == {'code': 2, 'message': "RuntimeError: timeout"}
+        assert collector.find("turn")[0].status_code == 2
+
+
+class TestOtlpJsonFileExporter:
+    """Test suite for OtlpJsonFileExporter."""
+    
+    def test_appends_one_request_per_trace(self, tmp_path):
+        """Test that each trace is written as an OTLP JSON request line."""
+        exporter = OtlpJsonFileExporter(tmp_path / "traces" / "traces.jsonl")
+        for thread_id in ("t1", "t2"):
+            with start_trace("turn", exporter, {'thread_id': thread_id}):
+                with span("model.call", {'gen_ai.usage.input_tokens': 12, 'cache.hit': False}):
+                    pass
+        
+        requests = [json.loads(line) for line in exporter.path.read_text(encoding="utf-8").splitlines()]
+        
+        assert len(requests) == 2
+        scope_spans = requests[0]['resourceSpans'][0]['scopeSpans'][0]
+        child, root = scope_spans['spans']
+        assert len(root['traceId']) == 32 and len(root['spanId']) == 16
+        assert 'parentSpanId' not in root
+        assert child['parentSpanId'] == root['spanId']
+        assert int(child['endTimeUnixNano']) >= int(child['startTimeUnixNano'])
+        assert child['attributes'] == [
+            {'key': 'gen_ai.usage.input_tokens', 'value': {'intValue': "12"}},
+            {'key': 'cache.hit', 'value': {'boolValue': False}},
+        ]
+
+    
+    def test_exporter_must_implement_export(self):
+        """Test that an exporter without export() cannot be created."""
+        class IncompleteExporter(SpanExporter):
+            pass
+        
+        with pytest.raises(TypeError, match="export"):
+            IncompleteExporter()
+
+
+class TestTracingCallbackHandler:
+    """Test suite for TracingCallbackHandler."""
+    
+    def test_agent_model_and_tool_spans(self):
+        """Test that the agent run, model and tool calls nest, with work inside a tool under it."""
+        collector = SpanCollector()
+        handler = TracingCallbackHandler()
+        agent_run, model_run, tool_run = uuid4(), uuid4(), uuid4()
+        response = LLMResult(generations=[[ChatGeneration(message=AIMessage(
+            content="", usage_metadata={'input_tokens': 30, 'output_tokens': 5, 'total_tokens': 35}
+        ))]])
+        
+        with start_trace("turn", collector) as root:
+            handler.on_chain_start({}, {}, run_id=agent_run, metadata={'thread_id': "t1"})
+            handler.on_chat_model_start(
+                {}, [[]], run_id=model_run, parent_run_id=uuid4(),
+                invocation_params={'model': "gpt-4o-mini"}
+            )
+            handler.on_llm_end(response, run_id=model_run)
+            handler.on_tool_start({'name': "get_country_info"}, "Brazil", run_id=tool_run)
+            with span("GET"):
+                pass
+            handler.on_tool_end("ok", run_id=tool_run)
+            handler.on_chain_end({}, run_id=agent_run)
+            assert current_span() is root
+        
+        assert _parent_names(collector) == {
+            "turn": None,
+            "agent.run": "turn",
+            "model.call": "agent.run",
+            "tool.get_country_info": "agent.run",
+            "GET": "tool.get_country_info",
+        }
+        assert collector.find("agent.run")[0].attributes == {'thread_id': "t1"}
+        assert collector.find("model.call")[0].attributes == {
+            'gen_ai.request.model': "gpt-4o-mini",
+            'gen_ai.usage.input_tokens': 30,
+            'gen_ai.usage.output_tokens': 5,
+        }
+    
+    def test_ignored_outside_a_trace(self):
+        """Test that runs outside a trace open no spans."""
+        handler = TracingCallbackHandler()
+        run_id = uuid4()
+        
+        handler.on_tool_start({'name': "get_exchange_rate"}, "USD", run_id=run_id)
+        
+        assert current_span() is NON_RECORDING_SPAN
+        handler.on_tool_end("ok", run_id=run_id)
+
+
+class TestInstrumentation:
+    """Test suite for the spans of the database and checkpoint calls."""
+    
+    def test_checkpoint_spans_record_cache_hits(self, temp_checkpoint_db_path):
+        """Test that checkpoint reads record whether the cache served them."""
+        inner = RetryingSqliteSaver(sqlite3.connect(str(temp_checkpoint_db_path)))
+        cache = CachingCheckpointSaver(inner, max_bytes=1024 * 1024)
+        checkpoint = {
+            "id": "1",
+            "channel_values": {"messages": [HumanMessage(content="hello")]},
+            "channel_versions": {}
+        }
+        collector = SpanCollector()
+        
+        with start_trace("turn", collector):
+            cache.put(_config("t1"), checkpoint, {}, {})
+            cache.get_tuple(_config("t1"))
+            cache.get_tuple(_config("t2"))
+        inner.conn.close()
+        
+        hits = [collected.attributes['cache.hit'] for collected in collector.find("checkpoint.cache.get")]
+        assert hits == [True, False]
+        assert collector.find("checkpoint.put")[0].attributes == {'thread_id': "t1"}
+        assert _parent_names(collector)["checkpoint.get"] == "checkpoint.cache.get"
+    
+    def test_conversation_db_calls_are_traced(self, conversation_db):
+        """Test that ConversationDB calls made during a trace are recorded."""
+        collector = SpanCollector()
+        
+        with start_trace("turn", collector):
+            conversation_id, thread_id = conversation_db.save_conversation_metadata("Olá")
+            conversation_db.record_activity(thread_id, 2, "Oi!")
+            conversation_db.flush_activity()
+            conversation_db.get_conversation(conversation_id)
+        
+        assert [collected.name for collected in collector.spans[:-1]] == [
+            "ConversationDB.save_conversation_metadata",
+            "ConversationDB.record_activity",
+            "ConversationDB.flush_activity",
+            "ConversationDB.get_conversation",
+        ]
+        assert collector.find("ConversationDB.get_conversation")[0].attributes == {
+            'conversation_id': conversation_id
+        }
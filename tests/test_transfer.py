@@ -0,0 +1,163 @@
+"""
+Tests for conversation export and import.
+"""
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.database.checkpointer import RetryingSqliteSaver, sqlite_savers
+from src.database.connection import connect
+from src.database.repository import ConversationDB
+from src.database.sharding import ShardedCheckpointSaver, shard_path
+from src.database import transfer
+from src.database.transfer import export_conversations, import_conversations
+
+
+def _config(thread_id):
+    """Builds the config of a thread."""
+    return RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+
+
+def _open_shards(db_path, count=2):
+    """Opens a sharded saver over the given number of files."""
+    return ShardedCheckpointSaver([
+        RetryingSqliteSaver(connect(shard_path(db_path, index), check_same_thread=False))
+        for index in range(count)
+    ])
+
+
+def _messages(checkpointer, thread_id):
+    """Returns the messages of the latest checkpoint of a thread."""
+    checkpoint = checkpointer.get(_config(thread_id))
+    return checkpoint["channel_values"]["messages"] if checkpoint else None
+
+
+@pytest.fixture
+def source(conversation_db, temp_checkpoint_db_path):
+    """Conversation database and sharded checkpointer holding three conversations."""
+    checkpointer = _open_shards(temp_checkpoint_db_path)
+    for i in range(3):
+        _, thread_id = conversation_db.save_conversation_metadata(f"Pergunta {i}")
+        messages = [HumanMessage(content=f"Pergunta {i}"), AIMessage(content=f"Resposta {i}")]
+        conversation_db.record_activity(thread_id, 2, f"Resposta {i}", [("user", f"Pergunta {i}")])
+        checkpoint = {
+            "v": 1, "id": f"checkpoint-{i}", "ts": "", "channel_values": {"messages": messages},
+            "channel_versions": {}, "versions_seen": {}
+        }
+        checkpointer.put(_config(thread_id), checkpoint, {"source": "test"}, {})
+    yield conversation_db, checkpointer
+    for saver in sqlite_savers(checkpointer):
+        saver.conn.close()
+
+
+class TestExportConversations:
+    """Test suite for export_conversations function."""
+    
+    def test_writes_one_line_per_conversation(self, source):
+        """Test that each line holds the metadata and checkpoint messages of a conversation."""
+        db, checkpointer = source
+        output = io.StringIO()
+        
+        report = export_conversations(db, checkpointer, output, workers=2, batch_size=2)
+        
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert report["conversations"] == 3
+        assert report["messages"] == 6
+        assert [record["thread_id"] for record in records] == ["t1", "t2", "t3"]
+        assert records[0]["first_message"] == "Pergunta 0"
+        assert records[0]["message_count"] == 2
+        assert records[0]["indexed_messages"] == [["user", "Pergunta 0"]]
+        assert records[0]["messages"][1]["data"]["content"] == "Resposta 0"
+    
+    def test_conversation_without_checkpoint_has_no_messages(self, conversation_db, checkpointer):
+        """Test that a conversation whose checkpoint is missing is still exported."""
+        conversation_db.save_conversation_metadata("Sem checkpoint")
+        output = io.StringIO()
+        
+        export_conversations(conversation_db, checkpointer, output)
+        
+        assert json.loads(output.getvalue())["messages"] == []
+
+
+class TestImportConversations:
+    """Test suite for import_conversations function."""
+    
+    def test_round_trip(self, source, tmp_path, monkeypatch):
+        """Test that exported conversations can be loaded from another host."""
+        db, checkpointer = source
+        output = io.StringIO()
+        export_conversations(db, checkpointer, output)
+        
+        monkeypatch.setattr(
+            "src.database.repository.settings.conversation_db_path", tmp_path / "target.db"
+        )
+        target_checkpointer = _open_shards(tmp_path / "target_checkpoints.db", count=3)
+        with ConversationDB() as target_db:
+            target_db.save_conversation_metadata("Conversa existente")
+            
+            report = import_conversations(
+                target_db, target_checkpointer, io.StringIO(output.getvalue()),
+                workers=3, batch_size=2
+            )
+            
+            assert report["conversations"] == 3
+            assert report["messages"] == 6
+            # Imported conversations get new thread IDs after the existing one
+            conversations = {conv["thread_id"]: conv for conv in target_db.iter_conversations()}
+            assert list(conversations) == ["t1", "t2", "t3", "t4"]
+            assert conversations["t2"]["first_message"] == "Pergunta 0"
+            assert conversations["t2"]["message_count"] == 2
+            assert [m.content for m in _messages(target_checkpointer, "t2")] == [
+                "Pergunta 0", "Resposta 0"
+            ]
+            assert _messages(target_checkpointer, "t1") is None
+            assert [r["id"] for r in target_db.search_conversations("pergunta 2")] == [4]
+        
+        for saver in sqlite_savers(target_checkpointer):
+            saver.conn.close()
+    
+    def test_failed_batch_is_removed(self, source, tmp_path, monkeypatch):
+        """Test that a batch whose checkpoints fail leaves no conversations or checkpoints behind."""
+        db, checkpointer = source
+        output = io.StringIO()
+        export_conversations(db, checkpointer, output)
+        write_checkpoints = transfer._write_checkpoints
+        
+        def fail_last_thread(saver, threads):
+            # Fails after the shard committed, like a later shard failing
+            write_checkpoints(saver, threads)
+            if any(thread_id == "t3" for thread_id, _ in threads):
+                raise RuntimeError("disk full")
+        
+        monkeypatch.setattr(
+            "src.database.repository.settings.conversation_db_path", tmp_path / "target.db"
+        )
+        target_checkpointer = _open_shards(tmp_path / "target_checkpoints.db")
+        with ConversationDB() as target_db:
+            with patch("src.database.transfer._write_checkpoints", side_effect=fail_last_thread):
+                with pytest.raises(RuntimeError, match="disk full"):
+                    import_conversations(
+                        target_db, target_checkpointer, io.StringIO(output.getvalue()), batch_size=2
+                    )
+            
+            # The first batch stays imported
+            assert sorted(target_db.get_thread_ids()) == ["t1", "t2"]
+            assert _messages(target_checkpointer, "t2") is not None
+            assert _messages(target_checkpointer, "t3") is None
+            assert target_db.search_conversations("pergunta 2") == []
+        
+        for saver in sqlite_savers(target_checkpointer):
+            saver.conn.close()
+    
+    def test_skips_blank_lines(self, conversation_db, checkpointer):
+        """Test that empty lines, e.g. a trailing newline, are ignored."""
+        line = json.dumps({"thread_id": "t9", "first_message": "Olá", "messages": []})
+        
+        report = import_conversations(conversation_db, checkpointer, [line + "\n", "\n"])
+        
+        assert report["conversations"] == 1
+        assert conversation_db.get_thread_ids() == ["t1"]
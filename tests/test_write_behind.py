@@ -0,0 +1,142 @@
+"""
+Tests for the write-behind checkpoint saver.
+"""
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.database.checkpointer import flush_checkpointer
+from src.database.checkpoint_cache import CachingCheckpointSaver
+from src.database.write_behind import MAX_PENDING_OPERATIONS, WriteBehindCheckpointSaver
+
+
+def _config(thread_id):
+    """Builds the config of a thread."""
+    return RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""})
+
+
+def _put(saver, thread_id, checkpoint_id, config=None):
+    """Stores a checkpoint with one message and one pending write."""
+    checkpoint = {
+        "id": checkpoint_id,
+        "channel_values": {"messages": [HumanMessage(content="hello")]},
+        "channel_versions": {}
+    }
+    saved_config = saver.put(config or _config(thread_id), checkpoint, {"source": "test"}, {})
+    saver.put_writes(saved_config, [("messages", "pending")], "task")
+    return saved_config
+
+
+def _count(checkpointer, table):
+    """Counts the rows of a checkpoint table."""
+    checkpointer.setup()
+    return checkpointer.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+@pytest.fixture
+def write_behind(checkpointer):
+    """Creates a write-behind saver that only flushes when asked."""
+    saver = WriteBehindCheckpointSaver(checkpointer, interval=3600)
+    yield saver
+    saver.close()
+
+
+class TestWriteBehindCheckpointSaver:
+    """Test suite for WriteBehindCheckpointSaver class."""
+    
+    def test_buffers_until_flush(self, checkpointer, write_behind):
+        """Test that writes reach SQLite only when flushed, in one commit."""
+        for step in range(3):
+            _put(write_behind, "t1", f"{step:05d}")
+        
+        assert _count(checkpointer, "checkpoints") == 0
+        assert write_behind.pending_count == 6
+        
+        write_behind.flush()
+        
+        assert _count(checkpointer, "checkpoints") == 3
+        assert _count(checkpointer, "writes") == 3
+        assert write_behind.commits == 1
+        assert write_behind.pending_count == 0
+    
+    def test_matches_sqlite_saver(self, checkpointer, write_behind):
+        """Test that flushed rows read back like rows written by SqliteSaver."""
+        _put(write_behind, "t1", "00002", config=_put(write_behind, "t1", "00001"))
+        _put(checkpointer, "t2", "00002", config=_put(checkpointer, "t2", "00001"))
+        
+        buffered = write_behind.get_tuple(_config("t1"))
+        direct = checkpointer.get_tuple(_config("t2"))
+        
+        assert buffered.checkpoint["channel_values"] == direct.checkpoint["channel_values"]
+        assert buffered.metadata == direct.metadata
+        assert buffered.parent_config["configurable"]["checkpoint_id"] == "00001"
+        assert buffered.pending_writes == direct.pending_writes
+    
+    def test_checkpoint_changes_after_put_are_ignored(self, write_behind):
+        """Test that the checkpoint is serialized when it is put."""
+        checkpoint = {"id": "00001", "channel_values": {"messages": ["a"]}, "channel_versions": {}}
+        write_behind.put(_config("t1"), checkpoint, {}, {})
+        checkpoint["channel_values"]["messages"].append("b")
+        
+        stored = write_behind.get_tuple(_config("t1"))
+        
+        assert stored.checkpoint["channel_values"]["messages"] == ["a"]
+    
+    def test_failed_flush_keeps_writes(self, checkpointer, write_behind):
+        """Test that writes stay buffered when the commit fails."""
+        _put(write_behind, "t1", "00001")
+        
+        with patch.object(WriteBehindCheckpointSaver, "_commit", side_effect=RuntimeError("disk")):
+            with pytest.raises(RuntimeError):
+                write_behind.flush()
+        
+        assert write_behind.pending_count == 2
+        write_behind.flush()
+        assert _count(checkpointer, "checkpoints") == 1
+    
+    def test_flushes_when_buffer_is_full(self, checkpointer, write_behind):
+        """Test that a full buffer is flushed without waiting for the interval."""
+        for step in range(MAX_PENDING_OPERATIONS // 2):
+            _put(write_behind, "t1", f"{step:05d}")
+        
+        assert write_behind.pending_count == 0
+        assert _count(checkpointer, "checkpoints") == MAX_PENDING_OPERATIONS // 2
+    
+    def test_delete_thread_removes_buffered_writes(self, checkpointer, write_behind):
+        """Test that deleting a thread also removes its buffered checkpoints."""
+        _put(write_behind, "t1", "00001")
+        
+        write_behind.delete_thread("t1")
+        
+        assert _count(checkpointer, "checkpoints") == 0
+        assert write_behind.get_tuple(_config("t1")) is None
+    
+    def test_background_flush(self, checkpointer):
+        """Test that the background thread flushes on its interval."""
+        saver = WriteBehindCheckpointSaver(checkpointer, interval=0.01)
+        _put(saver, "t1", "00001")
+        
+        saver._stop_event.wait(0.2)
+        
+        assert saver.pending_count == 0
+        saver.close()
+        assert _count(checkpointer, "checkpoints") == 1
+
+
+class TestFlushCheckpointer:
+    """Test suite for flush_checkpointer function."""
+    
+    def test_flushes_through_cache(self, checkpointer, write_behind):
+        """Test that the write-behind saver is found under the cache."""
+        cache = CachingCheckpointSaver(write_behind, max_bytes=1024 * 1024)
+        _put(cache, "t1", "00001")
+        
+        flush_checkpointer(cache)
+        
+        assert _count(checkpointer, "checkpoints") == 1
+    
+    def test_ignores_plain_saver(self, checkpointer):
+        """Test that a SqliteSaver without buffering is left alone."""
+        flush_checkpointer(checkpointer)